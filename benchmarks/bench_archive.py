@@ -0,0 +1,62 @@
+"""
+Frame index benchmark.
+
+Build a recording by replicating the RTCM test file, then time the index
+build and a random access decode, and report the peak resident memory.
+
+Usage: python benchmarks/bench_archive.py --size-mb 512
+"""
+import argparse
+import os
+import resource
+import tempfile
+import time
+
+from gnss.rtcm.archive import FrameReader, scan_frames
+
+
+DATA_FILE = os.path.join(
+    os.path.dirname(__file__), '..', 'tests', 'gnss', 'rtcm', 'rtcm_data.bin')
+
+
+def peak_rss_mb():
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[1])
+    parser.add_argument('--size-mb', type=int, default=512)
+    args = parser.parse_args()
+
+    with open(DATA_FILE, 'rb') as f:
+        data = f.read()
+    repeat = max(1, (args.size_mb << 20) // len(data))
+
+    with tempfile.TemporaryDirectory() as tmpdir:
+        path = os.path.join(tmpdir, 'rtcm_data.bin')
+        with open(path, 'wb') as f:
+            for _ in range(repeat):
+                f.write(data)
+        size = os.path.getsize(path) / 2**20
+        rss = peak_rss_mb()
+
+        start = time.perf_counter()
+        index = scan_frames(path)
+        elapsed = time.perf_counter() - start
+        print(f"index    {len(index):>10} frames {elapsed:>8.2f} s "
+              f"{size / elapsed:>8.1f} MB/s "
+              f"index {index.nbytes / 2**20:.1f} MB "
+              f"peak rss +{peak_rss_mb() - rss:.1f} MB")
+
+        with FrameReader(path, index) as reader:
+            middle = len(index) // 2
+            start = time.perf_counter()
+            nr_msgs = sum(1 for _ in reader.messages(
+                index[middle:middle + 1000]))
+            elapsed = time.perf_counter() - start
+        print(f"decode   {nr_msgs:>10} msgs   {elapsed:>8.3f} s "
+              f"from the middle of the recording")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,64 @@
+"""
+Asynchronous ingestion benchmark.
+
+A minimal NTRIP 1.0 caster runs in a separate process and serves the RTCM
+test recording, replicated, on every mountpoint. One event loop ingests all
+the mountpoints with AsyncClient and Parser.aiter_messages, and the
+aggregate rate is reported for that single core.
+
+Usage: python benchmarks/bench_async.py --streams 50 --size-kb 512
+"""
+import argparse
+import asyncio
+import os
+import time
+
+from fake_caster import FakeCaster
+from gnss.ntrip.client import AsyncClient
+from gnss.rtcm.parser import Parser
+
+
+DATA_FILE = os.path.join(
+    os.path.dirname(__file__), '..', 'tests', 'gnss', 'rtcm', 'rtcm_data.bin')
+
+
+async def ingest(port, nr_streams):
+    async def stream(i):
+        async with AsyncClient(
+                "127.0.0.1", mountpoint=f"M{i}", port=port,
+                ntrip_version="1.0") as client:
+            parser = Parser(client)
+            async for _ in parser.aiter_messages():
+                pass
+            return sum(parser.frame_counts.values())
+
+    return await asyncio.gather(*(stream(i) for i in range(nr_streams)))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[1])
+    parser.add_argument('--streams', type=int, default=50)
+    parser.add_argument('--size-kb', type=int, default=512)
+    parser.add_argument('--port', type=int, default=21010)
+    args = parser.parse_args()
+
+    with open(DATA_FILE, 'rb') as f:
+        data = f.read()
+    data *= max(1, (args.size_kb << 10) // len(data))
+
+    with FakeCaster(data, args.port):
+        start_cpu = time.process_time()
+        start = time.perf_counter()
+        counts = asyncio.run(ingest(args.port, args.streams))
+        elapsed = time.perf_counter() - start
+        cpu = time.process_time() - start_cpu
+
+    nr_frames = sum(counts)
+    print(f"{args.streams} streams {nr_frames} frames in {elapsed:.2f} s, "
+          f"{nr_frames / elapsed:.0f} frames/s, "
+          f"{nr_frames / cpu:.0f} frames per cpu second, "
+          f"{len(data) * args.streams / elapsed / 2**20:.1f} MB/s")
+
+
+if __name__ == "__main__":
+    main()
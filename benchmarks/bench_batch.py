@@ -0,0 +1,54 @@
+"""
+Columnar batch decoding benchmark.
+
+Build a buffer by replicating the RTCM test file, its 1004 frames followed
+by a 1005 frame, then time the decoding of the 1004 and 1005 messages with
+the parser, collecting one object per message, and with ``decode_batch``.
+
+Usage: python benchmarks/bench_batch.py --size-mb 64
+"""
+import argparse
+from io import BytesIO
+import os
+import time
+
+from gnss.rtcm.batch import decode_batch
+from gnss.rtcm.messages import ExtendedL1L2Gps, ReferenceStationAntenna
+from gnss.rtcm.parser import Parser, frame
+
+
+DATA_FILE = os.path.join(
+    os.path.dirname(__file__), '..', 'tests', 'gnss', 'rtcm', 'rtcm_data.bin')
+
+ANTENNA_PAYLOAD = (
+    b'>\xd0\x00\x026\xab\x10_\xca\x085\r\xd0\xca7\xe5G\xf8\x88\x00\x00')
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[1])
+    parser.add_argument('--size-mb', type=int, default=64)
+    args = parser.parse_args()
+
+    with open(DATA_FILE, 'rb') as f:
+        data = f.read() + frame(ANTENNA_PAYLOAD)
+    data *= max(1, (args.size_mb << 20) // len(data))
+    size = len(data) / 2**20
+
+    start = time.perf_counter()
+    msgs = list(Parser(BytesIO(data)).iter_messages(
+        ExtendedL1L2Gps, ReferenceStationAntenna))
+    elapsed = time.perf_counter() - start
+    print(f"objects  {len(msgs):>10} msgs {elapsed:>8.2f} s "
+          f"{len(msgs) / elapsed:>10.0f} msgs/s {size / elapsed:>8.1f} MB/s")
+    del msgs
+
+    start = time.perf_counter()
+    tables = decode_batch(data, ExtendedL1L2Gps, ReferenceStationAntenna)
+    elapsed = time.perf_counter() - start
+    nr_msgs = sum(len(table) for table in tables.values())
+    print(f"batch    {nr_msgs:>10} msgs {elapsed:>8.2f} s "
+          f"{nr_msgs / elapsed:>10.0f} msgs/s {size / elapsed:>8.1f} MB/s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,70 @@
+"""
+Callback execution benchmark.
+
+Parse a recording made of the RTCM test file followed by a 1005 frame,
+repeated, with a slow callback on the 1005 messages standing for a
+database write, called inline then through a ``CallbackExecutor`` with each
+queue policy. Report the parsing rate and what the queue dropped.
+
+Usage: python benchmarks/bench_callbacks.py --size-mb 4 --delay-ms 1
+"""
+import argparse
+from io import BytesIO
+import os
+import time
+
+from gnss.rtcm.executor import CallbackExecutor, QUEUE_POLICIES
+from gnss.rtcm.messages import ExtendedL1L2Gps, ReferenceStationAntenna
+from gnss.rtcm.parser import Parser, frame
+
+
+DATA_FILE = os.path.join(
+    os.path.dirname(__file__), '..', 'tests', 'gnss', 'rtcm', 'rtcm_data.bin')
+
+ANTENNA_PAYLOAD = (
+    b'>\xd0\x00\x026\xab\x10_\xca\x085\r\xd0\xca7\xe5G\xf8\x88\x00\x00')
+
+
+def run(data, delay, executor=None):
+    parser = Parser(BytesIO(data), executor=executor)
+
+    @parser.callback
+    def store(msg: ReferenceStationAntenna):
+        time.sleep(delay)
+
+    @parser.callback
+    def count(msg: ExtendedL1L2Gps):
+        pass
+
+    start = time.perf_counter()
+    parser.parse()
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[1])
+    parser.add_argument('--size-mb', type=int, default=4)
+    parser.add_argument('--delay-ms', type=float, default=1)
+    parser.add_argument('--maxsize', type=int, default=1024)
+    args = parser.parse_args()
+
+    with open(DATA_FILE, 'rb') as f:
+        data = f.read() + frame(ANTENNA_PAYLOAD)
+    data *= max(1, (args.size_mb << 20) // len(data))
+    size = len(data) / 2**20
+    delay = args.delay_ms / 1000
+
+    elapsed = run(data, delay)
+    print(f"{'inline':<16} {elapsed:>8.3f} s {size / elapsed:>8.1f} MB/s")
+    for policy in QUEUE_POLICIES:
+        with CallbackExecutor(maxsize=args.maxsize, policy=policy) as executor:
+            elapsed = run(data, delay, executor)
+        stats = executor.stats()["run.<locals>.store"]
+        print(f"{policy:<16} {elapsed:>8.3f} s {size / elapsed:>8.1f} MB/s "
+              f"executed {stats['executed']:>6} dropped {stats['dropped']:>6} "
+              f"coalesced {stats['coalesced']:>6} "
+              f"blocked {stats['blocked_time']:>6.2f} s")
+
+
+if __name__ == "__main__":
+    main()
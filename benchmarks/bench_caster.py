@@ -0,0 +1,131 @@
+"""
+Caster fan-out load test.
+
+Serve one upstream mountpoint, read from a local caster at a given rate
+through a ``Client``, to a thousand subscribers connected from a separate
+process, then report what each subscriber received over the measurement
+window, the drops and the CPU time of the caster process.
+
+Usage: python benchmarks/bench_caster.py --subscribers 1000 --rate-kb 64
+"""
+import argparse
+import asyncio
+import multiprocessing
+import os
+import time
+
+from fake_caster import FakeCaster
+from gnss.ntrip.caster import Caster
+from gnss.ntrip.client import Client
+from gnss.ntrip.protocol import build_request, request_headers
+
+
+DATA_FILE = os.path.join(
+    os.path.dirname(__file__), '..', 'tests', 'gnss', 'rtcm', 'rtcm_data.bin')
+
+
+def subscribe(port, nr_subscribers, duration, ready, results):
+    async def connect():
+        # Retry until the caster listens.
+        while True:
+            try:
+                return await asyncio.open_connection("127.0.0.1", port)
+            except ConnectionError:
+                await asyncio.sleep(0.1)
+
+    async def receive(reader, counts, i, started):
+        while True:
+            data = await reader.read(65536)
+            if not data:
+                break
+            if started.is_set():
+                counts[i] += len(data)
+
+    async def main():
+        started = asyncio.Event()
+        counts = [0] * nr_subscribers
+        request = build_request("127.0.0.1", port, "BASE",
+                                request_headers(ntrip_version="1.0"))
+        tasks, writers = [], []
+        for i in range(nr_subscribers):
+            reader, writer = await connect()
+            writer.write(request)
+            writers.append(writer)
+            tasks.append(asyncio.ensure_future(
+                receive(reader, counts, i, started)))
+        await asyncio.sleep(1)
+        ready.set()
+        started.set()
+        await asyncio.sleep(duration)
+        results.put(counts)
+        for task in tasks:
+            task.cancel()
+
+    asyncio.run(main())
+
+
+async def serve(caster, duration, ready, results):
+    async with caster:
+        mountpoint = caster.mountpoints["BASE"]
+        while not ready.is_set():
+            await asyncio.sleep(0.01)
+        start_bytes = mountpoint.bytes_published
+        start_cpu = time.process_time()
+        await asyncio.sleep(duration)
+        cpu = time.process_time() - start_cpu
+        published = mountpoint.bytes_published - start_bytes
+        nr_subscribers = len(mountpoint.subscribers)
+        loop = asyncio.get_running_loop()
+        counts = await loop.run_in_executor(None, results.get)
+    return counts, published, nr_subscribers, cpu
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[1])
+    parser.add_argument('--subscribers', type=int, default=1000)
+    parser.add_argument('--rate-kb', type=int, default=64)
+    parser.add_argument('--duration', type=float, default=10)
+    parser.add_argument('--drop-policy', default="drop-oldest")
+    parser.add_argument('--port', type=int, default=21011)
+    args = parser.parse_args()
+
+    with open(DATA_FILE, 'rb') as f:
+        data = f.read()
+    rate = args.rate_kb << 10
+    data *= int(rate * (args.duration + 60)) // len(data) + 1
+
+    ready = multiprocessing.Event()
+    results = multiprocessing.Queue()
+    with FakeCaster(data, args.port, rate=rate):
+        upstream = Client("127.0.0.1", mountpoint="BASE", port=args.port,
+                          ntrip_version="1.0", transport="socket")
+        caster = Caster(port=args.port + 1, drop_policy=args.drop_policy)
+        caster.add_mountpoint("BASE", upstream)
+        process = multiprocessing.Process(
+            target=subscribe,
+            args=(caster.port, args.subscribers, args.duration, ready,
+                  results),
+            daemon=True)
+        process.start()
+        counts, published, nr_subscribers, cpu = asyncio.run(
+            serve(caster, args.duration, ready, results))
+        process.join()
+        upstream.close()
+
+    stats = caster.stats()["BASE"]
+    counts.sort()
+    total = sum(counts)
+    print(f"{nr_subscribers} subscribers, "
+          f"{published / args.duration / 1024:.1f} kB/s published, "
+          f"{total / args.duration / 2**20:.1f} MB/s sent, "
+          f"caster cpu {100 * cpu / args.duration:.0f} %")
+    print(f"per subscriber bytes min {counts[0]} "
+          f"median {counts[len(counts) // 2]} max {counts[-1]} "
+          f"of {published} published")
+    print(f"dropped blocks {stats['dropped_blocks']}, "
+          f"disconnected {stats['disconnected']}, "
+          f"crc errors {stats['crc_errors']}")
+
+
+if __name__ == "__main__":
+    main()
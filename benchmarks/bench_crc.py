@@ -0,0 +1,70 @@
+"""
+CRC-24Q benchmark.
+
+Compare the byte-wise table loop, the slice-by-8 implementation and the
+NumPy batch check on the frames of the RTCM test recording.
+
+Usage: python benchmarks/bench_crc.py --repeat 200
+"""
+import argparse
+import os
+import time
+
+from gnss.rtcm.crc import Crc24Q, crc24q
+
+
+DATA_FILE = os.path.join(
+    os.path.dirname(__file__), '..', 'tests', 'gnss', 'rtcm', 'rtcm_data.bin')
+
+
+def bytewise(data: bytes) -> int:
+    crc = 0
+    for byte in data:
+        crc = ((crc << 8) & 0xffffff) ^ Crc24Q.tab[(crc >> 16) ^ byte]
+    return crc
+
+
+def frame_slices(data: bytes):
+    offsets = []
+    lengths = []
+    index = 0
+    while index + 3 <= len(data):
+        msg_length = ((data[index + 1] & 0x03) << 8) | data[index + 2]
+        offsets.append(index)
+        lengths.append(6 + msg_length)
+        index += 6 + msg_length
+    return offsets, lengths
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[1])
+    parser.add_argument('--repeat', type=int, default=200)
+    args = parser.parse_args()
+
+    with open(DATA_FILE, 'rb') as f:
+        data = f.read() * args.repeat
+    offsets, lengths = frame_slices(data)
+    frames = [data[o:o + n] for o, n in zip(offsets, lengths)]
+    size = len(data) / 2**20
+
+    timings = {}
+    start = time.perf_counter()
+    assert not any(bytewise(frame) for frame in frames)
+    timings['bytewise'] = time.perf_counter() - start
+
+    start = time.perf_counter()
+    assert not any(crc24q(frame) for frame in frames)
+    timings['slice-by-8'] = time.perf_counter() - start
+
+    start = time.perf_counter()
+    assert Crc24Q.check_batch(data, offsets, lengths).all()
+    timings['batch'] = time.perf_counter() - start
+
+    for name, elapsed in timings.items():
+        print(f"{name:<12} {len(frames):>8} frames {elapsed:>8.3f} s "
+              f"{size / elapsed:>8.2f} MB/s "
+              f"{timings['bytewise'] / elapsed:>6.1f}x")
+
+
+if __name__ == "__main__":
+    main()
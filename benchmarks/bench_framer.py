@@ -0,0 +1,106 @@
+"""
+Framing benchmark.
+
+Compare the preallocated buffer framer against the previous implementation
+which re-sliced a growing bytearray on every frame. The RTCM test recording
+is replicated up to the requested size and only framing and CRC checking
+are timed, messages are not decoded.
+
+Usage: python benchmarks/bench_framer.py --size-mb 256
+"""
+import argparse
+import os
+import tempfile
+import time
+
+from gnss.rtcm.parser import Crc24Q, Framer, BUFFER_SIZE, PREAMBLE
+
+
+DATA_FILE = os.path.join(
+    os.path.dirname(__file__), '..', 'tests', 'gnss', 'rtcm', 'rtcm_data.bin')
+
+
+def legacy_framing(stream):
+    nr_frames = 0
+    buffer = bytearray()
+    empty_stream = False
+    while True:
+        if len(buffer) < BUFFER_SIZE:
+            buff = stream.read(BUFFER_SIZE)
+            if buff:
+                buffer += buff
+            else:
+                empty_stream = True
+
+        try:
+            buffer = buffer[buffer.index(PREAMBLE):]
+        except ValueError:
+            if empty_stream:
+                return nr_frames
+            continue
+
+        if len(buffer) <= 3:
+            if empty_stream:
+                return nr_frames
+            continue
+
+        msg_length = ((buffer[1] & 0x03) << 8) | buffer[2]
+        if len(buffer) < 6 + msg_length:
+            if empty_stream:
+                return nr_frames
+            continue
+
+        crc = buffer[3 + msg_length: 6 + msg_length]
+        if Crc24Q.hash(buffer[:3 + msg_length]) != crc:
+            buffer = buffer[1:]
+            continue
+
+        buffer = buffer[6 + msg_length:]
+        nr_frames += 1
+
+
+def framer_framing(stream):
+    nr_frames = 0
+    framer = Framer()
+    while True:
+        if framer.next_frame() is not None:
+            nr_frames += 1
+        elif not framer.fill(stream):
+            return nr_frames
+
+
+def make_recording(path, size_mb):
+    with open(DATA_FILE, 'rb') as f:
+        data = f.read()
+    repeat = max(1, (size_mb << 20) // len(data))
+    with open(path, 'wb') as f:
+        for _ in range(repeat):
+            f.write(data)
+    return repeat * len(data)
+
+
+def run(name, func, path, size):
+    with open(path, 'rb') as stream:
+        start = time.perf_counter()
+        nr_frames = func(stream)
+        elapsed = time.perf_counter() - start
+    print(f"{name:<8} {nr_frames:>10} frames {elapsed:>8.2f} s "
+          f"{size / elapsed / 2**20:>8.2f} MB/s")
+    return elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[1])
+    parser.add_argument('--size-mb', type=int, default=256)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmpdir:
+        path = os.path.join(tmpdir, 'rtcm_data.bin')
+        size = make_recording(path, args.size_mb)
+        legacy = run('legacy', legacy_framing, path, size)
+        framer = run('framer', framer_framing, path, size)
+    print(f"speedup  {legacy / framer:.2f}x")
+
+
+if __name__ == "__main__":
+    main()
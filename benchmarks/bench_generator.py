@@ -0,0 +1,63 @@
+"""
+Synthetic stream generation and replay benchmark.
+
+Generate a recording of MSM epochs for a number of stations, report the
+generation rate, then replay the recording at the maximum rate into a
+local socket read by another thread, and report the frame rate.
+
+Usage: python benchmarks/bench_generator.py --stations 100 --epochs 60
+"""
+import argparse
+import socket
+import threading
+import time
+
+from gnss.rtcm.generator import Generator
+from gnss.rtcm.replay import Replayer
+
+
+def drain(sock, received):
+    while True:
+        data = sock.recv(1 << 20)
+        if not data:
+            return
+        received[0] += len(data)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[1])
+    parser.add_argument('--stations', type=int, default=100)
+    parser.add_argument('--epochs', type=int, default=60)
+    parser.add_argument('--nr-sat', type=int, default=10)
+    parser.add_argument('--repeat', type=int, default=20)
+    args = parser.parse_args()
+
+    generator = Generator(
+        [1005, 1077, 1087, 1097], stations=range(args.stations),
+        nr_sat=args.nr_sat)
+    start = time.perf_counter()
+    data = generator.generate(args.epochs)
+    elapsed = time.perf_counter() - start
+    print(f"{'generate':<10} {generator.nr_frames:>10} frames "
+          f"{elapsed:>8.2f} s {generator.nr_frames / elapsed:>12.0f} frames/s "
+          f"{len(data) / elapsed / 2**20:>8.1f} MB/s")
+
+    replayer = Replayer(data, speed=None, repeat=args.repeat)
+    receiver, sender = socket.socketpair()
+    received = [0]
+    thread = threading.Thread(target=drain, args=(receiver, received))
+    thread.start()
+    start = time.perf_counter()
+    replayer.play(sender.sendall)
+    sender.close()
+    thread.join()
+    elapsed = time.perf_counter() - start
+    receiver.close()
+    assert received[0] == len(data) * args.repeat
+    print(f"{'replay':<10} {replayer.frames_out:>10} frames "
+          f"{elapsed:>8.2f} s {replayer.frames_out / elapsed:>12.0f} frames/s "
+          f"{received[0] / elapsed / 2**20:>8.1f} MB/s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,106 @@
+"""
+Message decoding benchmark.
+
+Compare the compiled field layouts with the previous per-field
+bitstring reads for every implemented message type, and time the columnar
+decoding of a 30 satellites x 3 signals MSM7. Requires bitstring.
+
+Usage: python benchmarks/bench_messages.py --number 20000
+"""
+import argparse
+import timeit
+
+from bitstring import ConstBitStream
+
+from gnss.rtcm.messages import (
+    ExtendedL1L2Gps, ReferenceStationAntenna, ReferenceStationAntennaHeight,
+    GpsMsm7
+)
+from workloads import (
+    REFERENCE_STATION_ANTENNA, REFERENCE_STATION_ANTENNA_HEIGHT,
+    first_frame_payload, msm7_payload
+)
+
+
+class Decoded:
+    pass
+
+
+def bitstring_1004(buff):
+    msg = Decoded()
+    stream = ConstBitStream(buff)
+    msg.msg_number = stream.read('uint:12')
+    msg.station_id = stream.read('uint:12')
+    msg.gps_epoch = stream.read('uint:30')
+    msg.synchronous_gnss = bool(stream.read('uint:1'))
+    msg.nr_gps_sat = stream.read('uint:5')
+    msg.divergence_free_smoothing = bool(stream.read('uint:1'))
+    msg.smoothing_interval = stream.read('uint:3')
+    msg.sat_id = stream.read('uint:6')
+    msg.l1_code_indicator = stream.read('uint:1')
+    msg.l1_pseudorange = stream.read('uint:24')
+    msg.l1_phaserange = stream.read('int:20') + msg.l1_pseudorange
+    msg.lock_time_indicator = stream.read('uint:7')
+    return msg
+
+
+def bitstring_1005(buff, stream=None):
+    msg = Decoded()
+    stream = ConstBitStream(buff) if stream is None else stream
+    msg.msg_number = stream.read('uint:12')
+    msg.station_id = stream.read('uint:12')
+    stream.read('uint:6')
+    msg.gps_indicator = bool(stream.read('uint:1'))
+    msg.glonass_indicator = bool(stream.read('uint:1'))
+    msg.galileo_indicator = bool(stream.read('uint:1'))
+    msg.station_indicator = bool(stream.read('uint:1'))
+    msg.ecef_x = stream.read('int:38') * 1e-4
+    msg.oscillator_indicator = bool(stream.read('uint:1'))
+    stream.read('uint:1')
+    msg.ecef_y = stream.read('int:38') * 1e-4
+    msg.quarter_cycle_indicator = stream.read('uint:2')
+    msg.ecef_z = stream.read('int:38') * 1e-4
+    return msg
+
+
+def bitstring_1006(buff):
+    stream = ConstBitStream(buff)
+    msg = bitstring_1005(buff, stream)
+    msg.height = stream.read('uint:16')
+    return msg
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[1])
+    parser.add_argument('--number', type=int, default=20000)
+    args = parser.parse_args()
+
+    cases = [
+        (ExtendedL1L2Gps, bitstring_1004, first_frame_payload()),
+        (ReferenceStationAntenna, bitstring_1005, REFERENCE_STATION_ANTENNA),
+        (ReferenceStationAntennaHeight, bitstring_1006,
+         REFERENCE_STATION_ANTENNA_HEIGHT),
+    ]
+    for cls, legacy, buff in cases:
+        msg = cls(buff=buff)
+        expected = vars(legacy(buff))
+        assert {key: vars(msg)[key] for key in expected} == expected
+
+        legacy_time = timeit.timeit(
+            lambda: legacy(buff), number=args.number) / args.number
+        layout_time = timeit.timeit(
+            lambda: cls(buff=buff), number=args.number) / args.number
+        print(f"{cls.type:<6} {cls.__name__:<32} "
+              f"bitstring {legacy_time * 1e6:>8.2f} us "
+              f"layout {layout_time * 1e6:>8.2f} us "
+              f"{legacy_time / layout_time:>6.1f}x")
+
+    buff = msm7_payload()
+    msm_time = timeit.timeit(
+        lambda: GpsMsm7(buff=buff), number=args.number) / args.number
+    print(f"{GpsMsm7.type:<6} {'GpsMsm7 (30 sat x 3 sig)':<32} "
+          f"columnar {msm_time * 1e6:>8.2f} us")
+
+
+if __name__ == "__main__":
+    main()
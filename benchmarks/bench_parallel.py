@@ -0,0 +1,71 @@
+"""
+Parallel archive decoding benchmark.
+
+Build a recording by replicating the RTCM test file, then decode it with
+``ParallelDecoder`` into objects and into tables with an increasing number
+of processes, and report the speedup over the first process count.
+
+Tables scale with the number of processes. Objects have to be pickled in
+the workers and unpickled one by one in the main process, which bounds
+their speedup.
+
+Usage: python benchmarks/bench_parallel.py --size-mb 4096 --processes 1 8 16
+"""
+import argparse
+import os
+import tempfile
+import time
+
+from gnss.rtcm.messages import ExtendedL1L2Gps
+from gnss.rtcm.parallel import ParallelDecoder
+
+
+DATA_FILE = os.path.join(
+    os.path.dirname(__file__), '..', 'tests', 'gnss', 'rtcm', 'rtcm_data.bin')
+
+
+def run(path, processes, chunk_size, columnar):
+    decoder = ParallelDecoder(path, processes, chunk_size)
+    start = time.perf_counter()
+    if columnar:
+        nr_msgs = sum(
+            len(table) for table in decoder.tables(ExtendedL1L2Gps).values())
+    else:
+        nr_msgs = sum(1 for _ in decoder.messages(ExtendedL1L2Gps))
+    return nr_msgs, time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[1])
+    parser.add_argument('--size-mb', type=int, default=1024)
+    parser.add_argument('--chunk-mb', type=int, default=64)
+    parser.add_argument('--processes', type=int, nargs='+',
+                        default=[1, 2, 4, 8])
+    args = parser.parse_args()
+
+    with open(DATA_FILE, 'rb') as f:
+        data = f.read()
+    repeat = max(1, (args.size_mb << 20) // len(data))
+    block = data * max(1, (16 << 20) // len(data))
+
+    with tempfile.TemporaryDirectory() as tmpdir:
+        path = os.path.join(tmpdir, 'rtcm_data.bin')
+        with open(path, 'wb') as f:
+            for _ in range(repeat // (len(block) // len(data))):
+                f.write(block)
+        size = os.path.getsize(path) / 2**20
+        print(f"{size:.0f} MB, {os.cpu_count()} CPUs")
+
+        for columnar, name in ((False, 'objects'), (True, 'tables')):
+            reference = None
+            for processes in args.processes:
+                nr_msgs, elapsed = run(
+                    path, processes, args.chunk_mb << 20, columnar)
+                reference = reference or elapsed
+                print(f"{name:<8} {processes:>3} processes {nr_msgs:>10} msgs "
+                      f"{elapsed:>8.2f} s {size / elapsed:>8.1f} MB/s "
+                      f"speedup {reference / elapsed:>5.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,50 @@
+"""
+Parser throughput benchmark.
+
+Parse the RTCM test recording replicated to the requested size, with
+messages fully decoded, in lazy mode where only the frame header is read,
+and with a single 1005 subscription so every frame is skipped undecoded.
+
+Usage: python benchmarks/bench_parser.py --size-mb 16
+"""
+import argparse
+import io
+import os
+import time
+
+from gnss.rtcm.messages import ReferenceStationAntenna
+from gnss.rtcm.parser import Parser
+
+
+DATA_FILE = os.path.join(
+    os.path.dirname(__file__), '..', 'tests', 'gnss', 'rtcm', 'rtcm_data.bin')
+
+
+def run(name, data, *msg_types, **kwargs):
+    parser = Parser(io.BytesIO(data), **kwargs)
+    start = time.perf_counter()
+    for _ in parser.iter_messages(*msg_types):
+        pass
+    elapsed = time.perf_counter() - start
+    nr_frames = sum(parser.frame_counts.values())
+    print(f"{name:<8} {nr_frames:>10} frames {elapsed:>8.2f} s "
+          f"{nr_frames / elapsed:>10.0f} frames/s "
+          f"{len(data) / elapsed / 2**20:>8.2f} MB/s")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[1])
+    parser.add_argument('--size-mb', type=int, default=16)
+    args = parser.parse_args()
+
+    with open(DATA_FILE, 'rb') as f:
+        data = f.read()
+    data *= max(1, (args.size_mb << 20) // len(data))
+
+    run('eager', data)
+    run('lazy', data, lazy=True)
+    run('filtered', data, ReferenceStationAntenna)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,65 @@
+"""
+Mountpoint pool benchmark.
+
+Ingest hundreds of mountpoints of a local caster with one MountpointPool
+on a single event loop, then report the aggregate and per-stream rates.
+
+Usage: python benchmarks/bench_pool.py --streams 500 --size-kb 64
+"""
+import argparse
+import asyncio
+import os
+import time
+
+from fake_caster import FakeCaster
+from gnss.ntrip.client import AsyncClient
+from gnss.ntrip.pool import MountpointPool
+
+
+DATA_FILE = os.path.join(
+    os.path.dirname(__file__), '..', 'tests', 'gnss', 'rtcm', 'rtcm_data.bin')
+
+
+async def ingest(port, nr_streams):
+    pool = MountpointPool(maxsize=10000)
+    for i in range(nr_streams):
+        pool.add(AsyncClient(
+            "127.0.0.1", mountpoint=f"M{i}", port=port, ntrip_version="1.0",
+            timeout=60))
+    nr_msgs = 0
+    async for _ in pool.messages():
+        nr_msgs += 1
+    return pool, nr_msgs
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[1])
+    parser.add_argument('--streams', type=int, default=500)
+    parser.add_argument('--size-kb', type=int, default=64)
+    parser.add_argument('--port', type=int, default=21011)
+    args = parser.parse_args()
+
+    with open(DATA_FILE, 'rb') as f:
+        data = f.read()
+    data *= max(1, (args.size_kb << 10) // len(data))
+
+    with FakeCaster(data, args.port):
+        start_cpu = time.process_time()
+        start = time.perf_counter()
+        pool, nr_msgs = asyncio.run(ingest(args.port, args.streams))
+        elapsed = time.perf_counter() - start
+        cpu = time.process_time() - start_cpu
+
+    stats = pool.stats().values()
+    errors = [s["error"] for s in stats if s["error"] is not None]
+    rates = sorted(s["bytes_per_second"] for s in stats)
+    print(f"{len(pool)} streams, {len(errors)} errors, {nr_msgs} messages "
+          f"in {elapsed:.2f} s ({cpu:.2f} s cpu), "
+          f"{nr_msgs / elapsed:.0f} msgs/s, "
+          f"{sum(s['bytes'] for s in stats) / elapsed / 2**20:.1f} MB/s")
+    print(f"per stream bytes/s min {rates[0]:.0f} "
+          f"median {rates[len(rates) // 2]:.0f} max {rates[-1]:.0f}")
+
+
+if __name__ == "__main__":
+    main()
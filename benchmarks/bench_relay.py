@@ -0,0 +1,77 @@
+"""
+Frame relay benchmark.
+
+Build a recording by replicating the RTCM test file, its 1004 and 1012
+frames followed by a 1005 frame, then time a plain copy of the recording
+between two in-memory streams, a relay forwarding every frame, one
+forwarding the 1005 frames only, and the parser framing the recording
+frame by frame for comparison.
+
+Usage: python benchmarks/bench_relay.py --size-mb 64
+"""
+import argparse
+from io import BytesIO
+import os
+import time
+
+from gnss.rtcm.parser import Framer, frame
+from gnss.rtcm.relay import Relay, RELAY_CHUNK_SIZE
+
+
+DATA_FILE = os.path.join(
+    os.path.dirname(__file__), '..', 'tests', 'gnss', 'rtcm', 'rtcm_data.bin')
+
+ANTENNA_PAYLOAD = (
+    b'>\xd0\x00\x026\xab\x10_\xca\x085\r\xd0\xca7\xe5G\xf8\x88\x00\x00')
+
+
+def copy(data):
+    stream = BytesIO(data)
+    out = BytesIO()
+    while True:
+        chunk = stream.read(RELAY_CHUNK_SIZE)
+        if not chunk:
+            break
+        out.write(chunk)
+
+
+def framing(data):
+    stream = BytesIO(data)
+    framer = Framer()
+    while framer.fill(stream):
+        while framer.next_frame() is not None:
+            pass
+
+
+def report(name, func, data, *args):
+    size = len(data) / 2**20
+    start = time.perf_counter()
+    result = func(data, *args)
+    elapsed = time.perf_counter() - start
+    line = f"{name:<16} {elapsed:>8.3f} s {size / elapsed:>10.1f} MB/s"
+    if result is not None:
+        line += f"  {result['bytes_saved'] / 2**20:>8.1f} MB saved"
+    print(line)
+
+
+def relay(data, msg_numbers):
+    return Relay(BytesIO(data), BytesIO(), msg_numbers).run()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[1])
+    parser.add_argument('--size-mb', type=int, default=64)
+    args = parser.parse_args()
+
+    with open(DATA_FILE, 'rb') as f:
+        data = f.read() + frame(ANTENNA_PAYLOAD)
+    data *= max(1, (args.size_mb << 20) // len(data))
+
+    report('copy', copy, data)
+    report('relay all', relay, data, None)
+    report('relay 1005', relay, data, [1005])
+    report('parser framing', framing, data)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,82 @@
+"""
+Sourcetable parsing benchmark.
+
+Parse a synthetic sourcetable of the requested number of STR rows, from a
+list of lines and through ``Client.get_sourcetable`` served by a local HTTP
+server.
+
+Usage: python benchmarks/bench_sourcetable.py --rows 20000
+"""
+import argparse
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import random
+import threading
+import time
+
+from gnss.ntrip.client import Client
+from gnss.ntrip.sourcetable import parse_sourcetable
+
+
+def make_sourcetable(nr_rows: int, seed: int = 0) -> bytes:
+    rng = random.Random(seed)
+    lines = ["CAS;caster.example.com;2101;EXAMPLE;Example;0;USA;"
+             "47.61;-122.33;0.0.0.0;0;",
+             "NET;EXAMPLE;Example;B;N;https://example.com;"
+             "https://example.com/str;support@example.com;"]
+    for row in range(nr_rows):
+        lines.append(
+            f"STR;MP{row:05d};Station {row};RTCM 3.2;"
+            "1005(10),1074(1),1084(1),1094(1),1124(1);2;"
+            f"{rng.choice(['GPS', 'GPS+GLO', 'GPS+GLO+GAL+BDS'])};EXAMPLE;"
+            f"{rng.choice(['USA', 'FRA', 'DEU', 'JPN'])};"
+            f"{rng.uniform(-90, 90):.2f};{rng.uniform(-180, 180):.2f};"
+            f"{rng.randint(0, 1)};0;sNTRIP;none;B;N;{rng.randint(500, 9600)};")
+    lines.append("ENDSOURCETABLE")
+    return ("\r\n".join(lines) + "\r\n").encode()
+
+
+def serve(sourcetable: bytes) -> ThreadingHTTPServer:
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            self.send_response(200)
+            self.send_header("Content-Type", "gnss/sourcetable")
+            self.send_header("Content-Length", str(len(sourcetable)))
+            self.end_headers()
+            self.wfile.write(sourcetable)
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def run(name, func, nr_rows):
+    start = time.perf_counter()
+    sourcetable = func()
+    elapsed = time.perf_counter() - start
+    assert len(sourcetable) == nr_rows + 2
+    print(f"{name:<8} {len(sourcetable):>8} rows {elapsed * 1e3:>8.1f} ms "
+          f"{len(sourcetable) / elapsed:>10.0f} rows/s")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[1])
+    parser.add_argument('--rows', type=int, default=20000)
+    args = parser.parse_args()
+
+    sourcetable = make_sourcetable(args.rows)
+    lines = sourcetable.decode().splitlines()
+    run('lines', lambda: parse_sourcetable(lines), args.rows)
+
+    server = serve(sourcetable)
+    try:
+        client = Client("http://127.0.0.1", port=server.server_address[1])
+        run('client', client.get_sourcetable, args.rows)
+    finally:
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,92 @@
+"""
+Client transport benchmark.
+
+A minimal caster runs in a separate process and serves the RTCM test
+recording, replicated, with a chunked HTTP/1.1 answer and with an NTRIP 1.0
+ICY one. One copy of the recording is read through the requests transport
+and the socket transport, with ``read`` and with ``readinto`` into a single
+buffer, the client reconnecting on its own at the end of the stream.
+
+Throughput is measured on a first pass. A second pass runs under tracemalloc
+and sums the memory allocated by each call, as the traced peak reached
+during the call above the memory traced before it.
+
+Usage: python benchmarks/bench_transport.py --size-mb 64
+"""
+import argparse
+import os
+import time
+import tracemalloc
+
+from fake_caster import FakeCaster
+from gnss.ntrip.client import Client
+
+
+DATA_FILE = os.path.join(
+    os.path.dirname(__file__), '..', 'tests', 'gnss', 'rtcm', 'rtcm_data.bin')
+
+READ_SIZE = 4096
+
+
+def read_all(client, into, size):
+    buffer = bytearray(READ_SIZE)
+    nrbytes = 0
+    nrcalls = 0
+    allocated = 0
+    traced = tracemalloc.is_tracing()
+    while nrbytes < size:
+        if traced:
+            tracemalloc.reset_peak()
+            before, _ = tracemalloc.get_traced_memory()
+        if into:
+            nrbytes += client.readinto(buffer)
+        else:
+            nrbytes += len(client.read(READ_SIZE))
+        if traced:
+            allocated += tracemalloc.get_traced_memory()[1] - before
+        nrcalls += 1
+    client.close()
+    return nrbytes, nrcalls, allocated
+
+
+def run(name, port, size, transport, into, ntrip_version="2.0"):
+    def client():
+        return Client("http://127.0.0.1", mountpoint="RTCM", port=port,
+                      ntrip_version=ntrip_version, transport=transport)
+
+    start = time.perf_counter()
+    nrbytes, nrcalls, _ = read_all(client(), into, size)
+    elapsed = time.perf_counter() - start
+
+    tracemalloc.start()
+    _, _, allocated = read_all(client(), into, size)
+    tracemalloc.stop()
+
+    size_mb = nrbytes / 2**20
+    print(f"{name:<16} {size_mb / elapsed:>8.1f} MB/s "
+          f"{nrcalls / size_mb:>8.0f} calls/MB "
+          f"{allocated / size_mb / 2**10:>10.1f} KB allocated/MB")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[1])
+    parser.add_argument('--size-mb', type=int, default=64)
+    parser.add_argument('--port', type=int, default=21010)
+    args = parser.parse_args()
+
+    with open(DATA_FILE, 'rb') as f:
+        data = f.read()
+    data *= max(1, (args.size_mb << 20) // len(data))
+
+    with FakeCaster(data, args.port, chunked=True), \
+            FakeCaster(data, args.port + 1):
+        size = len(data)
+        run('requests read', args.port, size, "requests", False)
+        run('requests into', args.port, size, "requests", True)
+        run('socket read', args.port, size, "socket", False)
+        run('socket into', args.port, size, "socket", True)
+        run('socket ICY into', args.port + 1, size, "socket", True, "1.0")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,82 @@
+"""
+Idle CPU usage of a parser waiting for a slow stream.
+
+The RTCM test recording is sent through a non-blocking pipe at a low frame
+rate while a parser thread waits for data with ``wait_for_stream``.
+The stream is waited for with select, then again through a wrapper hiding
+its file descriptor so that the read backoff is used.
+
+Usage: python benchmarks/bench_wait.py --duration 5 --rate 10
+"""
+import argparse
+import os
+import threading
+import time
+
+from gnss.rtcm.archive import scan_buffer
+from gnss.rtcm.parser import Parser
+
+
+DATA_FILE = os.path.join(
+    os.path.dirname(__file__), '..', 'tests', 'gnss', 'rtcm', 'rtcm_data.bin')
+
+
+class NoFileno:
+    def __init__(self, stream):
+        self.stream = stream
+
+    def read(self, size):
+        return self.stream.read(size)
+
+
+def consume(parser, stats):
+    cpu_time = time.thread_time()
+    while True:
+        parser.parse()
+        stats['messages'] += 1
+        stats['cpu_time'] = time.thread_time() - cpu_time
+
+
+def run(name, frames, duration, rate, wrap=None):
+    read_fd, write_fd = os.pipe()
+    os.set_blocking(read_fd, False)
+    stream = open(read_fd, 'rb', buffering=0)
+    parser = Parser(stream if wrap is None else wrap(stream),
+                    wait_for_stream=True)
+    parser.subscribe()
+    stats = {'messages': 0, 'cpu_time': 0.0}
+    threading.Thread(target=consume, args=(parser, stats), daemon=True).start()
+
+    start = time.perf_counter()
+    for frame in frames:
+        if time.perf_counter() - start >= duration:
+            break
+        os.write(write_fd, frame)
+        time.sleep(1 / rate)
+    elapsed = time.perf_counter() - start
+    os.close(write_fd)
+    print(f"{name:<8} {stats['messages']:>6} messages {elapsed:>6.2f} s "
+          f"cpu {100 * stats['cpu_time'] / elapsed:>6.2f} % "
+          f"idle {parser.idle_time:>6.2f} s busy {parser.busy_time:>6.3f} s")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[1])
+    parser.add_argument('--duration', type=float, default=5)
+    parser.add_argument('--rate', type=float, default=10)
+    args = parser.parse_args()
+
+    with open(DATA_FILE, 'rb') as f:
+        data = f.read()
+    index = scan_buffer(data)
+    index = index[index['crc_valid']]
+    frames = [data[offset:offset + length] for offset, length in zip(
+        index['offset'].tolist(), index['length'].tolist())]
+    frames *= int(args.duration * args.rate) // len(frames) + 1
+
+    run('select', frames, args.duration, args.rate)
+    run('backoff', frames, args.duration, args.rate, wrap=NoFileno)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,64 @@
+"""
+Minimal NTRIP caster for the benchmarks.
+
+It runs in a separate process so that it does not share the interpreter of
+the measured client, and serves the same data on every mountpoint, at full
+speed or at a given byte rate, with an NTRIP 1.0 ICY answer or a chunked
+HTTP/1.1 one.
+"""
+import asyncio
+import multiprocessing
+
+
+def serve(data, port, ready, rate=None, chunked=False, chunk_size=4096):
+    async def handle(reader, writer):
+        while (await reader.readline()) not in (b"\r\n", b""):
+            pass
+        if chunked:
+            writer.write(
+                b"HTTP/1.1 200 OK\r\nContent-Type: gnss/data\r\n"
+                b"Transfer-Encoding: chunked\r\n\r\n")
+        else:
+            writer.write(b"ICY 200 OK\r\n")
+        try:
+            for start in range(0, len(data), chunk_size):
+                chunk = data[start:start + chunk_size]
+                if chunked:
+                    chunk = b"%x\r\n%s\r\n" % (len(chunk), chunk)
+                writer.write(chunk)
+                await writer.drain()
+                if rate:
+                    await asyncio.sleep(chunk_size / rate)
+            if chunked:
+                writer.write(b"0\r\n\r\n")
+                await writer.drain()
+        except ConnectionError:
+            pass
+        writer.close()
+
+    async def main():
+        server = await asyncio.start_server(
+            handle, '127.0.0.1', port, backlog=4096)
+        ready.set()
+        async with server:
+            await server.serve_forever()
+
+    asyncio.run(main())
+
+
+class FakeCaster:
+    def __init__(self, data: bytes, port: int, rate: float = None,
+                 chunked: bool = False):
+        self._ready = multiprocessing.Event()
+        self._process = multiprocessing.Process(
+            target=serve, args=(data, port, self._ready, rate, chunked),
+            daemon=True)
+
+    def __enter__(self):
+        self._process.start()
+        self._ready.wait()
+        return self
+
+    def __exit__(self, *args):
+        self._process.terminate()
+        self._process.join()
@@ -0,0 +1,335 @@
+"""
+Benchmark suite with baselines.
+
+Run the framing, CRC, decoding, callback dispatch, epoch assembly,
+ephemeris and sourcetable benchmarks on the RTCM test recording and
+synthetic workloads, keep the best of a few repeats of each, and compare
+them with a stored baseline.
+The exit status is 1 when a benchmark regressed past the tolerance, and
+2 when the baseline was run on other workloads, e.g. another --size-mb,
+results of different workloads being meaningless to compare.
+
+Usage: python benchmarks/suite.py --compare benchmarks/baseline.json
+"""
+import argparse
+from io import BytesIO
+import json
+import os
+import platform
+import sys
+import time
+import timeit
+
+import numpy as np
+
+from bench_crc import frame_slices
+from bench_sourcetable import make_sourcetable, serve
+from gnss.ntrip.client import Client
+from gnss.ntrip.sourcetable import parse_sourcetable
+from gnss.rtcm.crc import Crc24Q, crc24q
+from gnss.rtcm.epochs import EpochAssembler
+from gnss.rtcm.executor import CallbackExecutor
+from gnss.rtcm.generator import Generator
+from gnss.rtcm.messages import ExtendedL1L2Gps
+from gnss.rtcm.parser import Framer, Parser, decode
+from workloads import (
+    REFERENCE_STATION_ANTENNA, REFERENCE_STATION_ANTENNA_HEIGHT,
+    ephemeris_store, first_frame_payload, msm7_payload, recording
+)
+
+
+BASELINE_FILE = os.path.join(os.path.dirname(__file__), 'baseline.json')
+
+# Arguments setting the workloads, the same for a baseline and a run.
+WORKLOAD_ARGS = ("size_mb", "number", "rows", "callbacks")
+
+# Units of the results, True when higher is better.
+UNITS = {"MB/s": True, "msgs/s": True, "us": False, "ms": False}
+
+BENCHMARKS = {}
+
+
+def benchmark(name: str, unit: str):
+    """
+    Register a benchmark, a function of the arguments returning its result
+    in unit.
+    """
+    def decorator(func):
+        BENCHMARKS[name] = (func, unit)
+        return func
+    return decorator
+
+
+def framing_rate(data: bytes) -> float:
+    framer = Framer()
+    stream = BytesIO(data)
+    start = time.perf_counter()
+    while True:
+        if framer.next_frame() is None and not framer.fill(stream):
+            break
+    return len(data) / 2**20 / (time.perf_counter() - start)
+
+
+@benchmark("framing", "MB/s")
+def bench_framing(args):
+    return framing_rate(recording(args.size_mb))
+
+
+@benchmark("framing.garbage", "MB/s")
+def bench_framing_garbage(args):
+    # Frames separated by bytes holding false preambles, to time the
+    # resynchronisation.
+    data = recording()
+    offsets, lengths = frame_slices(data)
+    garbage = bytes([0xd3, 0x00, 0x10]) * 4
+    frames = b"".join(
+        garbage + data[o:o + n] for o, n in zip(offsets, lengths))
+    return framing_rate(frames * max(1, (args.size_mb << 20) // len(frames)))
+
+
+@benchmark("crc.slice-by-8", "MB/s")
+def bench_crc(args):
+    data = recording(args.size_mb)
+    offsets, lengths = frame_slices(data)
+    frames = [data[o:o + n] for o, n in zip(offsets, lengths)]
+    start = time.perf_counter()
+    for frame in frames:
+        crc24q(frame)
+    return len(data) / 2**20 / (time.perf_counter() - start)
+
+
+@benchmark("crc.batch", "MB/s")
+def bench_crc_batch(args):
+    data = recording(args.size_mb)
+    offsets, lengths = frame_slices(data)
+    start = time.perf_counter()
+    Crc24Q.check_batch(data, offsets, lengths)
+    return len(data) / 2**20 / (time.perf_counter() - start)
+
+
+def decode_latency(buff: bytes, number: int) -> float:
+    return timeit.timeit(lambda: decode(buff), number=number) / number * 1e6
+
+
+@benchmark("decode.1004", "us")
+def bench_decode_1004(args):
+    return decode_latency(first_frame_payload(), args.number)
+
+
+@benchmark("decode.1005", "us")
+def bench_decode_1005(args):
+    return decode_latency(REFERENCE_STATION_ANTENNA, args.number)
+
+
+@benchmark("decode.1006", "us")
+def bench_decode_1006(args):
+    return decode_latency(REFERENCE_STATION_ANTENNA_HEIGHT, args.number)
+
+
+@benchmark("decode.1077", "us")
+def bench_decode_1077(args):
+    return decode_latency(msm7_payload(), args.number)
+
+
+def dispatch_rate(data: bytes, nr_callbacks: int, executor=None) -> float:
+    parser = Parser(BytesIO(data), executor=executor)
+    for _ in range(nr_callbacks):
+        def noop(msg: ExtendedL1L2Gps):
+            pass
+        parser.callback(noop)
+    start = time.perf_counter()
+    parser.parse()
+    if executor is not None:
+        executor.join()
+    return parser.frame_counts[1004] / (time.perf_counter() - start)
+
+
+@benchmark("dispatch.inline", "msgs/s")
+def bench_dispatch_inline(args):
+    return dispatch_rate(recording(args.size_mb / 4), args.callbacks)
+
+
+@benchmark("dispatch.executor", "msgs/s")
+def bench_dispatch_executor(args):
+    with CallbackExecutor() as executor:
+        return dispatch_rate(
+            recording(args.size_mb / 4), args.callbacks, executor)
+
+
+@benchmark("dispatch.submit", "us")
+def bench_dispatch_submit(args):
+    msg = decode(first_frame_payload())
+
+    def noop(msg):
+        pass
+
+    with CallbackExecutor(maxsize=args.number) as executor:
+        start = time.perf_counter()
+        for _ in range(args.number):
+            executor.submit(noop, msg)
+        elapsed = time.perf_counter() - start
+    return elapsed / args.number * 1e6
+
+
+@benchmark("epochs.assemble", "msgs/s")
+def bench_epochs_assemble(args):
+    generator = Generator([1004, 1074, 1084, 1094, 1124], stations=range(4))
+    msgs = list(Parser(BytesIO(generator.generate(50))).iter_messages())
+    assembler = EpochAssembler()
+    start = time.perf_counter()
+    # feed, the zero-copy path.
+    for msg in msgs:
+        assembler.feed(msg)
+    assembler.flush()
+    return len(msgs) / (time.perf_counter() - start)
+
+
+@benchmark("ephemeris.positions", "ms")
+def bench_ephemeris_positions(args):
+    # Every satellite at 120 epochs 30 s apart.
+    store = ephemeris_store()
+    times = 345600 + 30.0 * np.arange(120)
+    store.positions(times[:1])
+    start = time.perf_counter()
+    store.positions(times)
+    return (time.perf_counter() - start) * 1e3
+
+
+@benchmark("sourcetable.parse", "ms")
+def bench_sourcetable_parse(args):
+    lines = make_sourcetable(args.rows).decode().splitlines()
+    start = time.perf_counter()
+    parse_sourcetable(lines)
+    return (time.perf_counter() - start) * 1e3
+
+
+@benchmark("sourcetable.client", "ms")
+def bench_sourcetable_client(args):
+    server = serve(make_sourcetable(args.rows))
+    try:
+        client = Client("http://127.0.0.1", port=server.server_address[1])
+        start = time.perf_counter()
+        client.get_sourcetable()
+        return (time.perf_counter() - start) * 1e3
+    finally:
+        server.shutdown()
+        server.server_close()
+
+
+def run(args) -> dict:
+    """
+    Best result of each selected benchmark over the repeats.
+
+    Returns
+    ----------
+    dict
+        Result and unit per benchmark name.
+    """
+    results = {}
+    for name, (func, unit) in BENCHMARKS.items():
+        if args.filter and not any(f in name for f in args.filter):
+            continue
+        values = [func(args) for _ in range(args.repeat)]
+        value = max(values) if UNITS[unit] else min(values)
+        results[name] = {"value": value, "unit": unit}
+        print(f"{name:<20} {value:>12.2f} {unit}", file=sys.stderr)
+    return results
+
+
+def compare(results: dict, baseline: dict, tolerance: float) -> list:
+    """
+    Print the speedup of each result over its baseline.
+
+    A speedup below one is a slowdown, beyond ``1 - tolerance`` a
+    regression. Benchmarks missing from the baseline are only printed.
+
+    Returns
+    ----------
+    list
+        Names of the regressed benchmarks.
+    """
+    regressions = []
+    for name, result in results.items():
+        value, unit = result["value"], result["unit"]
+        try:
+            reference = baseline["results"][name]["value"]
+        except KeyError:
+            print(f"{name:<20} {value:>12.2f} {unit:<6} no baseline")
+            continue
+        speedup = value / reference if UNITS[unit] else reference / value
+        status = "ok"
+        if speedup < 1 - tolerance:
+            status = "REGRESSION"
+            regressions.append(name)
+        print(f"{name:<20} {value:>12.2f} {unit:<6} "
+              f"baseline {reference:>12.2f} {speedup:>6.2f}x {status}")
+    return regressions
+
+
+def workload_mismatch(args, baseline: dict) -> list:
+    """
+    Workload arguments of a run differing from the baseline ones.
+
+    Returns
+    ----------
+    list
+        Messages naming each argument and its two values.
+    """
+    reference = baseline.get("metadata", {}).get("args", {})
+    return [f"--{key.replace('_', '-')} {getattr(args, key)}, "
+            f"baseline {reference.get(key)}"
+            for key in WORKLOAD_ARGS
+            if reference.get(key) != getattr(args, key)]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[1])
+    parser.add_argument('--size-mb', type=int, default=16)
+    parser.add_argument('--number', type=int, default=20000)
+    parser.add_argument('--rows', type=int, default=20000)
+    parser.add_argument('--callbacks', type=int, default=1)
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--filter', nargs='*',
+                        help='run the benchmarks whose name contains one of '
+                             'these')
+    parser.add_argument('--save', metavar='PATH',
+                        help='store the results as a baseline')
+    parser.add_argument('--compare', metavar='PATH', nargs='?',
+                        const=BASELINE_FILE,
+                        help='compare with a stored baseline')
+    parser.add_argument('--tolerance', type=float, default=0.2,
+                        help='slowdown tolerated before a regression')
+    args = parser.parse_args()
+
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+        mismatch = workload_mismatch(args, baseline)
+        if mismatch:
+            print(f"not comparable with {args.compare}, other workloads: "
+                  + "; ".join(mismatch), file=sys.stderr)
+            sys.exit(2)
+
+    results = run(args)
+    if args.save:
+        with open(args.save, 'w') as f:
+            json.dump({
+                "metadata": {
+                    "python": platform.python_version(),
+                    "platform": platform.platform(),
+                    "machine": platform.machine(),
+                    "cpu_count": os.cpu_count(),
+                    "date": time.strftime("%Y-%m-%d"),
+                    "args": {key: getattr(args, key)
+                             for key in WORKLOAD_ARGS + ("repeat",)},
+                },
+                "results": results,
+            }, f, indent=2)
+            f.write("\n")
+    if args.compare:
+        if compare(results, baseline, args.tolerance):
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,91 @@
+"""
+Workloads shared by the benchmarks.
+
+The RTCM test recording, replicated to a given size, and synthetic
+message payloads for the types the recording does not hold.
+"""
+import os
+
+from gnss.rtcm.ephemeris import EphemerisStore
+from gnss.rtcm.messages import (
+    GalileoEphemeris, GlonassEphemeris, GpsEphemeris, RtcmMessage
+)
+
+
+DATA_FILE = os.path.join(
+    os.path.dirname(__file__), '..', 'tests', 'gnss', 'rtcm', 'rtcm_data.bin')
+
+REFERENCE_STATION_ANTENNA = bytes(
+    b'>\xd0\x00\x026\xab\x10_\xca\x085\r\xd0\xca7\xe5G\xf8\x88\x00\x00')
+REFERENCE_STATION_ANTENNA_HEIGHT = bytes(
+    b'>\xe0\x00\x026\xab\x10_\xca\x085\r\xd0\xca7\xe5G\xf8\x88\x00\x00')
+
+
+def recording(size_mb: float = 0) -> bytes:
+    """
+    RTCM test recording, replicated up to size_mb if given.
+    """
+    with open(DATA_FILE, 'rb') as f:
+        data = f.read()
+    return data * max(1, int(size_mb * 2**20) // len(data))
+
+
+def first_frame_payload():
+    data = recording()
+    msg_length = ((data[1] & 0x03) << 8) | data[2]
+    return data[3:3 + msg_length]
+
+
+def msm7_payload(nr_sat=30, nr_sig=3):
+    fields = [(1077, 12), (0, 12), (0, 30), (0, 1), (0, 3), (0, 7), (0, 2),
+              (0, 2), (0, 1), (0, 3),
+              (((1 << nr_sat) - 1) << (64 - nr_sat), 64),
+              (((1 << nr_sig) - 1) << (32 - nr_sig), 32)]
+    fields += [(1, 1)] * (nr_sat * nr_sig)
+    for width in (8, 4, 10, 14):
+        fields += [(i, width) for i in range(nr_sat)]
+    for width in (20, 24, 10, 1, 10, 15):
+        fields += [(i, width) for i in range(nr_sat * nr_sig)]
+    value = 0
+    nr_bits = 0
+    for field_value, width in fields:
+        value = (value << width) | field_value
+        nr_bits += width
+    padding = -nr_bits % 8
+    return (value << padding).to_bytes((nr_bits + padding) // 8, 'big')
+
+
+def _ephemeris(cls, **values):
+    msg = RtcmMessage(msg_type=cls.type)
+    vars(msg).update(
+        {name: 0 for name in cls.layout.names if name != 'msg_number'},
+        **values)
+    return cls(buff=msg.to_buffer())
+
+
+def ephemeris_store(toe=345600, nr_records=2):
+    """
+    Store of 32 GPS, 24 GLONASS and 30 Galileo satellites, with nr_records
+    records each, an hour apart from toe.
+    """
+    store = EphemerisStore(max_records=nr_records)
+    for k in range(nr_records):
+        t = toe + 3600 * k
+        for sat_id in range(1, 33):
+            store.add(_ephemeris(
+                GpsEphemeris, sat_id=sat_id, iode=k, toe=t, toc=t,
+                sqrt_a=5153.6, eccentricity=0.01, i0=0.3,
+                m0=(sat_id - 1) / 16 - 1, omega0=sat_id % 6 / 3 - 1,
+                omega_dot=-2.6e-9, af0=1e-4))
+        for sat_id in range(1, 31):
+            store.add(_ephemeris(
+                GalileoEphemeris, sat_id=sat_id, iodnav=k, toe=t, toc=t,
+                sqrt_a=5440.6, eccentricity=0.0003, i0=0.31,
+                m0=(sat_id - 1) / 15 - 1, omega0=sat_id % 3 / 1.5 - 1))
+        tb = int((t % 86400 + 10782) // 900) % 96
+        for sat_id in range(1, 25):
+            store.add(_ephemeris(
+                GlonassEphemeris, sat_id=sat_id, tb=tb, x=-14483.0,
+                y=-19553.0, z=-7064.0, x_velocity=-0.33, y_velocity=-1.09,
+                z_velocity=3.53, tau=2e-5))
+    return store
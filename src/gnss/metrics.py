@@ -0,0 +1,235 @@
+from bisect import bisect_left
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import math
+import threading
+
+
+DECODE_TIME_BUCKETS = (1e-6, 2.5e-6, 5e-6, 1e-5, 2.5e-5, 5e-5, 1e-4,
+                       2.5e-4, 5e-4, 1e-3, 1e-2)
+PROMETHEUS_CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+# Monotonic counters among the stats keys, the others are gauges.
+COUNTER_KEYS = frozenset((
+    "bytes_in", "bytes_out", "frames", "crc_errors", "skipped_bytes",
+    "messages", "busy_time", "idle_time", "connects", "reconnects",
+    "read_stall_time", "outages", "failed_attempts", "standby_connects"))
+
+# Label of the keys of the dict valued stats.
+LABELS = {
+    "frames": "msg_number",
+    "messages": "msg_type",
+    "decode_time": "msg_number",
+}
+
+DESCRIPTIONS = {
+    "bytes_in": "Bytes read from the stream.",
+    "frames": "Valid frames per message number.",
+    "crc_errors": "Frames failing the CRC check.",
+    "skipped_bytes": "Bytes skipped to find the frames.",
+    "messages": "Decoded messages per type.",
+    "busy_time": "Time spent parsing.",
+    "idle_time": "Time spent waiting for the stream.",
+    "decode_time": "Decode time per message number.",
+    "connects": "Connections to the caster.",
+    "reconnects": "Connections to the caster after the first one.",
+    "read_stall_time": "Time spent waiting for data in reads.",
+}
+
+
+class Histogram:
+    """
+    Distribution of observed values over fixed buckets.
+
+    Observing a value costs a bisection and two additions, the buckets are
+    upper bounds like Prometheus ones and the last bucket is unbounded.
+    """
+    def __init__(self, buckets=DECODE_TIME_BUCKETS):
+        self.buckets = tuple(sorted(buckets))
+        self.counts = [0] * (len(self.buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float):
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def to_dict(self) -> dict:
+        """
+        Cumulative counts per bucket upper bound, sum and count.
+        """
+        counts = list(self.counts)
+        cumulative = {}
+        total = 0
+        for bound, count in zip(self.buckets + (math.inf,), counts):
+            total += count
+            cumulative[bound] = total
+        return {"buckets": cumulative, "sum": self.sum, "count": total}
+
+
+def _metric_name(prefix: str, key: str) -> str:
+    name = f"{prefix}_{key}"
+    if name.endswith("_time"):
+        name = name[:-len("_time")] + "_seconds"
+    return name
+
+
+def _format_labels(labels: dict) -> str:
+    if not labels:
+        return ""
+    escaped = (
+        str(value).replace("\\", "\\\\").replace('"', '\\"').replace(
+            "\n", "\\n")
+        for value in labels.values())
+    return "{" + ",".join(
+        f'{key}="{value}"' for key, value in zip(labels, escaped)) + "}"
+
+
+def _format_value(value) -> str:
+    if value == math.inf:
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(int(value))
+
+
+class Metrics:
+    """
+    Registry exporting the counters of parsers, clients and other sources.
+
+    Sources are objects with a ``stats`` method returning a dict, like
+    ``Parser``, ``Client`` or ``ReconnectingStream``. Nothing is collected
+    on the hot path: the sources keep plain counters and the registry reads
+    them only when a snapshot or an export is asked for.
+
+    Numeric stats become Prometheus counters or gauges, dicts of numbers
+    become a metric labeled by key, and decode time histograms become
+    Prometheus histograms. Other values are left out of the export. Series
+    are labeled with the source name and the lowercased class name of the
+    source, e.g. ``component="parser"``.
+
+    Parameters
+    ----------
+    prefix: str
+        Prefix of the metric names.
+
+    Examples
+    --------
+    >>> metrics = Metrics()
+    >>> metrics.add("base", parser)
+    >>> metrics.add("base", client)
+    >>> metrics.serve(port=9464)
+    >>> metrics.snapshot()["base"]["frames"]
+    """
+    def __init__(self, prefix: str = "gnss"):
+        self.prefix = prefix
+        self.sources = []
+        self.host = None
+        self.port = None
+        self._server = None
+        self._thread = None
+
+    def add(self, name: str, source, **labels):
+        """
+        Register a source, its metrics labeled with its name and labels.
+        """
+        if not callable(getattr(source, "stats", None)):
+            raise AttributeError("missing stats method")
+        self.sources.append((name, source, labels))
+
+    def snapshot(self) -> dict:
+        """
+        Stats of every source, per name, merged when sources share one.
+        """
+        snapshot = {}
+        for name, source, _ in self.sources:
+            snapshot.setdefault(name, {}).update(source.stats())
+        return snapshot
+
+    def to_prometheus(self) -> str:
+        """
+        Metrics in the Prometheus text exposition format.
+        """
+        families = {}
+
+        def sample(key, metric_type, suffix, labels, value):
+            name = _metric_name(self.prefix, key)
+            if metric_type == "counter":
+                name += "_total"
+            family = families.setdefault(name, (metric_type, key, []))
+            family[2].append(
+                f"{name}{suffix}{_format_labels(labels)} "
+                f"{_format_value(value)}")
+
+        for name, source, extra_labels in self.sources:
+            labels = {"source": name,
+                      "component": type(source).__name__.lower(),
+                      **extra_labels}
+            for key, value in source.stats().items():
+                metric_type = "counter" if key in COUNTER_KEYS else "gauge"
+                if isinstance(value, bool):
+                    sample(key, "gauge", "", labels, int(value))
+                elif isinstance(value, (int, float)):
+                    sample(key, metric_type, "", labels, value)
+                elif isinstance(value, dict) and key in LABELS:
+                    for label, item in value.items():
+                        item_labels = {**labels, LABELS[key]: label}
+                        if isinstance(item, dict):
+                            self._histogram(sample, key, item_labels, item)
+                        else:
+                            sample(key, metric_type, "", item_labels, item)
+
+        lines = []
+        for name, (metric_type, key, samples) in families.items():
+            lines.append(
+                f"# HELP {name} {DESCRIPTIONS.get(key, key)}")
+            lines.append(f"# TYPE {name} {metric_type}")
+            lines.extend(samples)
+        return "".join(line + "\n" for line in lines)
+
+    @staticmethod
+    def _histogram(sample, key: str, labels: dict, histogram: dict):
+        for bound, count in histogram["buckets"].items():
+            sample(key, "histogram", "_bucket",
+                   {**labels, "le": _format_value(bound)}, count)
+        sample(key, "histogram", "_sum", labels, histogram["sum"])
+        sample(key, "histogram", "_count", labels, histogram["count"])
+
+    def serve(self, host: str = "127.0.0.1", port: int = 9464):
+        """
+        Serve the Prometheus export on ``/metrics`` from a thread.
+
+        Parameters
+        ----------
+        host: str
+            Address to listen on.
+        port: int
+            Port to listen on, 0 for any free port, see ``port``.
+        """
+        metrics = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path.split("?")[0] != "/metrics":
+                    self.send_error(404)
+                    return
+                body = metrics.to_prometheus().encode("utf-8")
+                self.send_response(200)
+                self.send_header("Content-Type", PROMETHEUS_CONTENT_TYPE)
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args):
+                pass
+
+        self._server = ThreadingHTTPServer((host, port), Handler)
+        self.host, self.port = self._server.server_address[:2]
+        self._thread = threading.Thread(
+            target=self._server.serve_forever, name="metrics", daemon=True)
+        self._thread.start()
+
+    def close(self):
+        if self._server is not None:
+            self._server.shutdown()
+            self._server.server_close()
+            self._thread.join()
+            self._server = None
@@ -0,0 +1,261 @@
+import contextlib
+import gzip
+import hashlib
+import json
+import os
+import tempfile
+import threading
+import time
+
+import pandas as pd
+
+from .client import Client
+from .sourcetable import parse_sourcetable, query_to_string
+
+try:
+    import fcntl
+except ImportError:  # pragma: no cover
+    fcntl = None
+
+
+DEFAULT_TTL = 300.0
+
+
+class CacheEntry:
+    """
+    Sourcetable as fetched from a caster.
+
+    The raw sourcetable is kept for the on-disk cache, the parsed one is
+    built on first use.
+    """
+    def __init__(self, content: bytes, fetched_at: float, etag: str = None,
+                 last_modified: str = None):
+        self.content = content
+        self.fetched_at = fetched_at
+        self.etag = etag
+        self.last_modified = last_modified
+        self._sourcetable = None
+
+    @property
+    def sourcetable(self) -> pd.DataFrame:
+        if self._sourcetable is None:
+            self._sourcetable = parse_sourcetable(
+                self.content.decode("utf-8").splitlines())
+        return self._sourcetable
+
+    def validators(self) -> dict:
+        headers = {}
+        if self.etag is not None:
+            headers["If-None-Match"] = self.etag
+        if self.last_modified is not None:
+            headers["If-Modified-Since"] = self.last_modified
+        return headers
+
+
+class SourcetableCache:
+    """
+    Cache of caster sourcetables.
+
+    Sourcetables are cached in memory and, with a directory, on disk as
+    gzip-compressed raw sourcetables, keyed by caster URL and query string.
+    An entry older than ttl seconds is refreshed with a conditional request
+    when the caster gave an ``ETag`` or ``Last-Modified`` header, the
+    cached sourcetable being kept on a 304 answer.
+
+    Processes sharing a directory share fetches: a process about to fetch
+    takes a lock file of the entry, and processes waiting for the lock use
+    the sourcetable it fetched.
+
+    Parameters
+    ----------
+    ttl: float
+        Time to live of the entries, in seconds.
+    directory: str
+        Directory of the on-disk cache, memory only if None.
+    clock: callable
+        Time source, in seconds since the epoch.
+
+    Examples
+    --------
+    >>> cache = SourcetableCache(ttl=600, directory="~/.cache/ntrip")
+    >>> client = Client("rtk2go.com")
+    >>> sourcetable = cache.get(client, {"strict": True})
+    >>> cache.stats()
+    """
+    def __init__(self, ttl: float = DEFAULT_TTL, directory: str = None,
+                 clock=time.time):
+        self.ttl = ttl
+        self.directory = directory
+        if directory is not None:
+            self.directory = os.path.expanduser(directory)
+            os.makedirs(self.directory, exist_ok=True)
+        self.clock = clock
+        self._entries = {}
+        self._locks = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.not_modified = 0
+        self.fetch_count = 0
+        self.fetch_time = 0.0
+        self.last_fetch_time = None
+
+    @staticmethod
+    def key(client: Client, query: dict = None) -> str:
+        query_string = query_to_string(query) if query is not None else ""
+        return f"{client.caster_url}:{client.port}?{query_string}"
+
+    @property
+    def hit_rate(self) -> float:
+        requests = self.hits + self.misses
+        return self.hits / requests if requests else 0.0
+
+    def stats(self) -> dict:
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hit_rate,
+            "not_modified": self.not_modified,
+            "fetch_count": self.fetch_count,
+            "fetch_time": self.fetch_time,
+            "mean_fetch_time": (self.fetch_time / self.fetch_count
+                                if self.fetch_count else None),
+            "last_fetch_time": self.last_fetch_time,
+        }
+
+    def get(self, client: Client, query: dict = None,
+            refresh: bool = False) -> pd.DataFrame:
+        """
+        Get a sourcetable, from the cache if fresh enough.
+
+        Parameters
+        ----------
+        client: Client
+            Client of the caster.
+        query: dict
+            Sourcetable filter, see ``query_to_string``.
+        refresh: bool
+            Revalidate the cached sourcetable regardless of its age.
+
+        Returns
+        ----------
+        pd.DataFrame
+            A copy of the cached sourcetable, free to be modified.
+        """
+        key = self.key(client, query)
+        with self._key_lock(key):
+            entry = self._entries.get(key)
+            if not refresh and self._fresh(entry):
+                self.hits += 1
+                return entry.sourcetable.copy()
+
+            with self._file_lock(key):
+                stored = self._load(key)
+                if stored is not None and (
+                        entry is None or stored.fetched_at > entry.fetched_at):
+                    if not refresh and self._fresh(stored):
+                        self._entries[key] = stored
+                        self.hits += 1
+                        return stored.sourcetable.copy()
+                    entry = stored
+
+                self.misses += 1
+                entry = self._fetch(client, query, entry)
+                self._entries[key] = entry
+                self._store(key, entry)
+        return entry.sourcetable.copy()
+
+    def invalidate(self, client: Client = None, query: dict = None):
+        """
+        Drop an entry, or every entry without client.
+        """
+        if client is None:
+            keys = list(self._entries)
+        else:
+            keys = [self.key(client, query)]
+        for key in keys:
+            self._entries.pop(key, None)
+            if self.directory is not None:
+                with contextlib.suppress(FileNotFoundError):
+                    os.remove(self._path(key) + ".gz")
+        if client is None and self.directory is not None:
+            for name in os.listdir(self.directory):
+                if name.endswith(".gz"):
+                    with contextlib.suppress(FileNotFoundError):
+                        os.remove(os.path.join(self.directory, name))
+
+    def _fresh(self, entry: CacheEntry) -> bool:
+        return entry is not None and self.clock() - entry.fetched_at < self.ttl
+
+    def _fetch(self, client: Client, query: dict,
+               entry: CacheEntry) -> CacheEntry:
+        headers = entry.validators() if entry is not None else {}
+        start = time.perf_counter()
+        try:
+            with client.request_sourcetable(query, headers) as resp:
+                if resp.status_code == 304 and entry is not None:
+                    self.not_modified += 1
+                    entry.fetched_at = self.clock()
+                    return entry
+                return CacheEntry(
+                    resp.content, self.clock(), resp.headers.get("ETag"),
+                    resp.headers.get("Last-Modified"))
+        finally:
+            self.last_fetch_time = time.perf_counter() - start
+            self.fetch_time += self.last_fetch_time
+            self.fetch_count += 1
+
+    def _key_lock(self, key: str) -> threading.Lock:
+        with self._lock:
+            return self._locks.setdefault(key, threading.Lock())
+
+    def _path(self, key: str) -> str:
+        name = hashlib.sha1(key.encode("utf-8")).hexdigest()
+        return os.path.join(self.directory, name)
+
+    @contextlib.contextmanager
+    def _file_lock(self, key: str):
+        if self.directory is None or fcntl is None:
+            yield
+            return
+        with open(self._path(key) + ".lock", "a") as lock:
+            fcntl.flock(lock, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(lock, fcntl.LOCK_UN)
+
+    def _load(self, key: str) -> CacheEntry:
+        if self.directory is None:
+            return None
+        try:
+            with gzip.open(self._path(key) + ".gz", "rb") as f:
+                header = json.loads(f.readline())
+                content = f.read()
+        except (OSError, EOFError, ValueError):
+            return None
+        if header.get("key") != key:
+            return None
+        return CacheEntry(content, header["fetched_at"], header.get("etag"),
+                          header.get("last_modified"))
+
+    def _store(self, key: str, entry: CacheEntry):
+        if self.directory is None:
+            return
+        header = json.dumps({
+            "key": key,
+            "fetched_at": entry.fetched_at,
+            "etag": entry.etag,
+            "last_modified": entry.last_modified,
+        })
+        fd, path = tempfile.mkstemp(dir=self.directory, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as f, gzip.GzipFile(
+                    fileobj=f, mode="wb") as compressed:
+                compressed.write(header.encode("utf-8") + b"\n")
+                compressed.write(entry.content)
+            os.replace(path, self._path(key) + ".gz")
+        except BaseException:
+            with contextlib.suppress(FileNotFoundError):
+                os.remove(path)
+            raise
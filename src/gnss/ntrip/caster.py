@@ -0,0 +1,471 @@
+import asyncio
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from itertools import islice
+from urllib.parse import urlsplit
+
+from .protocol import parse_header_line
+from .sourcetable import format_record
+from ..rtcm.relay import Relay
+
+
+BUFFER_BLOCKS = 256
+UPSTREAM_CHUNK_SIZE = 65536
+WRITE_BUFFER_SIZE = 65536
+DROP_POLICIES = ("drop-oldest", "skip-to-latest", "disconnect")
+
+STR_DEFAULTS = {
+    "type": "STR",
+    "format": "RTCM 3",
+    "nmea": 0,
+    "solution": 0,
+    "generator": "gnss",
+    "compression": "none",
+    "authentication": "N",
+    "fee": "N",
+    "bitrate": 0,
+}
+
+
+class Subscriber:
+    """
+    Position and counters of one client of a ``Mountpoint``.
+
+    ``cursor`` is the sequence number of the next block to send and
+    ``position`` the number of bytes of the mountpoint stream behind it,
+    sent or dropped.
+    """
+    def __init__(self, mountpoint, peer=None):
+        self.peer = peer
+        self.cursor = mountpoint.head
+        self.position = mountpoint.bytes_published
+        self.bytes_sent = 0
+        self.dropped_blocks = 0
+        self.dropped_bytes = 0
+
+    def stats(self) -> dict:
+        return {
+            "peer": self.peer,
+            "bytes_sent": self.bytes_sent,
+            "dropped_blocks": self.dropped_blocks,
+            "dropped_bytes": self.dropped_bytes,
+        }
+
+
+class Mountpoint:
+    """
+    One caster mountpoint and the frame buffer shared by its subscribers.
+
+    Upstream data goes through a ``Relay``, which keeps complete, CRC
+    checked frames only, and each chunk of frames becomes a block of a ring
+    of at most ``buffer_blocks`` blocks. Blocks are numbered, the ring holds
+    the numbers from ``first`` to ``head`` excluded, and every subscriber
+    sends from its own cursor in it, so a block is stored once whatever the
+    number of subscribers. A subscriber lagging behind ``first`` lost the
+    blocks in between, what happens then is the caster drop policy.
+
+    Parameters
+    ----------
+    name: str
+        Mountpoint name.
+    source: file-like
+        Upstream with a ``read`` method, e.g. a ``Client``, coroutine or
+        blocking. None when data are pushed with ``feed``.
+    msg_numbers: iterable of int
+        Message numbers forwarded, all if None.
+    buffer_blocks: int
+        Number of blocks kept for the subscribers.
+    record: dict
+        Fields of the mountpoint STR record in the sourcetable.
+    """
+    def __init__(
+            self,
+            name: str,
+            source=None,
+            msg_numbers=None,
+            buffer_blocks: int = BUFFER_BLOCKS,
+            record: dict = None):
+        self.name = name
+        self.source = source
+        self.record = {**STR_DEFAULTS, "identifier": name,
+                       **(record or {}), "mountpoint": name}
+        self.relay = Relay(None, self, msg_numbers)
+        self.blocks = deque()
+        self.buffer_blocks = buffer_blocks
+        self.head = 0
+        self.bytes_published = 0
+        self.closed = False
+        self.error = None
+        self.subscribers = set()
+        self.nr_subscribed = 0
+        self.nr_disconnected = 0
+        self.dropped_blocks = 0
+        self._buffered_bytes = 0
+        self._waiter = None
+
+    def __repr__(self):
+        return f"Mountpoint({self.name!r}, {len(self.subscribers)} clients)"
+
+    @property
+    def first(self) -> int:
+        return self.head - len(self.blocks)
+
+    def write(self, data: bytes):
+        """
+        Publish a block of complete frames to the subscribers.
+        """
+        if len(self.blocks) == self.buffer_blocks:
+            self._buffered_bytes -= len(self.blocks.popleft())
+        self.blocks.append(data)
+        self._buffered_bytes += len(data)
+        self.bytes_published += len(data)
+        self.head += 1
+        self._wake()
+
+    def feed(self, data: bytes) -> int:
+        """
+        Push upstream data, the frames it completes are published.
+        """
+        return self.relay.feed(data)
+
+    def close(self):
+        """
+        End the stream, subscribers are sent what is left and disconnected.
+        """
+        self.closed = True
+        self._wake()
+
+    def _wake(self):
+        if self._waiter is not None:
+            self._waiter.set_result(None)
+            self._waiter = None
+
+    async def wait(self, subscriber: Subscriber):
+        """
+        Wait until there are blocks past the subscriber cursor or the stream
+        is closed.
+        """
+        while subscriber.cursor == self.head and not self.closed:
+            if self._waiter is None:
+                self._waiter = asyncio.get_running_loop().create_future()
+            await self._waiter
+
+    def skip(self, subscriber: Subscriber, seq: int):
+        """
+        Move a subscriber cursor forward to seq, counting what it drops.
+        """
+        position = (self.bytes_published - self._buffered_bytes
+                    + sum(len(block) for block in islice(
+                        self.blocks, 0, seq - self.first)))
+        subscriber.dropped_blocks += seq - subscriber.cursor
+        subscriber.dropped_bytes += position - subscriber.position
+        self.dropped_blocks += seq - subscriber.cursor
+        subscriber.cursor = seq
+        subscriber.position = position
+
+    def read(self, subscriber: Subscriber, max_bytes: int = None) -> bytes:
+        """
+        Blocks from the subscriber cursor to the head, joined.
+
+        At most max_bytes bytes of whole blocks are read, but always one
+        block at least.
+        """
+        blocks = []
+        size = 0
+        for block in islice(self.blocks, subscriber.cursor - self.first, None):
+            if (blocks and max_bytes is not None
+                    and size + len(block) > max_bytes):
+                break
+            blocks.append(block)
+            size += len(block)
+        subscriber.cursor += len(blocks)
+        subscriber.position += size
+        return b"".join(blocks)
+
+    def stats(self) -> dict:
+        relay = self.relay.stats()
+        return {
+            "subscribers": len(self.subscribers),
+            "subscribed": self.nr_subscribed,
+            "disconnected": self.nr_disconnected,
+            "frames": relay["frames_out"],
+            "crc_errors": relay["errors"],
+            "bytes_in": relay["bytes_in"],
+            "bytes_published": self.bytes_published,
+            "blocks_published": self.head,
+            "buffered_blocks": len(self.blocks),
+            "buffered_bytes": self._buffered_bytes,
+            "dropped_blocks": self.dropped_blocks,
+            "closed": self.closed,
+            "error": self.error,
+        }
+
+
+class Caster:
+    """
+    NTRIP 1.0 and 2.0 caster on asyncio.
+
+    Each mountpoint reads one upstream and fans its frames out to any
+    number of clients from a shared buffer, see ``Mountpoint``. A client
+    too slow to keep up with the buffer never holds the others back: it
+    loses blocks according to the drop policy.
+
+    Blocks are written at most ``write_buffer`` bytes at once, and only
+    once the client transport holds less than ``write_buffer`` bytes, so a
+    slow client queues a bounded amount of data whatever the buffer length.
+
+    - "drop-oldest" resumes at the oldest block still buffered.
+    - "skip-to-latest" drops the backlog and resumes at the newest block.
+    - "disconnect" closes the connection, also when blocks are to be
+      written while the client transport still holds more than
+      ``write_buffer`` bytes, without waiting for the buffer to wrap.
+
+    Requests for an unknown mountpoint, or the root, are answered with the
+    sourcetable built from the mountpoint records, see ``sourcetable``.
+
+    Parameters
+    ----------
+    host: str
+        Address to listen on.
+    port: int
+        Port to listen on, 0 for any free port, see ``port`` once started.
+    drop_policy: str
+        One of ``DROP_POLICIES``.
+    timeout: float
+        Time allowed to a client to send its request.
+    chunk_size: int
+        Number of bytes requested from the upstreams at once.
+    write_buffer: int
+        Number of bytes written to a client at once, and queued to its
+        transport before waiting for it to drain.
+
+    Examples
+    --------
+    >>> caster = Caster(port=2101)
+    >>> caster.add_mountpoint("BASE", Client("rtk2go.com", "ACASU"),
+    ...                       record={"country": "FRA"})
+    >>> async with caster:
+    ...     await caster.serve_forever()
+    """
+    def __init__(
+            self,
+            host: str = "127.0.0.1",
+            port: int = 2101,
+            drop_policy: str = "drop-oldest",
+            timeout=10,
+            chunk_size: int = UPSTREAM_CHUNK_SIZE,
+            write_buffer: int = WRITE_BUFFER_SIZE):
+        if drop_policy not in DROP_POLICIES:
+            raise ValueError(f"invalid drop policy: {drop_policy}")
+        self.host = host
+        self.port = port
+        self.drop_policy = drop_policy
+        self.timeout = timeout
+        self.chunk_size = chunk_size
+        self.write_buffer = write_buffer
+        self.mountpoints = {}
+        self._server = None
+        self._tasks = set()
+
+    async def __aenter__(self):
+        await self.start()
+        return self
+
+    async def __aexit__(self, *args):
+        await self.close()
+
+    def __repr__(self):
+        return f"Caster: {self.host}:{self.port}"
+
+    def add_mountpoint(
+            self,
+            name: str,
+            source=None,
+            msg_numbers=None,
+            buffer_blocks: int = BUFFER_BLOCKS,
+            record: dict = None) -> Mountpoint:
+        """
+        Add a mountpoint, see ``Mountpoint`` for the parameters.
+
+        Its upstream is read once the caster is started.
+
+        Raises
+        ---------
+        ValueError
+            If the name is already used.
+        """
+        if name in self.mountpoints:
+            raise ValueError(f"duplicate mountpoint: {name}")
+        mountpoint = Mountpoint(
+            name, source, msg_numbers, buffer_blocks, record)
+        self.mountpoints[name] = mountpoint
+        if self._server is not None and source is not None:
+            self._spawn(self._ingest(mountpoint))
+        return mountpoint
+
+    def sourcetable(self) -> str:
+        """
+        Sourcetable with one STR record per mountpoint.
+        """
+        lines = [format_record(mountpoint.record)
+                 for mountpoint in self.mountpoints.values()]
+        return "".join(
+            line + "\r\n" for line in lines + ["ENDSOURCETABLE"])
+
+    def stats(self) -> dict:
+        return {name: mountpoint.stats()
+                for name, mountpoint in self.mountpoints.items()}
+
+    def _spawn(self, coroutine):
+        task = asyncio.ensure_future(coroutine)
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def start(self):
+        self._server = await asyncio.start_server(
+            self._handle, self.host, self.port, backlog=4096)
+        self.port = self._server.sockets[0].getsockname()[1]
+        for mountpoint in self.mountpoints.values():
+            if mountpoint.source is not None:
+                self._spawn(self._ingest(mountpoint))
+
+    async def serve_forever(self):
+        await self._server.serve_forever()
+
+    async def close(self):
+        """
+        Stop listening, disconnect the clients and stop the upstreams.
+
+        Blocking upstreams are not interrupted, their owner closes them.
+        """
+        if self._server is None:
+            return
+        self._server.close()
+        for task in list(self._tasks):
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        await self._server.wait_closed()
+        self._server = None
+
+    async def _ingest(self, mountpoint: Mountpoint):
+        loop = asyncio.get_running_loop()
+        read = mountpoint.source.read
+        # Blocking upstreams are read in a thread of their own.
+        executor = (None if asyncio.iscoroutinefunction(read)
+                    else ThreadPoolExecutor(1, f"caster-{mountpoint.name}"))
+        try:
+            while True:
+                if executor is None:
+                    data = await read(self.chunk_size)
+                else:
+                    data = await loop.run_in_executor(
+                        executor, read, self.chunk_size)
+                if not data:
+                    break
+                mountpoint.feed(data)
+        except Exception as error:
+            mountpoint.error = error
+        finally:
+            mountpoint.close()
+            if executor is not None:
+                executor.shutdown(wait=False)
+
+    async def _handle(self, reader, writer):
+        self._tasks.add(asyncio.current_task())
+        try:
+            await self._serve_client(reader, writer)
+        except (ConnectionError, asyncio.TimeoutError):
+            pass
+        except asyncio.CancelledError:
+            # Cancelled by close, the client is simply disconnected.
+            pass
+        finally:
+            self._tasks.discard(asyncio.current_task())
+            writer.close()
+
+    async def _serve_client(self, reader, writer):
+        request_line = await asyncio.wait_for(reader.readline(), self.timeout)
+        headers = {}
+        while True:
+            line = await asyncio.wait_for(reader.readline(), self.timeout)
+            if line in (b"\r\n", b"\n", b""):
+                break
+            key, value = parse_header_line(line)
+            headers[key] = value
+
+        try:
+            method, target, _ = request_line.decode('latin-1').split()
+        except ValueError:
+            method = target = None
+        if method != "GET":
+            writer.write(b"HTTP/1.1 400 Bad Request\r\n"
+                         b"Connection: close\r\n\r\n")
+            return
+
+        version2 = headers.get("ntrip-version", "").endswith("2.0")
+        mountpoint = self.mountpoints.get(urlsplit(target).path.lstrip("/"))
+        if mountpoint is None or mountpoint.closed:
+            sourcetable = self.sourcetable().encode('utf-8')
+            if version2:
+                writer.write(b"HTTP/1.1 200 OK\r\nNtrip-Version: Ntrip/2.0\r\n"
+                             b"Content-Type: gnss/sourcetable\r\n")
+            else:
+                writer.write(b"SOURCETABLE 200 OK\r\n"
+                             b"Content-Type: text/plain\r\n")
+            writer.write(b"Content-Length: %d\r\nConnection: close\r\n\r\n"
+                         % len(sourcetable) + sourcetable)
+            await writer.drain()
+            return
+
+        if version2:
+            writer.write(b"HTTP/1.1 200 OK\r\nNtrip-Version: Ntrip/2.0\r\n"
+                         b"Content-Type: gnss/data\r\n"
+                         b"Transfer-Encoding: chunked\r\n"
+                         b"Connection: close\r\n\r\n")
+        else:
+            writer.write(b"ICY 200 OK\r\n\r\n")
+        await self._stream(mountpoint, writer, version2)
+
+    async def _stream(self, mountpoint: Mountpoint, writer, chunked: bool):
+        subscriber = Subscriber(mountpoint, writer.get_extra_info('peername'))
+        mountpoint.subscribers.add(subscriber)
+        mountpoint.nr_subscribed += 1
+        transport = writer.transport
+        # Writes wait while the transport holds more than the budget, but
+        # with the disconnect policy, which checks it before writing.
+        transport.set_write_buffer_limits(high=self.write_buffer)
+        try:
+            while True:
+                await mountpoint.wait(subscriber)
+                if subscriber.cursor < mountpoint.first:
+                    if self.drop_policy == "skip-to-latest":
+                        mountpoint.skip(subscriber, mountpoint.head - 1)
+                    else:
+                        mountpoint.skip(subscriber, mountpoint.first)
+                    if self.drop_policy == "disconnect":
+                        mountpoint.nr_disconnected += 1
+                        return
+                if (self.drop_policy == "disconnect"
+                        and subscriber.cursor < mountpoint.head
+                        and transport.get_write_buffer_size()
+                        > self.write_buffer):
+                    # The previous writes did not drain, whatever their size.
+                    mountpoint.skip(subscriber, mountpoint.head)
+                    mountpoint.nr_disconnected += 1
+                    return
+                data = mountpoint.read(subscriber, self.write_buffer)
+                if not data:
+                    break
+                subscriber.bytes_sent += len(data)
+                if chunked:
+                    data = b"%x\r\n%s\r\n" % (len(data), data)
+                writer.write(data)
+                if self.drop_policy != "disconnect":
+                    await writer.drain()
+                elif transport.is_closing():
+                    return
+            if chunked:
+                writer.write(b"0\r\n\r\n")
+            await writer.drain()
+        finally:
+            mountpoint.subscribers.discard(subscriber)
@@ -1,11 +1,31 @@
+import asyncio
+from ssl import CERT_NONE, create_default_context
+import time
+
 import pandas as pd
-from base64 import b64encode
 import requests
 
-from .sourcetable import get_headers, query_to_string
+from .protocol import (
+    build_request, check_response, parse_header_line, parse_status_line,
+    request_headers, split_url, ChunkedDecoder
+)
+from .sourcetable import query_to_string, SourcetableParser
+from .transport import SocketTransport
+
+
+SOURCETABLE_CHUNK_SIZE = 65536
+TRANSPORTS = ("requests", "socket")
 
 
 class Client:
+    """
+    NTRIP client.
+
+    GNSS data are read through requests by default. With the "socket"
+    transport, the caster is read on a plain socket, which handles NTRIP 1.0
+    ``ICY`` answers and fills the buffers given to ``readinto`` without
+    intermediate copies.
+    """
     def __init__(
             self,
             caster_url: str,
@@ -19,28 +39,27 @@ class Client:
             timeout=10,
             outstream=None,
             nmea: str = None,
+            transport: str = "requests",
             ):
+        if transport not in TRANSPORTS:
+            raise ValueError(f"invalid transport: {transport}")
         self.caster_url = caster_url
         self.mountpoint = mountpoint
         self.port = port
+        self.transport = transport
         self.timeout = timeout
         self.ssl = ssl
         self.outstream = outstream
 
-        self.headers = {"Ntrip-Version": f"Ntrip/{ntrip_version}",
-                        "User-Agent": user_agent,
-                        "Connection": "close"}
-
-        if username is not None:
-            if password is None:
-                raise ValueError('missing password')
-            auth = b64encode(f"{username}:{password}".encode('utf-8'))
-            self.headers["Authorization"] = "Basic " + auth.decode('utf-8')
-
-        if nmea is not None:
-            self.headers['Ntrip-GGA'] = nmea
+        self.headers = request_headers(
+            user_agent, ntrip_version, username, password, nmea)
+        self.headers["Connection"] = "close"
 
         self.response = None
+        self._transport = None
+        self.bytes_in = 0
+        self.connect_count = 0
+        self.read_stall_time = 0.0
 
     def __enter__(self):
         return self
@@ -51,16 +70,54 @@ class Client:
     def __repr__(self):
         return f"Ntripclient: {self.caster_url}:{self.port}/{self.mountpoint}"
 
-    def get_sourcetable(self, query: dict = None) -> pd.DataFrame:
+    def stats(self) -> dict:
+        """
+        Client counters, see ``gnss.metrics`` for their export.
+
+        ``read_stall_time`` is the time spent waiting for data in reads.
+        """
+        return {
+            "bytes_in": self.bytes_in,
+            "connects": self.connect_count,
+            "reconnects": max(self.connect_count - 1, 0),
+            "read_stall_time": self.read_stall_time,
+        }
+
+    def request_sourcetable(
+            self, query: dict = None,
+            headers: dict = None) -> requests.Response:
+        """
+        Send a sourcetable request.
+
+        Parameters
+        ----------
+        query: dict
+            Sourcetable filter, see ``query_to_string``.
+        headers: dict
+            Headers added to the client headers, e.g. conditional headers.
+
+        Returns
+        ----------
+        requests.Response
+            Streamed response, checked unless its status is 304.
+
+        Raises
+        ---------
+        RuntimeError
+            If the response is not a sourcetable.
+        """
         url = f"{self.caster_url}:{self.port}"
         params = query_to_string(query) if query is not None else ""
-        sourcetable = pd.DataFrame()
-        with requests.get(
-                url,
-                timeout=self.timeout,
-                headers=self.headers,
-                verify=self.ssl,
-                params=params) as resp:
+        resp = requests.get(
+            url,
+            timeout=self.timeout,
+            headers={**self.headers, **(headers or {})},
+            verify=self.ssl,
+            params=params,
+            stream=True)
+        try:
+            if resp.status_code == 304:
+                return resp
             resp.raise_for_status()
             if "Content-Type" in resp.headers:
                 if resp.headers["Content-Type"] != "gnss/sourcetable":
@@ -69,21 +126,18 @@ class Client:
                         f"{resp.headers['Content-Type']}")
             else:
                 raise RuntimeError("unable to find Content-Type")
+        except Exception:
+            resp.close()
+            raise
+        return resp
 
-            for line in resp.iter_lines():
-                line = line.decode("utf-8")
-                values = line.split(";")
-                try:
-                    headers = get_headers(values[0])
-                except ValueError:
-                    if values[0] == "ENDSOURCETABLE":
-                        break
-                    else:
-                        RuntimeError("invalid sourcetable")
-                sourcetable = sourcetable.append(
-                    dict(zip(headers, values)),
-                    ignore_index=True)
-        return sourcetable
+    def get_sourcetable(self, query: dict = None) -> pd.DataFrame:
+        parser = SourcetableParser()
+        with self.request_sourcetable(query) as resp:
+            for line in resp.iter_lines(chunk_size=SOURCETABLE_CHUNK_SIZE):
+                if not parser.feed(line.decode("utf-8")):
+                    break
+        return parser.to_frame()
 
     def get_data(
             self,
@@ -103,7 +157,13 @@ class Client:
         if self.isclosed():
             self.connect()
 
-        data = self.response.raw.read(nrbytes)
+        start = time.perf_counter()
+        if self._transport is not None:
+            data = self._transport.read(nrbytes)
+        else:
+            data = self.response.raw.read(nrbytes)
+        self.read_stall_time += time.perf_counter() - start
+        self.bytes_in += len(data)
         if self.outstream is not None:
             self.outstream.write(data)
         return data
@@ -111,7 +171,59 @@ class Client:
     def read(self, nrbytes: int):
         return self.get_data(nrbytes)
 
-    def connect(self):
+    def readinto(self, buffer) -> int:
+        """
+        Read GNSS data into buffer, connecting first if needed.
+
+        Returns
+        ----------
+        int
+            Number of bytes read, 0 when the caster closed the stream.
+        """
+        if self.isclosed():
+            self.connect()
+
+        start = time.perf_counter()
+        if self._transport is not None:
+            nrbytes = self._transport.readinto(buffer)
+        else:
+            nrbytes = self.response.raw.readinto(buffer)
+        self.read_stall_time += time.perf_counter() - start
+        self.bytes_in += nrbytes
+        if self.outstream is not None:
+            self.outstream.write(memoryview(buffer)[:nrbytes])
+        return nrbytes
+
+    def make_transport(self) -> SocketTransport:
+        """
+        Create a socket transport to the client mountpoint.
+
+        The transport shares the client headers, so that header updates
+        apply to its next request.
+        """
+        host, port, tls = split_url(self.caster_url, self.port)
+        return SocketTransport(
+            host, port, self.mountpoint, self.headers, tls=tls,
+            verify=self.ssl, timeout=self.timeout)
+
+    def connect(self, transport: SocketTransport = None):
+        """
+        Connect to the mountpoint.
+
+        Parameters
+        ----------
+        transport: SocketTransport
+            Transport to use with the socket transport, e.g. one already
+            opened by ``make_transport``, a new one if None.
+        """
+        if self.transport == "socket":
+            self.close()
+            self._transport = (self.make_transport() if transport is None
+                               else transport)
+            self._transport.connect()
+            self.connect_count += 1
+            return
+
         url = f"{self.caster_url}:{self.port}/{self.mountpoint}"
         self.response = requests.get(
             url,
@@ -126,13 +238,18 @@ class Client:
                 raise RuntimeError(
                     "invalid content-type: "
                     f"{self.response.headers['Content-Type']}")
+        self.connect_count += 1
 
     def close(self):
-        if not self.isclosed():
+        if self._transport is not None:
+            self._transport.close()
+        elif not self.isclosed():
             self.response.close()
 
     def isclosed(self):
-        if self.response is None:
+        if self.transport == "socket":
+            return self._transport is None or self._transport.isclosed()
+        elif self.response is None:
             return True
         elif self.response.raw is None:
             return True
@@ -140,3 +257,165 @@ class Client:
             return True
         else:
             return False
+
+
+class AsyncClient:
+    """
+    NTRIP 1.0 and 2.0 client on asyncio streams.
+
+    The client is meant to be the stream of a ``Parser`` iterated with
+    ``aiter_messages``, so that a single event loop can ingest many
+    mountpoints.
+
+    Examples
+    --------
+    >>> async with AsyncClient("rtk2go.com", mountpoint="ACASU") as client:
+    ...     parser = Parser(client)
+    ...     async for msg in parser.aiter_messages():
+    ...         print(msg.name)
+    """
+    def __init__(
+            self,
+            caster_url: str,
+            mountpoint: str = "",
+            port: int = 2101,
+            username: str = None,
+            password: str = None,
+            user_agent: str = "ntrip-client",
+            ntrip_version: str = "2.0",
+            ssl: bool = False,
+            timeout=10,
+            outstream=None,
+            nmea: str = None,
+            ):
+        self.caster_url = caster_url
+        self.host, self.port, self.tls = split_url(caster_url, port)
+        self.mountpoint = mountpoint
+        self.timeout = timeout
+        self.ssl = ssl
+        self.outstream = outstream
+        self.headers = request_headers(
+            user_agent, ntrip_version, username, password, nmea)
+        self.response_headers = {}
+        self._reader = None
+        self._writer = None
+        self._chunked = None
+        self._pending = b""
+        self.bytes_in = 0
+        self.connect_count = 0
+        self.read_stall_time = 0.0
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *args):
+        await self.close()
+
+    def __repr__(self):
+        return (f"AsyncNtripclient: {self.host}:{self.port}/"
+                f"{self.mountpoint}")
+
+    def stats(self) -> dict:
+        """
+        Client counters, see ``Client.stats``.
+        """
+        return {
+            "bytes_in": self.bytes_in,
+            "connects": self.connect_count,
+            "reconnects": max(self.connect_count - 1, 0),
+            "read_stall_time": self.read_stall_time,
+        }
+
+    async def connect(self):
+        ssl_context = None
+        if self.tls:
+            ssl_context = create_default_context()
+            if not self.ssl:
+                ssl_context.check_hostname = False
+                ssl_context.verify_mode = CERT_NONE
+
+        self._reader, self._writer = await asyncio.wait_for(
+            asyncio.open_connection(self.host, self.port, ssl=ssl_context),
+            self.timeout)
+        self._writer.write(build_request(
+            self.host, self.port, self.mountpoint, self.headers))
+        try:
+            await asyncio.wait_for(self._read_response(), self.timeout)
+        except BaseException:
+            await self.close()
+            raise
+        self.connect_count += 1
+
+    async def _read_response(self):
+        protocol, status, _ = parse_status_line(await self._reader.readline())
+        self.response_headers = {}
+        self._pending = b""
+        while True:
+            if protocol == "ICY":
+                # NTRIP 1.0 casters may send the data right after the
+                # status line, without headers nor blank line.
+                first = await self._reader.read(1)
+                if first == b"\r":
+                    await self._reader.readline()
+                    break
+                elif not first.isalpha():
+                    self._pending = first
+                    break
+                line = first + await self._reader.readline()
+            else:
+                line = await self._reader.readline()
+                if line in (b"\r\n", b"\n", b""):
+                    break
+            key, value = parse_header_line(line)
+            self.response_headers[key] = value
+
+        check_response(protocol, status, self.response_headers)
+        encoding = self.response_headers.get("transfer-encoding", "")
+        self._chunked = ChunkedDecoder() if encoding == "chunked" else None
+
+    async def read(self, nrbytes: int) -> bytes:
+        """
+        Read at most nrbytes of GNSS data, connecting first if needed.
+
+        Returns
+        ----------
+        bytes
+            Data, empty when the caster closed the stream.
+        """
+        if self.isclosed():
+            await self.connect()
+
+        if self._pending:
+            data, self._pending = self._pending[:nrbytes], b""
+        else:
+            data = b""
+            start = time.perf_counter()
+            while not data:
+                data = await asyncio.wait_for(
+                    self._reader.read(nrbytes), self.timeout)
+                if not data:
+                    await self.close()
+                    break
+                if self._chunked is not None:
+                    data = self._chunked.decode(data)
+                    if self._chunked.finished and not data:
+                        await self.close()
+                        break
+            self.read_stall_time += time.perf_counter() - start
+
+        self.bytes_in += len(data)
+        if self.outstream is not None:
+            self.outstream.write(data)
+        return data
+
+    async def close(self):
+        if self._writer is not None:
+            writer, self._writer, self._reader = self._writer, None, None
+            writer.close()
+            try:
+                await writer.wait_closed()
+            except (ConnectionError, OSError):
+                pass
+
+    def isclosed(self):
+        return self._reader is None
@@ -0,0 +1,173 @@
+import asyncio
+import time
+from typing import NamedTuple
+
+from ..rtcm.parser import Parser, BUFFER_SIZE
+from ..rtcm.messages import RtcmMessage
+
+
+class TaggedMessage(NamedTuple):
+    mountpoint: str
+    message: RtcmMessage
+
+
+class PoolStream:
+    """
+    One stream of a ``MountpointPool`` with its parser and counters.
+    """
+    def __init__(self, name: str, client, parser: Parser):
+        self.name = name
+        self.client = client
+        self.parser = parser
+        self.bytes_count = 0
+        self.msg_count = 0
+        self.started = None
+        self.stopped = None
+        self.error = None
+
+    @property
+    def running(self):
+        return self.started is not None and self.stopped is None
+
+    def stats(self) -> dict:
+        now = time.monotonic() if self.stopped is None else self.stopped
+        elapsed = now - self.started if self.started is not None else 0.0
+        return {
+            "bytes": self.bytes_count,
+            "frames": sum(self.parser.frame_counts.values()),
+            "messages": self.msg_count,
+            "crc_errors": self.parser.error_count,
+            "elapsed": elapsed,
+            "bytes_per_second": self.bytes_count / elapsed if elapsed else 0.0,
+            "messages_per_second":
+                self.msg_count / elapsed if elapsed else 0.0,
+            "running": self.running,
+            "error": self.error,
+        }
+
+
+class MountpointPool:
+    """
+    Ingest many NTRIP streams on a single event loop.
+
+    Each stream reads from its own ``AsyncClient`` into its own ``Parser``
+    and the decoded messages of every stream are delivered, tagged with
+    their mountpoint, into one output queue. Sockets are multiplexed by the
+    event loop, there is no thread per stream.
+
+    Parameters
+    ----------
+    maxsize: int
+        Size of the output queue, 0 for unbounded. A full queue suspends
+        the streams trying to deliver.
+    chunk_size: int
+        Number of bytes requested on each read.
+
+    Examples
+    --------
+    >>> pool = MountpointPool()
+    >>> for mountpoint in ("MP1", "MP2"):
+    ...     pool.add(AsyncClient("caster.com", mountpoint=mountpoint))
+    >>> async for mountpoint, msg in pool.messages():
+    ...     print(mountpoint, msg.name)
+    """
+    def __init__(self, maxsize: int = 0, chunk_size: int = BUFFER_SIZE):
+        self.maxsize = maxsize
+        self.chunk_size = chunk_size
+        self.streams = {}
+        self.queue = None
+
+    def __len__(self):
+        return len(self.streams)
+
+    def add(self, client, *msg_types, name: str = None, **parser_kwargs):
+        """
+        Add a stream to the pool.
+
+        Parameters
+        ----------
+        client: AsyncClient
+            Client of the stream, or any object with a coroutine ``read``.
+        msg_types: RtcmMessage
+            Message types to deliver, all implemented types by default.
+        name: str
+            Tag of the messages, the client mountpoint by default.
+        parser_kwargs:
+            Extra ``Parser`` arguments, e.g. lazy.
+
+        Raises
+        ---------
+        ValueError
+            If the name is already used.
+        """
+        name = client.mountpoint if name is None else name
+        if name in self.streams:
+            raise ValueError(f"stream {name} already in pool")
+        parser = Parser(**parser_kwargs)
+        parser.subscribe(*msg_types)
+        stream = PoolStream(name, client, parser)
+        self.streams[name] = stream
+        return stream
+
+    def stats(self) -> dict:
+        """
+        Counters and throughput of every stream, by name.
+        """
+        return {name: stream.stats() for name, stream in self.streams.items()}
+
+    async def _ingest(self, stream: PoolStream):
+        stream.started = time.monotonic()
+        client = stream.client
+        try:
+            while True:
+                data = await client.read(self.chunk_size)
+                if not data:
+                    break
+                stream.bytes_count += len(data)
+                for msg in stream.parser.feed(data):
+                    stream.msg_count += 1
+                    await self.queue.put(TaggedMessage(stream.name, msg))
+        except asyncio.CancelledError:
+            raise
+        except Exception as error:
+            stream.error = error
+        finally:
+            stream.stopped = time.monotonic()
+            close = getattr(client, 'close', None)
+            if close is not None:
+                await close()
+
+    async def run(self):
+        """
+        Ingest every stream until all of them end.
+
+        A stream failing is stopped and its exception recorded in its
+        stats, the other streams go on. None is put in the queue at the
+        end.
+        """
+        if self.queue is None:
+            self.queue = asyncio.Queue(self.maxsize)
+        await asyncio.gather(
+            *(self._ingest(stream) for stream in self.streams.values()))
+        await self.queue.put(None)
+
+    async def messages(self):
+        """
+        Run the pool and iterate over the tagged messages.
+        """
+        if self.queue is None:
+            self.queue = asyncio.Queue(self.maxsize)
+        task = asyncio.ensure_future(self.run())
+        try:
+            while True:
+                item = await self.queue.get()
+                if item is None:
+                    break
+                yield item
+        finally:
+            if not task.done():
+                task.cancel()
+                try:
+                    await task
+                except asyncio.CancelledError:
+                    pass
@@ -0,0 +1,174 @@
+from base64 import b64encode
+from urllib.parse import urlsplit
+
+
+def request_headers(
+        user_agent: str = "ntrip-client",
+        ntrip_version: str = "2.0",
+        username: str = None,
+        password: str = None,
+        nmea: str = None) -> dict:
+    headers = {"Ntrip-Version": f"Ntrip/{ntrip_version}",
+               "User-Agent": user_agent}
+
+    if username is not None:
+        if password is None:
+            raise ValueError('missing password')
+        auth = b64encode(f"{username}:{password}".encode('utf-8'))
+        headers["Authorization"] = "Basic " + auth.decode('utf-8')
+
+    if nmea is not None:
+        headers['Ntrip-GGA'] = nmea
+    return headers
+
+
+def split_url(caster_url: str, port: int):
+    """
+    Return host, port and TLS flag of a caster url.
+
+    The scheme is optional, https enables TLS.
+    """
+    url = urlsplit(caster_url if "://" in caster_url else f"//{caster_url}")
+    return url.hostname, url.port or port, url.scheme == "https"
+
+
+def build_request(
+        host: str,
+        port: int,
+        mountpoint: str,
+        headers: dict,
+        query: str = "") -> bytes:
+    """
+    Build a NTRIP GET request.
+
+    NTRIP 1.0 requests use HTTP/1.0 and a "NTRIP " prefixed user agent,
+    NTRIP 2.0 requests use HTTP/1.1 with a Host header.
+    """
+    headers = dict(headers)
+    path = f"/{mountpoint}" + (f"?{query}" if query else "")
+    if headers.get("Ntrip-Version", "").endswith("1.0"):
+        del headers["Ntrip-Version"]
+        if not headers.get("User-Agent", "").startswith("NTRIP"):
+            headers["User-Agent"] = f"NTRIP {headers.get('User-Agent', '')}"
+        lines = [f"GET {path} HTTP/1.0"]
+    else:
+        lines = [f"GET {path} HTTP/1.1", f"Host: {host}:{port}"]
+        headers.setdefault("Connection", "close")
+    lines += [f"{key}: {value}" for key, value in headers.items()]
+    return ("\r\n".join(lines) + "\r\n\r\n").encode('utf-8')
+
+
+def parse_status_line(line: bytes):
+    """
+    Parse the first line of a caster response.
+
+    Returns
+    ----------
+    tuple
+        Protocol ("ICY", "SOURCETABLE" or "HTTP/1.x"), status code and
+        reason.
+
+    Raises
+    ---------
+    RuntimeError
+        If the line is not a valid status line.
+    """
+    try:
+        protocol, status, reason = line.decode('latin-1').strip().split(
+            " ", 2)
+        return protocol, int(status), reason
+    except ValueError:
+        raise RuntimeError(f"invalid response: {line!r}") from None
+
+
+def parse_header_line(line: bytes):
+    key, _, value = line.decode('latin-1').partition(":")
+    return key.strip().lower(), value.strip()
+
+
+def check_response(protocol: str, status: int, headers: dict):
+    """
+    Check that a caster response carries GNSS data.
+
+    Raises
+    ---------
+    ValueError
+        If the caster answers with its sourcetable, the mountpoint does not
+        exist.
+    RuntimeError
+        On any other unexpected answer.
+    """
+    content_type = headers.get("content-type")
+    if protocol == "SOURCETABLE" or content_type == "gnss/sourcetable":
+        raise ValueError("Invalid mountpoint")
+    if status != 200:
+        raise RuntimeError(f"caster error: {protocol} {status}")
+    if protocol != "ICY" and content_type != "gnss/data":
+        raise RuntimeError(f"invalid content-type: {content_type}")
+
+
+class ChunkedDecoder:
+    """
+    Incremental decoder of HTTP chunked transfer encoding.
+
+    Bytes are fed as they arrive, whatever the chunk boundaries, and the
+    decoded payload is returned. Between chunk headers, ``payload_size``
+    bytes of payload can also be read by the caller directly and accounted
+    for with ``skip``.
+    """
+    def __init__(self):
+        self.finished = False
+        self._remaining = 0
+        self._pending = bytearray()
+        self._state = "size"
+
+    @property
+    def payload_size(self) -> int:
+        """
+        Number of payload bytes directly following the data fed so far.
+        """
+        if self._state == "data" and not self._pending:
+            return self._remaining
+        return 0
+
+    def skip(self, nrbytes: int):
+        """
+        Account for payload bytes read without being fed.
+        """
+        if nrbytes > self.payload_size:
+            raise ValueError("skip beyond the current chunk")
+        self._remaining -= nrbytes
+        if not self._remaining:
+            self._state = "end"
+
+    def decode(self, data: bytes) -> bytes:
+        self._pending += data
+        output = bytearray()
+        while self._pending and not self.finished:
+            if self._state == "data":
+                size = min(self._remaining, len(self._pending))
+                output += self._pending[:size]
+                del self._pending[:size]
+                self._remaining -= size
+                if not self._remaining:
+                    self._state = "end"
+                continue
+
+            end = self._pending.find(b"\r\n")
+            if end < 0:
+                break
+            line = bytes(self._pending[:end])
+            del self._pending[:end + 2]
+            if self._state == "end":
+                self._state = "size"
+                continue
+
+            try:
+                self._remaining = int(line.split(b";")[0], 16)
+            except ValueError:
+                raise RuntimeError(f"invalid chunk size: {line!r}") from None
+            if self._remaining:
+                self._state = "data"
+            else:
+                self.finished = True
+        return bytes(output)
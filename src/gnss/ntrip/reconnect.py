@@ -0,0 +1,253 @@
+from collections import deque
+import random
+import time
+
+import requests
+
+from ..rtcm.parser import Framer, MAX_FRAME_LENGTH
+from .client import Client
+
+
+RETRY_ERRORS = (OSError, RuntimeError, requests.RequestException)
+HISTORY_SIZE = 1000
+
+
+class ReconnectingStream:
+    """
+    Stream reading a client and reconnecting it when the link drops.
+
+    The stream is meant to be the stream of a ``Parser``: reconnections
+    happen within its ``readinto``, so the parser keeps its state, counts
+    and callbacks. The incomplete frame the parser may hold when the link
+    drops is dropped, so that the first frame of the new connection is not
+    taken for its end.
+
+    A dropped link is reconnected at once, failed attempts are then retried
+    with a jittered exponential backoff. An attempt fails when the
+    connection cannot be opened, or when it closes before a valid frame,
+    like the ones some casters accept and close at once: attempts are only
+    counted afresh once a valid frame arrived. Before each attempt, the
+    ``Ntrip-GGA`` header is set from gga.
+    With standby, a connection to the caster is kept opened ahead, saving
+    the TCP and TLS handshakes to the next reconnection.
+
+    Downtime is measured from the link drop to the first valid frame of the
+    new connection, and kept in ``first_frame_times``.
+
+    Parameters
+    ----------
+    client: Client
+        Client of the mountpoint.
+    parser: Parser
+        Parser reading the stream, to resync on reconnection.
+    gga: str or callable
+        NMEA GGA sentence sent with each connection request, or a function
+        returning the current one.
+    backoff_min: float
+        Delay before the second attempt, in seconds.
+    backoff_max: float
+        Maximum delay between attempts, in seconds.
+    max_attempts: int
+        Number of failed attempts in a row before giving up, unlimited if
+        None.
+    standby: bool
+        Keep a connection opened ahead, requires the socket transport.
+    standby_ttl: float
+        Age in seconds after which the standby connection is renewed.
+
+    Raises
+    ---------
+    ValueError
+        If standby is requested without the socket transport.
+
+    Examples
+    --------
+    >>> client = Client("caster.example.com", "MOUNT", transport="socket")
+    >>> parser = Parser()
+    >>> stream = ReconnectingStream(client, parser, gga=rover.gga,
+    ...                             standby=True)
+    >>> parser.load_stream(stream)
+    >>> for msg in parser.iter_messages():
+    ...     pass
+    """
+    def __init__(
+            self,
+            client: Client,
+            parser=None,
+            gga=None,
+            backoff_min: float = 0.5,
+            backoff_max: float = 30.0,
+            max_attempts: int = None,
+            standby: bool = False,
+            standby_ttl: float = 10.0,
+            errors: tuple = RETRY_ERRORS,
+            sleep=time.sleep,
+            clock=time.monotonic):
+        if standby and client.transport != "socket":
+            raise ValueError("standby requires the socket transport")
+        self.client = client
+        self.parser = parser
+        self.gga = gga
+        self.backoff_min = backoff_min
+        self.backoff_max = backoff_max
+        self.max_attempts = max_attempts
+        self.standby = standby
+        self.standby_ttl = standby_ttl
+        self.errors = errors
+        self.sleep = sleep
+        self.clock = clock
+
+        self.connect_count = 0
+        self.outage_count = 0
+        self.failed_attempts = 0
+        self.standby_count = 0
+        self.last_error = None
+        self.first_frame_times = deque(maxlen=HISTORY_SIZE)
+        self._down_since = None
+        self._attempt = 0
+        self._probe = None
+        self._standby = None
+        self._standby_opened_at = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    def close(self):
+        self.client.close()
+        self._close_standby()
+
+    def stats(self) -> dict:
+        times = self.first_frame_times
+        return {
+            "connects": self.connect_count,
+            "outages": self.outage_count,
+            "failed_attempts": self.failed_attempts,
+            "standby_connects": self.standby_count,
+            "down": self._down_since is not None,
+            "last_time_to_first_frame": times[-1] if times else None,
+            "mean_time_to_first_frame": (sum(times) / len(times)
+                                         if times else None),
+            "max_time_to_first_frame": max(times) if times else None,
+        }
+
+    def readinto(self, buffer) -> int:
+        """
+        Read GNSS data into buffer, reconnecting as long as needed.
+
+        Raises
+        ---------
+        Exception
+            The last connection error once max_attempts attempts failed, or
+            ConnectionError if the last one was closed before a valid frame.
+        """
+        while True:
+            if self.client.isclosed():
+                if self.connect_count:
+                    self._disconnected()
+                self._reconnect()
+            try:
+                nrbytes = self.client.readinto(buffer)
+            except self.errors as error:
+                self.last_error = error
+                nrbytes = 0
+            if not nrbytes and self._probe is not None:
+                # Closed before a valid frame.
+                self._attempt += 1
+                self.failed_attempts += 1
+            if nrbytes:
+                if self._probe is not None:
+                    self._check_first_frame(memoryview(buffer)[:nrbytes])
+                if (self.standby and self.clock() - self._standby_opened_at
+                        >= self.standby_ttl):
+                    self._open_standby()
+                return nrbytes
+            self._disconnected()
+
+    def read(self, nrbytes: int) -> bytes:
+        buffer = bytearray(nrbytes)
+        return bytes(memoryview(buffer)[:self.readinto(buffer)])
+
+    def _disconnected(self):
+        if self._down_since is None:
+            self._down_since = self.clock()
+            self.outage_count += 1
+        self.client.close()
+        if self.parser is not None:
+            self.parser.resync()
+
+    def _delay(self, attempt: int) -> float:
+        ceiling = min(self.backoff_max, self.backoff_min * 2 ** (attempt - 1))
+        return self.backoff_min + random.random() * (
+            max(ceiling, self.backoff_min) - self.backoff_min)
+
+    def _reconnect(self):
+        if self._down_since is None:
+            self._down_since = self.clock()
+        if self._attempt:
+            if (self.max_attempts is not None
+                    and self._attempt >= self.max_attempts):
+                raise ConnectionError(
+                    f"no valid frame after {self._attempt} attempts")
+            self.sleep(self._delay(self._attempt))
+        while True:
+            if self.gga is not None:
+                self.client.headers["Ntrip-GGA"] = (
+                    self.gga() if callable(self.gga) else self.gga)
+            standby = self._take_standby()
+            try:
+                self.client.connect(standby)
+                break
+            except self.errors as error:
+                self.last_error = error
+                self.failed_attempts += 1
+                if standby is not None:
+                    continue
+                self._attempt += 1
+                if (self.max_attempts is not None
+                        and self._attempt >= self.max_attempts):
+                    raise
+                self.sleep(self._delay(self._attempt))
+
+        self.connect_count += 1
+        if standby is not None:
+            self.standby_count += 1
+        self._probe = Framer()
+        if self.standby:
+            self._open_standby()
+
+    def _check_first_frame(self, data):
+        for start in range(0, len(data), MAX_FRAME_LENGTH):
+            self._probe.feed(data[start:start + MAX_FRAME_LENGTH])
+            if self._probe.next_frame() is not None:
+                self.first_frame_times.append(self.clock() - self._down_since)
+                self._down_since = None
+                self._attempt = 0
+                self._probe = None
+                return
+
+    def _open_standby(self):
+        self._close_standby()
+        self._standby_opened_at = self.clock()
+        transport = self.client.make_transport()
+        try:
+            transport.open()
+        except self.errors as error:
+            self.last_error = error
+            return
+        self._standby = transport
+
+    def _take_standby(self):
+        standby, self._standby = self._standby, None
+        if standby is not None and (self.clock() - self._standby_opened_at
+                                    >= self.standby_ttl):
+            standby.close()
+            standby = None
+        return standby
+
+    def _close_standby(self):
+        if self._standby is not None:
+            self._standby.close()
+            self._standby = None
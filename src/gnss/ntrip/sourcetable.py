@@ -1,5 +1,8 @@
 from urllib.parse import quote
 
+import numpy as np
+import pandas as pd
+
 
 STR_HEADERS = ("type", "mountpoint", "identifier", "format", "format-details",
                "carrier", "nav-system", "network", "country", "latitude",
@@ -14,6 +17,13 @@ CAS_HEADERS = ("type", "host", "port", "identifier", "operator", "nmea",
                "fallback_ip", "misc")
 
 
+RECORD_TYPES = ("CAS", "NET", "STR")
+
+FLOAT_FIELDS = frozenset(("latitude", "longitude"))
+INT_FIELDS = frozenset(("port", "nmea", "solution", "bitrate"))
+MISSING_INT = -1
+
+
 def get_headers(type_):
     if type_ == "CAS":
         headers = CAS_HEADERS
@@ -44,3 +54,150 @@ def query_to_string(query: dict):
             filter_string = ";".join(filter_strings)
             query_strings.append(f"{key}={filter_string}")
     return "&".join(query_strings).rstrip(";")
+
+
+def format_record(record: dict) -> str:
+    """
+    Format a sourcetable record as a line, without line ending.
+
+    The record type is taken from its "type" field, fields are written in
+    the order of the headers of that type and missing ones are empty.
+    """
+    headers = get_headers(record["type"])
+    return ";".join(str(record.get(header, "")) for header in headers)
+
+
+def _to_float(values: list) -> np.ndarray:
+    try:
+        return np.array(values, dtype=np.float64)
+    except ValueError:
+        return pd.to_numeric(
+            pd.Series(values, dtype=object), errors='coerce'
+        ).to_numpy(dtype=np.float64, na_value=np.nan)
+
+
+def _to_int(values: list) -> np.ndarray:
+    try:
+        return np.array(values, dtype=np.int64)
+    except ValueError:
+        floats = _to_float(values)
+        return np.where(
+            np.isnan(floats), MISSING_INT, floats).astype(np.int64)
+
+
+class SourcetableParser:
+    """
+    Streaming sourcetable parser.
+
+    Records are split as lines arrive and their fields appended to one
+    column per header, numeric fields are converted once per column at the
+    end. A ``misc`` field holding ``;`` is kept whole and missing trailing
+    fields are empty.
+
+    Examples
+    --------
+    >>> parser = SourcetableParser()
+    >>> for line in lines:
+    ...     if not parser.feed(line):
+    ...         break
+    >>> sourcetable = parser.to_frame()
+    """
+    def __init__(self):
+        self._columns = {
+            type_: tuple([] for _ in get_headers(type_))
+            for type_ in RECORD_TYPES}
+        self._rows = {type_: [] for type_ in RECORD_TYPES}
+        self.nr_rows = 0
+        self.finished = False
+
+    def __len__(self):
+        return self.nr_rows
+
+    def feed(self, line: str) -> bool:
+        """
+        Parse one sourcetable line.
+
+        Returns
+        ----------
+        bool
+            False once the ``ENDSOURCETABLE`` line is reached.
+
+        Raises
+        ---------
+        RuntimeError
+            If the line is not a CAS, NET or STR record.
+        """
+        line = line.rstrip("\r\n")
+        if not line:
+            return not self.finished
+        type_, _, _ = line.partition(";")
+        try:
+            columns = self._columns[type_]
+        except KeyError:
+            if type_ == "ENDSOURCETABLE":
+                self.finished = True
+                return False
+            raise RuntimeError("invalid sourcetable")
+
+        values = line.split(";", len(columns) - 1)
+        if len(values) < len(columns):
+            values += [""] * (len(columns) - len(values))
+        for column, value in zip(columns, values):
+            column.append(value)
+        self._rows[type_].append(self.nr_rows)
+        self.nr_rows += 1
+        return True
+
+    def columns(self, type_: str) -> dict:
+        """
+        Typed columns of the records of one type.
+
+        Latitude and longitude are float64, NaN when missing. Port, NMEA,
+        solution and bitrate are int64, ``MISSING_INT`` when missing. Other
+        fields are object arrays of strings.
+        """
+        columns = {}
+        for header, values in zip(get_headers(type_), self._columns[type_]):
+            if header in FLOAT_FIELDS:
+                columns[header] = _to_float(values)
+            elif header in INT_FIELDS:
+                columns[header] = _to_int(values)
+            else:
+                array = np.empty(len(values), dtype=object)
+                array[:] = values
+                columns[header] = array
+        return columns
+
+    def to_frame(self) -> pd.DataFrame:
+        """
+        Build the sourcetable as a single DataFrame, in the line order.
+
+        Integer fields use the pandas nullable ``Int64`` type.
+        """
+        frames = []
+        for type_ in RECORD_TYPES:
+            if not self._rows[type_]:
+                continue
+            columns = self.columns(type_)
+            for header in INT_FIELDS.intersection(columns):
+                values = columns[header]
+                columns[header] = pd.arrays.IntegerArray(
+                    values, values == MISSING_INT)
+            frames.append(pd.DataFrame(columns, index=self._rows[type_]))
+        if not frames:
+            return pd.DataFrame()
+        sourcetable = pd.concat(frames) if len(frames) > 1 else frames[0]
+        return sourcetable.sort_index().reset_index(drop=True)
+
+
+def parse_sourcetable(lines) -> pd.DataFrame:
+    """
+    Parse sourcetable lines up to ``ENDSOURCETABLE``.
+
+    See ``SourcetableParser`` for the result format.
+    """
+    parser = SourcetableParser()
+    for line in lines:
+        if not parser.feed(line):
+            break
+    return parser.to_frame()
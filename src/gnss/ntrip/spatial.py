@@ -0,0 +1,375 @@
+import numpy as np
+import pandas as pd
+
+
+EARTH_RADIUS = 6371008.8
+BLOCK_SIZE = 1 << 22
+
+
+def _unit_vectors(latitude, longitude) -> np.ndarray:
+    latitude = np.radians(latitude)
+    longitude = np.radians(longitude)
+    cos_latitude = np.cos(latitude)
+    return np.stack([cos_latitude * np.cos(longitude),
+                     cos_latitude * np.sin(longitude),
+                     np.sin(latitude)], axis=-1)
+
+
+def _angles(points: np.ndarray, point: np.ndarray) -> np.ndarray:
+    chords = np.sqrt(((points - point) ** 2).sum(axis=-1))
+    return 2 * np.arcsin(np.minimum(chords / 2, 1))
+
+
+def _match(values: np.ndarray, predicate) -> np.ndarray:
+    uniques, inverse = np.unique(values.astype(str), return_inverse=True)
+    return np.array([predicate(value) for value in uniques],
+                    dtype=bool)[inverse.ravel()]
+
+
+class SpatialIndex:
+    """
+    Nearest mountpoint lookup over the STR records of a sourcetable.
+
+    Stations are bucketed in a latitude/longitude grid. Distances are great
+    circle distances on a sphere of radius ``EARTH_RADIUS``, within 0.5% of
+    the WGS84 geodesic distance, and are computed from unit vectors so that
+    queries across the antimeridian and near the poles are exact.
+
+    Queries only visit the grid cells intersecting the searched cap. Batches
+    of k-nearest queries are grouped by grid cell, the stations which can be
+    the nearest of any point of a cell are gathered once and the queries of
+    the cell answered with one matrix product against them.
+
+    Parameters
+    ----------
+    latitude: array_like
+        Station latitudes, in degrees.
+    longitude: array_like
+        Station longitudes, in degrees.
+    formats: array_like
+        Station formats, e.g. "RTCM 3.2".
+    nav_systems: array_like
+        Station navigation systems, e.g. "GPS+GLO".
+    mountpoints: array_like
+        Station mountpoints.
+    rows: array_like
+        Label of each station in its sourcetable, positions by default.
+    cell_size: float
+        Grid cell size, in degrees.
+
+    Examples
+    --------
+    >>> index = SpatialIndex.from_sourcetable(client.get_sourcetable())
+    >>> distances, stations = index.nearest(45.5, 4.8, k=3)
+    >>> index.mountpoints[stations]
+    >>> distances, stations = index.nearest(lats, lons, nav_systems="GAL")
+    """
+    def __init__(
+            self,
+            latitude,
+            longitude,
+            formats=None,
+            nav_systems=None,
+            mountpoints=None,
+            rows=None,
+            cell_size: float = 1.0):
+        self.latitude = np.asarray(latitude, dtype=np.float64)
+        self.longitude = (
+            np.asarray(longitude, dtype=np.float64) + 180) % 360 - 180
+        size = len(self.latitude)
+        if len(self.longitude) != size:
+            raise ValueError("latitude and longitude lengths differ")
+        if np.isnan(self.latitude).any() or np.isnan(self.longitude).any():
+            raise ValueError("missing station position")
+
+        def strings(values):
+            if values is None:
+                values = [""] * size
+            array = np.empty(size, dtype=object)
+            array[:] = list(values)
+            return array
+
+        self.formats = strings(formats)
+        self.nav_systems = strings(nav_systems)
+        self.mountpoints = strings(mountpoints)
+        self.rows = np.arange(size) if rows is None else np.asarray(rows)
+        self._xyz = _unit_vectors(self.latitude, self.longitude)
+
+        self.cell_size = cell_size
+        self._nr_rows = int(np.ceil(180 / cell_size))
+        self._nr_cols = int(np.ceil(360 / cell_size))
+        cells = self._cells(self.latitude, self.longitude)
+        self._order = np.argsort(cells, kind='stable')
+        self._cell_start = np.searchsorted(
+            cells[self._order], np.arange(self._nr_rows * self._nr_cols + 1))
+
+    @classmethod
+    def from_sourcetable(cls, sourcetable: pd.DataFrame, **kwargs):
+        """
+        Index the STR records of a sourcetable.
+
+        Records without position are left out, ``rows`` holds the frame
+        labels of the indexed records.
+        """
+        records = sourcetable[sourcetable['type'] == "STR"]
+        records = records[
+            records['latitude'].notna() & records['longitude'].notna()]
+        return cls(
+            records['latitude'].to_numpy(dtype=np.float64),
+            records['longitude'].to_numpy(dtype=np.float64),
+            formats=records['format'].to_numpy(),
+            nav_systems=records['nav-system'].to_numpy(),
+            mountpoints=records['mountpoint'].to_numpy(),
+            rows=records.index.to_numpy(),
+            **kwargs)
+
+    def __len__(self):
+        return len(self.latitude)
+
+    def _grid_rows(self, latitude) -> np.ndarray:
+        return np.clip(np.floor((latitude + 90) / self.cell_size),
+                       0, self._nr_rows - 1).astype(np.intp)
+
+    def _cells(self, latitude, longitude) -> np.ndarray:
+        rows = self._grid_rows(latitude)
+        cols = np.floor((longitude + 180) / self.cell_size).astype(
+            np.intp) % self._nr_cols
+        return rows * self._nr_cols + cols
+
+    def mask(self, formats=None, nav_systems=None) -> np.ndarray:
+        """
+        Select the stations matching filters.
+
+        Parameters
+        ----------
+        formats: str or list of str
+            Accepted format prefixes, case insensitive, e.g. "RTCM 3".
+        nav_systems: str or list of str
+            Navigation systems all required, e.g. ["GPS", "GAL"].
+
+        Returns
+        ----------
+        numpy.ndarray
+            Boolean selection of the stations, None without filter.
+        """
+        if formats is None and nav_systems is None:
+            return None
+        mask = np.ones(len(self), dtype=bool)
+        if formats is not None and len(self):
+            if isinstance(formats, str):
+                formats = [formats]
+            prefixes = tuple(format_.upper() for format_ in formats)
+            mask &= _match(self.formats,
+                           lambda value: value.upper().startswith(prefixes))
+        if nav_systems is not None and len(self):
+            if isinstance(nav_systems, str):
+                nav_systems = [nav_systems]
+            required = {system.upper() for system in nav_systems}
+            mask &= _match(self.nav_systems, lambda value: required.issubset(
+                value.upper().split("+")))
+        return mask
+
+    def _candidates(self, latitude: float, longitude: float,
+                    angle: float) -> np.ndarray:
+        """
+        Stations of the grid cells intersecting a spherical cap.
+        """
+        angle = np.degrees(angle)
+        first_row, last_row = self._grid_rows(
+            np.array([latitude - angle, latitude + angle])).tolist()
+        if latitude + angle >= 90 or latitude - angle <= -90:
+            half_width = 180
+        else:
+            half_width = np.degrees(np.arcsin(min(
+                np.sin(np.radians(angle)) / np.cos(np.radians(latitude)), 1)))
+
+        if 2 * half_width + self.cell_size >= 360:
+            col_ranges = [(0, self._nr_cols)]
+        else:
+            first_col = int(np.floor(
+                (longitude - half_width + 180) / self.cell_size))
+            last_col = int(np.floor(
+                (longitude + half_width + 180) / self.cell_size))
+            if last_col - first_col + 1 >= self._nr_cols:
+                col_ranges = [(0, self._nr_cols)]
+            else:
+                first_col %= self._nr_cols
+                last_col %= self._nr_cols
+                if first_col <= last_col:
+                    col_ranges = [(first_col, last_col + 1)]
+                else:
+                    col_ranges = [(first_col, self._nr_cols),
+                                  (0, last_col + 1)]
+
+        parts = []
+        for row in range(first_row, last_row + 1):
+            for start, end in col_ranges:
+                start = self._cell_start[row * self._nr_cols + start]
+                end = self._cell_start[row * self._nr_cols + end]
+                if end > start:
+                    parts.append(self._order[start:end])
+        if not parts:
+            return np.zeros(0, dtype=np.intp)
+        return np.concatenate(parts)
+
+    def _within(self, latitude: float, longitude: float, angle: float,
+                mask: np.ndarray):
+        candidates = self._candidates(latitude, longitude, angle)
+        if mask is not None:
+            candidates = candidates[mask[candidates]]
+        angles = _angles(self._xyz[candidates],
+                         _unit_vectors(latitude, longitude))
+        within = angles <= angle
+        return angles[within], candidates[within]
+
+    def _nearest_one(self, latitude: float, longitude: float, k: int,
+                     mask: np.ndarray):
+        angle = np.radians(self.cell_size)
+        while True:
+            angles, stations = self._within(latitude, longitude, angle, mask)
+            if len(stations) >= k or angle >= np.pi:
+                break
+            angle = min(2 * angle, np.pi)
+        order = np.argsort(angles, kind='stable')[:k]
+        return angles[order], stations[order]
+
+    def _cell_candidates(self, cell: int, k: int, mask: np.ndarray):
+        """
+        Stations holding the k nearest stations of any point of a cell.
+
+        If k stations lie within an angle of the cell center, the k nearest
+        stations of a point of the cell lie within that angle plus twice the
+        cell half diagonal of the center.
+        """
+        row, col = divmod(cell, self._nr_cols)
+        latitude = min((row + 0.5) * self.cell_size - 90, 90)
+        longitude = (col + 0.5) * self.cell_size - 180
+        angles, _ = self._nearest_one(latitude, longitude, k, mask)
+        if not len(angles):
+            return angles.astype(np.intp)
+        angle = angles[-1] + 2 * np.radians(self.cell_size)
+        if angle >= np.pi:
+            return (np.arange(len(self)) if mask is None
+                    else np.flatnonzero(mask))
+        _, stations = self._within(latitude, longitude, angle, mask)
+        return stations
+
+    def _nearest_block(self, xyz: np.ndarray, k: int, stations: np.ndarray):
+        k = min(k, len(stations))
+        points = self._xyz[stations]
+        dots = xyz @ points.T
+        if k < len(stations):
+            nearest = np.argpartition(-dots, k - 1, axis=1)[:, :k]
+        else:
+            nearest = np.broadcast_to(
+                np.arange(len(stations)), (len(xyz), k))
+        angles = _angles(points[nearest], xyz[:, None, :])
+        order = np.argsort(angles, axis=1, kind='stable')
+        return (np.take_along_axis(angles, order, axis=1),
+                stations[np.take_along_axis(nearest, order, axis=1)])
+
+    def nearest(self, latitude, longitude, k: int = 1, formats=None,
+                nav_systems=None):
+        """
+        Find the k nearest stations of positions.
+
+        Parameters
+        ----------
+        latitude: float or array_like
+            Query latitudes, in degrees.
+        longitude: float or array_like
+            Query longitudes, in degrees.
+        k: int
+            Number of stations per query.
+        formats, nav_systems:
+            Station filters, see ``mask``.
+
+        Returns
+        ----------
+        tuple of numpy.ndarray
+            Distances in meters and station positions in the index, sorted
+            by distance, with shape (k,) for a scalar query and
+            (n, k) for n queries. Missing stations, when less than k
+            match, have an infinite distance and a -1 position.
+        """
+        if k < 1:
+            raise ValueError("k must be positive")
+        mask = self.mask(formats, nav_systems)
+        scalar = np.ndim(latitude) == 0 and np.ndim(longitude) == 0
+        latitude, longitude = np.broadcast_arrays(
+            np.asarray(latitude, dtype=np.float64),
+            np.asarray(longitude, dtype=np.float64))
+        latitude = latitude.ravel()
+        longitude = longitude.ravel()
+
+        distances = np.full((len(latitude), k), np.inf)
+        stations = np.full((len(latitude), k), -1, dtype=np.intp)
+        if scalar:
+            angles, found = self._nearest_one(
+                latitude[0], longitude[0], k, mask)
+            distances[0, :len(found)] = angles * EARTH_RADIUS
+            stations[0, :len(found)] = found
+            return distances[0], stations[0]
+
+        xyz = _unit_vectors(latitude, longitude)
+        cells = self._cells(latitude, ((longitude + 180) % 360) - 180)
+        order = np.argsort(cells, kind='stable')
+        cells, starts = np.unique(cells[order], return_index=True)
+        ends = np.append(starts[1:], len(order))
+        for cell, start, end in zip(cells.tolist(), starts.tolist(),
+                                    ends.tolist()):
+            queries = order[start:end]
+            if len(queries) == 1:
+                query = queries[0]
+                angles, found = self._nearest_one(
+                    latitude[query], longitude[query], k, mask)
+                distances[query, :len(found)] = angles * EARTH_RADIUS
+                stations[query, :len(found)] = found
+                continue
+            candidates = self._cell_candidates(cell, k, mask)
+            if not len(candidates):
+                continue
+            block_size = max(1, BLOCK_SIZE // len(candidates))
+            for first in range(0, len(queries), block_size):
+                block = queries[first:first + block_size]
+                angles, found = self._nearest_block(xyz[block], k, candidates)
+                distances[block, :found.shape[1]] = angles * EARTH_RADIUS
+                stations[block, :found.shape[1]] = found
+        return distances, stations
+
+    def within(self, latitude, longitude, radius: float, formats=None,
+               nav_systems=None):
+        """
+        Find the stations within a distance of positions.
+
+        Parameters
+        ----------
+        latitude: float or array_like
+            Query latitudes, in degrees.
+        longitude: float or array_like
+            Query longitudes, in degrees.
+        radius: float
+            Search radius, in meters.
+        formats, nav_systems:
+            Station filters, see ``mask``.
+
+        Returns
+        ----------
+        tuple of numpy.ndarray or list of tuple
+            Distances in meters and station positions in the index, sorted
+            by distance, one such pair per query for array queries.
+        """
+        mask = self.mask(formats, nav_systems)
+        angle = min(radius / EARTH_RADIUS, np.pi)
+        scalar = np.ndim(latitude) == 0 and np.ndim(longitude) == 0
+        latitude, longitude = np.broadcast_arrays(
+            np.asarray(latitude, dtype=np.float64),
+            np.asarray(longitude, dtype=np.float64))
+
+        results = []
+        for lat, lon in zip(latitude.ravel().tolist(),
+                            longitude.ravel().tolist()):
+            angles, stations = self._within(lat, lon, angle, mask)
+            order = np.argsort(angles, kind='stable')
+            results.append((angles[order] * EARTH_RADIUS, stations[order]))
+        return results[0] if scalar else results
@@ -0,0 +1,212 @@
+import socket
+from ssl import CERT_NONE, create_default_context
+
+from .protocol import (
+    build_request, check_response, parse_header_line, parse_status_line,
+    ChunkedDecoder
+)
+
+
+RECV_SIZE = 4096
+CHUNK_HEADER_SIZE = 32
+MAX_HEADER_SIZE = 65536
+
+
+class SocketTransport:
+    """
+    NTRIP 1.0 and 2.0 data stream on a plain socket.
+
+    The response is parsed with the ``protocol`` helpers, NTRIP 1.0
+    ``ICY 200 OK`` answers with or without headers included. Data are read
+    with ``recv_into`` straight into the caller buffer: only the bytes
+    received along with the response headers, and for chunked answers the
+    few payload bytes received along with a chunk header, are copied.
+
+    Parameters
+    ----------
+    host: str
+        Caster host.
+    port: int
+        Caster port.
+    mountpoint: str
+        Mountpoint to read.
+    headers: dict
+        Request headers, see ``request_headers``.
+    tls: bool
+        Connect with TLS.
+    verify: bool
+        Verify the caster certificate.
+    timeout: float
+        Socket timeout, in seconds.
+    """
+    def __init__(
+            self,
+            host: str,
+            port: int,
+            mountpoint: str,
+            headers: dict,
+            tls: bool = False,
+            verify: bool = False,
+            timeout=10):
+        self.host = host
+        self.port = port
+        self.mountpoint = mountpoint
+        self.headers = headers
+        self.tls = tls
+        self.verify = verify
+        self.timeout = timeout
+        self.response_headers = {}
+        self._sock = None
+        self._requested = False
+        self._pending = bytearray()
+        self._chunked = None
+
+    def open(self):
+        """
+        Open the connection to the caster without sending the request.
+
+        An opened transport saves the TCP and TLS handshakes to ``connect``.
+        """
+        self.close()
+        self._pending.clear()
+        self._chunked = None
+        sock = socket.create_connection((self.host, self.port), self.timeout)
+        try:
+            if self.tls:
+                context = create_default_context()
+                if not self.verify:
+                    context.check_hostname = False
+                    context.verify_mode = CERT_NONE
+                sock = context.wrap_socket(sock, server_hostname=self.host)
+            sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        except BaseException:
+            sock.close()
+            raise
+        self._sock = sock
+        self._requested = False
+
+    def connect(self):
+        """
+        Send the request, opening the connection first if needed.
+        """
+        if self._sock is None or self._requested:
+            self.open()
+        self._requested = True
+        try:
+            self._sock.sendall(build_request(
+                self.host, self.port, self.mountpoint, self.headers))
+            self._read_response()
+        except BaseException:
+            self._pending.clear()
+            self.close()
+            raise
+
+    def _fill(self) -> int:
+        data = self._sock.recv(RECV_SIZE)
+        self._pending += data
+        return len(data)
+
+    def _readline(self) -> bytes:
+        while True:
+            end = self._pending.find(b"\n")
+            if end >= 0:
+                line = bytes(self._pending[:end + 1])
+                del self._pending[:end + 1]
+                return line
+            if len(self._pending) > MAX_HEADER_SIZE:
+                raise RuntimeError("response header too long")
+            if not self._fill():
+                line = bytes(self._pending)
+                self._pending.clear()
+                return line
+
+    def _read_response(self):
+        protocol, status, _ = parse_status_line(self._readline())
+        self.response_headers = {}
+        while True:
+            if protocol == "ICY":
+                # NTRIP 1.0 casters may send the data right after the
+                # status line, without headers nor blank line.
+                if not self._pending and not self._fill():
+                    break
+                first = self._pending[:1]
+                if first == b"\r":
+                    self._readline()
+                    break
+                elif not first.isalpha():
+                    break
+                line = self._readline()
+            else:
+                line = self._readline()
+                if line in (b"\r\n", b"\n", b""):
+                    break
+            key, value = parse_header_line(line)
+            self.response_headers[key] = value
+
+        check_response(protocol, status, self.response_headers)
+        encoding = self.response_headers.get("transfer-encoding", "")
+        self._chunked = ChunkedDecoder() if encoding == "chunked" else None
+        if self._chunked is not None and self._pending:
+            self._pending = bytearray(self._chunked.decode(self._pending))
+
+    def readinto(self, buffer) -> int:
+        """
+        Read GNSS data into buffer.
+
+        Returns
+        ----------
+        int
+            Number of bytes read, 0 when the caster closed the stream.
+        """
+        view = memoryview(buffer).cast('B')
+        if not len(view):
+            return 0
+        while True:
+            if self._pending:
+                nrbytes = min(len(view), len(self._pending))
+                view[:nrbytes] = self._pending[:nrbytes]
+                del self._pending[:nrbytes]
+                return nrbytes
+            if self._sock is None:
+                return 0
+
+            if self._chunked is None:
+                nrbytes = self._sock.recv_into(view)
+            elif self._chunked.payload_size:
+                nrbytes = self._sock.recv_into(
+                    view, min(len(view), self._chunked.payload_size))
+                self._chunked.skip(nrbytes)
+            elif self._chunked.finished:
+                nrbytes = 0
+            else:
+                data = self._sock.recv(CHUNK_HEADER_SIZE)
+                if data:
+                    self._pending += self._chunked.decode(data)
+                    continue
+                nrbytes = 0
+
+            if not nrbytes:
+                self.close()
+            return nrbytes
+
+    def read(self, nrbytes: int) -> bytes:
+        """
+        Read at most nrbytes of GNSS data, empty when the stream is closed.
+        """
+        if (self._chunked is None and not self._pending
+                and self._sock is not None):
+            data = self._sock.recv(nrbytes)
+            if not data:
+                self.close()
+            return data
+        buffer = bytearray(nrbytes)
+        return bytes(memoryview(buffer)[:self.readinto(buffer)])
+
+    def close(self):
+        if self._sock is not None:
+            sock, self._sock = self._sock, None
+            sock.close()
+
+    def isclosed(self) -> bool:
+        return not self._requested or (
+            self._sock is None and not self._pending)
@@ -0,0 +1,250 @@
+import mmap
+
+import numpy as np
+
+from .crc import Crc24Q, crc24q
+from .messages import STATION_ID_MSG_NUMBERS
+from .parser import decode, HEADER_LENGTH, CRC_LENGTH, PREAMBLE
+
+
+FRAME_DTYPE = np.dtype([
+    ('offset', np.int64),
+    ('length', np.uint16),
+    ('msg_number', np.uint16),
+    ('station_id', np.int16),
+    ('crc_valid', np.bool_),
+])
+
+CHAIN_SIZE = 65536
+
+
+def _map(path: str):
+    with open(path, 'rb') as f:
+        if not f.seek(0, 2):
+            return b""
+        return mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+
+def _chain(buffer, start: int, stop: int):
+    """
+    Follow back-to-back frames from start using only their length fields,
+    up to the first frame starting at or after stop.
+    """
+    size = len(buffer)
+    offsets = []
+    lengths = []
+    offset = start
+    while (offset + HEADER_LENGTH <= size and offset < stop
+           and len(offsets) < CHAIN_SIZE):
+        length = (HEADER_LENGTH + CRC_LENGTH
+                  + (((buffer[offset + 1] & 0x03) << 8) | buffer[offset + 2]))
+        if offset + length > size:
+            break
+        offsets.append(offset)
+        lengths.append(length)
+        offset += length
+        if offset >= size or buffer[offset] != PREAMBLE:
+            break
+    return offsets, lengths
+
+
+def _index(buffer, offsets, lengths, valid) -> np.ndarray:
+    index = np.zeros(len(offsets), dtype=FRAME_DTYPE)
+    index['offset'] = offsets
+    index['length'] = lengths
+    index['crc_valid'] = valid
+    index['station_id'] = -1
+
+    data = np.frombuffer(buffer, dtype=np.uint8)
+    offsets = index['offset']
+    has_number = valid & (index['length'] >= HEADER_LENGTH + CRC_LENGTH + 2)
+    payload = offsets[has_number] + HEADER_LENGTH
+    index['msg_number'][has_number] = (
+        (data[payload].astype(np.uint16) << 4) | (data[payload + 1] >> 4))
+
+    has_station = has_number & np.isin(
+        index['msg_number'], list(STATION_ID_MSG_NUMBERS))
+    has_station &= index['length'] >= HEADER_LENGTH + CRC_LENGTH + 3
+    payload = offsets[has_station] + HEADER_LENGTH
+    index['station_id'][has_station] = (
+        ((data[payload + 1].astype(np.int16) & 0x0f) << 8) | data[payload + 2])
+    return index
+
+
+def _scan(buffer, start: int, stop: int, strict: bool):
+    parts = []
+    offset = start
+    while offset < stop:
+        offset = buffer.find(bytes([PREAMBLE]), offset, stop)
+        if offset < 0:
+            offset = stop
+            break
+
+        offsets, lengths = _chain(buffer, offset, stop)
+        if not offsets:
+            if strict:
+                break
+            offset += 1
+            continue
+
+        if len(offsets) == 1:
+            valid = np.array([
+                crc24q(buffer[offset:offset + lengths[0]]) == 0])
+        else:
+            valid = Crc24Q.check_batch(buffer, offsets, lengths)
+
+        if valid.all():
+            parts.append(_index(buffer, offsets, lengths, valid))
+            offset = offsets[-1] + lengths[-1]
+        else:
+            nr_frames = int(valid.argmin()) + 1
+            parts.append(_index(
+                buffer, offsets[:nr_frames], lengths[:nr_frames],
+                valid[:nr_frames]))
+            offset = offsets[nr_frames - 1] + 1
+
+    if not parts:
+        return np.zeros(0, dtype=FRAME_DTYPE), offset
+    return np.concatenate(parts), offset
+
+
+def scan_buffer(buffer) -> np.ndarray:
+    """
+    Index the RTCM frames of a buffer.
+
+    Frames are located the same way as the parser framer does: a candidate
+    starts at a preamble and is accepted if its CRC is valid, otherwise the
+    search restarts at the next byte. Runs of back-to-back frames are
+    followed through their length fields and CRC checked in one batch.
+
+    Returns
+    ----------
+    numpy.ndarray
+        One ``FRAME_DTYPE`` row per candidate frame. Candidates failing the
+        CRC check are kept with ``crc_valid`` set to False, their message
+        number is 0 and their station id -1. Station id is -1 for messages
+        that do not carry one.
+    """
+    return _scan(buffer, 0, len(buffer), strict=False)[0]
+
+
+def scan_range(buffer, start: int, stop: int):
+    """
+    Index the RTCM frames of a buffer starting in a byte range.
+
+    Frames are located like ``scan_buffer`` does, from start as if the
+    buffer began there, and the scan ends at the first candidate starting
+    at or after stop. Unlike ``scan_buffer``, the scan also ends at a
+    candidate running past the end of the buffer, where the parser would
+    wait for more data.
+
+    Returns
+    ----------
+    numpy.ndarray
+        Index of the frames, see ``scan_buffer``.
+    int
+        Offset from which the scan would go on: at or after stop, the end
+        of the last frame when it runs past stop, or before stop when the
+        scan ended at a candidate running past the end of the buffer.
+    """
+    return _scan(buffer, start, stop, strict=True)
+
+
+def find_frame(buffer, start: int) -> int:
+    """
+    Find the first complete frame with a valid CRC starting at or after
+    start.
+
+    Returns
+    ----------
+    int
+        Offset of the frame, or the buffer length if there is none.
+    """
+    size = len(buffer)
+    offset = start
+    while True:
+        offset = buffer.find(bytes([PREAMBLE]), offset)
+        if offset < 0 or offset + HEADER_LENGTH > size:
+            return size
+        length = (HEADER_LENGTH + CRC_LENGTH
+                  + (((buffer[offset + 1] & 0x03) << 8) | buffer[offset + 2]))
+        if (offset + length <= size
+                and crc24q(buffer[offset:offset + length]) == 0):
+            return offset
+        offset += 1
+
+
+def scan_frames(path: str) -> np.ndarray:
+    """
+    Index the RTCM frames of a recording.
+
+    The file is memory-mapped, see ``scan_buffer`` for the index format.
+    """
+    buffer = _map(path)
+    try:
+        return scan_buffer(buffer)
+    finally:
+        if isinstance(buffer, mmap.mmap):
+            buffer.close()
+
+
+class FrameReader:
+    """
+    Random access to the frames of a recording.
+
+    Parameters
+    ----------
+    path: str
+        RTCM recording.
+    index: numpy.ndarray
+        Index of the recording, built with ``scan_frames`` if not given.
+
+    Examples
+    --------
+    >>> with FrameReader("recording.bin") as reader:
+    ...     index = reader.index
+    ...     antennas = index[index['msg_number'] == 1005]
+    ...     antennas = list(reader.messages(antennas))
+    ...     block = list(reader.messages(index[10_000_000:10_100_000]))
+    """
+    def __init__(self, path: str, index: np.ndarray = None):
+        self.path = path
+        self._buffer = _map(path)
+        self.index = scan_buffer(self._buffer) if index is None else index
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    def __len__(self):
+        return len(self.index)
+
+    def close(self):
+        if isinstance(self._buffer, mmap.mmap):
+            self._buffer.close()
+
+    def frames(self, rows: np.ndarray = None):
+        """
+        Iterate over the raw frames of the index rows failing no CRC check.
+
+        Only the pages holding the selected frames are read from the file.
+        """
+        rows = self.index if rows is None else rows
+        rows = rows[rows['crc_valid']]
+        for offset, length in zip(
+                rows['offset'].tolist(), rows['length'].tolist()):
+            yield self._buffer[offset:offset + length]
+
+    def messages(self, rows: np.ndarray = None):
+        """
+        Decode the frames of the index rows.
+
+        Frames of unknown or not implemented messages are skipped.
+        """
+        for frame in self.frames(rows):
+            try:
+                yield decode(frame[HEADER_LENGTH:-CRC_LENGTH])
+            except (ValueError, NotImplementedError):
+                continue
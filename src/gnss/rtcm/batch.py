@@ -0,0 +1,210 @@
+import numpy as np
+import pandas as pd
+
+from .archive import scan_buffer
+from .fields import ArrayLayout, Field
+from .messages import Msm, RtcmMessage, Type
+from .parser import HEADER_LENGTH, CRC_LENGTH
+
+
+CELL_MASK_LAYOUT = ArrayLayout(Field('cell', 'bool:1'))
+MSM_COLUMNS = ('pseudorange', 'phaserange', 'phaserange_rate', 'cnr',
+               'lock_time', 'half_cycle')
+
+
+class Table:
+    """
+    Messages of one type decoded as columns.
+
+    Columns are NumPy arrays named after the message attributes, plus
+    ``offset``, the position of the frame of each row in the buffer.
+
+    Attributes
+    ----------
+    type: Type
+        Message type.
+    columns: dict
+        Arrays by column name, all of the same length.
+    """
+    def __init__(self, msg_type: Type, columns: dict):
+        self.type = msg_type
+        self.columns = columns
+
+    def __len__(self):
+        return len(self.columns['offset'])
+
+    def __getitem__(self, name: str) -> np.ndarray:
+        return self.columns[name]
+
+    def __contains__(self, name: str) -> bool:
+        return name in self.columns
+
+    def __repr__(self):
+        return f"Table({self.name}, {len(self)} rows)"
+
+    @property
+    def name(self) -> str:
+        return RtcmMessage.get_name(self.type)
+
+    @classmethod
+    def concat(cls, tables: list):
+        """
+        Join tables of the same type, rows kept in order.
+        """
+        columns = {name: np.concatenate([table[name] for table in tables])
+                   for name in tables[0].columns}
+        return cls(tables[0].type, columns)
+
+    def to_frame(self) -> pd.DataFrame:
+        return pd.DataFrame(self.columns)
+
+
+def _payload_bits(rows: np.ndarray) -> np.ndarray:
+    return (rows['length'].astype(np.int64) - HEADER_LENGTH - CRC_LENGTH) * 8
+
+
+def _payload_pos(rows: np.ndarray) -> np.ndarray:
+    return (rows['offset'] + HEADER_LENGTH) * 8
+
+
+def _decode_layout(cls, data: np.ndarray, rows: np.ndarray) -> dict:
+    layout = cls.layout
+    rows = rows[_payload_bits(rows) >= layout.bit_length]
+    columns = {'offset': rows['offset'].copy()}
+    columns.update(layout.unpack_columns(data, _payload_pos(rows)))
+    from_columns = getattr(cls, '_from_columns', None)
+    if from_columns is not None:
+        from_columns(columns)
+    return columns
+
+
+def _mask_bits(mask: np.ndarray, width: int) -> np.ndarray:
+    shifts = np.arange(width - 1, -1, -1, dtype=np.uint64)
+    return ((mask.astype(np.uint64)[:, None] >> shifts) & np.uint64(1)
+            ).astype(bool)
+
+
+def _decode_msm(cls, data: np.ndarray, rows: np.ndarray) -> dict:
+    header_layout = cls.header_layout
+    rows = rows[_payload_bits(rows) >= header_layout.bit_length]
+    header = header_layout.unpack_columns(data, _payload_pos(rows))
+    nr_sat = _mask_bits(header['satellite_mask'], 64).sum(axis=1)
+    nr_sig = _mask_bits(header['signal_mask'], 32).sum(axis=1)
+    pos = _payload_pos(rows) + header_layout.bit_length
+    end = _payload_pos(rows) + _payload_bits(rows)
+
+    # Drop the messages the object path rejects as too short: first the
+    # ones with a truncated cell mask, then the ones with truncated data.
+    valid = pos + nr_sat * nr_sig <= end
+    rows, nr_sat, nr_sig, pos, end = (
+        rows[valid], nr_sat[valid], nr_sig[valid], pos[valid], end[valid])
+    (cell_mask,), _ = CELL_MASK_LAYOUT.unpack_columns(
+        data, pos, nr_sat * nr_sig)
+    mask_msg = np.repeat(np.arange(len(rows)), nr_sat * nr_sig)
+    nr_cell = np.bincount(mask_msg[cell_mask], minlength=len(rows))
+    valid = (pos + nr_sat * nr_sig + nr_sat * cls.satellite_layout.bit_length
+             + nr_cell * cls.cell_layout.bit_length <= end)
+    cell_mask = cell_mask[np.repeat(valid, nr_sat * nr_sig)]
+    rows, nr_sat, nr_sig, nr_cell, pos = (
+        rows[valid], nr_sat[valid], nr_sig[valid], nr_cell[valid], pos[valid])
+    header = header_layout.unpack_columns(data, _payload_pos(rows))
+    satellites = _mask_bits(header['satellite_mask'], 64)
+    signals = _mask_bits(header['signal_mask'], 32)
+
+    # Cells are the set bits of the cell masks, each mask being the
+    # satellite by signal matrix of its message flattened row by row.
+    mask_size = nr_sat * nr_sig
+    mask_msg = np.repeat(np.arange(len(rows)), mask_size)
+    mask_item = np.arange(len(mask_msg)) - np.repeat(
+        np.cumsum(mask_size) - mask_size, mask_size)
+    cell_msg = mask_msg[cell_mask]
+    cell_item = mask_item[cell_mask]
+    sat_start = np.cumsum(nr_sat) - nr_sat
+    sig_start = np.cumsum(nr_sig) - nr_sig
+    sat_index = sat_start[cell_msg] + cell_item // nr_sig[cell_msg]
+    sig_index = sig_start[cell_msg] + cell_item % nr_sig[cell_msg]
+
+    pos += mask_size
+    satellite_data, pos = cls.satellite_layout.unpack_columns(
+        data, pos, nr_sat)
+    cell_data, pos = cls.cell_layout.unpack_columns(data, pos, nr_cell)
+
+    # One instance per type computes the observables of all the cells.
+    msm = cls.__new__(cls)
+    msm._from_arrays(
+        dict(zip(cls.satellite_layout.names, satellite_data)),
+        dict(zip(cls.cell_layout.names, cell_data)),
+        sat_index)
+
+    columns = {'offset': rows['offset'][cell_msg]}
+    columns.update(
+        (name, values[cell_msg]) for name, values in header.items())
+    columns['satellite'] = np.nonzero(satellites)[1][sat_index] + 1
+    columns['signal'] = np.nonzero(signals)[1][sig_index] + 1
+    columns.update((name, getattr(msm, name)) for name in MSM_COLUMNS)
+    if 'extended_info' in cls.satellite_layout.names:
+        columns['extended_info'] = msm.extended_info[sat_index]
+    return columns
+
+
+def decode_batch(buffer, *msg_types, index: np.ndarray = None) -> dict:
+    """
+    Decode all the frames of a buffer into one table per message type.
+
+    Frames are located like the parser does, see
+    ``gnss.rtcm.archive.scan_buffer``, and the messages of a type are
+    decoded all at once with NumPy, without any per message object. Tables
+    hold the same values as the attributes of the messages the parser
+    returns, one row per message, except for MSM where rows are cells:
+    ``satellite``, ``signal`` and the observables, the header fields of
+    the message being repeated on each of its cells and ``extended_info``
+    on each cell of its satellite.
+
+    Like in the parser, frames failing the CRC check, of unknown or not
+    implemented messages, or too short for their message are skipped.
+
+    Parameters
+    ----------
+    buffer: bytes-like
+        RTCM data, bytes, bytearray or mmap.
+    msg_types: RtcmMessage
+        Message classes to decode, all the implemented ones if none given.
+    index: numpy.ndarray
+        Frame index of the buffer, built with ``scan_buffer`` if not given.
+
+    Returns
+    ----------
+    dict
+        ``Table`` by message type, for the types having decoded rows.
+
+    Examples
+    --------
+    >>> tables = decode_batch(data, ExtendedL1L2Gps)
+    >>> df = tables[Type.EXTENDED_L1_L2_GPS].to_frame()
+    """
+    data = np.frombuffer(buffer, dtype=np.uint8)
+    if index is None:
+        index = scan_buffer(buffer)
+    index = index[index['crc_valid']]
+    selected = {msg_type.type for msg_type in msg_types}
+
+    tables = {}
+    for msg_number in np.unique(index['msg_number']).tolist():
+        try:
+            msg_type = Type(msg_number)
+            cls = RtcmMessage.get_class(msg_type)
+        except (ValueError, NotImplementedError):
+            continue
+        if selected and msg_type not in selected:
+            continue
+
+        rows = index[index['msg_number'] == msg_number]
+        if issubclass(cls, Msm):
+            columns = _decode_msm(cls, data, rows)
+        elif hasattr(cls, 'layout'):
+            columns = _decode_layout(cls, data, rows)
+        else:
+            continue
+        if len(columns['offset']):
+            tables[msg_type] = Table(msg_type, columns)
+    return tables
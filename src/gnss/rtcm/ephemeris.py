@@ -0,0 +1,468 @@
+from typing import NamedTuple
+
+import numpy as np
+
+from .messages import (
+    GalileoEphemeris, GlonassEphemeris, GpsEphemeris, LEAP_MS,
+    MOSCOW_OFFSET_MS, SPEED_OF_LIGHT
+)
+
+
+SECONDS_PER_WEEK = 604800.0
+SECONDS_PER_DAY = 86400.0
+# Value of pi of the GPS interface specification, for semicircles.
+GPS_PI = 3.1415926535898
+EARTH_ROTATION = 7.2921151467e-5
+# Gravitational constants of the GPS and Galileo orbit models.
+GPS_MU = 3.986005e14
+GALILEO_MU = 3.986004418e14
+# PZ-90 constants of the GLONASS orbit model.
+GLONASS_MU = 3.9860044e14
+GLONASS_RADIUS = 6378136.0
+GLONASS_J2 = 1.0826257e-3
+GLONASS_ROTATION = 7.292115e-5
+# Largest step of the integration of the GLONASS orbits, in seconds.
+GLONASS_STEP = 60.0
+KEPLER_ITERATIONS = 8
+
+EPHEMERIS_CLASSES = {
+    GpsEphemeris: "GPS", GlonassEphemeris: "GLONASS",
+    GalileoEphemeris: "GALILEO"}
+CONSTELLATIONS = ("GPS", "GLONASS", "GALILEO")
+# Largest time between a record reference time and the epochs it is used
+# for, in seconds.
+MAX_AGE = {"GPS": 7200.0, "GLONASS": 1800.0, "GALILEO": 14400.0}
+MAX_RECORDS = 4
+
+KEPLER_FIELDS = (
+    'toc', 'af0', 'af1', 'af2', 'crs', 'delta_n', 'm0', 'cuc',
+    'eccentricity', 'cus', 'sqrt_a', 'toe', 'cic', 'omega0', 'cis', 'i0',
+    'crc', 'omega', 'omega_dot', 'idot')
+GLONASS_FIELDS = (
+    'x', 'y', 'z', 'x_velocity', 'y_velocity', 'z_velocity',
+    'x_acceleration', 'y_acceleration', 'z_acceleration', 'tau', 'gamma')
+
+
+class Orbits(NamedTuple):
+    """
+    Satellite positions and clock biases at a set of epochs.
+
+    Attributes
+    ----------
+    constellation: numpy.ndarray
+        Constellation of each satellite.
+    satellite: numpy.ndarray
+        Satellite id of each satellite, the slot number for GLONASS.
+    position: numpy.ndarray
+        ECEF positions in meters, shaped (epochs, satellites, 3), NaN
+        without a valid ephemeris.
+    clock: numpy.ndarray
+        Clock biases in seconds, shaped (epochs, satellites), NaN without a
+        valid ephemeris.
+    """
+    constellation: np.ndarray
+    satellite: np.ndarray
+    position: np.ndarray
+    clock: np.ndarray
+
+
+def _wrap(dt, period: float):
+    """
+    Time difference brought within half a period.
+    """
+    return (dt + period / 2) % period - period / 2
+
+
+def kepler_orbits(params: dict, t: np.ndarray, mu: np.ndarray):
+    """
+    Positions and clock biases from GPS or Galileo ephemerides.
+
+    Follows the user algorithm of the GPS interface specification, the
+    clock biases including the relativistic correction but not the group
+    delays.
+
+    Parameters
+    ----------
+    params: dict
+        Arrays of the ephemeris fields of ``KEPLER_FIELDS``, broadcast with
+        t.
+    t: numpy.ndarray
+        GPS times of week in seconds.
+    mu: numpy.ndarray
+        Gravitational constant of each ephemeris.
+
+    Returns
+    ----------
+    tuple
+        ECEF positions in meters, with a last axis of 3, and clock biases in
+        seconds.
+    """
+    a = params['sqrt_a'] ** 2
+    e = params['eccentricity']
+    tk = _wrap(t - params['toe'], SECONDS_PER_WEEK)
+    n = np.sqrt(mu / a ** 3) + params['delta_n'] * GPS_PI
+    mean_anomaly = params['m0'] * GPS_PI + n * tk
+    anomaly = mean_anomaly
+    for _ in range(KEPLER_ITERATIONS):
+        anomaly = anomaly - (anomaly - e * np.sin(anomaly) - mean_anomaly) / (
+            1 - e * np.cos(anomaly))
+    sin_e, cos_e = np.sin(anomaly), np.cos(anomaly)
+
+    latitude = (np.arctan2(np.sqrt(1 - e * e) * sin_e, cos_e - e)
+                + params['omega'] * GPS_PI)
+    sin_2u, cos_2u = np.sin(2 * latitude), np.cos(2 * latitude)
+    u = latitude + params['cus'] * sin_2u + params['cuc'] * cos_2u
+    r = (a * (1 - e * cos_e) + params['crs'] * sin_2u
+         + params['crc'] * cos_2u)
+    i = ((params['i0'] + params['idot'] * tk) * GPS_PI
+         + params['cis'] * sin_2u + params['cic'] * cos_2u)
+    node = (params['omega0'] * GPS_PI
+            + (params['omega_dot'] * GPS_PI - EARTH_ROTATION) * tk
+            - EARTH_ROTATION * params['toe'])
+
+    x, y = r * np.cos(u), r * np.sin(u)
+    cos_node, sin_node, cos_i = np.cos(node), np.sin(node), np.cos(i)
+    position = np.stack((
+        x * cos_node - y * cos_i * sin_node,
+        x * sin_node + y * cos_i * cos_node,
+        y * np.sin(i)), axis=-1)
+
+    dt = _wrap(t - params['toc'], SECONDS_PER_WEEK)
+    relativity = (-2 * np.sqrt(mu) / SPEED_OF_LIGHT ** 2 * e
+                  * params['sqrt_a'] * sin_e)
+    clock = (params['af0'] + params['af1'] * dt + params['af2'] * dt * dt
+             + relativity)
+    return position, clock
+
+
+def _glonass_derivatives(state: np.ndarray, acceleration: np.ndarray):
+    position, velocity = state[..., :3], state[..., 3:]
+    x, y, z = position[..., 0], position[..., 1], position[..., 2]
+    r2 = np.sum(position * position, axis=-1)
+    r = np.sqrt(r2)
+    a = GLONASS_MU / (r2 * r)
+    b = 1.5 * GLONASS_J2 * GLONASS_MU * GLONASS_RADIUS ** 2 / (r2 * r2 * r)
+    c = 5 * z * z / r2
+    w2 = GLONASS_ROTATION ** 2
+    derivatives = np.empty_like(state)
+    derivatives[..., :3] = velocity
+    derivatives[..., 3] = ((w2 - a - b * (1 - c)) * x
+                           + 2 * GLONASS_ROTATION * velocity[..., 1])
+    derivatives[..., 4] = ((w2 - a - b * (1 - c)) * y
+                           - 2 * GLONASS_ROTATION * velocity[..., 0])
+    derivatives[..., 5] = (-a - b * (3 - c)) * z
+    derivatives[..., 3:] += acceleration
+    return derivatives
+
+
+def glonass_orbits(params: dict, dt: np.ndarray):
+    """
+    Positions and clock biases from GLONASS ephemerides.
+
+    The satellite states are integrated with a fourth order Runge-Kutta, in
+    steps of at most ``GLONASS_STEP`` seconds, all at once. Positions are in
+    the PZ-90 frame.
+
+    Parameters
+    ----------
+    params: dict
+        Arrays of the ephemeris fields of ``GLONASS_FIELDS``, in the units
+        of the message, shaped like dt.
+    dt: numpy.ndarray
+        Times since the ephemeris reference times in seconds.
+
+    Returns
+    ----------
+    tuple
+        ECEF positions in meters, with a last axis of 3, and clock biases in
+        seconds.
+    """
+    dt = np.asarray(dt, dtype=float)
+    state = np.stack(
+        [params[name] * 1e3 for name in GLONASS_FIELDS[:6]], axis=-1)
+    acceleration = np.stack(
+        [params[name] * 1e3 for name in GLONASS_FIELDS[6:9]], axis=-1)
+
+    nr_steps = int(np.ceil(np.abs(dt).max(initial=0) / GLONASS_STEP))
+    if nr_steps:
+        h = (dt / nr_steps)[..., None]
+        for _ in range(nr_steps):
+            k1 = _glonass_derivatives(state, acceleration)
+            k2 = _glonass_derivatives(state + h / 2 * k1, acceleration)
+            k3 = _glonass_derivatives(state + h / 2 * k2, acceleration)
+            k4 = _glonass_derivatives(state + h * k3, acceleration)
+            state += h / 6 * (k1 + 2 * k2 + 2 * k3 + k4)
+    return state[..., :3], -params['tau'] + params['gamma'] * dt
+
+
+class EphemerisStore:
+    """
+    GPS (1019), GLONASS (1020) and Galileo (1045) ephemerides.
+
+    Records are indexed by constellation, satellite, issue of data and
+    reference time: the IODE and toe for GPS, the IODnav and toe for
+    Galileo, and tb for GLONASS, as a GPS time of day. A record received
+    again replaces the previous one. Each satellite keeps at most
+    ``max_records`` records, the oldest received being evicted first, and
+    ``evict`` drops the records too old for a given time.
+
+    Times are GPS times of week in seconds, records being selected within
+    ``max_age`` of their reference time, so across a week change.
+
+    Parameters
+    ----------
+    max_records: int
+        Maximum number of records per satellite.
+    max_age: dict
+        Largest time between a record reference time and the epochs it is
+        used for, per constellation, in seconds, ``MAX_AGE`` if not given.
+
+    Examples
+    --------
+    >>> store = EphemerisStore()
+    >>> for msg in parser.iter_messages(GpsEphemeris, GalileoEphemeris):
+    ...     store.add(msg)
+    >>> orbits = store.positions(np.arange(345600, 349200, 30.0))
+    """
+    def __init__(self, max_records: int = MAX_RECORDS, max_age: dict = None):
+        self.max_records = max_records
+        self.max_age = dict(MAX_AGE if max_age is None else max_age)
+        self.records = {}
+        self.nr_added = 0
+        self.nr_replaced = 0
+        self.nr_evicted = 0
+        self._satellites = {}
+        self._arrays = None
+
+    def __len__(self):
+        return len(self.records)
+
+    def stats(self) -> dict:
+        """
+        Store counters.
+
+        Returns
+        ----------
+        dict
+            Records and satellites held, records added, replaced by the same
+            record received again, and evicted.
+        """
+        return {
+            "records": len(self.records),
+            "satellites": len(self._satellites),
+            "added": self.nr_added,
+            "replaced": self.nr_replaced,
+            "evicted": self.nr_evicted,
+        }
+
+    @staticmethod
+    def key(msg) -> tuple:
+        """
+        Index of an ephemeris message: constellation, satellite, issue of
+        data and reference time in seconds.
+        """
+        constellation = EPHEMERIS_CLASSES[type(msg)]
+        if constellation == "GLONASS":
+            toe = (msg.tb * 900 + (LEAP_MS - MOSCOW_OFFSET_MS) / 1000
+                   ) % SECONDS_PER_DAY
+            return constellation, msg.sat_id, msg.tb, toe
+        if constellation == "GPS":
+            return constellation, msg.sat_id, msg.iode, msg.toe
+        return constellation, msg.sat_id, msg.iodnav, msg.toe
+
+    @staticmethod
+    def healthy(msg) -> bool:
+        """
+        Whether an ephemeris message announces a usable satellite.
+        """
+        if isinstance(msg, GlonassEphemeris):
+            return not msg.bn_msb
+        if isinstance(msg, GalileoEphemeris):
+            return msg.e5a_health == 0 and not msg.e5a_validity
+        return msg.health == 0
+
+    def add(self, msg) -> bool:
+        """
+        Add an ephemeris message, other messages are ignored.
+
+        Returns
+        ----------
+        bool
+            Whether the message was added.
+        """
+        if type(msg) not in EPHEMERIS_CLASSES:
+            return False
+        key = self.key(msg)
+        satellite = key[:2]
+        keys = self._satellites.setdefault(satellite, [])
+        if key in self.records:
+            self.nr_replaced += 1
+            keys.remove(key)
+        else:
+            self.nr_added += 1
+        self.records[key] = msg
+        keys.append(key)
+        while len(keys) > self.max_records:
+            del self.records[keys.pop(0)]
+            self.nr_evicted += 1
+        self._arrays = None
+        return True
+
+    def evict(self, time: float) -> int:
+        """
+        Drop the records whose reference time is more than ``max_age``
+        away from a GPS time of week, either way: the time differences are
+        only known within half a period, so records older than that come
+        out ahead of time.
+
+        Returns
+        ----------
+        int
+            Number of records dropped.
+        """
+        stale = []
+        for key in self.records:
+            constellation, _, _, toe = key
+            period = (SECONDS_PER_DAY if constellation == "GLONASS"
+                      else SECONDS_PER_WEEK)
+            if abs(_wrap(time % period - toe, period)) > self.max_age[
+                    constellation]:
+                stale.append(key)
+        for key in stale:
+            del self.records[key]
+            keys = self._satellites[key[:2]]
+            keys.remove(key)
+            if not keys:
+                del self._satellites[key[:2]]
+        self.nr_evicted += len(stale)
+        if stale:
+            self._arrays = None
+        return len(stale)
+
+    def select(self, constellation: str, sat_id: int, time: float):
+        """
+        Best record of a satellite at a GPS time of week: the healthy one
+        with the nearest reference time within ``max_age``, the last
+        received on a tie.
+
+        Returns
+        ----------
+        RtcmMessage
+            Ephemeris message, None if no record is valid.
+        """
+        period = (SECONDS_PER_DAY if constellation == "GLONASS"
+                  else SECONDS_PER_WEEK)
+        best, best_age = None, self.max_age[constellation]
+        for key in self._satellites.get((constellation, sat_id), ()):
+            msg = self.records[key]
+            age = abs(_wrap(time % period - key[3], period))
+            if age <= best_age and self.healthy(msg):
+                best, best_age = msg, age
+        return best
+
+    def _build_arrays(self) -> dict:
+        satellites = sorted(self._satellites, key=lambda satellite: (
+            CONSTELLATIONS.index(satellite[0]), satellite[1]))
+        # Records of each satellite, the last received first, padded with
+        # the index of an invalid record.
+        keys = [key for satellite in satellites
+                for key in reversed(self._satellites[satellite])]
+        nr_records = len(keys)
+        table = np.full((len(satellites), self.max_records), nr_records)
+        start = 0
+        for row, satellite in enumerate(satellites):
+            count = len(self._satellites[satellite])
+            table[row, :count] = np.arange(start, start + count)
+            start += count
+
+        msgs = [self.records[key] for key in keys]
+        constellations = np.array([key[0] for key in keys] + [""])
+        glonass = constellations == "GLONASS"
+        arrays = {
+            "satellites": satellites,
+            "table": table,
+            "glonass": glonass,
+            "reference": np.array([key[3] for key in keys] + [0.0]),
+            "period": np.where(glonass, SECONDS_PER_DAY, SECONDS_PER_WEEK),
+            "max_age": np.array(
+                [self.max_age[key[0]] for key in keys] + [-1.0]),
+            "healthy": np.array([self.healthy(msg) for msg in msgs] + [False]),
+            "mu": np.where(constellations == "GALILEO", GALILEO_MU, GPS_MU),
+        }
+        for fields, selected in ((KEPLER_FIELDS, ~glonass),
+                                 (GLONASS_FIELDS, glonass)):
+            for name in fields:
+                column = np.zeros(nr_records + 1)
+                column[np.flatnonzero(selected[:-1])] = [
+                    getattr(msg, name) for msg, valid
+                    in zip(msgs, selected) if valid]
+                arrays[name] = column
+        return arrays
+
+    def positions(self, times) -> Orbits:
+        """
+        Positions and clock biases of every satellite at GPS times of week,
+        computed with the best record of each satellite at each time, see
+        ``select``, in one vectorized pass per orbit model.
+
+        Positions are the ones at the given transmission times, in the
+        Earth-fixed frame of that time: the caller applies the light time
+        and Earth rotation corrections. GLONASS positions are not converted
+        from PZ-90.
+
+        Parameters
+        ----------
+        times: array-like
+            GPS times of week in seconds.
+
+        Returns
+        ----------
+        Orbits
+            Satellites with at least one record, sorted by constellation and
+            satellite id, and their positions and clock biases.
+        """
+        if self._arrays is None:
+            self._arrays = self._build_arrays()
+        arrays = self._arrays
+        times = np.atleast_1d(np.asarray(times, dtype=float))
+        satellites = arrays["satellites"]
+        position = np.full((len(times), len(satellites), 3), np.nan)
+        clock = np.full((len(times), len(satellites)), np.nan)
+        orbits = Orbits(
+            np.array([satellite[0] for satellite in satellites], dtype=str),
+            np.array([satellite[1] for satellite in satellites], dtype=int),
+            position, clock)
+        if not satellites:
+            return orbits
+
+        period = arrays["period"]
+        dt = _wrap(times[:, None] % period - arrays["reference"], period)
+        age = np.abs(dt)
+        age[:, ~arrays["healthy"]] = np.inf
+        age[age > arrays["max_age"]] = np.inf
+        candidates = age[:, arrays["table"]]
+        best = np.take_along_axis(
+            arrays["table"][None], candidates.argmin(axis=2)[..., None],
+            axis=2)[..., 0]
+        valid = np.isfinite(candidates.min(axis=2))
+        epoch, column = np.nonzero(valid)
+        record = best[epoch, column]
+
+        glonass = arrays["glonass"][record]
+        for selected, compute in ((~glonass, self._kepler),
+                                  (glonass, self._glonass)):
+            if selected.any():
+                rows, columns = epoch[selected], column[selected]
+                position[rows, columns], clock[rows, columns] = compute(
+                    record[selected], times[rows], dt[rows, record[selected]])
+        return orbits
+
+    def _kepler(self, record: np.ndarray, t: np.ndarray, dt: np.ndarray):
+        arrays = self._arrays
+        params = {name: arrays[name][record] for name in KEPLER_FIELDS}
+        return kepler_orbits(params, t, arrays["mu"][record])
+
+    def _glonass(self, record: np.ndarray, t: np.ndarray, dt: np.ndarray):
+        arrays = self._arrays
+        params = {name: arrays[name][record] for name in GLONASS_FIELDS}
+        return glonass_orbits(params, dt)
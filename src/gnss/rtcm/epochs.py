@@ -0,0 +1,281 @@
+import numpy as np
+
+from .messages import (
+    ExtendedL1L2Gps, Msm, MS_PER_DAY, OBSERVATION_MSG_NUMBERS, epoch_time
+)
+
+
+MAX_EPOCHS = 16
+MAX_CELLS = 512
+# Constellation codes of the cells, by index.
+CONSTELLATIONS = ("GPS", "GLONASS", "GALILEO", "SBAS", "QZSS", "BEIDOU")
+# MSM signal id of the GPS L1 C/A observations of the 1004 message.
+GPS_L1_CA_SIGNAL = 2
+
+CELL_DTYPE = np.dtype([
+    ('constellation', np.uint8),
+    ('satellite', np.uint8),
+    ('signal', np.uint8),
+    ('pseudorange', np.float64),
+    ('phaserange', np.float64),
+    ('phaserange_rate', np.float64),
+    ('cnr', np.float64),
+    ('lock_time', np.int64),
+    ('half_cycle', np.bool_),
+])
+
+
+def _after(time: int, other: int) -> bool:
+    """
+    Whether a GPS time of day is after another, across a day change.
+    """
+    return 0 < (time - other) % MS_PER_DAY < MS_PER_DAY // 2
+
+
+class Epoch:
+    """
+    Observations of a station at an epoch.
+
+    Attributes
+    ----------
+    station_id: int
+        Reference station id.
+    time: int
+        GPS time of day of the epoch in milliseconds, see ``epoch_time``.
+    msg_numbers: list
+        Numbers of the messages the observations come from.
+    complete: bool
+        Whether the epoch was closed by its last message, rather than by a
+        newer epoch of the station, an eviction or a flush.
+    cells: numpy.ndarray
+        One ``CELL_DTYPE`` row per satellite signal, in message order.
+    """
+    def __init__(self, station_id: int, time: int, slot: int,
+                 buffer: np.ndarray):
+        self.station_id = station_id
+        self.time = time
+        self.msg_numbers = []
+        self.complete = False
+        self.slot = slot
+        self._buffer = buffer
+        self._size = 0
+
+    def __repr__(self):
+        return (f"Epoch(station {self.station_id}, {self.time} ms, "
+                f"{self._size} cells)")
+
+    def __len__(self):
+        return self._size
+
+    @property
+    def cells(self) -> np.ndarray:
+        return self._buffer[:self._size]
+
+    def detach(self):
+        """
+        Copy the cells out of the assembler buffer, so that they outlive the
+        next call of ``EpochAssembler.feed``.
+        """
+        self._buffer = self.cells.copy()
+
+    def add(self, msg) -> int:
+        """
+        Copy the observations of a message, as many as there is room for.
+
+        Returns
+        ----------
+        int
+            Number of observations left out.
+        """
+        self.msg_numbers.append(msg.type)
+        start = self._size
+        if isinstance(msg, Msm):
+            count = len(msg)
+        else:
+            count = 1
+        stop = min(start + count, len(self._buffer))
+        cells = self._buffer[start:stop]
+        size = stop - start
+        if isinstance(msg, Msm):
+            cells['constellation'] = CONSTELLATIONS.index(msg.constellation)
+            for name in ('satellite', 'signal', 'pseudorange', 'phaserange',
+                         'phaserange_rate', 'cnr', 'lock_time',
+                         'half_cycle'):
+                cells[name] = getattr(msg, name)[:size]
+        elif size:
+            # The first satellite of the message, its ranges modulo one
+            # light millisecond.
+            pseudorange = msg.l1_pseudorange * 0.02
+            cells[0] = (
+                CONSTELLATIONS.index("GPS"), msg.sat_id, GPS_L1_CA_SIGNAL,
+                pseudorange,
+                pseudorange + (msg.l1_phaserange - msg.l1_pseudorange)
+                * 0.0005,
+                np.nan, np.nan, -1, False)
+        self._size = stop
+        return count - size
+
+
+class EpochAssembler:
+    """
+    Group observation messages into epochs per station.
+
+    Messages are keyed by station id and GPS time of day, so the MSM of
+    every constellation and the 1004 messages of an epoch end up in the
+    same ``Epoch``. An epoch is closed:
+
+    - by its last message, the one with the multiple message flag,
+      ``synchronous_gnss``, cleared,
+    - by a message of a newer epoch of its station, when the last message
+      was lost,
+    - when ``max_epochs`` epochs are in flight and another one starts, the
+      oldest one being evicted.
+
+    Observations are copied into a buffer of ``max_epochs + 1`` epochs of
+    ``max_cells`` cells allocated once, and the epochs closed by ``feed`` and
+    ``flush`` are views of it. They are overwritten by the next call of
+    ``feed``: copy them to keep them. ``iter_epochs`` yields epochs with
+    cells of their own instead.
+    Messages of epochs of a station older than the last one closed are
+    dropped as late.
+
+    Parameters
+    ----------
+    max_epochs: int
+        Maximum number of epochs in flight.
+    max_cells: int
+        Maximum number of observations of an epoch, the extra ones are
+        dropped.
+
+    Examples
+    --------
+    >>> assembler = EpochAssembler(max_epochs=32)
+    >>> for epoch in assembler.iter_epochs(parser.iter_messages()):
+    ...     engine.process(epoch.station_id, epoch.time, epoch.cells)
+    """
+    def __init__(self, max_epochs: int = MAX_EPOCHS,
+                 max_cells: int = MAX_CELLS):
+        if max_epochs < 1:
+            raise ValueError("max_epochs must be at least 1")
+        self.max_epochs = max_epochs
+        self.max_cells = max_cells
+        self.buffer = np.zeros((max_epochs + 1, max_cells), dtype=CELL_DTYPE)
+        self.nr_complete = 0
+        self.nr_incomplete = 0
+        self.nr_evicted = 0
+        self.nr_late = 0
+        self.dropped_cells = 0
+        self._free = list(range(max_epochs, -1, -1))
+        self._released = []
+        self._open = {}
+        self._closed = {}
+
+    def __len__(self):
+        return len(self._open)
+
+    def stats(self) -> dict:
+        """
+        Assembler counters.
+
+        Returns
+        ----------
+        dict
+            Epochs closed complete and incomplete, evicted, messages dropped
+            as late, observations dropped for lack of room, and epochs in
+            flight.
+        """
+        return {
+            "complete": self.nr_complete,
+            "incomplete": self.nr_incomplete,
+            "evicted": self.nr_evicted,
+            "late": self.nr_late,
+            "dropped_cells": self.dropped_cells,
+            "in_flight": len(self._open),
+        }
+
+    def _close(self, epoch: Epoch, complete: bool) -> Epoch:
+        del self._open[epoch.station_id, epoch.time]
+        # The slot is reused once the epoch was handed out.
+        self._released.append(epoch.slot)
+        epoch.complete = complete
+        if complete:
+            self.nr_complete += 1
+        else:
+            self.nr_incomplete += 1
+        last = self._closed.get(epoch.station_id)
+        if last is None or _after(epoch.time, last):
+            self._closed[epoch.station_id] = epoch.time
+        return epoch
+
+    def feed(self, msg) -> list:
+        """
+        Add the observations of a message.
+
+        Messages other than 1004 and MSM are ignored.
+
+        Returns
+        ----------
+        list
+            Epochs closed by the message, oldest first.
+        """
+        self._free.extend(self._released)
+        self._released.clear()
+        if msg.type not in OBSERVATION_MSG_NUMBERS or not isinstance(
+                msg, (Msm, ExtendedL1L2Gps)):
+            return []
+
+        station_id = msg.station_id
+        time = epoch_time(
+            msg.type, msg.epoch if isinstance(msg, Msm) else msg.gps_epoch)
+        last = self._closed.get(station_id)
+        if last is not None and not _after(time, last):
+            self.nr_late += 1
+            return []
+
+        closed = []
+        epoch = self._open.get((station_id, time))
+        if epoch is None:
+            for other in list(self._open.values()):
+                if other.station_id == station_id and _after(time, other.time):
+                    closed.append(self._close(other, complete=False))
+            if len(self._open) == self.max_epochs:
+                self.nr_evicted += 1
+                closed.append(self._close(
+                    next(iter(self._open.values())), complete=False))
+            slot = self._free.pop()
+            epoch = Epoch(station_id, time, slot, self.buffer[slot])
+            self._open[station_id, time] = epoch
+
+        self.dropped_cells += epoch.add(msg)
+        if not msg.synchronous_gnss:
+            closed.append(self._close(epoch, complete=True))
+        return closed
+
+    def flush(self) -> list:
+        """
+        Close the epochs in flight, e.g. at the end of a stream.
+
+        Returns
+        ----------
+        list
+            Epochs closed, oldest first.
+        """
+        self._free.extend(self._released)
+        self._released.clear()
+        return [self._close(epoch, complete=False)
+                for epoch in list(self._open.values())]
+
+    def iter_epochs(self, messages):
+        """
+        Yield the epochs of messages, e.g. ``Parser.iter_messages()``, and
+        the epochs in flight at their end.
+
+        The epochs are detached from the buffer, they can be kept.
+        """
+        for msg in messages:
+            for epoch in self.feed(msg):
+                epoch.detach()
+                yield epoch
+        for epoch in self.flush():
+            epoch.detach()
+            yield epoch
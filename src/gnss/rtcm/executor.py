@@ -0,0 +1,307 @@
+from collections import deque
+import threading
+import time
+
+
+QUEUE_SIZE = 1024
+QUEUE_POLICIES = ("block", "drop-oldest", "coalesce-latest")
+EXECUTOR_MODES = ("worker", "pool")
+
+
+class CallbackQueue:
+    """
+    Bounded queue of callback calls shared by producer and worker threads.
+
+    Calls are queued with a key, the message number, which is what
+    "coalesce-latest" coalesces on. When the queue is full:
+
+    - "block" waits for room, the time waited is counted in
+      ``blocked_time``.
+    - "drop-oldest" drops the oldest queued call.
+    - "coalesce-latest" replaces a queued call of the same key, keeping its
+      place, and drops the oldest call otherwise. Calls of a key already
+      queued are coalesced even when the queue is not full.
+    """
+    def __init__(self, maxsize: int = QUEUE_SIZE, policy: str = "block"):
+        if policy not in QUEUE_POLICIES:
+            raise ValueError(f"invalid queue policy: {policy}")
+        if maxsize < 1:
+            raise ValueError("queue size must be at least 1")
+        self.maxsize = maxsize
+        self.policy = policy
+        self.closed = False
+        self.max_depth = 0
+        self.submitted = 0
+        self.executed = 0
+        self.dropped = 0
+        self.coalesced = 0
+        self.errors = 0
+        self.last_error = None
+        self.blocked_time = 0.0
+        self._items = deque()
+        self._latest = {}
+        self._lock = threading.Lock()
+        self._not_empty = threading.Condition(self._lock)
+        self._not_full = threading.Condition(self._lock)
+        self._drained = threading.Condition(self._lock)
+        self._running = 0
+
+    def __len__(self):
+        return len(self._items)
+
+    def put(self, key, callback, msg):
+        with self._lock:
+            if self.closed:
+                raise RuntimeError("queue closed")
+            self.submitted += 1
+            if self.policy == "coalesce-latest":
+                # The queue holds keys, the latest call of each is in
+                # _latest.
+                item = (callback, msg)
+                if (callback, key) in self._latest:
+                    self._latest[callback, key] = item
+                    self.coalesced += 1
+                    return
+            items = self._items
+            if len(items) >= self.maxsize:
+                if self.policy == "block":
+                    start = time.perf_counter()
+                    while len(items) >= self.maxsize and not self.closed:
+                        self._not_full.wait()
+                    self.blocked_time += time.perf_counter() - start
+                else:
+                    dropped = items.popleft()
+                    if self.policy == "coalesce-latest":
+                        del self._latest[dropped]
+                    self.dropped += 1
+            if self.policy == "coalesce-latest":
+                self._latest[callback, key] = item
+                items.append((callback, key))
+            else:
+                items.append((callback, msg))
+            self.max_depth = max(self.max_depth, len(items))
+            self._not_empty.notify()
+
+    def get(self):
+        """
+        Next call, waiting for one.
+
+        Returns
+        ----------
+        tuple or None
+            Callback and message, None once closed and empty.
+        """
+        with self._lock:
+            while not self._items:
+                if self.closed:
+                    return None
+                self._not_empty.wait()
+            item = self._items.popleft()
+            if self.policy == "coalesce-latest":
+                item = self._latest.pop(item)
+            self._running += 1
+            self._not_full.notify()
+            return item
+
+    def done(self, error: Exception = None):
+        with self._lock:
+            self._running -= 1
+            self.executed += 1
+            if error is not None:
+                self.errors += 1
+                self.last_error = error
+            if not self._items and not self._running:
+                self._drained.notify_all()
+
+    def join(self):
+        """
+        Wait until every queued call has run.
+        """
+        with self._lock:
+            while (self._items or self._running) and not self.closed:
+                self._drained.wait()
+
+    def close(self):
+        with self._lock:
+            self.closed = True
+            self._not_empty.notify_all()
+            self._not_full.notify_all()
+            self._drained.notify_all()
+
+    def stats(self) -> dict:
+        return {
+            "depth": len(self._items),
+            "max_depth": self.max_depth,
+            "submitted": self.submitted,
+            "executed": self.executed,
+            "dropped": self.dropped,
+            "coalesced": self.coalesced,
+            "errors": self.errors,
+            "blocked_time": self.blocked_time,
+        }
+
+
+class CallbackExecutor:
+    """
+    Run parser callbacks in threads, off the parsing loop.
+
+    Given to a ``Parser``, the callbacks of the decoded messages are queued
+    instead of called, and the parser goes on framing while they run.
+
+    - In "worker" mode, every callback has a thread and a queue of its own,
+      so its calls run in the order of the messages and a slow callback
+      only delays itself.
+    - In "pool" mode, the calls of all the callbacks go through a single
+      queue served by ``max_workers`` threads, in no particular order.
+
+    Queues are bounded, see ``CallbackQueue`` for the policies applied when
+    a queue is full. Exceptions raised by the callbacks are counted, the
+    last one kept, and do not stop the workers.
+
+    Parameters
+    ----------
+    mode: str
+        One of ``EXECUTOR_MODES``.
+    maxsize: int
+        Size of each queue.
+    policy: str
+        One of ``QUEUE_POLICIES``.
+    max_workers: int
+        Number of threads of the pool mode.
+
+    Examples
+    --------
+    >>> with CallbackExecutor(policy="coalesce-latest") as executor:
+    ...     parser = Parser(client, executor=executor)
+    ...     @parser.callback
+    ...     def store(msg: ReferenceStationAntenna):
+    ...         database.write(msg)
+    ...     list(parser.iter_messages())
+    >>> executor.stats()
+    """
+    def __init__(
+            self,
+            mode: str = "worker",
+            maxsize: int = QUEUE_SIZE,
+            policy: str = "block",
+            max_workers: int = 4):
+        if mode not in EXECUTOR_MODES:
+            raise ValueError(f"invalid executor mode: {mode}")
+        if policy not in QUEUE_POLICIES:
+            raise ValueError(f"invalid queue policy: {policy}")
+        self.mode = mode
+        self.maxsize = maxsize
+        self.policy = policy
+        self.max_workers = max_workers
+        self.closed = False
+        self._queues = {}
+        # Unique queue names, per callback key.
+        self._names = {"pool": "pool"}
+        self._name_counts = {}
+        self._threads = []
+        self._lock = threading.Lock()
+        if mode == "pool":
+            queue = CallbackQueue(maxsize, policy)
+            self._queues["pool"] = queue
+            for i in range(max_workers):
+                self._start(queue, f"callback-pool-{i}")
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    def _start(self, queue: CallbackQueue, name: str):
+        thread = threading.Thread(
+            target=self._work, args=(queue,), name=name, daemon=True)
+        thread.start()
+        self._threads.append(thread)
+
+    @staticmethod
+    def _work(queue: CallbackQueue):
+        while True:
+            item = queue.get()
+            if item is None:
+                return
+            callback, msg = item
+            try:
+                callback(msg)
+            except Exception as error:
+                queue.done(error)
+            else:
+                queue.done()
+
+    def _queue(self, callback) -> CallbackQueue:
+        if self.mode == "pool":
+            return self._queues["pool"]
+        try:
+            return self._queues[callback]
+        except KeyError:
+            with self._lock:
+                if callback not in self._queues:
+                    # Callbacks of the same name, e.g. the methods of two
+                    # instances, are told apart by a counter.
+                    name = getattr(callback, "__qualname__", repr(callback))
+                    count = self._name_counts.get(name, 0) + 1
+                    self._name_counts[name] = count
+                    if count > 1:
+                        name = f"{name}-{count}"
+                    queue = CallbackQueue(self.maxsize, self.policy)
+                    self._start(queue, f"callback-{name}")
+                    self._names[callback] = name
+                    self._queues[callback] = queue
+            return self._queues[callback]
+
+    def submit(self, callback, msg):
+        """
+        Queue a call of callback with msg.
+
+        Raises
+        ---------
+        RuntimeError
+            If the executor is closed.
+        """
+        if self.closed:
+            raise RuntimeError("executor closed")
+        self._queue(callback).put(msg.type, callback, msg)
+
+    def join(self):
+        """
+        Wait until every queued call has run.
+        """
+        for queue in list(self._queues.values()):
+            queue.join()
+
+    def close(self, wait: bool = True):
+        """
+        Stop the workers, after the queued calls have run if wait.
+        """
+        if self.closed:
+            return
+        if wait:
+            self.join()
+        self.closed = True
+        for queue in self._queues.values():
+            queue.close()
+        if wait:
+            for thread in self._threads:
+                thread.join()
+
+    def stats(self) -> dict:
+        """
+        Queue statistics, per callback name in worker mode, under "pool" in
+        pool mode.
+
+        Callbacks of the same name get the names "name", "name-2", "name-3"
+        and so on, in the order of their first call.
+
+        Returns
+        ----------
+        dict
+            Current and maximum depth, calls submitted, executed, dropped,
+            coalesced, raising, and the time the parser was blocked.
+        """
+        return {
+            self._names[key]: queue.stats()
+            for key, queue in list(self._queues.items())}
@@ -0,0 +1,397 @@
+from typing import NamedTuple
+
+import numpy as np
+
+
+class Field(NamedTuple):
+    """
+    Bit field of a RTCM message.
+
+    The format follows bitstring tokens: ``uint:n``, ``int:n`` (two's
+    complement), ``bool:n`` or ``pad:n`` for reserved bits, plus ``sint:n``
+    for the sign and magnitude integers of RTCM.
+    """
+    name: str
+    fmt: str
+    scale: float = None
+
+
+def parse_format(fmt: str):
+    """
+    Split a field format into its kind and its width in bits.
+    """
+    try:
+        kind, width = fmt.split(':')
+        width = int(width)
+    except ValueError:
+        raise ValueError(f"invalid field format: {fmt}") from None
+    if kind not in ('uint', 'int', 'sint', 'bool', 'pad') or width <= 0:
+        raise ValueError(f"invalid field format: {fmt}")
+    return kind, width
+
+
+def extract_bits(data: np.ndarray, pos: np.ndarray, width: int) -> np.ndarray:
+    """
+    Read an unsigned field at many bit positions at once.
+
+    Parameters
+    ----------
+    data: numpy.ndarray
+        Bytes holding the fields, as an uint8 array.
+    pos: numpy.ndarray
+        Bit positions of the fields in data. Every field must lie within
+        data, no check is made.
+    width: int
+        Width of the fields in bits, up to 64.
+
+    Returns
+    ----------
+    numpy.ndarray
+        Field values as uint64.
+    """
+    if width > 57:
+        # Up to 9 bytes would be needed, read the field in two parts.
+        high = extract_bits(data, pos, width - 32)
+        low = extract_bits(data, pos + width - 32, 32)
+        return (high << np.uint64(32)) | low
+
+    nr_bytes = (width + 14) // 8
+    start = pos >> 3
+    value = np.zeros(len(start), dtype=np.uint64)
+    for k in range(nr_bytes):
+        value <<= np.uint64(8)
+        value |= data.take(start + k, mode='clip')
+    shift = (nr_bytes * 8 - width - (pos & 7)).astype(np.uint64)
+    return (value >> shift) & np.uint64((1 << width) - 1)
+
+
+def _typed(raw: np.ndarray, kind: str, width: int, scale: float):
+    if kind == 'bool':
+        return raw.astype(bool)
+    values = raw.astype(np.int64) if width < 64 or kind == 'int' else raw
+    if kind == 'int' and width < 64:
+        values -= (values >> (width - 1)) << width
+    elif kind == 'sint':
+        sign = values >> (width - 1)
+        values = (values & ((1 << (width - 1)) - 1)) * (1 - 2 * sign)
+    if scale is not None:
+        values = values * scale
+    return values
+
+
+def _bounds(kind: str, width: int):
+    if kind == 'int':
+        return -(1 << (width - 1)), (1 << (width - 1)) - 1
+    if kind == 'sint':
+        return -((1 << (width - 1)) - 1), (1 << (width - 1)) - 1
+    return 0, (1 << width) - 1
+
+
+def int_to_bits(value: int, width: int) -> np.ndarray:
+    """
+    Bits of an unsigned integer of width bits, most significant first, as
+    an uint8 array like ``numpy.unpackbits`` returns.
+    """
+    nr_bytes = (width + 7) // 8
+    bits = np.unpackbits(
+        np.frombuffer(value.to_bytes(nr_bytes, 'big'), dtype=np.uint8))
+    return bits[nr_bytes * 8 - width:]
+
+
+class Layout:
+    """
+    Contiguous sequence of bit fields.
+
+    The layout is compiled once into functions extracting every field of a
+    buffer from a single ``int.from_bytes`` call with shifts and masks.
+
+    Attributes
+    ----------
+    names: tuple
+        Names of the decoded fields, padding excluded.
+    bit_length: int
+        Number of bits covered by the layout.
+    unpack: callable
+        ``unpack(buff, pos=0)`` returns the field values as a tuple, pos
+        being the bit position of the first field in buff.
+    decode_into: callable
+        ``decode_into(obj, buff, pos=0)`` sets the fields as attributes of
+        obj and returns the bit position following the layout.
+    pack: callable
+        ``pack(values)`` encodes the fields taken from the values mapping,
+        padding bits set to zero, into an integer of ``bit_length`` bits.
+
+    Raises
+    ---------
+    ValueError
+        If a field format is invalid. The compiled functions raise it when
+        the buffer is too short, or a value does not fit its field.
+    """
+    def __init__(self, *fields: Field):
+        self.fields = fields
+        self.names = tuple(
+            field.name for field in fields if not field.fmt.startswith('pad'))
+        self.bit_length = sum(parse_format(field.fmt)[1] for field in fields)
+        self.unpack, self.decode_into, self.pack = self._compile()
+
+    def __add__(self, other):
+        return Layout(*self.fields, *other.fields)
+
+    def extend(self, *fields: Field):
+        return Layout(*self.fields, *fields)
+
+    def unpack_columns(self, data: np.ndarray, pos: np.ndarray) -> dict:
+        """
+        Extract the fields of many occurrences of the layout at once.
+
+        Values are the ones ``unpack`` returns, as NumPy arrays: int64,
+        uint64 for 64 bits unsigned fields, bool or float64 when scaled.
+
+        Parameters
+        ----------
+        data: numpy.ndarray
+            Bytes holding the layouts, as an uint8 array.
+        pos: numpy.ndarray
+            Bit position of each layout in data. Every layout must lie
+            within data.
+
+        Returns
+        ----------
+        dict
+            Field arrays by name, padding excluded.
+        """
+        pos = np.asarray(pos, dtype=np.int64)
+        columns = {}
+        for field in self.fields:
+            kind, width = parse_format(field.fmt)
+            if kind != 'pad':
+                columns[field.name] = _typed(
+                    extract_bits(data, pos, width), kind, width, field.scale)
+            pos = pos + width
+        return columns
+
+    def _expressions(self):
+        pos = 0
+        for field in self.fields:
+            kind, width = parse_format(field.fmt)
+            pos += width
+            if kind == 'pad':
+                continue
+
+            shift = self.bit_length - pos
+            expr = f"(value >> {shift})" if shift else "value"
+            expr = f"({expr} & {hex((1 << width) - 1)})"
+            if kind == 'int':
+                sign = hex(1 << (width - 1))
+                expr = f"(({expr} ^ {sign}) - {sign})"
+            elif kind == 'sint':
+                magnitude = hex((1 << (width - 1)) - 1)
+                expr = (f"(-({expr} & {magnitude}) if {expr} >> {width - 1} "
+                        f"else {expr})")
+            elif kind == 'bool':
+                expr = f"bool{expr}"
+            if field.scale is not None:
+                expr = f"{expr} * {field.scale!r}"
+            yield field.name, expr
+
+    def _pack_statements(self):
+        for field in self.fields:
+            kind, width = parse_format(field.fmt)
+            if kind == 'pad':
+                yield f"    value <<= {width}"
+                continue
+
+            value = f"values[{field.name!r}]"
+            if field.scale is not None:
+                value = f"int(round({value} / {field.scale!r}))"
+            elif kind == 'bool':
+                value = f"int(bool({value}))"
+            else:
+                value = f"int({value})"
+            low, high = _bounds(kind, width)
+            yield f"    v = {value}"
+            yield f"    if not {low} <= v <= {high}:"
+            yield f"        raise ValueError('{field.name} out of range')"
+            if kind == 'sint':
+                yield f"    v = (-v | {hex(1 << (width - 1))}) if v < 0 else v"
+            mask = hex((1 << width) - 1)
+            yield f"    value = (value << {width}) | (v & {mask})"
+
+    def _compile(self):
+        nr_bytes = (self.bit_length + 14) // 8
+        prologue = [
+            "    start = pos >> 3",
+            f"    chunk = buff[start:start + {nr_bytes}]",
+            f"    shift = len(chunk) * 8 - (pos & 7) - {self.bit_length}",
+            "    if shift < 0:",
+            "        raise ValueError('buffer too short')",
+            "    value = int.from_bytes(chunk, 'big') >> shift",
+        ]
+        expressions = list(self._expressions())
+        values = "".join(f"{expr}, " for _, expr in expressions)
+        source = "\n".join(
+            ["def unpack(buff, pos=0):"] + prologue
+            + [f"    return ({values})",
+               "def decode_into(obj, buff, pos=0):"] + prologue
+            + [f"    obj.{name} = {expr}" for name, expr in expressions]
+            + [f"    return pos + {self.bit_length}",
+               "def pack(values):",
+               "    value = 0"]
+            + list(self._pack_statements())
+            + ["    return value"])
+        namespace = {}
+        exec(source, namespace)
+        return namespace['unpack'], namespace['decode_into'], namespace['pack']
+
+
+class ArrayLayout:
+    """
+    Sequence of bit fields each repeated a variable number of times.
+
+    This describes the satellite and signal data blocks of MSM messages
+    where all the values of a field are stored next to each other. Values
+    are extracted with NumPy from the unpacked bits of the message, one
+    matrix product per field, computed in floating point which is exact
+    for fields up to 53 bits.
+
+    Raises
+    ---------
+    ValueError
+        If a field format is invalid, or is wider than 53 bits.
+    """
+    def __init__(self, *fields: Field):
+        self.fields = fields
+        self.names = tuple(
+            field.name for field in fields if not field.fmt.startswith('pad'))
+        self._formats = []
+        for field in fields:
+            kind, width = parse_format(field.fmt)
+            if width > 53:
+                raise ValueError(f"field too wide: {field.fmt}")
+            weights = 2.0 ** np.arange(width - 1, -1, -1)
+            self._formats.append((kind, width, weights))
+        self.bit_length = sum(width for _, width, _ in self._formats)
+
+    def unpack(self, bits: np.ndarray, pos: int, count: int):
+        """
+        Extract count values of every field.
+
+        Parameters
+        ----------
+        bits: numpy.ndarray
+            Message bits, as returned by ``numpy.unpackbits``, preferably
+            converted to float64.
+        pos: int
+            Bit position of the first value.
+        count: int
+            Number of values of each field.
+
+        Returns
+        ----------
+        tuple
+            Arrays of the decoded fields, padding excluded, and the bit
+            position following the layout.
+        """
+        if pos + count * self.bit_length > len(bits):
+            raise ValueError('buffer too short')
+        values = []
+        for field, (kind, width, weights) in zip(self.fields, self._formats):
+            end = pos + count * width
+            if kind != 'pad':
+                array = (bits[pos:end].reshape(count, width) @ weights
+                         ).astype(np.int64)
+                if kind == 'int':
+                    array -= (array >> (width - 1)) << width
+                elif kind == 'sint':
+                    sign = array >> (width - 1)
+                    array = (array - (sign << (width - 1))) * (1 - 2 * sign)
+                elif kind == 'bool':
+                    array = array.astype(bool)
+                if field.scale is not None:
+                    array = array * field.scale
+                values.append(array)
+            pos = end
+        return tuple(values), pos
+
+    def pack(self, columns: dict, count: int) -> np.ndarray:
+        """
+        Encode count values of every field, the inverse of ``unpack``.
+
+        Parameters
+        ----------
+        columns: dict
+            Field arrays by name, scaled fields in their scaled unit.
+        count: int
+            Number of values of each field.
+
+        Returns
+        ----------
+        numpy.ndarray
+            Bits of the layout, as an uint8 array, padding set to zero.
+
+        Raises
+        ---------
+        ValueError
+            If a value does not fit its field.
+        """
+        parts = []
+        for field, (kind, width, _) in zip(self.fields, self._formats):
+            if kind == 'pad':
+                parts.append(np.zeros(count * width, dtype=np.uint8))
+                continue
+            values = np.asarray(columns[field.name])
+            if field.scale is not None:
+                values = values / field.scale
+            if values.dtype.kind == 'f':
+                if not np.isfinite(values).all():
+                    raise ValueError(f'{field.name} out of range')
+                values = np.round(values)
+            values = values.astype(np.int64).reshape(count)
+            low, high = _bounds(kind, width)
+            if ((values < low) | (values > high)).any():
+                raise ValueError(f'{field.name} out of range')
+            if kind == 'sint':
+                values = np.where(
+                    values < 0, -values | (1 << (width - 1)), values)
+            shifts = np.arange(width - 1, -1, -1, dtype=np.int64)
+            parts.append(((values[:, None] >> shifts) & 1).astype(
+                np.uint8).ravel())
+        if not parts:
+            return np.zeros(0, dtype=np.uint8)
+        return np.concatenate(parts)
+
+    def unpack_columns(self, data: np.ndarray, pos: np.ndarray,
+                       counts: np.ndarray):
+        """
+        Extract the values of many occurrences of the layout at once.
+
+        Parameters
+        ----------
+        data: numpy.ndarray
+            Bytes holding the layouts, as an uint8 array.
+        pos: numpy.ndarray
+            Bit position of each layout in data. Every layout must lie
+            within data.
+        counts: numpy.ndarray
+            Number of values of each field in each layout.
+
+        Returns
+        ----------
+        tuple
+            Arrays of the decoded fields, padding excluded, holding the
+            values of all the layouts one after the other, and the bit
+            positions following each layout.
+        """
+        pos = np.asarray(pos, dtype=np.int64)
+        counts = np.asarray(counts, dtype=np.int64)
+        starts = np.cumsum(counts) - counts
+        item = np.arange(counts.sum()) - np.repeat(starts, counts)
+        values = []
+        for field, (kind, width, _) in zip(self.fields, self._formats):
+            if kind != 'pad':
+                bit_pos = np.repeat(pos, counts) + item * width
+                values.append(_typed(
+                    extract_bits(data, bit_pos, width), kind, width,
+                    field.scale))
+            pos = pos + counts * width
+        return tuple(values), pos
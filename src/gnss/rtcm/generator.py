@@ -0,0 +1,273 @@
+from itertools import chain
+
+import numpy as np
+
+from .messages import (
+    Msm, RtcmMessage, Type, RANGE_MS, OBSERVATION_MSG_NUMBERS, epoch_field
+)
+from .parser import encode
+
+
+# Number of satellite ids drawn from per constellation.
+SATELLITE_IDS = {
+    "GPS": 32, "GLONASS": 24, "GALILEO": 36, "QZSS": 10, "BEIDOU": 63}
+# MSM signal ids drawn from, the first nr_sig are used.
+SIGNAL_IDS = (2, 15, 22, 8, 30, 16, 4, 9)
+EARTH_RADIUS = 6378137.0
+# Ranges oscillate around their mean with the period of a half sidereal
+# day, like the ones of GPS satellites.
+RANGE_MEAN = (21e6, 24e6)
+RANGE_AMPLITUDE = (1e6, 3e6)
+RANGE_PERIOD = 43082.0
+STATION_MSG_NUMBERS = (1005, 1006)
+# 1004, 1005, 1006 and the MSM4 to MSM7 of GPS, GLONASS, Galileo, QZSS and
+# BeiDou.
+GENERATED_MSG_NUMBERS = frozenset(chain(
+    (1004,), STATION_MSG_NUMBERS,
+    *(range(base + 4, base + 8) for base in (1070, 1080, 1090, 1110, 1120))))
+
+
+class Generator:
+    """
+    Synthetic RTCM stream, reproducible from its seed.
+
+    Every epoch, each station sends its reference station messages, every
+    ``station_interval`` epochs, then one observation message per message
+    number. The satellites of each station and constellation are drawn
+    once and their ranges vary smoothly, signals of a satellite being a few
+    meters apart. The multiple message flag of the observation messages is
+    set on all the messages of a station epoch but its last one.
+
+    Frames are encoded with ``encode``, at a few thousand frames per
+    second: for higher rates, generate a recording once and replay it with
+    a ``Replayer``.
+
+    Parameters
+    ----------
+    msg_numbers: iterable of int
+        Message numbers among 1004, 1005, 1006 and the MSM4 to MSM7.
+    stations: iterable of int
+        Reference station ids.
+    nr_sat: int
+        Number of satellites of each constellation.
+    nr_sig: int
+        Number of signals of each satellite in the MSM.
+    interval: float
+        Time between epochs in seconds.
+    station_interval: int
+        Number of epochs between reference station messages.
+    start: float
+        GPS time of week of the first epoch in seconds.
+    seed: int
+        Seed of the random draws.
+
+    Raises
+    ---------
+    ValueError
+        If a message number cannot be generated, or nr_sat or nr_sig are
+        out of range.
+
+    Examples
+    --------
+    >>> generator = Generator([1005, 1074, 1084], stations=range(10))
+    >>> data = generator.generate(nr_epochs=3600)
+    """
+    def __init__(
+            self,
+            msg_numbers=(1005, 1077),
+            stations=(0,),
+            nr_sat: int = 10,
+            nr_sig: int = 2,
+            interval: float = 1.0,
+            station_interval: int = 10,
+            start: float = 0.0,
+            seed: int = 0):
+        self.msg_numbers = [int(msg_number) for msg_number in msg_numbers]
+        for msg_number in self.msg_numbers:
+            if msg_number not in GENERATED_MSG_NUMBERS:
+                raise ValueError(f"message {msg_number} cannot be generated")
+        if not 1 <= nr_sig <= len(SIGNAL_IDS):
+            raise ValueError(f"invalid number of signals: {nr_sig}")
+        self.stations = list(stations)
+        self.nr_sat = nr_sat
+        self.nr_sig = nr_sig
+        self.interval = interval
+        self.station_interval = station_interval
+        self.start = start
+        self.seed = seed
+        self.nr_frames = 0
+        self.nr_bytes = 0
+        self.constellations = self._constellations()
+        if not 1 <= nr_sat <= min(
+                SATELLITE_IDS[constellation]
+                for constellation in self.constellations + ["GPS"]):
+            raise ValueError(f"invalid number of satellites: {nr_sat}")
+
+        rng = np.random.default_rng(seed)
+        self._stations = {station_id: self._draw_station(rng)
+                          for station_id in self.stations}
+
+    def _constellations(self):
+        constellations = []
+        for msg_number in self.msg_numbers:
+            if msg_number == 1004:
+                constellation = "GPS"
+            elif msg_number in OBSERVATION_MSG_NUMBERS:
+                constellation = RtcmMessage.get_class(msg_number).constellation
+            else:
+                continue
+            if constellation not in constellations:
+                constellations.append(constellation)
+        return constellations
+
+    def _draw_station(self, rng) -> dict:
+        lat = rng.uniform(-np.pi / 2, np.pi / 2)
+        lon = rng.uniform(-np.pi, np.pi)
+        station = {
+            "ecef": EARTH_RADIUS * np.array([
+                np.cos(lat) * np.cos(lon), np.cos(lat) * np.sin(lon),
+                np.sin(lat)]),
+            "height": int(rng.integers(0, 30000)),
+        }
+        nr_cells = self.nr_sat * self.nr_sig
+        for constellation in self.constellations:
+            station[constellation] = {
+                "satellites": np.sort(rng.choice(
+                    SATELLITE_IDS[constellation], self.nr_sat,
+                    replace=False) + 1),
+                "mean": rng.uniform(*RANGE_MEAN, self.nr_sat),
+                "amplitude": rng.uniform(*RANGE_AMPLITUDE, self.nr_sat),
+                "phase": rng.uniform(0, 2 * np.pi, self.nr_sat),
+                "bias": rng.uniform(-5, 5, nr_cells),
+                "phase_offset": rng.uniform(-10, 10, nr_cells),
+                "rate_noise": rng.uniform(-0.5, 0.5, nr_cells),
+                "cnr": rng.uniform(30, 50, nr_cells),
+            }
+        return station
+
+    @staticmethod
+    def _ranges(satellites: dict, elapsed: float):
+        """
+        Ranges and range rates of the satellites at a time.
+        """
+        angle = 2 * np.pi * elapsed / RANGE_PERIOD + satellites["phase"]
+        ranges = satellites["mean"] + satellites["amplitude"] * np.sin(angle)
+        rates = (satellites["amplitude"] * 2 * np.pi / RANGE_PERIOD
+                 * np.cos(angle))
+        return ranges, rates
+
+    def _station_msg(self, msg_number: int, station_id: int) -> RtcmMessage:
+        station = self._stations[station_id]
+        constellations = self.constellations
+        msg = RtcmMessage(msg_type=Type(msg_number))
+        vars(msg).update(
+            station_id=station_id,
+            gps_indicator="GPS" in constellations,
+            glonass_indicator="GLONASS" in constellations,
+            galileo_indicator="GALILEO" in constellations,
+            station_indicator=False,
+            ecef_x=station["ecef"][0],
+            oscillator_indicator=False,
+            ecef_y=station["ecef"][1],
+            quarter_cycle_indicator=0,
+            ecef_z=station["ecef"][2],
+            height=station["height"])
+        return msg
+
+    def _gps_msg(self, station_id: int, time_of_week: int, elapsed: float,
+                 synchronous: bool) -> RtcmMessage:
+        satellites = self._stations[station_id]["GPS"]
+        ranges, _ = self._ranges(satellites, elapsed)
+        pseudorange = round((ranges[0] % RANGE_MS) / 0.02)
+        msg = RtcmMessage(msg_type=Type.EXTENDED_L1_L2_GPS)
+        vars(msg).update(
+            station_id=station_id,
+            gps_epoch=epoch_field(1004, time_of_week),
+            synchronous_gnss=synchronous,
+            nr_gps_sat=self.nr_sat,
+            divergence_free_smoothing=False,
+            smoothing_interval=0,
+            sat_id=int(satellites["satellites"][0]),
+            l1_code_indicator=0,
+            l1_pseudorange=pseudorange,
+            l1_phaserange=pseudorange + round(
+                satellites["phase_offset"][0] / 0.0005),
+            lock_time_indicator=min(int(elapsed), 127))
+        return msg
+
+    def _msm(self, msg_number: int, station_id: int, time_of_week: int,
+             elapsed: float, synchronous: bool) -> Msm:
+        msg = RtcmMessage(msg_type=Type(msg_number))
+        satellites = self._stations[station_id][msg.constellation]
+        ranges, rates = self._ranges(satellites, elapsed)
+        nr_sig = self.nr_sig
+        pseudorange = np.repeat(ranges, nr_sig) + satellites["bias"]
+        vars(msg).update(
+            station_id=station_id,
+            epoch=epoch_field(msg_number, time_of_week),
+            synchronous_gnss=synchronous,
+            iods=0,
+            clock_steering=0,
+            external_clock=0,
+            divergence_free_smoothing=False,
+            smoothing_interval=0,
+            satellite=np.repeat(satellites["satellites"], nr_sig),
+            signal=np.tile(SIGNAL_IDS[:nr_sig], self.nr_sat),
+            pseudorange=pseudorange,
+            phaserange=pseudorange + satellites["phase_offset"],
+            phaserange_rate=np.repeat(rates, nr_sig)
+            + satellites["rate_noise"],
+            cnr=satellites["cnr"],
+            lock_time=np.full(self.nr_sat * nr_sig, int(elapsed * 1000)),
+            half_cycle=np.zeros(self.nr_sat * nr_sig, dtype=bool))
+        return msg
+
+    def epoch(self, index: int) -> list:
+        """
+        Frames of an epoch, for every station.
+
+        Parameters
+        ----------
+        index: int
+            Epoch number, from 0 for the first epoch.
+        """
+        elapsed = index * self.interval
+        time_of_week = round((self.start + elapsed) * 1000)
+        observations = [
+            msg_number for msg_number in self.msg_numbers
+            if msg_number in OBSERVATION_MSG_NUMBERS]
+        frames = []
+        for station_id in self.stations:
+            if index % self.station_interval == 0:
+                for msg_number in self.msg_numbers:
+                    if msg_number in STATION_MSG_NUMBERS:
+                        frames.append(encode(
+                            self._station_msg(msg_number, station_id)))
+            for i, msg_number in enumerate(observations):
+                synchronous = i < len(observations) - 1
+                if msg_number == 1004:
+                    msg = self._gps_msg(
+                        station_id, time_of_week, elapsed, synchronous)
+                else:
+                    msg = self._msm(
+                        msg_number, station_id, time_of_week, elapsed,
+                        synchronous)
+                frames.append(encode(msg))
+        self.nr_frames += len(frames)
+        self.nr_bytes += sum(len(frame) for frame in frames)
+        return frames
+
+    def iter_frames(self, nr_epochs: int = None):
+        """
+        Yield the frames of nr_epochs epochs, endlessly if None.
+        """
+        index = 0
+        while nr_epochs is None or index < nr_epochs:
+            yield from self.epoch(index)
+            index += 1
+
+    def generate(self, nr_epochs: int) -> bytes:
+        """
+        Frames of nr_epochs epochs, joined.
+        """
+        return b"".join(self.iter_frames(nr_epochs))
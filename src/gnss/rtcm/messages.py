@@ -1,5 +1,9 @@
 from enum import IntEnum
-from bitstring import ConstBitStream
+from itertools import chain
+
+import numpy as np
+
+from .fields import ArrayLayout, Field, Layout, int_to_bits
 
 
 class Type(IntEnum):
@@ -16,7 +20,7 @@ class Type(IntEnum):
     GPS_EPHEMERIDES = 1019
     GLONASS_EPHEMERIDES = 1020
 
-    UNICODE_TEXT_STRING = 1020
+    UNICODE_TEXT_STRING = 1029
     RECEIVER_ANTENNA_DESCRIPTOR = 1033
 
     GALILEO_EPHEMERIS = 1045
@@ -78,6 +82,72 @@ class Type(IntEnum):
     GLONASS_L1_2_CODE_PHASE_BIASES = 1230
 
 
+SPEED_OF_LIGHT = 299792458.0
+RANGE_MS = SPEED_OF_LIGHT / 1000
+
+# Message numbers whose payload starts with the 12-bit reference station id
+# right after the message number.
+STATION_ID_MSG_NUMBERS = frozenset(chain(
+    range(1001, 1014), (1029, 1032, 1033, 1230), range(1071, 1138)))
+
+# Observation message numbers, their epoch time follows the station id.
+OBSERVATION_MSG_NUMBERS = frozenset(chain(
+    range(1001, 1005), range(1009, 1013), range(1071, 1138)))
+GLONASS_MSG_NUMBERS = frozenset(chain(range(1009, 1013), range(1081, 1088)))
+BEIDOU_MSG_NUMBERS = frozenset(range(1121, 1128))
+
+MS_PER_DAY = 86400000
+MS_PER_WEEK = 7 * MS_PER_DAY
+# GPS time minus UTC, and GPS time minus BeiDou time, in milliseconds.
+LEAP_MS = 18000
+BEIDOU_OFFSET_MS = 14000
+# Moscow time minus UTC, the time scale of the GLONASS epochs.
+MOSCOW_OFFSET_MS = 3 * 3600000
+
+
+def epoch_time(msg_number: int, epoch: int) -> int:
+    """
+    GPS time of day of the epoch field of an observation message.
+
+    Epochs are times of week in GPS time for GPS, Galileo and QZSS, in
+    BeiDou time for BeiDou, and times of day in Moscow time for GLONASS,
+    with the day of week in the upper bits for the GLONASS MSM. Their GPS
+    times of day compare across constellations within a day.
+
+    Returns
+    ----------
+    int
+        GPS time of day in milliseconds.
+    """
+    if msg_number in GLONASS_MSG_NUMBERS:
+        return ((epoch & 0x7ffffff) - MOSCOW_OFFSET_MS + LEAP_MS) % MS_PER_DAY
+    if msg_number in BEIDOU_MSG_NUMBERS:
+        return (epoch + BEIDOU_OFFSET_MS) % MS_PER_DAY
+    return epoch % MS_PER_DAY
+
+
+def epoch_field(msg_number: int, time_of_week: int) -> int:
+    """
+    Epoch field of an observation message, the inverse of ``epoch_time``.
+
+    Parameters
+    ----------
+    msg_number: int
+        Observation message number.
+    time_of_week: int
+        GPS time of week in milliseconds.
+    """
+    if msg_number in GLONASS_MSG_NUMBERS:
+        moscow = time_of_week - LEAP_MS + MOSCOW_OFFSET_MS
+        epoch = moscow % MS_PER_DAY
+        if msg_number >= 1081:
+            epoch |= ((moscow // MS_PER_DAY) % 7) << 27
+        return epoch
+    if msg_number in BEIDOU_MSG_NUMBERS:
+        return (time_of_week - BEIDOU_OFFSET_MS) % MS_PER_WEEK
+    return time_of_week % MS_PER_WEEK
+
+
 class RtcmMessage:
     """
     RTCM message interface.
@@ -154,13 +224,19 @@ class GpsRtkHeader:
     divergence_free_smoothing: bool
     smoothing_interval: int
 
-    def from_bit_stream(self, stream: ConstBitStream):
-        self.station_id = stream.read('uint:12')
-        self.gps_epoch = stream.read('uint:30')
-        self.synchronous_gnss = bool(stream.read('uint:1'))
-        self.nr_gps_sat = stream.read('uint:5')
-        self.divergence_free_smoothing = bool(stream.read('uint:1'))
-        self.smoothing_interval = stream.read('uint:3')
+    header_layout = Layout(
+        Field('msg_number', 'uint:12'),
+        Field('station_id', 'uint:12'),
+        Field('gps_epoch', 'uint:30'),
+        Field('synchronous_gnss', 'bool:1'),
+        Field('nr_gps_sat', 'uint:5'),
+        Field('divergence_free_smoothing', 'bool:1'),
+        Field('smoothing_interval', 'uint:3'),
+    )
+
+
+# Bits of each satellite block of the 1004 message.
+GPS_SATELLITE_BITS = 125
 
 
 class ExtendedL1L2Gps(
@@ -173,26 +249,55 @@ class ExtendedL1L2Gps(
     l1_phaserange: float
     lock_time_indicator: int
 
+    layout = GpsRtkHeader.header_layout.extend(
+        Field('sat_id', 'uint:6'),
+        Field('l1_code_indicator', 'uint:1'),
+        Field('l1_pseudorange', 'uint:24'),
+        Field('l1_phaserange', 'int:20'),
+        Field('lock_time_indicator', 'uint:7'),
+    )
+
     def __init__(self, buff: bytes = None, **kwargs):
         super().__init__(**kwargs)
         if buff is not None:
             self.from_buffer(buff)
 
     def from_buffer(self, buff: bytes):
-        stream = ConstBitStream(buff)
-        msg_number = Type(stream.read('uint:12'))
-        if msg_number != self.type:
+        self.layout.decode_into(self, buff)
+        if self.msg_number != self.type:
             raise RuntimeError('invalid message number')
-
-        super().from_bit_stream(stream)
-        self.sat_id = stream.read('uint:6')
-        self.l1_code_indicator = stream.read('uint:1')
-        self.l1_pseudorange = stream.read('uint:24')
-        self.l1_phaserange = stream.read('int:20') + self.l1_pseudorange
-        self.lock_time_indicator = stream.read('uint:7')
-
-    def to_buffer(self):
-        raise NotImplementedError
+        self.l1_phaserange += self.l1_pseudorange
+
+    @staticmethod
+    def _from_columns(columns: dict):
+        """
+        Columnar counterpart of ``from_buffer``, see ``decode_batch``.
+        """
+        columns['l1_phaserange'] = (
+            columns['l1_phaserange'] + columns['l1_pseudorange'])
+
+    def to_buffer(self) -> bytes:
+        """
+        Encode the message.
+
+        Only the first satellite is modelled, the blocks of the others are
+        left to zero so that the payload has the length announced by
+        ``nr_gps_sat``.
+
+        Raises
+        ---------
+        ValueError
+            If a value does not fit its field.
+        """
+        value = self.layout.pack({
+            **vars(self), 'msg_number': self.type,
+            'l1_phaserange': self.l1_phaserange - self.l1_pseudorange})
+        nr_bits = max(self.layout.bit_length,
+                      self.header_layout.bit_length
+                      + self.nr_gps_sat * GPS_SATELLITE_BITS)
+        padding = -nr_bits % 8
+        value <<= nr_bits - self.layout.bit_length + padding
+        return value.to_bytes((nr_bits + padding) // 8, 'big')
 
 
 class ReferenceStationAntenna(
@@ -210,35 +315,45 @@ class ReferenceStationAntenna(
     quarter_cycle_indicator: int
     ecef_z: float
 
+    layout = Layout(
+        Field('msg_number', 'uint:12'),
+        Field('station_id', 'uint:12'),
+        Field(None, 'pad:6'),
+        Field('gps_indicator', 'bool:1'),
+        Field('glonass_indicator', 'bool:1'),
+        Field('galileo_indicator', 'bool:1'),
+        Field('station_indicator', 'bool:1'),
+        Field('ecef_x', 'int:38', 1e-4),
+        Field('oscillator_indicator', 'bool:1'),
+        Field(None, 'pad:1'),
+        Field('ecef_y', 'int:38', 1e-4),
+        Field('quarter_cycle_indicator', 'uint:2'),
+        Field('ecef_z', 'int:38', 1e-4),
+    )
+
     def __init__(self, buff: bytes = None, **kwargs):
         super().__init__(**kwargs)
         if buff is not None:
             self.from_buffer(buff)
 
     def from_buffer(self, buff: bytes):
-        stream = ConstBitStream(buff)
-        self.from_stream(stream)
-
-    def from_stream(self, stream: ConstBitStream):
-        msg_number = Type(stream.read('uint:12'))
-        if msg_number != self.type:
+        self.layout.decode_into(self, buff)
+        if self.msg_number != self.type:
             raise RuntimeError('invalid message number')
 
-        self.station_id = stream.read('uint:12')
-        stream.read('uint:6')
-        self.gps_indicator = bool(stream.read('uint:1'))
-        self.glonass_indicator = bool(stream.read('uint:1'))
-        self.galileo_indicator = bool(stream.read('uint:1'))
-        self.station_indicator = bool(stream.read('uint:1'))
-        self.ecef_x = stream.read('int:38') * 1e-4
-        self.oscillator_indicator = bool(stream.read('uint:1'))
-        stream.read('uint:1')
-        self.ecef_y = stream.read('int:38') * 1e-4
-        self.quarter_cycle_indicator = stream.read('uint:2')
-        self.ecef_z = stream.read('int:38') * 1e-4
+    def to_buffer(self) -> bytes:
+        """
+        Encode the message.
 
-    def to_buffer(self):
-        raise NotImplementedError
+        Raises
+        ---------
+        ValueError
+            If a value does not fit its field.
+        """
+        value = self.layout.pack({**vars(self), 'msg_number': self.type})
+        padding = -self.layout.bit_length % 8
+        return (value << padding).to_bytes(
+            (self.layout.bit_length + padding) // 8, 'big')
 
 
 class ReferenceStationAntennaHeight(
@@ -247,31 +362,319 @@ class ReferenceStationAntennaHeight(
         ):
     height: int
 
+    layout = ReferenceStationAntenna.layout.extend(
+        Field('height', 'uint:16'),
+    )
+
+    def __init__(self, buff: bytes = None, **kwargs):
+        super().__init__(**kwargs)
+        if buff is not None:
+            self.from_buffer(buff)
+
+
+class GpsEphemeris(RtcmMessage, msg_type=Type.GPS_EPHEMERIDES):
+    """
+    GPS satellite ephemeris.
+
+    Angles are in semicircles and times in seconds, with the scale factors
+    of the broadcast navigation message.
+    """
+    sat_id: int
+    week: int
+    ura: int
+    l2_code: int
+    idot: float
+    iode: int
+    toc: float
+    af2: float
+    af1: float
+    af0: float
+    iodc: int
+    crs: float
+    delta_n: float
+    m0: float
+    cuc: float
+    eccentricity: float
+    cus: float
+    sqrt_a: float
+    toe: float
+    cic: float
+    omega0: float
+    cis: float
+    i0: float
+    crc: float
+    omega: float
+    omega_dot: float
+    tgd: float
+    health: int
+    l2_p_flag: bool
+    fit_interval: bool
+
+    layout = Layout(
+        Field('msg_number', 'uint:12'),
+        Field('sat_id', 'uint:6'),
+        Field('week', 'uint:10'),
+        Field('ura', 'uint:4'),
+        Field('l2_code', 'uint:2'),
+        Field('idot', 'int:14', 2**-43),
+        Field('iode', 'uint:8'),
+        Field('toc', 'uint:16', 16),
+        Field('af2', 'int:8', 2**-55),
+        Field('af1', 'int:16', 2**-43),
+        Field('af0', 'int:22', 2**-31),
+        Field('iodc', 'uint:10'),
+        Field('crs', 'int:16', 2**-5),
+        Field('delta_n', 'int:16', 2**-43),
+        Field('m0', 'int:32', 2**-31),
+        Field('cuc', 'int:16', 2**-29),
+        Field('eccentricity', 'uint:32', 2**-33),
+        Field('cus', 'int:16', 2**-29),
+        Field('sqrt_a', 'uint:32', 2**-19),
+        Field('toe', 'uint:16', 16),
+        Field('cic', 'int:16', 2**-29),
+        Field('omega0', 'int:32', 2**-31),
+        Field('cis', 'int:16', 2**-29),
+        Field('i0', 'int:32', 2**-31),
+        Field('crc', 'int:16', 2**-5),
+        Field('omega', 'int:32', 2**-31),
+        Field('omega_dot', 'int:24', 2**-43),
+        Field('tgd', 'int:8', 2**-31),
+        Field('health', 'uint:6'),
+        Field('l2_p_flag', 'bool:1'),
+        Field('fit_interval', 'bool:1'),
+    )
+
     def __init__(self, buff: bytes = None, **kwargs):
         super().__init__(**kwargs)
         if buff is not None:
             self.from_buffer(buff)
 
     def from_buffer(self, buff: bytes):
-        stream = ConstBitStream(buff)
-        super().from_stream(stream)
-        self.height = stream.read('uint:16')
+        self.layout.decode_into(self, buff)
+        if self.msg_number != self.type:
+            raise RuntimeError('invalid message number')
 
-    def to_buffer(self):
-        raise NotImplementedError
+    def to_buffer(self) -> bytes:
+        """
+        Encode the message.
 
+        Raises
+        ---------
+        ValueError
+            If a value does not fit its field.
+        """
+        value = self.layout.pack({**vars(self), 'msg_number': self.type})
+        padding = -self.layout.bit_length % 8
+        return (value << padding).to_bytes(
+            (self.layout.bit_length + padding) // 8, 'big')
+
+
+class GlonassEphemeris(RtcmMessage, msg_type=Type.GLONASS_EPHEMERIDES):
+    """
+    GLONASS satellite ephemeris.
+
+    The satellite state is in the PZ-90 frame, in kilometers, kilometers
+    per second and kilometers per second squared, at the time ``tb`` given
+    in 15 minutes intervals of the Moscow day. The frequency channel is
+    the one of the message minus 7, from -7 to 13.
+    """
+    sat_id: int
+    frequency_channel: int
+    almanac_health: bool
+    almanac_health_available: bool
+    p1: int
+    tk: int
+    bn_msb: bool
+    p2: bool
+    tb: int
+    x_velocity: float
+    x: float
+    x_acceleration: float
+    y_velocity: float
+    y: float
+    y_acceleration: float
+    z_velocity: float
+    z: float
+    z_acceleration: float
+    p3: bool
+    gamma: float
+    p: int
+    ln3: bool
+    tau: float
+    delta_tau: float
+    age: int
+    p4: bool
+    ft: int
+    nt: int
+    satellite_type: int
+    additional_data: bool
+    na: int
+    tau_c: float
+    n4: int
+    tau_gps: float
+    ln5: bool
+
+    layout = Layout(
+        Field('msg_number', 'uint:12'),
+        Field('sat_id', 'uint:6'),
+        Field('frequency_channel', 'uint:5'),
+        Field('almanac_health', 'bool:1'),
+        Field('almanac_health_available', 'bool:1'),
+        Field('p1', 'uint:2'),
+        Field('tk', 'uint:12'),
+        Field('bn_msb', 'bool:1'),
+        Field('p2', 'bool:1'),
+        Field('tb', 'uint:7'),
+        Field('x_velocity', 'sint:24', 2**-20),
+        Field('x', 'sint:27', 2**-11),
+        Field('x_acceleration', 'sint:5', 2**-30),
+        Field('y_velocity', 'sint:24', 2**-20),
+        Field('y', 'sint:27', 2**-11),
+        Field('y_acceleration', 'sint:5', 2**-30),
+        Field('z_velocity', 'sint:24', 2**-20),
+        Field('z', 'sint:27', 2**-11),
+        Field('z_acceleration', 'sint:5', 2**-30),
+        Field('p3', 'bool:1'),
+        Field('gamma', 'sint:11', 2**-40),
+        Field('p', 'uint:2'),
+        Field('ln3', 'bool:1'),
+        Field('tau', 'sint:22', 2**-30),
+        Field('delta_tau', 'sint:5', 2**-30),
+        Field('age', 'uint:5'),
+        Field('p4', 'bool:1'),
+        Field('ft', 'uint:4'),
+        Field('nt', 'uint:11'),
+        Field('satellite_type', 'uint:2'),
+        Field('additional_data', 'bool:1'),
+        Field('na', 'uint:11'),
+        Field('tau_c', 'sint:32', 2**-31),
+        Field('n4', 'uint:5'),
+        Field('tau_gps', 'sint:22', 2**-30),
+        Field('ln5', 'bool:1'),
+        Field(None, 'pad:7'),
+    )
 
-class GpsEphemeris(RtcmMessage, msg_type=Type.GPS_EPHEMERIDES):
     def __init__(self, buff: bytes = None, **kwargs):
         super().__init__(**kwargs)
         if buff is not None:
             self.from_buffer(buff)
 
     def from_buffer(self, buff: bytes):
-        raise NotImplementedError
+        self.layout.decode_into(self, buff)
+        if self.msg_number != self.type:
+            raise RuntimeError('invalid message number')
+        self.frequency_channel -= 7
+
+    @staticmethod
+    def _from_columns(columns: dict):
+        """
+        Columnar counterpart of ``from_buffer``, see ``decode_batch``.
+        """
+        columns['frequency_channel'] = columns['frequency_channel'] - 7
+
+    def to_buffer(self) -> bytes:
+        """
+        Encode the message.
+
+        Raises
+        ---------
+        ValueError
+            If a value does not fit its field.
+        """
+        value = self.layout.pack({
+            **vars(self), 'msg_number': self.type,
+            'frequency_channel': self.frequency_channel + 7})
+        return value.to_bytes(self.layout.bit_length // 8, 'big')
+
+
+class GalileoEphemeris(RtcmMessage, msg_type=Type.GALILEO_EPHEMERIS):
+    """
+    Galileo F/NAV satellite ephemeris.
 
-    def to_buffer(self):
-        raise NotImplementedError
+    Angles are in semicircles and times in seconds, with the scale factors
+    of the broadcast navigation message.
+    """
+    sat_id: int
+    week: int
+    iodnav: int
+    sisa: int
+    idot: float
+    toc: float
+    af2: float
+    af1: float
+    af0: float
+    crs: float
+    delta_n: float
+    m0: float
+    cuc: float
+    eccentricity: float
+    cus: float
+    sqrt_a: float
+    toe: float
+    cic: float
+    omega0: float
+    cis: float
+    i0: float
+    crc: float
+    omega: float
+    omega_dot: float
+    bgd: float
+    e5a_health: int
+    e5a_validity: bool
+
+    layout = Layout(
+        Field('msg_number', 'uint:12'),
+        Field('sat_id', 'uint:6'),
+        Field('week', 'uint:12'),
+        Field('iodnav', 'uint:10'),
+        Field('sisa', 'uint:8'),
+        Field('idot', 'int:14', 2**-43),
+        Field('toc', 'uint:14', 60),
+        Field('af2', 'int:6', 2**-59),
+        Field('af1', 'int:21', 2**-46),
+        Field('af0', 'int:31', 2**-34),
+        Field('crs', 'int:16', 2**-5),
+        Field('delta_n', 'int:16', 2**-43),
+        Field('m0', 'int:32', 2**-31),
+        Field('cuc', 'int:16', 2**-29),
+        Field('eccentricity', 'uint:32', 2**-33),
+        Field('cus', 'int:16', 2**-29),
+        Field('sqrt_a', 'uint:32', 2**-19),
+        Field('toe', 'uint:14', 60),
+        Field('cic', 'int:16', 2**-29),
+        Field('omega0', 'int:32', 2**-31),
+        Field('cis', 'int:16', 2**-29),
+        Field('i0', 'int:32', 2**-31),
+        Field('crc', 'int:16', 2**-5),
+        Field('omega', 'int:32', 2**-31),
+        Field('omega_dot', 'int:24', 2**-43),
+        Field('bgd', 'int:10', 2**-32),
+        Field('e5a_health', 'uint:2'),
+        Field('e5a_validity', 'bool:1'),
+        Field(None, 'pad:7'),
+    )
+
+    def __init__(self, buff: bytes = None, **kwargs):
+        super().__init__(**kwargs)
+        if buff is not None:
+            self.from_buffer(buff)
+
+    def from_buffer(self, buff: bytes):
+        self.layout.decode_into(self, buff)
+        if self.msg_number != self.type:
+            raise RuntimeError('invalid message number')
+
+    def to_buffer(self) -> bytes:
+        """
+        Encode the message.
+
+        Raises
+        ---------
+        ValueError
+            If a value does not fit its field.
+        """
+        value = self.layout.pack({**vars(self), 'msg_number': self.type})
+        return value.to_bytes(self.layout.bit_length // 8, 'big')
 
 
 class AntennaDescriptor(RtcmMessage, msg_type=Type.ANTENNA_DESCRIPTOR):
@@ -367,3 +770,415 @@ class ReceiverAntennaDescriptor(
 
     def to_buffer(self):
         raise NotImplementedError
+
+
+class MsmHeader:
+    station_id: int
+    epoch: int
+    synchronous_gnss: bool
+    iods: int
+    clock_steering: int
+    external_clock: int
+    divergence_free_smoothing: bool
+    smoothing_interval: int
+    satellite_mask: int
+    signal_mask: int
+
+    # The multiple message bit is stored as synchronous_gnss, like the
+    # flag of the legacy observation headers it replaces.
+    header_layout = Layout(
+        Field('msg_number', 'uint:12'),
+        Field('station_id', 'uint:12'),
+        Field('epoch', 'uint:30'),
+        Field('synchronous_gnss', 'bool:1'),
+        Field('iods', 'uint:3'),
+        Field(None, 'pad:7'),
+        Field('clock_steering', 'uint:2'),
+        Field('external_clock', 'uint:2'),
+        Field('divergence_free_smoothing', 'bool:1'),
+        Field('smoothing_interval', 'uint:3'),
+        Field('satellite_mask', 'uint:64'),
+        Field('signal_mask', 'uint:32'),
+    )
+
+
+def _extended_lock_time(indicator: np.ndarray) -> np.ndarray:
+    scale = np.maximum(indicator // 32 - 1, 0)
+    return (indicator - 32 * scale) << scale
+
+
+def _extended_lock_time_indicator(lock_time: np.ndarray) -> np.ndarray:
+    lock_time = np.asarray(lock_time, dtype=np.int64)
+    scale = np.maximum(_floor_log2(lock_time) - 5, 0)
+    return np.minimum((lock_time >> scale) + 32 * scale, 704)
+
+
+def _floor_log2(values: np.ndarray) -> np.ndarray:
+    return np.floor(np.log2(np.maximum(values, 1))).astype(np.int64)
+
+
+def _mean_by_satellite(values, sat_index, nr_sat):
+    """
+    Mean of the valid cell values of each satellite, NaN if there is none.
+    """
+    valid = ~np.isnan(values)
+    counts = np.bincount(sat_index[valid], minlength=nr_sat)
+    sums = np.bincount(
+        sat_index[valid], weights=values[valid], minlength=nr_sat)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        return sums / counts
+
+
+class Msm(RtcmMessage, MsmHeader):
+    """
+    Multiple Signal Message with observables.
+
+    Satellite, signal and cell masks are expanded with NumPy and the
+    observables are stored as columns with one entry per cell, ordered by
+    satellite then signal:
+
+    - ``satellite``, ``signal``: satellite and signal ids from the masks,
+    - ``pseudorange``, ``phaserange``: full ranges in meters,
+    - ``phaserange_rate``: in m/s, NaN if not transmitted (MSM4 and MSM6),
+    - ``cnr``: carrier to noise ratio in dB-Hz,
+    - ``lock_time``: minimum lock time in milliseconds,
+    - ``half_cycle``: half-cycle ambiguity indicator.
+
+    Invalid values are set to NaN. Satellite and signal ids are the mask
+    positions starting from 1, their meaning depends on the constellation.
+    """
+    constellation: str = None
+    satellite_layout: ArrayLayout
+    cell_layout: ArrayLayout
+    fine_pseudorange_scale: float
+    fine_phaserange_scale: float
+    invalid_fine_pseudorange: int
+    invalid_fine_phaserange: int
+    cnr_scale: float
+
+    satellites: np.ndarray
+    signals: np.ndarray
+    satellite: np.ndarray
+    signal: np.ndarray
+    pseudorange: np.ndarray
+    phaserange: np.ndarray
+    phaserange_rate: np.ndarray
+    cnr: np.ndarray
+    lock_time: np.ndarray
+    half_cycle: np.ndarray
+
+    def __init__(self, buff: bytes = None, **kwargs):
+        super().__init__(**kwargs)
+        if buff is not None:
+            self.from_buffer(buff)
+
+    def __len__(self):
+        return len(self.satellite)
+
+    def from_buffer(self, buff: bytes):
+        pos = self.header_layout.decode_into(self, buff)
+        if self.msg_number != self.type:
+            raise RuntimeError('invalid message number')
+
+        bits = np.unpackbits(np.frombuffer(buff, dtype=np.uint8))
+        self.satellites = np.flatnonzero(bits[pos - 96:pos - 32]) + 1
+        self.signals = np.flatnonzero(bits[pos - 32:pos]) + 1
+        nr_sat = len(self.satellites)
+        nr_sig = len(self.signals)
+
+        if pos + nr_sat * nr_sig > len(bits):
+            raise ValueError('buffer too short')
+        cell_mask = bits[pos:pos + nr_sat * nr_sig].reshape(nr_sat, nr_sig)
+        bits = bits.astype(np.float64)
+        sat_index, sig_index = np.nonzero(cell_mask)
+        pos += nr_sat * nr_sig
+
+        satellite_data, pos = self.satellite_layout.unpack(bits, pos, nr_sat)
+        cell_data, pos = self.cell_layout.unpack(bits, pos, len(sat_index))
+        self.satellite = self.satellites[sat_index]
+        self.signal = self.signals[sig_index]
+        self._from_arrays(
+            dict(zip(self.satellite_layout.names, satellite_data)),
+            dict(zip(self.cell_layout.names, cell_data)),
+            sat_index)
+
+    def _from_arrays(self, sat, cell, sat_index):
+        rough_range = sat['rough_range_ms'] + sat['rough_range_mod'] * 2**-10
+        rough_range[sat['rough_range_ms'] == 0xff] = np.nan
+        rough_range = rough_range[sat_index]
+
+        fine_pseudorange = cell['fine_pseudorange']
+        fine_phaserange = cell['fine_phaserange']
+        self.pseudorange = RANGE_MS * np.where(
+            fine_pseudorange == self.invalid_fine_pseudorange, np.nan,
+            rough_range + fine_pseudorange * self.fine_pseudorange_scale)
+        self.phaserange = RANGE_MS * np.where(
+            fine_phaserange == self.invalid_fine_phaserange, np.nan,
+            rough_range + fine_phaserange * self.fine_phaserange_scale)
+
+        if 'fine_phaserange_rate' in cell:
+            rough_rate = sat['rough_phaserange_rate'].astype(float)
+            rough_rate[sat['rough_phaserange_rate'] == -0x2000] = np.nan
+            fine_rate = cell['fine_phaserange_rate']
+            self.phaserange_rate = np.where(
+                fine_rate == -0x4000, np.nan,
+                rough_rate[sat_index] + fine_rate * 1e-4)
+            self.extended_info = sat['extended_info']
+        else:
+            self.phaserange_rate = np.full(len(sat_index), np.nan)
+
+        self.cnr = cell['cnr'] * self.cnr_scale
+        self.half_cycle = cell['half_cycle']
+        self.lock_time = self._lock_time(cell['lock_time_indicator'])
+
+    def to_buffer(self) -> bytes:
+        """
+        Encode the message from its header and cell columns.
+
+        The masks are rebuilt from the ``satellite`` and ``signal`` columns,
+        and the rough range of each satellite from the mean of its ranges,
+        so the fine ranges of its signals must fit around it. Lock times are
+        rounded down to the ones the indicators can represent.
+
+        Raises
+        ---------
+        ValueError
+            If a cell is repeated or a value does not fit its field.
+        """
+        satellite = np.asarray(self.satellite, dtype=np.int64)
+        signal = np.asarray(self.signal, dtype=np.int64)
+        order = np.lexsort((signal, satellite))
+        satellites, sat_index = np.unique(
+            satellite[order], return_inverse=True)
+        signals, sig_index = np.unique(signal[order], return_inverse=True)
+        nr_sat, nr_sig = len(satellites), len(signals)
+        cell_mask = np.zeros((nr_sat, nr_sig), dtype=np.uint8)
+        np.add.at(cell_mask, (sat_index, sig_index), 1)
+        if (cell_mask > 1).any():
+            raise ValueError('repeated cell')
+
+        header = self.header_layout.pack({
+            **vars(self), 'msg_number': self.type,
+            'satellite_mask': sum(1 << (64 - int(sat)) for sat in satellites),
+            'signal_mask': sum(1 << (32 - int(sig)) for sig in signals)})
+        sat, cell = self._to_arrays(order, sat_index, nr_sat)
+        bits = np.concatenate((
+            int_to_bits(header, self.header_layout.bit_length),
+            cell_mask.ravel(),
+            self.satellite_layout.pack(sat, nr_sat),
+            self.cell_layout.pack(cell, len(order))))
+        return np.packbits(bits).tobytes()
+
+    def _to_arrays(self, order, sat_index, nr_sat):
+        """
+        Satellite and cell fields of the cells in order, the inverse of
+        ``_from_arrays``.
+        """
+        pseudorange = np.asarray(self.pseudorange, dtype=float)[order]
+        phaserange = np.asarray(self.phaserange, dtype=float)[order]
+        pseudorange /= RANGE_MS
+        phaserange /= RANGE_MS
+        ranges = np.where(np.isnan(pseudorange), phaserange, pseudorange)
+        rough_range = np.round(
+            _mean_by_satellite(ranges, sat_index, nr_sat) * 1024) / 1024
+        invalid = np.isnan(rough_range)
+        rough_range[invalid] = 0
+        sat = {
+            'rough_range_ms': np.where(
+                invalid, 0xff, np.floor(rough_range)),
+            'rough_range_mod': np.where(
+                invalid, 0, (rough_range % 1) * 1024),
+        }
+
+        rough_range = rough_range[sat_index]
+        cell = {
+            'fine_pseudorange': np.where(
+                np.isnan(pseudorange), self.invalid_fine_pseudorange,
+                np.round((pseudorange - rough_range)
+                         / self.fine_pseudorange_scale)),
+            'fine_phaserange': np.where(
+                np.isnan(phaserange), self.invalid_fine_phaserange,
+                np.round((phaserange - rough_range)
+                         / self.fine_phaserange_scale)),
+            'lock_time_indicator': self._lock_time_indicator(
+                np.asarray(self.lock_time)[order]),
+            'half_cycle': np.asarray(self.half_cycle)[order],
+            'cnr': np.round(np.asarray(self.cnr)[order] / self.cnr_scale),
+        }
+
+        if 'fine_phaserange_rate' in self.cell_layout.names:
+            rate = np.asarray(self.phaserange_rate, dtype=float)[order]
+            rough_rate = np.round(
+                _mean_by_satellite(rate, sat_index, nr_sat))
+            extended_info = getattr(self, 'extended_info', None)
+            if extended_info is None or len(extended_info) != nr_sat:
+                extended_info = np.zeros(nr_sat, dtype=np.int64)
+            sat['extended_info'] = extended_info
+            sat['rough_phaserange_rate'] = np.where(
+                np.isnan(rough_rate), -0x2000, rough_rate)
+            cell['fine_phaserange_rate'] = np.where(
+                np.isnan(rate), -0x4000,
+                np.round((rate - rough_rate[sat_index]) * 1e4))
+        return sat, cell
+
+
+class Msm4(Msm):
+    satellite_layout = ArrayLayout(
+        Field('rough_range_ms', 'uint:8'),
+        Field('rough_range_mod', 'uint:10'),
+    )
+    cell_layout = ArrayLayout(
+        Field('fine_pseudorange', 'int:15'),
+        Field('fine_phaserange', 'int:22'),
+        Field('lock_time_indicator', 'uint:4'),
+        Field('half_cycle', 'bool:1'),
+        Field('cnr', 'uint:6'),
+    )
+    fine_pseudorange_scale = 2**-24
+    fine_phaserange_scale = 2**-29
+    invalid_fine_pseudorange = -0x4000
+    invalid_fine_phaserange = -0x200000
+    cnr_scale = 1.0
+
+    @staticmethod
+    def _lock_time(indicator):
+        return np.where(indicator > 0, 1 << (indicator + 4), 0)
+
+    @staticmethod
+    def _lock_time_indicator(lock_time):
+        lock_time = np.asarray(lock_time, dtype=np.int64)
+        return np.where(
+            lock_time >= 32, np.minimum(_floor_log2(lock_time) - 4, 15), 0)
+
+
+class Msm5(Msm4):
+    satellite_layout = ArrayLayout(
+        Field('rough_range_ms', 'uint:8'),
+        Field('extended_info', 'uint:4'),
+        Field('rough_range_mod', 'uint:10'),
+        Field('rough_phaserange_rate', 'int:14'),
+    )
+    cell_layout = ArrayLayout(
+        Field('fine_pseudorange', 'int:15'),
+        Field('fine_phaserange', 'int:22'),
+        Field('lock_time_indicator', 'uint:4'),
+        Field('half_cycle', 'bool:1'),
+        Field('cnr', 'uint:6'),
+        Field('fine_phaserange_rate', 'int:15'),
+    )
+
+
+class Msm6(Msm):
+    satellite_layout = Msm4.satellite_layout
+    cell_layout = ArrayLayout(
+        Field('fine_pseudorange', 'int:20'),
+        Field('fine_phaserange', 'int:24'),
+        Field('lock_time_indicator', 'uint:10'),
+        Field('half_cycle', 'bool:1'),
+        Field('cnr', 'uint:10'),
+    )
+    fine_pseudorange_scale = 2**-29
+    fine_phaserange_scale = 2**-31
+    invalid_fine_pseudorange = -0x80000
+    invalid_fine_phaserange = -0x800000
+    cnr_scale = 2**-4
+
+    @staticmethod
+    def _lock_time(indicator):
+        return _extended_lock_time(indicator)
+
+    @staticmethod
+    def _lock_time_indicator(lock_time):
+        return _extended_lock_time_indicator(lock_time)
+
+
+class Msm7(Msm6):
+    satellite_layout = Msm5.satellite_layout
+    cell_layout = ArrayLayout(
+        Field('fine_pseudorange', 'int:20'),
+        Field('fine_phaserange', 'int:24'),
+        Field('lock_time_indicator', 'uint:10'),
+        Field('half_cycle', 'bool:1'),
+        Field('cnr', 'uint:10'),
+        Field('fine_phaserange_rate', 'int:15'),
+    )
+
+
+class GpsMsm4(Msm4, msg_type=Type.GPS_MSM4):
+    constellation = 'GPS'
+
+
+class GpsMsm5(Msm5, msg_type=Type.GPS_MSM5):
+    constellation = 'GPS'
+
+
+class GpsMsm6(Msm6, msg_type=Type.GPS_MSM6):
+    constellation = 'GPS'
+
+
+class GpsMsm7(Msm7, msg_type=Type.GPS_MSM7):
+    constellation = 'GPS'
+
+
+class GlonassMsm4(Msm4, msg_type=Type.GLONASS_MSM4):
+    constellation = 'GLONASS'
+
+
+class GlonassMsm5(Msm5, msg_type=Type.GLONASS_MSM5):
+    constellation = 'GLONASS'
+
+
+class GlonassMsm6(Msm6, msg_type=Type.GLONASS_MSM6):
+    constellation = 'GLONASS'
+
+
+class GlonassMsm7(Msm7, msg_type=Type.GLONASS_MSM7):
+    constellation = 'GLONASS'
+
+
+class GalileoMsm4(Msm4, msg_type=Type.GALILEO_MSM4):
+    constellation = 'GALILEO'
+
+
+class GalileoMsm5(Msm5, msg_type=Type.GALILEO_MSM5):
+    constellation = 'GALILEO'
+
+
+class GalileoMsm6(Msm6, msg_type=Type.GALILEO_MSM6):
+    constellation = 'GALILEO'
+
+
+class GalileoMsm7(Msm7, msg_type=Type.GALILEO_MSM7):
+    constellation = 'GALILEO'
+
+
+class QzssMsm4(Msm4, msg_type=Type.QZSS_MSM4):
+    constellation = 'QZSS'
+
+
+class QzssMsm5(Msm5, msg_type=Type.QZSS_MSM5):
+    constellation = 'QZSS'
+
+
+class QzssMsm6(Msm6, msg_type=Type.QZSS_MSM6):
+    constellation = 'QZSS'
+
+
+class QzssMsm7(Msm7, msg_type=Type.QZSS_MSM7):
+    constellation = 'QZSS'
+
+
+class BeidouMsm4(Msm4, msg_type=Type.BEIDOU_MSM4):
+    constellation = 'BEIDOU'
+
+
+class BeidouMsm5(Msm5, msg_type=Type.BEIDOU_MSM5):
+    constellation = 'BEIDOU'
+
+
+class BeidouMsm6(Msm6, msg_type=Type.BEIDOU_MSM6):
+    constellation = 'BEIDOU'
+
+
+class BeidouMsm7(Msm7, msg_type=Type.BEIDOU_MSM7):
+    constellation = 'BEIDOU'
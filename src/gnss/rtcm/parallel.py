@@ -0,0 +1,228 @@
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+import mmap
+import os
+from typing import NamedTuple
+
+import numpy as np
+
+from .archive import _map, find_frame, scan_range
+from .batch import decode_batch, Table
+from .parser import decode, HEADER_LENGTH, CRC_LENGTH
+
+
+CHUNK_SIZE = 64 << 20
+
+
+class ChunkResult(NamedTuple):
+    start: int
+    end: int
+    frame_counts: dict
+    error_count: int
+    result: object
+
+
+def _messages(buffer, rows: np.ndarray, msg_numbers: set):
+    for offset, length, msg_number in zip(
+            rows['offset'].tolist(), rows['length'].tolist(),
+            rows['msg_number'].tolist()):
+        if msg_numbers and msg_number not in msg_numbers:
+            continue
+        try:
+            yield decode(
+                buffer[offset + HEADER_LENGTH:offset + length - CRC_LENGTH])
+        except (ValueError, NotImplementedError):
+            continue
+
+
+def decode_chunk(path: str, start: int, stop: int, msg_types: tuple = (),
+                 columnar: bool = False) -> ChunkResult:
+    """
+    Decode the frames of a recording starting in a byte range.
+
+    Frames are located with ``scan_range``, from start as the parser would
+    if it had just read a frame ending there.
+
+    Returns
+    ----------
+    ChunkResult
+        Start of the range, offset from which the scan would go on, frame
+        counts by message number, number of frames failing the CRC check,
+        and the list of decoded messages or, if columnar, the tables of
+        ``decode_batch``.
+    """
+    buffer = _map(path)
+    try:
+        index, end = scan_range(buffer, start, stop)
+        rows = index[index['crc_valid']]
+        msg_numbers, counts = np.unique(rows['msg_number'], return_counts=True)
+        frame_counts = dict(zip(msg_numbers.tolist(), counts.tolist()))
+        if columnar:
+            result = decode_batch(buffer, *msg_types, index=rows)
+        else:
+            result = list(_messages(
+                buffer, rows, {msg_type.type for msg_type in msg_types}))
+    finally:
+        if isinstance(buffer, mmap.mmap):
+            buffer.close()
+    return ChunkResult(start, end, frame_counts, len(index) - len(rows),
+                       result)
+
+
+class ParallelDecoder:
+    """
+    Decode a RTCM recording with a pool of processes.
+
+    The recording is split into chunks of about chunk_size bytes, each
+    starting on a complete frame with a valid CRC, and the chunks are
+    decoded in parallel. Results come back in the order of the frames.
+    Tables are the way to scale: messages are pickled by the workers and
+    unpickled one at a time by the calling process, which bounds the
+    speedup of ``messages``.
+
+    A chunk boundary may still not be where the parser would be, e.g. a
+    valid frame embedded in the payload of another one. Each chunk reports
+    the offset at which its scan ends, and the next chunk is decoded again
+    from there when it started elsewhere, so that frames, frame counts and
+    error counts are always the ones of a single parser reading the whole
+    recording.
+
+    Parameters
+    ----------
+    path: str
+        RTCM recording.
+    processes: int
+        Number of worker processes, the number of CPUs if None. With a
+        single process, chunks are decoded in the calling process.
+    chunk_size: int
+        Approximate size of the chunks in bytes.
+
+    Attributes
+    ----------
+    frame_counts: dict
+        Valid frames by message number, like ``Parser.frame_counts``.
+    error_count: int
+        Frames failing the CRC check, like ``Parser.error_count``.
+    incomplete: bool
+        The recording ends with an incomplete frame, where the parser
+        raises a RuntimeError after the last message.
+    resync_count: int
+        Chunks decoded again because their boundary was off.
+
+    Examples
+    --------
+    >>> decoder = ParallelDecoder("day.rtcm3", processes=8)
+    >>> tables = decoder.tables(ExtendedL1L2Gps, GpsMsm7)
+    >>> for msg in decoder.messages(ReferenceStationAntenna):
+    ...     pass
+    """
+    def __init__(
+            self,
+            path: str,
+            processes: int = None,
+            chunk_size: int = CHUNK_SIZE):
+        self.path = path
+        self.processes = processes or os.cpu_count()
+        self.chunk_size = chunk_size
+        self.frame_counts = {}
+        self.error_count = 0
+        self.incomplete = False
+        self.resync_count = 0
+
+    def chunks(self) -> list:
+        """
+        Split the recording into byte ranges starting on valid frames.
+        """
+        buffer = _map(self.path)
+        try:
+            size = len(buffer)
+            bounds = [0]
+            for start in range(self.chunk_size, size, self.chunk_size):
+                bound = find_frame(buffer, max(start, bounds[-1]))
+                if bounds[-1] < bound < size:
+                    bounds.append(bound)
+            bounds.append(size)
+        finally:
+            if isinstance(buffer, mmap.mmap):
+                buffer.close()
+        return list(zip(bounds[:-1], bounds[1:]))
+
+    def _submit(self, executor, chunks, msg_types, columnar):
+        for start, stop in chunks:
+            if executor is None:
+                yield start, stop, decode_chunk(
+                    self.path, start, stop, msg_types, columnar)
+            else:
+                yield start, stop, executor.submit(
+                    decode_chunk, self.path, start, stop, msg_types, columnar)
+
+    def _results(self, msg_types: tuple, columnar: bool):
+        self.frame_counts = {}
+        self.error_count = 0
+        self.incomplete = False
+        self.resync_count = 0
+        chunks = self.chunks()
+        executor = None
+        if self.processes > 1 and len(chunks) > 1:
+            executor = ProcessPoolExecutor(self.processes)
+
+        pending = deque()
+        try:
+            submitted = self._submit(executor, chunks, msg_types, columnar)
+            expected = 0
+            while True:
+                # Keep a bounded number of chunks in flight so that results
+                # do not pile up when the caller is slower than the pool.
+                while len(pending) < 2 * self.processes:
+                    try:
+                        pending.append(next(submitted))
+                    except StopIteration:
+                        break
+                if not pending:
+                    break
+
+                start, stop, chunk = pending.popleft()
+                if executor is not None:
+                    chunk = chunk.result()
+                if chunk.start != expected:
+                    chunk = decode_chunk(
+                        self.path, expected, stop, msg_types, columnar)
+                    self.resync_count += 1
+
+                for msg_number, count in chunk.frame_counts.items():
+                    self.frame_counts[msg_number] = (
+                        self.frame_counts.get(msg_number, 0) + count)
+                self.error_count += chunk.error_count
+                expected = chunk.end
+                yield chunk.result
+                if chunk.end < stop:
+                    self.incomplete = True
+                    break
+        finally:
+            if executor is not None:
+                for _, _, future in pending:
+                    future.cancel()
+                executor.shutdown()
+
+    def messages(self, *msg_types):
+        """
+        Iterate over the messages of the recording in frame order.
+
+        Only the messages of msg_types are decoded, all the implemented
+        ones if none given, like ``Parser.iter_messages``.
+        """
+        for msgs in self._results(msg_types, columnar=False):
+            yield from msgs
+
+    def tables(self, *msg_types) -> dict:
+        """
+        Decode the recording into one table per message type.
+
+        See ``decode_batch`` for the tables, rows are in frame order.
+        """
+        parts = {}
+        for tables in self._results(msg_types, columnar=True):
+            for msg_type, table in tables.items():
+                parts.setdefault(msg_type, []).append(table)
+        return {msg_type: Table.concat(tables)
+                for msg_type, tables in sorted(parts.items())}
@@ -1,32 +1,321 @@
 import functools
 from io import BytesIO
+import os
+import select
+import stat
+import time
 
-from bitstring import ConstBitStream
-
-from .messages import RtcmMessage, Type
+from .crc import Crc24Q, crc24q  # noqa: F401
+from ..metrics import Histogram
+from .messages import RtcmMessage, Type, STATION_ID_MSG_NUMBERS
 
 
 PREAMBLE = 0xd3
 BUFFER_SIZE = 2048
+HEADER_LENGTH = 3
+CRC_LENGTH = 3
+MAX_FRAME_LENGTH = HEADER_LENGTH + 0x3ff + CRC_LENGTH
+BUFFER_CAPACITY = 16 * BUFFER_SIZE
+BACKOFF_MIN = 0.001
+BACKOFF_MAX = 0.5
+
+
+class Framer:
+    """
+    RTCM frame extractor over a preallocated buffer.
+
+    Incoming bytes are written at a write offset and frames are consumed
+    from a read offset, so locating, checking and handing out a frame never
+    copies the pending data. Unread bytes are moved back to the start of the
+    buffer only when the free space at its end runs out, which costs at most
+    one partial frame.
+
+    Parameters
+    ----------
+    capacity: int
+        Hard limit of the buffer memory in bytes.
+    chunk_size: int
+        Maximum number of bytes requested from the stream on each read.
+
+    Raises
+    ---------
+    ValueError
+        If the capacity cannot hold a maximum size frame plus one chunk.
+    """
+    def __init__(
+            self,
+            capacity: int = BUFFER_CAPACITY,
+            chunk_size: int = BUFFER_SIZE):
+        if capacity < MAX_FRAME_LENGTH + chunk_size:
+            raise ValueError(
+                f"capacity must be at least {MAX_FRAME_LENGTH + chunk_size}")
+        self.capacity = capacity
+        self.chunk_size = chunk_size
+        self.error_count = 0
+        self.bytes_in = 0
+        self.skipped_bytes = 0
+        self.synced = False
+        self._buffer = bytearray(capacity)
+        self._view = memoryview(self._buffer)
+        self._read = 0
+        self._write = 0
+
+    def __len__(self):
+        return self._write - self._read
+
+    def _reserve(self, size: int) -> int:
+        if self._read == self._write:
+            self._read = self._write = 0
+        elif self.capacity - self._write < size:
+            pending = self._write - self._read
+            self._buffer[:pending] = self._buffer[self._read:self._write]
+            self._read = 0
+            self._write = pending
+        return min(size, self.capacity - self._write)
+
+    def feed(self, data: bytes) -> int:
+        """
+        Copy data into the buffer.
+
+        Raises
+        ---------
+        BufferError
+            If data does not fit in the remaining capacity.
+        """
+        size = len(data)
+        if self._reserve(size) < size:
+            raise BufferError("buffer capacity exceeded")
+        self._view[self._write:self._write + size] = data
+        self._write += size
+        self.bytes_in += size
+        return size
+
+    def fill(self, stream) -> int:
+        """
+        Read at most one chunk from stream into the buffer.
+
+        The stream ``readinto`` method is used when available so that the
+        bytes are written directly in place.
+
+        Returns
+        ----------
+        int
+            Number of bytes read, 0 if the stream has nothing to give.
+        """
+        size = self._reserve(self.chunk_size)
+        if hasattr(stream, 'readinto'):
+            nrbytes = stream.readinto(
+                self._view[self._write:self._write + size])
+            if not nrbytes:
+                return 0
+            self._write += nrbytes
+            self.bytes_in += nrbytes
+            return nrbytes
+
+        data = stream.read(size)
+        if not data:
+            return 0
+        return self.feed(data)
+
+    def resync(self):
+        """
+        Drop the unread bytes.
+
+        Meant for an incomplete frame whose end will never come, e.g. when
+        the stream was reconnected.
+        """
+        self.skipped_bytes += self._write - self._read
+        self._read = self._write
+        self.synced = False
+
+    def next_frame(self):
+        """
+        Extract the next valid frame from the buffer.
+
+        Bytes preceding a preamble and frames failing the CRC check are
+        skipped, and counted in ``skipped_bytes``.
+
+        Returns
+        ----------
+        memoryview or None
+            Complete frame including header and CRC, or None if more data is
+            needed. The view is only valid until the next call to ``feed``
+            or ``fill``.
+        """
+        buffer = self._buffer
+        while True:
+            index = buffer.find(PREAMBLE, self._read, self._write)
+            if index < 0:
+                self.skipped_bytes += self._write - self._read
+                self._read = self._write
+                self.synced = False
+                return None
+            self.skipped_bytes += index - self._read
+            self._read = index
+            self.synced = True
+
+            if self._write - index < HEADER_LENGTH:
+                return None
+
+            msg_length = ((buffer[index + 1] & 0x03) << 8) | buffer[index + 2]
+            end = index + HEADER_LENGTH + msg_length + CRC_LENGTH
+            if self._write < end:
+                return None
+
+            frame = self._view[index:end]
+            if crc24q(frame):
+                self._read = index + 1
+                self.error_count += 1
+                self.skipped_bytes += 1
+                continue
+
+            self._read = end
+            self.synced = False
+            return frame
 
 
 class Parser:
-    def __init__(self, stream: BytesIO = None, wait_for_stream: bool = False):
+    def __init__(
+            self,
+            stream: BytesIO = None,
+            wait_for_stream: bool = False,
+            buffer_capacity: int = BUFFER_CAPACITY,
+            lazy: bool = False,
+            backoff_min: float = BACKOFF_MIN,
+            backoff_max: float = BACKOFF_MAX,
+            executor=None,
+            decode_timing: bool = False):
         self._callbacks = {}
+        self.executor = executor
+        self.decode_times = {} if decode_timing else None
+        self._dispatch = None
+        self.lazy = lazy
         self.counts = {}
-        self.error_count = 0
+        self.frame_counts = {}
         self.msg = None
-        self._issync = False
-        self._buffer = bytearray()
+        self._framer = Framer(buffer_capacity)
         self.break_msg_types = []
+        self.backoff_min = backoff_min
+        self.backoff_max = backoff_max
+        self.idle_time = 0.0
+        self.busy_time = 0.0
+        self._stream_fd = None
+        self._stream_ready = False
+        self._empty_reads = 0
         if stream is not None:
             self.load_stream(stream, wait_for_stream)
 
+    @property
+    def error_count(self):
+        return self._framer.error_count
+
+    def stats(self) -> dict:
+        """
+        Parser counters, see ``gnss.metrics`` for their export.
+
+        Returns
+        ----------
+        dict
+            Bytes read, valid frames per message number, CRC failures,
+            bytes skipped to find frames, decoded messages per name, busy
+            and idle times, and with decode timing, the decode time
+            histogram of each message number.
+        """
+        stats = {
+            "bytes_in": self._framer.bytes_in,
+            "frames": dict(self.frame_counts),
+            "crc_errors": self._framer.error_count,
+            "skipped_bytes": self._framer.skipped_bytes,
+            "messages": dict(self.counts),
+            "busy_time": self.busy_time,
+            "idle_time": self.idle_time,
+        }
+        if self.decode_times is not None:
+            stats["decode_time"] = {
+                msg_number: histogram.to_dict()
+                for msg_number, histogram in list(self.decode_times.items())}
+        return stats
+
+    @property
+    def break_msg_types(self):
+        return self._break_msg_types
+
+    @break_msg_types.setter
+    def break_msg_types(self, msg_types):
+        self._break_msg_types = list(msg_types)
+        self._dispatch = None
+
+    def _build_dispatch(self):
+        """
+        Map each subscribed message number to its callbacks and break flag.
+
+        Without any callback or break type every message is decoded.
+        """
+        if not self._callbacks and not self._break_msg_types:
+            return {}
+        dispatch = {}
+        for msg_type in set(self._callbacks) | set(self._break_msg_types):
+            dispatch[int(msg_type)] = (
+                tuple(self._callbacks.get(msg_type, ())),
+                msg_type in self._break_msg_types)
+        return dispatch
+
     def load_stream(self, stream, wait_for_stream: bool = False):
+        """
+        Set the stream to parse.
+
+        With wait_for_stream, the parser waits for data instead of stopping
+        when the stream has nothing to give. Streams exposing a ``fileno``
+        other than a regular file are waited for with ``select``, the
+        others are polled with an exponential backoff between
+        ``backoff_min`` and ``backoff_max`` seconds.
+        """
         if not hasattr(stream, 'read') or not callable(stream.read):
             raise AttributeError("missing read method")
         self.stream = stream
         self.wait_for_stream = wait_for_stream
+        self._stream_fd = None
+        self._stream_ready = False
+        self._empty_reads = 0
+        try:
+            fd = stream.fileno()
+            if not stat.S_ISREG(os.fstat(fd).st_mode):
+                self._stream_fd = fd
+        except (AttributeError, OSError, ValueError):
+            pass
+
+    def resync(self):
+        """
+        Drop an incomplete frame, keeping the rest of the parser state.
+
+        To be called when the stream is reconnected, before reading the new
+        connection, so that the start of the new data is not taken for the
+        end of the incomplete frame.
+        """
+        self._framer.resync()
+
+    def _wait_for_stream(self):
+        """
+        Wait for the stream to have data, without spinning.
+
+        The stream is selected until it is reported readable. A readable
+        stream that still gives nothing, e.g. at the end of a file, and
+        streams without file descriptor are polled with a growing delay.
+        """
+        start = time.perf_counter()
+        self._empty_reads += 1
+        if self._stream_fd is not None and not self._stream_ready:
+            try:
+                readable, _, _ = select.select(
+                    [self._stream_fd], [], [], self.backoff_max)
+                self._stream_ready = bool(readable)
+            except (OSError, ValueError):
+                self._stream_fd = None
+        else:
+            time.sleep(min(
+                self.backoff_min * 2 ** min(self._empty_reads - 1, 30),
+                self.backoff_max))
+        self.idle_time += time.perf_counter() - start
 
     def callback(self, func):
         """
@@ -34,7 +323,8 @@ class Parser:
 
         This decorator can be used to attach a callback function to the parser.
         Each time a message that match one of the function parameters is parsed
-        the function will be called.
+        the function will be called. With an executor, the calls are queued
+        to it instead, see ``gnss.rtcm.executor.CallbackExecutor``.
 
         Raises
         ---------
@@ -60,20 +350,35 @@ class Parser:
                     self._callbacks[param_type.type].append(func)
                 except KeyError:
                     self._callbacks[param_type.type] = [func]
+            self._dispatch = None
             return func
 
         return decorator_callback(func) if func else decorator_callback
 
-    def iter_messages(self, *break_msg_types):
+    def subscribe(self, *break_msg_types):
+        """
+        Set the message types returned by the parser.
+
+        Without argument, every implemented message type is returned.
+
+        Raises
+        ---------
+        AttributeError
+            If a type is not a RTCM message.
+        """
         if break_msg_types:
-            self.break_msg_types = []
+            msg_types = []
             for msg_type in break_msg_types:
                 if issubclass(msg_type, RtcmMessage):
-                    self.break_msg_types.append(msg_type.type)
+                    msg_types.append(msg_type.type)
                 else:
                     raise AttributeError(f"{msg_type} is not a SBG message.")
+            self.break_msg_types = msg_types
         else:
             self.break_msg_types = RtcmMessage.get_types()
+
+    def iter_messages(self, *break_msg_types):
+        self.subscribe(*break_msg_types)
         while True:
             msg = self.parse()
             if msg is not None:
@@ -81,134 +386,253 @@ class Parser:
             else:
                 break
 
-    def parse(self):
+    async def aiter_messages(self, *break_msg_types):
         """
-        Parse RTCM binary messages.
+        Asynchronous version of ``iter_messages``.
+
+        The stream must have a coroutine ``read`` method, like
+        ``gnss.ntrip.client.AsyncClient`` or ``asyncio.StreamReader``.
+        Iteration stops at the end of the stream.
         """
-        empty_stream = False
-        msg_found = False
+        self.subscribe(*break_msg_types)
         while True:
-            if len(self._buffer) < BUFFER_SIZE:
-                buff = self.stream.read(BUFFER_SIZE)
-                if buff:
-                    self._buffer += buff
-                elif self.wait_for_stream:
-                    continue
-                else:
-                    empty_stream = True
+            data = await self.stream.read(self._framer.chunk_size)
+            if not data:
+                break
+            for msg in self.feed(data):
+                yield msg
+        if self._framer.synced:
+            raise RuntimeError("incomplete message")
 
-            if not msg_found:
-                try:
-                    index = self._buffer.index(PREAMBLE)
-                    self._buffer = self._buffer[index:]
-                    msg_found = True
-                except ValueError:
-                    if not self.wait_for_stream:
-                        return
-                    continue
+    def feed(self, data: bytes) -> list:
+        """
+        Push data into the parser.
 
-            if len(self._buffer) <= 3:
-                if empty_stream:
-                    raise RuntimeError("incomplete message")
-                continue
+        Use this instead of a stream when the bytes are received elsewhere.
+        All of data is parsed before returning, callbacks included.
 
-            stream = ConstBitStream(self._buffer[:3])
-            stream.pos += 14
-            msg_length = stream.read('uint:10')
+        Returns
+        ----------
+        list
+            Messages of a break type completed by data.
+        """
+        msgs = []
+        view = memoryview(data)
+        chunk_size = self._framer.chunk_size
+        for start in range(0, len(view), chunk_size):
+            self._framer.feed(view[start:start + chunk_size])
+            msg = self._parse_frames()
+            while msg is not None:
+                msgs.append(msg)
+                msg = self._parse_frames()
+        return msgs
 
-            if len(self._buffer) < (6 + msg_length):
-                if empty_stream:
+    def parse(self):
+        """
+        Parse RTCM binary messages.
+
+        Only messages with a callback or in the break types are decoded,
+        frames of other messages are counted in ``frame_counts`` and
+        skipped. If there is no callback nor break type, every message is
+        decoded.
+
+        In lazy mode, messages are returned as ``LazyMessage`` handles which
+        are only decoded when a decoded attribute is first read.
+
+        The time spent waiting for the stream is accumulated in
+        ``idle_time``, the rest of the time spent in this method in
+        ``busy_time``.
+        """
+        start = time.perf_counter()
+        idle_time = self.idle_time
+        try:
+            while True:
+                msg = self._parse_frames()
+                if msg is not None:
+                    return msg
+                elif self._framer.fill(self.stream):
+                    self._empty_reads = 0
+                    self._stream_ready = False
+                elif self.wait_for_stream:
+                    self._wait_for_stream()
+                elif self._framer.synced:
                     raise RuntimeError("incomplete message")
-                continue
+                else:
+                    return
+        finally:
+            self.busy_time += (time.perf_counter() - start
+                               - (self.idle_time - idle_time))
 
-            crc = self._buffer[3 + msg_length: 6 + msg_length]
-            computed_crc = Crc24Q.hash(self._buffer[: 3 + msg_length])
-            if computed_crc != crc:
-                self._buffer = self._buffer[1:]
-                msg_found = False
-                self.error_count += 1
-                continue
+    def _parse_frames(self):
+        """
+        Parse the frames available in the buffer.
+
+        Returns
+        ----------
+        RtcmMessage or None
+            The first message of a break type, or None once the buffer holds
+            no complete frame.
+        """
+        if self._dispatch is None:
+            self._dispatch = self._build_dispatch()
+        dispatch = self._dispatch
+        frame_counts = self.frame_counts
+        decode_times = self.decode_times
+        while True:
+            frame = self._framer.next_frame()
+            if frame is None:
+                return
+
+            msg_number = (frame[HEADER_LENGTH] << 4) | (
+                frame[HEADER_LENGTH + 1] >> 4)
+            frame_counts[msg_number] = frame_counts.get(msg_number, 0) + 1
+            if dispatch:
+                try:
+                    callbacks, is_break = dispatch[msg_number]
+                except KeyError:
+                    continue
+            else:
+                callbacks, is_break = (), False
 
             try:
-                self.parse_message(self._buffer[3: 3 + msg_length])
+                if decode_times is None:
+                    self.parse_message(frame[HEADER_LENGTH:-CRC_LENGTH])
+                else:
+                    start = time.perf_counter()
+                    self.parse_message(frame[HEADER_LENGTH:-CRC_LENGTH])
+                    elapsed = time.perf_counter() - start
+                    try:
+                        decode_times[msg_number].observe(elapsed)
+                    except KeyError:
+                        decode_times[msg_number] = Histogram()
+                        decode_times[msg_number].observe(elapsed)
             except (ValueError, NotImplementedError):
                 continue
-            finally:
-                self._buffer = self._buffer[6 + msg_length:]
-                msg_found = False
 
             msg_name = self.msg.name
-            if msg_name in self.counts:
-                self.counts[msg_name] += 1
-            else:
-                self.counts[msg_name] = 0
+            self.counts[msg_name] = self.counts.get(msg_name, 0) + 1
 
-            if self.msg.type in self._callbacks:
-                for callback in self._callbacks[self.msg.type]:
+            if self.executor is None:
+                for callback in callbacks:
                     callback(self.msg)
+            else:
+                for callback in callbacks:
+                    self.executor.submit(callback, self.msg)
 
-            if self.msg.type in self.break_msg_types:
+            if is_break:
                 return self.msg
 
     def parse_message(self, buff: bytes) -> None:
-        stream = ConstBitStream(buff[:2])
-        msg_type = Type(stream.read('uint:12'))
-        self.msg = RtcmMessage(msg_type=msg_type)
-        self.msg.from_buffer(buff)
+        if self.lazy:
+            self.msg = LazyMessage(buff)
+        else:
+            self.msg = decode(buff)
+
 
+def decode(buff: bytes) -> RtcmMessage:
+    """
+    Decode the payload of a RTCM frame.
 
-class Crc24Q:
+    Raises
+    ---------
+    ValueError
+        If the message number is unknown.
+    NotImplementedError
+        If the message is not implemented.
     """
-    Qualcomm CRC-24.
+    if len(buff) < 2:
+        raise ValueError("missing message number")
+    msg_type = Type((buff[0] << 4) | (buff[1] >> 4))
+    msg = RtcmMessage(msg_type=msg_type)
+    msg.from_buffer(buff)
+    return msg
+
+
+def frame(payload: bytes) -> bytes:
     """
-    tab = (0x000000, 0x864CFB, 0x8AD50D, 0x0C99F6, 0x93E6E1, 0x15AA1A,
-           0x1933EC, 0x9F7F17, 0xA18139, 0x27CDC2, 0x2B5434, 0xAD18CF,
-           0x3267D8, 0xB42B23, 0xB8B2D5, 0x3EFE2E, 0xC54E89, 0x430272,
-           0x4F9B84, 0xC9D77F, 0x56A868, 0xD0E493, 0xDC7D65, 0x5A319E,
-           0x64CFB0, 0xE2834B, 0xEE1ABD, 0x685646, 0xF72951, 0x7165AA,
-           0x7DFC5C, 0xFBB0A7, 0x0CD1E9, 0x8A9D12, 0x8604E4, 0x00481F,
-           0x9F3708, 0x197BF3, 0x15E205, 0x93AEFE, 0xAD50D0, 0x2B1C2B,
-           0x2785DD, 0xA1C926, 0x3EB631, 0xB8FACA, 0xB4633C, 0x322FC7,
-           0xC99F60, 0x4FD39B, 0x434A6D, 0xC50696, 0x5A7981, 0xDC357A,
-           0xD0AC8C, 0x56E077, 0x681E59, 0xEE52A2, 0xE2CB54, 0x6487AF,
-           0xFBF8B8, 0x7DB443, 0x712DB5, 0xF7614E, 0x19A3D2, 0x9FEF29,
-           0x9376DF, 0x153A24, 0x8A4533, 0x0C09C8, 0x00903E, 0x86DCC5,
-           0xB822EB, 0x3E6E10, 0x32F7E6, 0xB4BB1D, 0x2BC40A, 0xAD88F1,
-           0xA11107, 0x275DFC, 0xDCED5B, 0x5AA1A0, 0x563856, 0xD074AD,
-           0x4F0BBA, 0xC94741, 0xC5DEB7, 0x43924C, 0x7D6C62, 0xFB2099,
-           0xF7B96F, 0x71F594, 0xEE8A83, 0x68C678, 0x645F8E, 0xE21375,
-           0x15723B, 0x933EC0, 0x9FA736, 0x19EBCD, 0x8694DA, 0x00D821,
-           0x0C41D7, 0x8A0D2C, 0xB4F302, 0x32BFF9, 0x3E260F, 0xB86AF4,
-           0x2715E3, 0xA15918, 0xADC0EE, 0x2B8C15, 0xD03CB2, 0x567049,
-           0x5AE9BF, 0xDCA544, 0x43DA53, 0xC596A8, 0xC90F5E, 0x4F43A5,
-           0x71BD8B, 0xF7F170, 0xFB6886, 0x7D247D, 0xE25B6A, 0x641791,
-           0x688E67, 0xEEC29C, 0x3347A4, 0xB50B5F, 0xB992A9, 0x3FDE52,
-           0xA0A145, 0x26EDBE, 0x2A7448, 0xAC38B3, 0x92C69D, 0x148A66,
-           0x181390, 0x9E5F6B, 0x01207C, 0x876C87, 0x8BF571, 0x0DB98A,
-           0xF6092D, 0x7045D6, 0x7CDC20, 0xFA90DB, 0x65EFCC, 0xE3A337,
-           0xEF3AC1, 0x69763A, 0x578814, 0xD1C4EF, 0xDD5D19, 0x5B11E2,
-           0xC46EF5, 0x42220E, 0x4EBBF8, 0xC8F703, 0x3F964D, 0xB9DAB6,
-           0xB54340, 0x330FBB, 0xAC70AC, 0x2A3C57, 0x26A5A1, 0xA0E95A,
-           0x9E1774, 0x185B8F, 0x14C279, 0x928E82, 0x0DF195, 0x8BBD6E,
-           0x872498, 0x016863, 0xFAD8C4, 0x7C943F, 0x700DC9, 0xF64132,
-           0x693E25, 0xEF72DE, 0xE3EB28, 0x65A7D3, 0x5B59FD, 0xDD1506,
-           0xD18CF0, 0x57C00B, 0xC8BF1C, 0x4EF3E7, 0x426A11, 0xC426EA,
-           0x2AE476, 0xACA88D, 0xA0317B, 0x267D80, 0xB90297, 0x3F4E6C,
-           0x33D79A, 0xB59B61, 0x8B654F, 0x0D29B4, 0x01B042, 0x87FCB9,
-           0x1883AE, 0x9ECF55, 0x9256A3, 0x141A58, 0xEFAAFF, 0x69E604,
-           0x657FF2, 0xE33309, 0x7C4C1E, 0xFA00E5, 0xF69913, 0x70D5E8,
-           0x4E2BC6, 0xC8673D, 0xC4FECB, 0x42B230, 0xDDCD27, 0x5B81DC,
-           0x57182A, 0xD154D1, 0x26359F, 0xA07964, 0xACE092, 0x2AAC69,
-           0xB5D37E, 0x339F85, 0x3F0673, 0xB94A88, 0x87B4A6, 0x01F85D,
-           0x0D61AB, 0x8B2D50, 0x145247, 0x921EBC, 0x9E874A, 0x18CBB1,
-           0xE37B16, 0x6537ED, 0x69AE1B, 0xEFE2E0, 0x709DF7, 0xF6D10C,
-           0xFA48FA, 0x7C0401, 0x42FA2F, 0xC4B6D4, 0xC82F22, 0x4E63D9,
-           0xD11CCE, 0x575035, 0x5BC9C3, 0xDD8538)
-
-    @classmethod
-    def hash(cls, data: bytes) -> bytes:
-        crc = 0
-        for byte in data:
-            crc = ((crc << 8) & 0xffffff) ^ cls.tab[(crc >> 16) ^ byte]
-        crc = crc.to_bytes(3, 'big')
-        return crc
+    Frame a payload: preamble, payload length, payload and CRC-24Q.
+
+    Raises
+    ---------
+    ValueError
+        If the payload is longer than 1023 bytes.
+    """
+    if len(payload) > MAX_FRAME_LENGTH - HEADER_LENGTH - CRC_LENGTH:
+        raise ValueError("payload too long")
+    data = bytes((PREAMBLE, len(payload) >> 8, len(payload) & 0xff)) + payload
+    return data + crc24q(data).to_bytes(CRC_LENGTH, 'big')
+
+
+def encode(msg: RtcmMessage) -> bytes:
+    """
+    Encode a message into a RTCM frame, the inverse of ``decode``.
+
+    Raises
+    ---------
+    ValueError
+        If a value does not fit its field or the payload is too long.
+    NotImplementedError
+        If the message encoding is not implemented.
+    """
+    return frame(msg.to_buffer())
+
+
+class LazyMessage:
+    """
+    Handle on a RTCM frame payload, decoded on demand.
+
+    The message number, type and station id are read straight from the
+    header bits. The full message is decoded the first time any other
+    attribute is read, and then cached.
+
+    Parameters
+    ----------
+    buff: bytes-like
+        Frame payload, copied by the handle.
+
+    Raises
+    ---------
+    ValueError
+        If the message number is unknown.
+    NotImplementedError
+        If the message is not implemented.
+    """
+    __slots__ = ('payload', 'msg_number', 'type', '_msg')
+
+    def __init__(self, buff: bytes):
+        if len(buff) < 2:
+            raise ValueError("missing message number")
+        self.payload = bytes(buff)
+        self.msg_number = (buff[0] << 4) | (buff[1] >> 4)
+        self.type = Type(self.msg_number)
+        RtcmMessage.get_class(self.type)
+        self._msg = None
+
+    def __repr__(self):
+        state = "decoded" if self._msg is not None else "pending"
+        return f"LazyMessage({self.msg_number}, {state})"
+
+    def __getattr__(self, name):
+        if name.startswith('_'):
+            raise AttributeError(name)
+        return getattr(self.message, name)
+
+    @property
+    def name(self):
+        return RtcmMessage.get_name(self.type)
+
+    @property
+    def station_id(self):
+        if self.msg_number in STATION_ID_MSG_NUMBERS and len(self.payload) > 2:
+            return ((self.payload[1] & 0x0f) << 8) | self.payload[2]
+        return self.message.station_id
+
+    @property
+    def decoded(self) -> bool:
+        return self._msg is not None
+
+    @property
+    def message(self) -> RtcmMessage:
+        if self._msg is None:
+            self._msg = decode(self.payload)
+        return self._msg
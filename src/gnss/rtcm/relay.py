@@ -0,0 +1,175 @@
+import numpy as np
+
+from .archive import scan_range
+from .parser import decode, HEADER_LENGTH, CRC_LENGTH
+
+
+RELAY_CHUNK_SIZE = 1 << 20
+
+
+class Relay:
+    """
+    Forward the raw frames of chosen messages from a stream to another.
+
+    Frames are located and CRC checked like the parser does, a chunk at a
+    time with ``gnss.rtcm.archive.scan_range``, and the original bytes of
+    the selected frames are written to the output stream, one write per
+    chunk read. Nothing is decoded unless messages are asked for with
+    ``iter_messages``.
+
+    Parameters
+    ----------
+    stream: file-like
+        Input stream with a ``read`` method, e.g. a ``Client``.
+    outstream: file-like
+        Output stream with a ``write`` method.
+    msg_numbers: iterable of int
+        Message numbers to forward, all if None.
+    station_ids: iterable of int
+        Reference station ids to forward, all if None. Messages without a
+        station id in their header, like ephemerides, are not filtered on
+        it.
+    chunk_size: int
+        Maximum number of bytes read from the stream at once.
+
+    Examples
+    --------
+    >>> relay = Relay(client, rover, msg_numbers=[1005, 1074, 1084])
+    >>> relay.run()
+    >>> relay.stats()["bytes_saved"]
+    """
+    def __init__(
+            self,
+            stream,
+            outstream,
+            msg_numbers=None,
+            station_ids=None,
+            chunk_size: int = RELAY_CHUNK_SIZE):
+        self.stream = stream
+        self.outstream = outstream
+        self.msg_numbers = (None if msg_numbers is None
+                            else np.array(sorted(set(msg_numbers))))
+        self.station_ids = (None if station_ids is None
+                            else np.array(sorted(set(station_ids))))
+        self.chunk_size = chunk_size
+        self.frame_counts = {}
+        self.forward_counts = {}
+        self.error_count = 0
+        self.bytes_in = 0
+        self.bytes_out = 0
+        self._buffer = bytearray()
+
+    def stats(self) -> dict:
+        frames_in = sum(self.frame_counts.values())
+        frames_out = sum(self.forward_counts.values())
+        return {
+            "frames_in": frames_in,
+            "frames_out": frames_out,
+            "errors": self.error_count,
+            "bytes_in": self.bytes_in,
+            "bytes_out": self.bytes_out,
+            "bytes_saved": self.bytes_in - self.bytes_out,
+            "saved_ratio": (1 - self.bytes_out / self.bytes_in
+                            if self.bytes_in else 0.0),
+        }
+
+    def _select(self, rows: np.ndarray) -> np.ndarray:
+        selected = np.ones(len(rows), dtype=bool)
+        if self.msg_numbers is not None:
+            selected &= np.isin(rows['msg_number'], self.msg_numbers)
+        if self.station_ids is not None:
+            selected &= ((rows['station_id'] < 0)
+                         | np.isin(rows['station_id'], self.station_ids))
+        return selected
+
+    @staticmethod
+    def _count(counts: dict, msg_numbers: np.ndarray):
+        numbers, nr_frames = np.unique(msg_numbers, return_counts=True)
+        for number, nr in zip(numbers.tolist(), nr_frames.tolist()):
+            counts[number] = counts.get(number, 0) + nr
+
+    def _relay(self, decoded: list = None):
+        buffer = self._buffer
+        index, end = scan_range(buffer, 0, len(buffer))
+        rows = index[index['crc_valid']]
+        self.error_count += len(index) - len(rows)
+        rows = rows[self._select(rows)]
+        self._count(self.frame_counts, index['msg_number'][index['crc_valid']])
+        self._count(self.forward_counts, rows['msg_number'])
+
+        if len(rows):
+            starts = rows['offset']
+            stops = starts + rows['length']
+            # Back-to-back frames are written as a single slice.
+            run_starts = np.flatnonzero(starts[1:] != stops[:-1]) + 1
+            with memoryview(buffer) as view:
+                data = b"".join([view[start:stop] for start, stop in zip(
+                    starts[np.r_[0, run_starts]].tolist(),
+                    stops[np.r_[run_starts - 1, -1]].tolist())])
+            self.outstream.write(data)
+            self.bytes_out += len(data)
+            if decoded is not None:
+                for start, stop in zip(starts.tolist(), stops.tolist()):
+                    try:
+                        decoded.append(decode(
+                            buffer[start + HEADER_LENGTH:stop - CRC_LENGTH]))
+                    except (ValueError, NotImplementedError):
+                        continue
+        del buffer[:end]
+
+    def feed(self, data: bytes, decoded: list = None) -> int:
+        """
+        Push data into the relay and forward the frames it completes.
+
+        Use this instead of a stream when the bytes are received elsewhere.
+        Decoded forwarded messages are appended to decoded if given.
+
+        Returns
+        ----------
+        int
+            Number of bytes pushed.
+        """
+        self._buffer += data
+        self.bytes_in += len(data)
+        self._relay(decoded)
+        return len(data)
+
+    def step(self, decoded: list = None) -> int:
+        """
+        Read one chunk from the stream and forward its frames.
+
+        Returns
+        ----------
+        int
+            Number of bytes read, 0 at the end of the stream.
+        """
+        data = self.stream.read(self.chunk_size)
+        if not data:
+            return 0
+        return self.feed(data, decoded)
+
+    def run(self) -> dict:
+        """
+        Forward frames until the end of the stream.
+
+        Returns
+        ----------
+        dict
+            Relay statistics, see ``stats``.
+        """
+        while self.step():
+            pass
+        return self.stats()
+
+    def iter_messages(self):
+        """
+        Forward frames until the end of the stream, yielding the forwarded
+        messages decoded.
+
+        Frames of unknown or not implemented messages are forwarded but not
+        yielded.
+        """
+        decoded = []
+        while self.step(decoded):
+            yield from decoded
+            decoded.clear()
@@ -0,0 +1,214 @@
+import mmap
+import time
+
+import numpy as np
+
+from .archive import _map, scan_buffer
+from .fields import extract_bits
+from .messages import (
+    BEIDOU_MSG_NUMBERS, GLONASS_MSG_NUMBERS, OBSERVATION_MSG_NUMBERS,
+    BEIDOU_OFFSET_MS, LEAP_MS, MOSCOW_OFFSET_MS, MS_PER_DAY
+)
+from .parser import HEADER_LENGTH
+
+
+REPLAY_CHUNK_SIZE = 65536
+
+
+def frame_times(buffer, index: np.ndarray) -> np.ndarray:
+    """
+    Time of the frames of a recording, from the epochs of its observation
+    messages.
+
+    Epochs are converted to GPS times of day like ``epoch_time`` does and
+    unwrapped at day changes. Other frames take the time of the last epoch
+    before them, or of the first epoch for the frames preceding it. Times
+    never go backwards.
+
+    Parameters
+    ----------
+    buffer: bytes-like
+        Recording.
+    index: numpy.ndarray
+        Valid frames of the recording, see ``scan_buffer``.
+
+    Returns
+    ----------
+    numpy.ndarray
+        Time of each frame in seconds, from 0 for the first epoch.
+    """
+    msg_numbers = index['msg_number']
+    observations = np.flatnonzero(
+        np.isin(msg_numbers, list(OBSERVATION_MSG_NUMBERS))
+        & (index['length'] >= HEADER_LENGTH + 10))
+    if not len(observations):
+        return np.zeros(len(index))
+
+    data = np.frombuffer(buffer, dtype=np.uint8)
+    pos = (index['offset'][observations] + HEADER_LENGTH) * 8 + 24
+    epochs = extract_bits(data, pos, 30).astype(np.int64)
+    msg_numbers = msg_numbers[observations]
+    glonass = np.isin(msg_numbers, list(GLONASS_MSG_NUMBERS))
+    # The legacy GLONASS epoch is 27 bits wide.
+    epochs[glonass & (msg_numbers < 1081)] >>= 3
+    epochs[glonass] = ((epochs[glonass] & 0x7ffffff) - MOSCOW_OFFSET_MS
+                       + LEAP_MS)
+    epochs[np.isin(msg_numbers, list(BEIDOU_MSG_NUMBERS))] += BEIDOU_OFFSET_MS
+    epochs %= MS_PER_DAY
+
+    steps = (np.diff(epochs) + MS_PER_DAY // 2) % MS_PER_DAY - MS_PER_DAY // 2
+    epoch_times = np.maximum.accumulate(
+        np.concatenate(([0], np.cumsum(steps)))) / 1000
+
+    last = np.full(len(index), -1)
+    last[observations] = np.arange(len(observations))
+    last = np.maximum(np.maximum.accumulate(last), 0)
+    return epoch_times[last]
+
+
+class Replayer:
+    """
+    Replay a RTCM recording at its real rate, scaled, or as fast as
+    possible.
+
+    The recording is paced by the epochs of its observation messages, see
+    ``frame_times``: the frames of an epoch are sent together, at the time
+    of their epoch divided by the speed. Bytes between frames are sent with
+    the frame they follow. A ``Replayer`` is a blocking file-like object,
+    so it can be read by a ``Parser``, written to a socket with ``play``, or
+    be the source of a ``Caster`` mountpoint as a local NTRIP stand-in.
+
+    Parameters
+    ----------
+    source: str or bytes-like
+        Path of the recording, memory-mapped, or its content.
+    speed: float
+        Replay speed, 1 for the real rate, None for the maximum rate.
+    repeat: int
+        Number of times the recording is replayed, endlessly if None.
+        Passes follow each other at the interval of the recording epochs.
+    chunk_size: int
+        Maximum number of bytes returned by a read, unless a single frame is
+        larger.
+
+    Examples
+    --------
+    >>> with Replayer("recording.bin", speed=10) as replayer:
+    ...     replayer.play(sock.sendall)
+    >>> caster.add_mountpoint("REPLAY", Replayer(data, repeat=None))
+    """
+    def __init__(
+            self,
+            source,
+            speed: float = 1.0,
+            repeat: int = 1,
+            chunk_size: int = REPLAY_CHUNK_SIZE):
+        self.buffer = _map(source) if isinstance(source, str) else source
+        self.speed = speed
+        self.repeat = repeat
+        self.chunk_size = chunk_size
+
+        index = scan_buffer(self.buffer)
+        index = index[index['crc_valid']]
+        self.nr_frames = len(index)
+        self.bounds = np.append(index['offset'], len(self.buffer))
+        self.bounds[0] = 0
+        self.times = frame_times(self.buffer, index)
+        epochs = np.unique(self.times)
+        interval = np.median(np.diff(epochs)) if len(epochs) > 1 else 1.0
+        self.duration = self.times[-1] + interval if self.nr_frames else 0.0
+
+        self.frames_out = 0
+        self.bytes_out = 0
+        self.passes = 0
+        self.max_lag = 0.0
+        self._frame = 0
+        self._start = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    def close(self):
+        if isinstance(self.buffer, mmap.mmap):
+            self.buffer.close()
+
+    def stats(self) -> dict:
+        """
+        Replay counters.
+
+        Returns
+        ----------
+        dict
+            Frames and bytes sent, passes completed, and the largest delay
+            of a frame past its due time in seconds.
+        """
+        return {
+            "frames_out": self.frames_out,
+            "bytes_out": self.bytes_out,
+            "passes": self.passes,
+            "max_lag": self.max_lag,
+        }
+
+    def read(self, size: int = -1) -> bytes:
+        """
+        Next frames, waiting until they are due.
+
+        Returns
+        ----------
+        bytes
+            Whole frames, at most size bytes unless the first frame is
+            larger, empty once the replay is over.
+        """
+        if self._start is None:
+            self._start = time.perf_counter()
+        if self._frame == self.nr_frames:
+            if self.nr_frames:
+                self.passes += 1
+            if not self.nr_frames or (self.repeat is not None
+                                      and self.passes >= self.repeat):
+                return b""
+            self._frame = 0
+
+        bounds = self.bounds
+        first = self._frame
+        size = self.chunk_size if size is None or size < 0 else size
+        last = int(np.searchsorted(bounds, bounds[first] + size, 'right')) - 1
+        last = min(max(last, first + 1), self.nr_frames)
+        if self.speed is not None:
+            offset = self.passes * self.duration
+            due = (self.times[first] + offset) / self.speed
+            now = time.perf_counter() - self._start
+            if due > now:
+                time.sleep(due - now)
+                now = time.perf_counter() - self._start
+            self.max_lag = max(self.max_lag, float(now - due))
+            due_frames = int(np.searchsorted(
+                self.times, now * self.speed - offset, 'right'))
+            last = min(last, max(due_frames, first + 1))
+
+        self._frame = last
+        data = bytes(self.buffer[bounds[first]:bounds[last]])
+        self.frames_out += last - first
+        self.bytes_out += len(data)
+        return data
+
+    def play(self, write) -> int:
+        """
+        Replay the recording into write, e.g. ``socket.sendall``, until its
+        end.
+
+        Returns
+        ----------
+        int
+            Number of bytes written.
+        """
+        nr_bytes = 0
+        while True:
+            data = self.read(self.chunk_size)
+            if not data:
+                return nr_bytes
+            write(data)
+            nr_bytes += len(data)
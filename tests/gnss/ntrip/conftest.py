@@ -0,0 +1,118 @@
+import asyncio
+import os
+import threading
+
+import pytest
+
+
+RTCM_FILE = os.path.join(
+    os.path.dirname(__file__), '..', 'rtcm', 'rtcm_data.bin')
+
+SOURCETABLE = (
+    "STR;RTCM;Test;RTCM 3.2;1004(1),1012(1);2;GPS+GLO;TEST;FRA;48.85;2.35;"
+    "0;0;test;none;N;N;2400;\r\n"
+    "ENDSOURCETABLE\r\n")
+
+
+class FakeCaster:
+    """
+    Local stand-in NTRIP caster running its own event loop in a thread.
+
+    NTRIP 2.0 requests get a chunked HTTP/1.1 answer, others an ICY one.
+    Unknown mountpoints get the sourcetable.
+    """
+    def __init__(self, mountpoints: dict, chunk_size: int = 512):
+        self.mountpoints = mountpoints
+        self.chunk_size = chunk_size
+        self.requests = []
+        self.port = None
+        self._loop = asyncio.new_event_loop()
+        self._thread = threading.Thread(target=self._loop.run_forever)
+        self._server = None
+
+    def start(self):
+        self._thread.start()
+        self._server = asyncio.run_coroutine_threadsafe(
+            asyncio.start_server(self._handle, '127.0.0.1', 0),
+            self._loop).result()
+        self.port = self._server.sockets[0].getsockname()[1]
+        return self
+
+    def stop(self):
+        self._loop.call_soon_threadsafe(self._server.close)
+        self._loop.call_soon_threadsafe(self._loop.stop)
+        self._thread.join()
+        self._loop.close()
+
+    async def _handle(self, reader, writer):
+        request_line = (await reader.readline()).decode().strip()
+        if not request_line:
+            writer.close()
+            return
+        headers = {}
+        while True:
+            line = await reader.readline()
+            if line in (b"\r\n", b""):
+                break
+            key, _, value = line.decode().partition(":")
+            headers[key.strip().lower()] = value.strip()
+        self.requests.append((request_line, headers))
+
+        mountpoint = request_line.split()[1].lstrip('/')
+        version2 = headers.get("ntrip-version") == "Ntrip/2.0"
+        if mountpoint not in self.mountpoints:
+            if version2:
+                writer.write(
+                    b"HTTP/1.1 200 OK\r\nContent-Type: gnss/sourcetable\r\n"
+                    b"Connection: close\r\n\r\n")
+            else:
+                writer.write(b"SOURCETABLE 200 OK\r\n")
+            writer.write(SOURCETABLE.encode())
+        else:
+            data = self.mountpoints[mountpoint]
+            if version2:
+                writer.write(
+                    b"HTTP/1.1 200 OK\r\nNtrip-Version: Ntrip/2.0\r\n"
+                    b"Content-Type: gnss/data\r\n"
+                    b"Transfer-Encoding: chunked\r\n\r\n")
+            else:
+                writer.write(b"ICY 200 OK\r\n")
+            for start in range(0, len(data), self.chunk_size):
+                chunk = data[start:start + self.chunk_size]
+                if version2:
+                    chunk = b"%x\r\n%s\r\n" % (len(chunk), chunk)
+                writer.write(chunk)
+                await writer.drain()
+            if version2:
+                writer.write(b"0\r\n\r\n")
+        await writer.drain()
+        writer.close()
+
+
+@pytest.fixture
+def rtcm_data():
+    with open(RTCM_FILE, 'rb') as f:
+        return f.read()
+
+
+@pytest.fixture
+def caster(rtcm_data):
+    caster = FakeCaster({"RTCM": rtcm_data}).start()
+    yield caster
+    caster.stop()
+
+
+@pytest.fixture
+def truncated_caster(rtcm_data):
+    # The link drops in the middle of a frame.
+    caster = FakeCaster({"RTCM": rtcm_data + rtcm_data[:20]}).start()
+    yield caster
+    caster.stop()
+
+
+@pytest.fixture
+def closing_caster():
+    # The connections are accepted and closed at once, without data.
+    caster = FakeCaster({"RTCM": b""}).start()
+    yield caster
+    caster.stop()
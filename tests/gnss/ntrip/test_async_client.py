@@ -0,0 +1,84 @@
+import asyncio
+from io import BytesIO
+
+import pytest
+
+from gnss.ntrip.client import AsyncClient
+from gnss.ntrip.protocol import ChunkedDecoder
+from gnss.rtcm.messages import ExtendedL1L2Gps
+from gnss.rtcm.parser import Parser
+
+
+@pytest.mark.parametrize("ntrip_version", ["1.0", "2.0"])
+def test_read(caster, rtcm_data, ntrip_version):
+    async def read_all():
+        data = bytearray()
+        async with AsyncClient(
+                "127.0.0.1", mountpoint="RTCM", port=caster.port,
+                ntrip_version=ntrip_version) as client:
+            while True:
+                buff = await client.read(100)
+                if not buff:
+                    return bytes(data)
+                data += buff
+
+    assert asyncio.run(read_all()) == rtcm_data
+    request_line, headers = caster.requests[0]
+    if ntrip_version == "1.0":
+        assert request_line == "GET /RTCM HTTP/1.0"
+        assert headers["user-agent"].startswith("NTRIP")
+    else:
+        assert request_line == "GET /RTCM HTTP/1.1"
+        assert headers["ntrip-version"] == "Ntrip/2.0"
+
+
+@pytest.mark.parametrize("ntrip_version", ["1.0", "2.0"])
+def test_invalid_mountpoint(caster, ntrip_version):
+    async def connect():
+        async with AsyncClient(
+                "http://127.0.0.1", mountpoint="UNKNOWN", port=caster.port,
+                ntrip_version=ntrip_version) as client:
+            await client.connect()
+
+    with pytest.raises(ValueError):
+        asyncio.run(connect())
+
+
+@pytest.mark.parametrize("ntrip_version", ["1.0", "2.0"])
+def test_aiter_messages(caster, rtcm_data, ntrip_version):
+    expected = list(Parser(BytesIO(rtcm_data)).iter_messages(ExtendedL1L2Gps))
+
+    async def parse():
+        async with AsyncClient(
+                "127.0.0.1", mountpoint="RTCM", port=caster.port,
+                ntrip_version=ntrip_version) as client:
+            parser = Parser(client)
+            return [msg async for msg in parser.aiter_messages(
+                ExtendedL1L2Gps)]
+
+    msgs = asyncio.run(parse())
+    assert [vars(msg) for msg in msgs] == [vars(msg) for msg in expected]
+
+
+def test_many_mountpoints(caster, rtcm_data):
+    caster.mountpoints.update({f"M{i}": rtcm_data for i in range(20)})
+
+    async def parse(mountpoint):
+        async with AsyncClient("127.0.0.1", mountpoint=mountpoint,
+                               port=caster.port) as client:
+            parser = Parser(client)
+            return len([msg async for msg in parser.aiter_messages()])
+
+    async def parse_all():
+        return await asyncio.gather(*(parse(f"M{i}") for i in range(20)))
+
+    assert asyncio.run(parse_all()) == [7] * 20
+
+
+def test_chunked_decoder():
+    encoded = b"4\r\nabcd\r\n3;ext=1\r\nefg\r\n0\r\n\r\n"
+    decoder = ChunkedDecoder()
+    decoded = b"".join(
+        decoder.decode(encoded[i:i + 1]) for i in range(len(encoded)))
+    assert decoded == b"abcdefg"
+    assert decoder.finished
@@ -0,0 +1,130 @@
+import threading
+import time
+
+from gnss.ntrip.cache import SourcetableCache
+from gnss.ntrip.client import Client
+
+
+SOURCETABLE = (
+    "STR;ZUPT6818;Houston, Tx;RTCM 3.2;1005(1);;GPS+GLO;SNIP;USA;29.94;"
+    "-95.53;1;0;sNTRIP;none;N;N;6800;\r\n"
+    "NET;SNIP;RTK2go;N;N;rtk2go.com;rtk2go.com:2101;support@use-snip.com;;\r\n"
+    "ENDSOURCETABLE\r\n")
+
+HEADERS = {'Content-Type': 'gnss/sourcetable'}
+
+
+class Clock:
+    def __init__(self):
+        self.time = 1000.0
+
+    def __call__(self):
+        return self.time
+
+
+def test_cache_ttl(requests_mock):
+    adapter = requests_mock.get(
+        "http://test.com:2101", headers=HEADERS, text=SOURCETABLE)
+    clock = Clock()
+    cache = SourcetableCache(ttl=60, clock=clock)
+    client = Client("http://test.com")
+
+    df = cache.get(client)
+    assert list(df['type']) == ["STR", "NET"]
+    assert cache.get(client).equals(df)
+    assert adapter.call_count == 1
+
+    cache.get(client, {"strict": True})
+    assert adapter.call_count == 2
+    assert adapter.last_request.query == "strict=1"
+
+    clock.time += 60
+    cache.get(client)
+    assert adapter.call_count == 3
+
+    stats = cache.stats()
+    assert stats["hits"] == 1
+    assert stats["misses"] == 3
+    assert stats["hit_rate"] == 0.25
+    assert stats["fetch_count"] == 3
+    assert stats["mean_fetch_time"] > 0
+
+
+def test_cache_conditional_refresh(requests_mock):
+    adapter = requests_mock.get("mock://test.com:2101", [
+        {"headers": {**HEADERS, "ETag": '"v1"'}, "text": SOURCETABLE},
+        {"status_code": 304, "headers": {"ETag": '"v1"'}}])
+    clock = Clock()
+    cache = SourcetableCache(ttl=60, clock=clock)
+    client = Client("mock://test.com")
+
+    df = cache.get(client)
+    clock.time += 120
+    assert cache.get(client).equals(df)
+    assert adapter.call_count == 2
+    assert adapter.last_request.headers["If-None-Match"] == '"v1"'
+    assert cache.not_modified == 1
+
+    clock.time += 30
+    assert cache.get(client).equals(df)
+    assert adapter.call_count == 2
+
+
+def test_cache_copies(requests_mock):
+    requests_mock.get(
+        "http://test.com:2101", headers=HEADERS, text=SOURCETABLE)
+    cache = SourcetableCache(ttl=60)
+    client = Client("http://test.com")
+
+    df = cache.get(client)
+    df.drop(index=df.index[-1], inplace=True)
+    df["note"] = "changed"
+    df = cache.get(client)
+    assert list(df['type']) == ["STR", "NET"]
+    assert "note" not in df
+    assert cache.hits == 1
+
+
+def test_cache_directory(requests_mock, tmp_path):
+    adapter = requests_mock.get(
+        "mock://test.com:2101",
+        headers={**HEADERS, "Last-Modified": "Sat, 17 Oct 2026 10:00:00 GMT"},
+        text=SOURCETABLE)
+    clock = Clock()
+    client = Client("mock://test.com")
+    SourcetableCache(ttl=60, directory=tmp_path, clock=clock).get(client)
+
+    cache = SourcetableCache(ttl=60, directory=tmp_path, clock=clock)
+    df = cache.get(client)
+    assert adapter.call_count == 1
+    assert cache.hits == 1
+    assert list(df['mountpoint'][:1]) == ["ZUPT6818"]
+
+    clock.time += 60
+    cache.get(client)
+    assert adapter.call_count == 2
+    assert (adapter.last_request.headers["If-Modified-Since"]
+            == "Sat, 17 Oct 2026 10:00:00 GMT")
+
+    cache.invalidate()
+    assert not list(tmp_path.glob("*.gz"))
+
+
+def test_cache_shared_fetch(requests_mock, tmp_path):
+    def slow_sourcetable(request, context):
+        time.sleep(0.2)
+        return SOURCETABLE
+
+    adapter = requests_mock.get(
+        "mock://test.com:2101", headers=HEADERS, text=slow_sourcetable)
+    caches = [SourcetableCache(directory=tmp_path) for _ in range(4)]
+    threads = [
+        threading.Thread(target=cache.get, args=(Client("mock://test.com"),))
+        for cache in caches]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert adapter.call_count == 1
+    assert sum(cache.hits for cache in caches) == 3
@@ -0,0 +1,257 @@
+import asyncio
+from io import BytesIO
+import socket
+import threading
+
+import pytest
+
+from gnss.ntrip.caster import Caster, Subscriber
+from gnss.ntrip.client import AsyncClient, Client
+from gnss.ntrip.protocol import build_request, request_headers
+from gnss.rtcm.parser import Parser
+
+
+async def read_all(client):
+    data = bytearray()
+    while True:
+        buff = await client.read(65536)
+        if not buff:
+            return bytes(data)
+        data += buff
+
+
+async def wait_until(condition):
+    while not condition():
+        await asyncio.sleep(0.01)
+
+
+class GatedStream:
+    """
+    Blocking stream whose first read waits for an event.
+    """
+    def __init__(self, stream, event):
+        self.stream = stream
+        self.event = event
+
+    def read(self, nrbytes):
+        self.event.wait()
+        return self.stream.read(nrbytes)
+
+
+def test_sourcetable():
+    caster = Caster(port=0)
+    caster.add_mountpoint("A", record={"country": "FRA", "latitude": 48.85})
+    caster.add_mountpoint("B", record={"format": "RTCM 3.2"})
+
+    async def request():
+        async with caster:
+            loop = asyncio.get_running_loop()
+            client = Client("http://127.0.0.1", port=caster.port)
+            sourcetable = await loop.run_in_executor(
+                None, client.get_sourcetable)
+
+            reader, writer = await asyncio.open_connection(
+                "127.0.0.1", caster.port)
+            writer.write(build_request(
+                "127.0.0.1", caster.port, "UNKNOWN",
+                request_headers(ntrip_version="1.0")))
+            answer = await reader.read()
+            writer.close()
+            return sourcetable, answer
+
+    sourcetable, answer = asyncio.run(request())
+    assert list(sourcetable["mountpoint"]) == ["A", "B"]
+    assert list(sourcetable["format"]) == ["RTCM 3", "RTCM 3.2"]
+    assert sourcetable["country"][0] == "FRA"
+    assert sourcetable["latitude"][0] == 48.85
+    assert answer.startswith(b"SOURCETABLE 200 OK\r\n")
+    assert answer.endswith(caster.sourcetable().encode())
+    assert caster.sourcetable().endswith("\r\nENDSOURCETABLE\r\n")
+
+
+def test_fan_out(rtcm_data):
+    nr_clients = 20
+    caster = Caster(port=0)
+    mountpoint = caster.add_mountpoint("RTCM")
+    stream = (b"garbage" + rtcm_data) * 3
+
+    async def run():
+        async with caster:
+            clients = [AsyncClient(
+                "127.0.0.1", mountpoint="RTCM", port=caster.port,
+                ntrip_version="1.0" if i % 2 else "2.0")
+                for i in range(nr_clients)]
+            for client in clients:
+                await client.connect()
+            tasks = [asyncio.ensure_future(read_all(client))
+                     for client in clients]
+            await wait_until(lambda: len(mountpoint.subscribers) == nr_clients)
+            for start in range(0, len(stream), 100):
+                mountpoint.feed(stream[start:start + 100])
+                await asyncio.sleep(0)
+            mountpoint.close()
+            return await asyncio.gather(*tasks)
+
+    received = asyncio.run(run())
+    assert received == [rtcm_data * 3] * nr_clients
+    stats = caster.stats()["RTCM"]
+    assert stats["subscribed"] == nr_clients
+    assert stats["subscribers"] == 0
+    assert stats["frames"] == 39
+    assert stats["bytes_published"] == len(rtcm_data) * 3
+    assert stats["dropped_blocks"] == 0
+
+
+def test_read_budget(rtcm_data):
+    caster = Caster(port=0)
+    mountpoint = caster.add_mountpoint("RTCM", buffer_blocks=8)
+    subscriber = Subscriber(mountpoint)
+    for _ in range(4):
+        mountpoint.feed(rtcm_data)
+
+    assert mountpoint.read(subscriber, 2 * len(rtcm_data)) == rtcm_data * 2
+    # One block at least.
+    assert mountpoint.read(subscriber, 1) == rtcm_data
+    assert mountpoint.read(subscriber) == rtcm_data
+    assert subscriber.cursor == mountpoint.head
+    assert subscriber.position == mountpoint.bytes_published
+
+
+@pytest.mark.parametrize("drop_policy", ["drop-oldest", "disconnect"])
+def test_stalled_subscriber(rtcm_data, drop_policy):
+    caster = Caster(port=0, drop_policy=drop_policy)
+    # Large enough for the stalled client to never lag behind it.
+    nr_blocks = 500
+    mountpoint = caster.add_mountpoint("RTCM", buffer_blocks=nr_blocks)
+    block = rtcm_data * 16
+
+    async def run():
+        async with caster:
+            reader, writer = await asyncio.open_connection(
+                "127.0.0.1", caster.port)
+            writer.write(build_request(
+                "127.0.0.1", caster.port, "RTCM",
+                request_headers(ntrip_version="1.0")))
+            await wait_until(lambda: mountpoint.subscribers)
+            subscriber = next(iter(mountpoint.subscribers))
+            for _ in range(nr_blocks):
+                mountpoint.feed(block)
+                await asyncio.sleep(0)
+            writer.close()
+            return subscriber
+
+    subscriber = asyncio.run(run())
+    # The client never reads: what the caster queued to it is bounded by
+    # the socket buffers and the write budget.
+    assert 0 < subscriber.bytes_sent < len(block) * nr_blocks // 2
+    stats = caster.stats()["RTCM"]
+    if drop_policy == "disconnect":
+        assert stats["disconnected"] == 1
+    else:
+        assert stats["disconnected"] == 0
+        assert subscriber.dropped_blocks == 0
+
+
+def test_large_blocks(rtcm_data):
+    caster = Caster(port=0, drop_policy="disconnect", write_buffer=4096)
+    mountpoint = caster.add_mountpoint("RTCM")
+    # Larger than the socket buffers, not flushed by a single write.
+    block = rtcm_data * 4096
+
+    async def run():
+        async with caster:
+            client = AsyncClient(
+                "127.0.0.1", mountpoint="RTCM", port=caster.port)
+            await client.connect()
+            await wait_until(lambda: mountpoint.subscribers)
+            received = bytearray()
+            for _ in range(3):
+                mountpoint.feed(block)
+                while len(received) < mountpoint.bytes_published:
+                    received += await client.read(1 << 20)
+            mountpoint.close()
+            assert await client.read(1) == b""
+            return bytes(received)
+
+    assert asyncio.run(run()) == block * 3
+    assert caster.stats()["RTCM"]["disconnected"] == 0
+
+
+def test_client_upstream(caster, rtcm_data):
+    event = threading.Event()
+    upstream = Client("127.0.0.1", mountpoint="RTCM", port=caster.port,
+                      transport="socket")
+    server = Caster(port=0)
+    mountpoint = server.add_mountpoint(
+        "BASE", GatedStream(upstream, event), msg_numbers=[1004])
+
+    async def run():
+        async with server:
+            client = AsyncClient(
+                "127.0.0.1", mountpoint="BASE", port=server.port)
+            await client.connect()
+            await wait_until(lambda: mountpoint.subscribers)
+            event.set()
+            return await read_all(client)
+
+    received = asyncio.run(run())
+    upstream.close()
+    parser = Parser(BytesIO(received))
+    msgs = list(parser.iter_messages())
+    assert [msg.msg_number for msg in msgs] == [1004] * 7
+    assert mountpoint.closed and mountpoint.error is None
+
+
+@pytest.mark.parametrize(
+    "drop_policy", ["drop-oldest", "skip-to-latest", "disconnect"])
+def test_slow_subscriber(rtcm_data, drop_policy):
+    caster = Caster(port=0, drop_policy=drop_policy)
+    mountpoint = caster.add_mountpoint("RTCM", buffer_blocks=8)
+    block = rtcm_data * 16
+    nr_blocks = 1000
+
+    async def run():
+        async with caster:
+            loop = asyncio.get_running_loop()
+            sock = socket.socket()
+            sock.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, 4096)
+            sock.setblocking(False)
+            await loop.sock_connect(sock, ("127.0.0.1", caster.port))
+            slow_reader, slow_writer = await asyncio.open_connection(sock=sock)
+            slow_writer.write(build_request(
+                "127.0.0.1", caster.port, "RTCM",
+                request_headers(ntrip_version="1.0")))
+            await wait_until(lambda: mountpoint.subscribers)
+
+            fast = AsyncClient(
+                "127.0.0.1", mountpoint="RTCM", port=caster.port)
+            await fast.connect()
+            await wait_until(lambda: len(mountpoint.subscribers) == 2)
+            received = bytearray()
+            for _ in range(nr_blocks):
+                mountpoint.feed(block)
+                while len(received) < mountpoint.bytes_published:
+                    received += await fast.read(1 << 20)
+            mountpoint.close()
+            assert await fast.read(1) == b""
+
+            slow = await slow_reader.read()
+            slow_writer.close()
+            return bytes(received), slow
+
+    fast, slow = asyncio.run(run())
+    assert fast == block * nr_blocks
+    stats = caster.stats()["RTCM"]
+    assert len(slow) < len(fast)
+    _, _, slow = slow.partition(b"ICY 200 OK\r\n\r\n")
+    parser = Parser(BytesIO(slow))
+    for _ in parser.iter_messages():
+        pass
+    assert parser.error_count == 0
+    if drop_policy == "disconnect":
+        # Disconnected once its transport is full, maybe before the
+        # buffer wraps.
+        assert stats["disconnected"] == 1
+    else:
+        assert stats["dropped_blocks"] > 0
+        assert stats["disconnected"] == 0
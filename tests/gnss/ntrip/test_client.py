@@ -42,3 +42,24 @@ def test_get_data(requests_mock):
     with Client("mock://test.com", mountpoint="fake_data", port=2101) as client:
         data = client.get_data(len(FAKE_DATA))
         assert data.decode("utf-8") == FAKE_DATA
+
+
+def test_client_stats(caster, rtcm_data):
+    client = Client("127.0.0.1", mountpoint="RTCM", port=caster.port,
+                    transport="socket")
+    buffer = bytearray(4096)
+    for _ in range(2):
+        received = 0
+        while True:
+            nrbytes = client.readinto(buffer)
+            if not nrbytes:
+                break
+            received += nrbytes
+        assert received == len(rtcm_data)
+        client.close()
+
+    stats = client.stats()
+    assert stats["bytes_in"] == 2 * len(rtcm_data)
+    assert stats["connects"] == 2
+    assert stats["reconnects"] == 1
+    assert stats["read_stall_time"] > 0
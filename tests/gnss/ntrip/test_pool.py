@@ -0,0 +1,61 @@
+import asyncio
+
+import pytest
+
+from gnss.ntrip.client import AsyncClient
+from gnss.ntrip.pool import MountpointPool
+from gnss.rtcm.messages import ExtendedL1L2Gps
+
+
+def test_pool(caster, rtcm_data):
+    nr_streams = 50
+    caster.mountpoints.update(
+        {f"M{i}": rtcm_data for i in range(nr_streams)})
+    pool = MountpointPool()
+    for i in range(nr_streams):
+        pool.add(AsyncClient(
+            "127.0.0.1", mountpoint=f"M{i}", port=caster.port,
+            ntrip_version="1.0" if i % 2 else "2.0"), ExtendedL1L2Gps)
+
+    async def collect():
+        return [item async for item in pool.messages()]
+
+    items = asyncio.run(collect())
+    assert len(items) == 7 * nr_streams
+    assert all(isinstance(msg, ExtendedL1L2Gps) for _, msg in items)
+    per_stream = {}
+    for mountpoint, _ in items:
+        per_stream[mountpoint] = per_stream.get(mountpoint, 0) + 1
+    assert per_stream == {f"M{i}": 7 for i in range(nr_streams)}
+
+    stats = pool.stats()
+    for i in range(nr_streams):
+        assert stats[f"M{i}"]["bytes"] == len(rtcm_data)
+        assert stats[f"M{i}"]["frames"] == 13
+        assert stats[f"M{i}"]["messages"] == 7
+        assert not stats[f"M{i}"]["running"]
+        assert stats[f"M{i}"]["error"] is None
+
+
+def test_pool_stream_error(caster):
+    pool = MountpointPool()
+    pool.add(AsyncClient(
+        "127.0.0.1", mountpoint="RTCM", port=caster.port))
+    pool.add(AsyncClient(
+        "127.0.0.1", mountpoint="UNKNOWN", port=caster.port))
+
+    async def collect():
+        return [item async for item in pool.messages()]
+
+    items = asyncio.run(collect())
+    assert {mountpoint for mountpoint, _ in items} == {"RTCM"}
+    assert isinstance(pool.stats()["UNKNOWN"]["error"], ValueError)
+
+
+def test_pool_duplicate_name(caster):
+    pool = MountpointPool()
+    pool.add(AsyncClient("127.0.0.1", mountpoint="RTCM", port=caster.port))
+    with pytest.raises(ValueError):
+        pool.add(AsyncClient("127.0.0.1", mountpoint="RTCM"))
+    pool.add(AsyncClient("127.0.0.1", mountpoint="RTCM"), name="RTCM-2")
+    assert len(pool) == 2
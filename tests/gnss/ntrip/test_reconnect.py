@@ -0,0 +1,127 @@
+from io import BytesIO
+import socket
+
+import pytest
+
+from gnss.ntrip.client import Client
+from gnss.ntrip.reconnect import ReconnectingStream
+from gnss.rtcm.messages import ExtendedL1L2Gps
+from gnss.rtcm.parser import Parser
+
+
+def count_frames(data):
+    parser = Parser(BytesIO(data))
+    list(parser.iter_messages())
+    return parser.frame_counts
+
+
+def parse_frames(stream, parser, nr_frames):
+    parser.load_stream(stream)
+    parser.subscribe(ExtendedL1L2Gps)
+    while sum(parser.frame_counts.values()) < nr_frames:
+        parser.parse()
+
+
+@pytest.mark.parametrize("transport, ntrip_version", [
+    ("socket", "1.0"), ("socket", "2.0"), ("requests", "2.0")])
+def test_reconnect(truncated_caster, rtcm_data, transport, ntrip_version):
+    expected = count_frames(rtcm_data)
+    nr_frames = sum(expected.values())
+
+    client = Client("http://127.0.0.1", mountpoint="RTCM",
+                    port=truncated_caster.port, transport=transport,
+                    ntrip_version=ntrip_version)
+    parser = Parser()
+    with ReconnectingStream(client, parser) as stream:
+        parse_frames(stream, parser, 3 * nr_frames)
+
+    assert parser.error_count == 0
+    assert parser.frame_counts == {
+        number: 3 * count for number, count in expected.items()}
+    assert stream.connect_count == 3
+    assert stream.outage_count == 2
+    stats = stream.stats()
+    assert len(stream.first_frame_times) == 3
+    assert 0 < stats["mean_time_to_first_frame"] < 1
+
+
+def test_gga_resend(caster, rtcm_data):
+    sentences = iter(f"$GPGGA,{i}" for i in range(10))
+    client = Client("127.0.0.1", mountpoint="RTCM", port=caster.port,
+                    transport="socket")
+    parser = Parser()
+    stream = ReconnectingStream(client, parser, gga=lambda: next(sentences))
+    parse_frames(stream, parser, 100)
+    stream.close()
+
+    assert [headers["ntrip-gga"] for _, headers in caster.requests] == [
+        f"$GPGGA,{i}" for i in range(len(caster.requests))]
+
+
+def test_standby(caster, rtcm_data):
+    nr_frames = sum(count_frames(rtcm_data).values())
+    client = Client("127.0.0.1", mountpoint="RTCM", port=caster.port,
+                    transport="socket")
+    parser = Parser()
+    with ReconnectingStream(client, parser, standby=True) as stream:
+        parse_frames(stream, parser, 3 * nr_frames)
+
+    assert stream.connect_count == 3
+    assert stream.standby_count == 2
+
+
+def test_backoff():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        port = sock.getsockname()[1]
+
+    delays = []
+    client = Client("127.0.0.1", mountpoint="RTCM", port=port,
+                    transport="socket")
+    stream = ReconnectingStream(client, backoff_min=0.1, backoff_max=0.3,
+                                max_attempts=5, sleep=delays.append)
+    with pytest.raises(OSError):
+        stream.read(100)
+
+    assert len(delays) == 4
+    for attempt, delay in enumerate(delays, 1):
+        assert 0.1 <= delay <= min(0.3, 0.1 * 2 ** (attempt - 1))
+    assert stream.failed_attempts == 5
+    assert stream.stats()["down"]
+
+
+def test_accept_and_close(closing_caster):
+    delays = []
+    client = Client("127.0.0.1", mountpoint="RTCM", port=closing_caster.port,
+                    transport="socket")
+    stream = ReconnectingStream(client, backoff_min=0.1, backoff_max=0.3,
+                                max_attempts=5, sleep=delays.append)
+    with pytest.raises(ConnectionError):
+        stream.read(100)
+
+    assert len(closing_caster.requests) == 5
+    assert len(delays) == 4
+    for attempt, delay in enumerate(delays, 1):
+        assert 0.1 <= delay <= min(0.3, 0.1 * 2 ** (attempt - 1))
+    assert stream.connect_count == 5
+    assert stream.failed_attempts == 5
+
+
+def test_attempts_reset(truncated_caster, rtcm_data):
+    # Links delivering frames are reconnected at once, however many times.
+    nr_frames = sum(count_frames(rtcm_data).values())
+    delays = []
+    client = Client("127.0.0.1", mountpoint="RTCM",
+                    port=truncated_caster.port, transport="socket")
+    parser = Parser()
+    with ReconnectingStream(client, parser, max_attempts=1,
+                            sleep=delays.append) as stream:
+        parse_frames(stream, parser, 3 * nr_frames)
+
+    assert stream.connect_count == 3
+    assert delays == []
+
+
+def test_standby_transport():
+    with pytest.raises(ValueError):
+        ReconnectingStream(Client("127.0.0.1"), standby=True)
@@ -1,7 +1,25 @@
+import numpy as np
 import pytest
 
 from gnss.ntrip.sourcetable import STR_HEADERS, NET_HEADERS, CAS_HEADERS
 from gnss.ntrip.sourcetable import get_headers, query_to_string
+from gnss.ntrip.sourcetable import (
+    parse_sourcetable, SourcetableParser, MISSING_INT
+)
+
+
+SOURCETABLE_LINES = [
+    "CAS;rtk2go.com;2101;SNIP;SNIP;0;USA;47.61;-122.33;0.0.0.0;0;misc",
+    "STR;ZUPT6818;Houston, Tx;RTCM 3.2;1005(1),1077(1);;GPS+GLO;SNIP;USA;"
+    "29.94;-95.53;1;0;sNTRIP;none;N;N;6800;",
+    "NET;SNIP;RTK2go;N;N;rtk2go.com;rtk2go.com:2101;support@use-snip.com;;",
+    "STR;zznrcstrk;Torak;RTCM 3.2;1005(5);;GPS+GLO+GAL;SNIP;SRB;"
+    "45.51;20.60;1;0;sNTRIP;none;N;N;;a;b",
+    "",
+    "STR;short;Short;RTCM 3.2",
+    "ENDSOURCETABLE",
+    "STR;after;After;RTCM 3.2",
+]
 
 
 @pytest.mark.parametrize(
@@ -44,3 +62,42 @@ def test_get_headers(type_, headers):
 def test_query_to_string(query, string):
     computed_string = query_to_string(query)
     assert computed_string == string
+
+
+def test_parse_sourcetable():
+    df = parse_sourcetable(SOURCETABLE_LINES)
+
+    assert list(df['type']) == ["CAS", "STR", "NET", "STR", "STR"]
+    assert set(df.columns) == set(CAS_HEADERS + NET_HEADERS + STR_HEADERS)
+    assert df['latitude'].dtype == np.float64
+    assert df['bitrate'].dtype == "Int64"
+    assert df['port'][0] == 2101
+    assert df['bitrate'][1] == 6800
+    assert df['bitrate'].isna().tolist() == [True, False, True, True, True]
+    assert df['latitude'][3] == 45.51
+    assert np.isnan(df['latitude'][4])
+    assert df['misc'][3] == "a;b"
+    assert df['mountpoint'][4] == "short"
+
+
+def test_sourcetable_parser_columns():
+    parser = SourcetableParser()
+    assert all(parser.feed(line) for line in SOURCETABLE_LINES[:6])
+    assert not parser.feed(SOURCETABLE_LINES[6])
+    assert parser.finished
+    assert len(parser) == 5
+
+    columns = parser.columns("STR")
+    assert columns['mountpoint'].tolist() == ["ZUPT6818", "zznrcstrk", "short"]
+    assert columns['bitrate'].tolist() == [6800, MISSING_INT, MISSING_INT]
+    assert columns['nmea'].dtype == np.int64
+    assert columns['longitude'][:2].tolist() == [-95.53, 20.60]
+
+
+@pytest.mark.xfail(raises=RuntimeError)
+def test_sourcetable_parser_invalid_line():
+    SourcetableParser().feed("HTTP/1.1 200 OK")
+
+
+def test_parse_empty_sourcetable():
+    assert parse_sourcetable(["ENDSOURCETABLE"]).empty
@@ -0,0 +1,107 @@
+import numpy as np
+import pytest
+
+from gnss.ntrip.sourcetable import parse_sourcetable
+from gnss.ntrip.spatial import SpatialIndex, EARTH_RADIUS
+
+
+def great_circle(lat1, lon1, lat2, lon2):
+    lat1, lon1, lat2, lon2 = map(np.radians, (lat1, lon1, lat2, lon2))
+    a = (np.sin((lat2 - lat1) / 2) ** 2
+         + np.cos(lat1) * np.cos(lat2) * np.sin((lon2 - lon1) / 2) ** 2)
+    return 2 * EARTH_RADIUS * np.arcsin(np.sqrt(a))
+
+
+@pytest.fixture
+def stations():
+    rng = np.random.default_rng(0)
+    size = 2000
+    latitude = np.degrees(np.arcsin(rng.uniform(-1, 1, size)))
+    longitude = rng.uniform(-180, 180, size)
+    nav_systems = rng.choice(["GPS", "GPS+GLO", "GPS+GLO+GAL"], size)
+    formats = rng.choice(["RTCM 3.2", "RTCM 3.3", "RTCM 2.3"], size)
+    return latitude, longitude, nav_systems, formats
+
+
+def brute_force(stations, latitude, longitude, k, mask=None):
+    distances = great_circle(stations[0], stations[1], latitude, longitude)
+    if mask is not None:
+        distances[~mask] = np.inf
+    order = np.argsort(distances, kind='stable')[:k]
+    return distances[order], order
+
+
+@pytest.mark.parametrize("latitude, longitude", [
+    (45.5, 4.8), (0, 179.99), (0, -180), (89.9, 12), (-89.9, -100)])
+def test_nearest(stations, latitude, longitude):
+    index = SpatialIndex(*stations[:2])
+    distances, found = index.nearest(latitude, longitude, k=5)
+    expected, _ = brute_force(stations, latitude, longitude, 5)
+    np.testing.assert_allclose(distances, expected, rtol=1e-9)
+    assert found.shape == (5,)
+
+
+def test_nearest_batch(stations):
+    index = SpatialIndex(*stations[:2])
+    rng = np.random.default_rng(1)
+    latitude = np.concatenate(
+        [rng.uniform(-90, 90, 100), rng.normal(45, 0.5, 200)])
+    longitude = np.concatenate(
+        [rng.uniform(-180, 180, 100), rng.normal(5, 0.5, 200)])
+    distances, found = index.nearest(latitude, longitude, k=3)
+
+    assert distances.shape == found.shape == (300, 3)
+    for i in range(0, 300, 7):
+        expected, _ = brute_force(stations, latitude[i], longitude[i], 3)
+        np.testing.assert_allclose(distances[i], expected, rtol=1e-9)
+
+
+def test_nearest_filters(stations):
+    index = SpatialIndex(*stations[:2], nav_systems=stations[2],
+                         formats=stations[3])
+    mask = ((stations[2] == "GPS+GLO+GAL")
+            & np.char.startswith(stations[3].astype(str), "RTCM 3"))
+    np.testing.assert_array_equal(
+        index.mask(formats="rtcm 3", nav_systems=["GAL", "GPS"]), mask)
+
+    distances, found = index.nearest(
+        [10, 20], [30, 40], k=4, formats="RTCM 3", nav_systems="GAL")
+    assert mask[found].all()
+    expected, _ = brute_force(stations, 20, 40, 4, mask)
+    np.testing.assert_allclose(distances[1], expected, rtol=1e-9)
+
+
+def test_nearest_missing_stations():
+    index = SpatialIndex([10, 20], [10, 20], nav_systems=["GPS", "GPS+GAL"])
+    distances, found = index.nearest(0, 0, k=3, nav_systems="GAL")
+    assert found.tolist() == [1, -1, -1]
+    assert np.isinf(distances[1:]).all()
+
+
+def test_within(stations):
+    index = SpatialIndex(*stations[:2])
+    radius = 500e3
+    for latitude, longitude in [(45.5, 4.8), (0, 180), (-89.5, 0)]:
+        distances, found = index.within(latitude, longitude, radius)
+        expected = great_circle(
+            stations[0], stations[1], latitude, longitude)
+        assert set(found) == set(np.flatnonzero(expected <= radius))
+        assert (np.diff(distances) >= 0).all()
+
+    results = index.within([45.5, 0], [4.8, 180], radius)
+    assert len(results) == 2
+
+
+def test_from_sourcetable():
+    df = parse_sourcetable([
+        "NET;SNIP;RTK2go;N;N;rtk2go.com;rtk2go.com:2101;;;",
+        "STR;A;A;RTCM 3.2;;;GPS+GLO;SNIP;FRA;45.0;5.0;1;0;s;none;N;N;0;",
+        "STR;B;B;RTCM 3.2;;;GPS;SNIP;FRA;;;1;0;s;none;N;N;0;",
+        "STR;C;C;RTCM 3.2;;;GPS;SNIP;FRA;46.0;5.0;1;0;s;none;N;N;0;",
+        "ENDSOURCETABLE"])
+    index = SpatialIndex.from_sourcetable(df)
+    assert len(index) == 2
+
+    distances, found = index.nearest(45.9, 5.0, k=2)
+    assert index.mountpoints[found].tolist() == ["C", "A"]
+    assert index.rows[found].tolist() == [3, 1]
@@ -0,0 +1,96 @@
+from io import BytesIO
+import socket
+
+import pytest
+
+from gnss.ntrip.client import Client
+from gnss.ntrip.protocol import ChunkedDecoder
+from gnss.ntrip.transport import SocketTransport
+from gnss.rtcm.messages import ExtendedL1L2Gps
+from gnss.rtcm.parser import Parser
+
+
+@pytest.mark.parametrize("ntrip_version", ["1.0", "2.0"])
+@pytest.mark.parametrize("size", [1, 100, 4096])
+def test_readinto(caster, rtcm_data, ntrip_version, size):
+    data = bytearray()
+    buffer = bytearray(size)
+    with Client("127.0.0.1", mountpoint="RTCM", port=caster.port,
+                ntrip_version=ntrip_version, transport="socket") as client:
+        while True:
+            nrbytes = client.readinto(buffer)
+            if not nrbytes:
+                break
+            data += buffer[:nrbytes]
+    assert data == rtcm_data
+
+
+@pytest.mark.parametrize("ntrip_version", ["1.0", "2.0"])
+def test_read(caster, rtcm_data, ntrip_version):
+    outstream = BytesIO()
+    data = bytearray()
+    client = Client("http://127.0.0.1", mountpoint="RTCM", port=caster.port,
+                    ntrip_version=ntrip_version, transport="socket",
+                    outstream=outstream)
+    while True:
+        buff = client.read(1000)
+        if not buff:
+            break
+        data += buff
+    assert client.isclosed()
+    assert data == rtcm_data
+    assert outstream.getvalue() == rtcm_data
+
+
+@pytest.mark.parametrize("ntrip_version", ["1.0", "2.0"])
+def test_invalid_mountpoint(caster, ntrip_version):
+    client = Client("127.0.0.1", mountpoint="UNKNOWN", port=caster.port,
+                    ntrip_version=ntrip_version, transport="socket")
+    with pytest.raises(ValueError):
+        client.connect()
+    assert client.isclosed()
+
+
+def test_parser(caster, rtcm_data):
+    expected = list(Parser(BytesIO(rtcm_data)).iter_messages(ExtendedL1L2Gps))
+    client = Client("127.0.0.1", mountpoint="RTCM", port=caster.port,
+                    transport="socket")
+    client.connect()
+    msgs = list(Parser(client).iter_messages(ExtendedL1L2Gps))
+    assert [vars(msg) for msg in msgs] == [vars(msg) for msg in expected]
+
+
+@pytest.mark.parametrize("response", [
+    b"ICY 200 OK\r\nServer: test\r\nContent-Type: gnss/data\r\n\r\n",
+    b"ICY 200 OK\r\n\r\n",
+    b"ICY 200 OK\r\n"])
+def test_icy_response(response):
+    caster, client = socket.socketpair()
+    transport = SocketTransport("127.0.0.1", 2101, "RTCM", {})
+    transport._sock = client
+    caster.sendall(response + b"\xd3\x00\x13data")
+    caster.close()
+    transport._read_response()
+
+    buffer = bytearray(100)
+    nrbytes = transport.readinto(buffer)
+    assert buffer[:nrbytes] == b"\xd3\x00\x13data"
+    assert transport.readinto(buffer) == 0
+    assert transport.isclosed()
+
+
+def test_chunked_decoder_skip():
+    decoder = ChunkedDecoder()
+    assert decoder.decode(b"5\r\nab") == b"ab"
+    assert decoder.payload_size == 3
+    decoder.skip(3)
+    assert decoder.payload_size == 0
+    assert decoder.decode(b"\r\n0\r\n\r\n") == b""
+    assert decoder.finished
+    with pytest.raises(ValueError):
+        decoder.skip(1)
+
+
+def test_invalid_transport():
+    with pytest.raises(ValueError):
+        Client("127.0.0.1", transport="curl")
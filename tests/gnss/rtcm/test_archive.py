@@ -0,0 +1,66 @@
+from io import BytesIO
+import os
+
+import pytest
+
+from gnss.rtcm.archive import FrameReader, scan_buffer, scan_frames
+from gnss.rtcm.messages import ExtendedL1L2Gps
+from gnss.rtcm.parser import Parser
+
+
+BINARY_FILE = os.path.join(os.path.dirname(__file__), 'rtcm_data.bin')
+
+
+@pytest.fixture
+def rtcm_data():
+    with open(BINARY_FILE, 'rb') as f:
+        return f.read()
+
+
+def test_scan_frames():
+    index = scan_frames(BINARY_FILE)
+    assert len(index) == 13
+    assert index['crc_valid'].all()
+    assert index['offset'][0] == 0
+    ends = index['offset'] + index['length']
+    assert (index['offset'][1:] == ends[:-1]).all()
+    assert index['msg_number'].tolist() == [1004, 1012] * 6 + [1004]
+    assert (index['station_id'] == 0).all()
+
+
+def test_scan_empty_file(tmp_path):
+    path = tmp_path / "empty.bin"
+    path.write_bytes(b"")
+    assert len(scan_frames(str(path))) == 0
+
+
+def test_scan_corrupted(rtcm_data):
+    corrupted = bytearray(b"garbage" + rtcm_data)
+    corrupted[7 + 155 + 20] ^= 0x01
+    index = scan_buffer(bytes(corrupted))
+    valid = index[index['crc_valid']]
+    assert len(valid) == 12
+    assert valid['offset'][0] == 7
+    assert 7 + 155 not in valid['offset']
+
+    parser = Parser(BytesIO(bytes(corrupted)))
+    parser.parse()
+    assert parser.error_count == (~index['crc_valid']).sum()
+
+
+def test_frame_reader():
+    with FrameReader(BINARY_FILE) as reader:
+        assert len(reader) == 13
+        index = reader.index
+        msgs = list(reader.messages(index[index['msg_number'] == 1004]))
+        assert len(msgs) == 7
+        assert all(isinstance(msg, ExtendedL1L2Gps) for msg in msgs)
+
+        msgs = list(reader.messages(index[2:5]))
+        assert len(msgs) == 2
+
+        with open(BINARY_FILE, 'rb') as stream:
+            parser = Parser(stream)
+            expected = list(parser.iter_messages(ExtendedL1L2Gps))
+        for msg, expected_msg in zip(reader.messages(), expected):
+            assert vars(msg) == vars(expected_msg)
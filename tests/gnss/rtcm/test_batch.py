@@ -0,0 +1,177 @@
+from io import BytesIO
+import os
+
+import numpy as np
+from numpy.testing import assert_array_equal
+import pytest
+
+from gnss.rtcm.archive import scan_buffer
+from gnss.rtcm.batch import decode_batch
+from gnss.rtcm.fields import ArrayLayout, Field, Layout, extract_bits
+from gnss.rtcm.messages import (
+    ExtendedL1L2Gps, Msm, ReferenceStationAntenna, RtcmMessage, Type
+)
+from gnss.rtcm.parser import Parser, frame
+
+
+BINARY_FILE = os.path.join(os.path.dirname(__file__), 'rtcm_data.bin')
+ANTENNA_PAYLOAD = (
+    b'>\xd0\x00\x026\xab\x10_\xca\x085\r\xd0\xca7\xe5G\xf8\x88\x00\x00')
+
+
+def random_msm(rng, msg_number, truncate=0):
+    cls = RtcmMessage.get_class(Type(msg_number))
+    satellites = rng.random(64) < 0.2
+    signals = rng.random(32) < 0.1
+    cells = rng.random(satellites.sum() * signals.sum()) < 0.7
+    fields = [(msg_number, 12), (int(rng.integers(4096)), 12),
+              (int(rng.integers(1 << 30)), 30), (int(rng.integers(2)), 1),
+              (0, 10), (int(rng.integers(16)), 7)]
+    fields += [(int(bit), 1) for bit in satellites]
+    fields += [(int(bit), 1) for bit in signals]
+    fields += [(int(bit), 1) for bit in cells]
+    for layout, count in ((cls.satellite_layout, satellites.sum()),
+                          (cls.cell_layout, cells.sum())):
+        for field in layout.fields:
+            width = int(field.fmt.split(':')[1])
+            fields += [(int(value), width)
+                       for value in rng.integers(1 << width, size=count)]
+
+    value = 0
+    nr_bits = 0
+    for field_value, width in fields:
+        value = (value << width) | field_value
+        nr_bits += width
+    padding = -nr_bits % 8
+    payload = (value << padding).to_bytes((nr_bits + padding) // 8, 'big')
+    return payload[:len(payload) - truncate]
+
+
+def object_columns(data, msg_type):
+    parser = Parser(BytesIO(data))
+    rows = []
+    for msg in parser.iter_messages(RtcmMessage.get_class(msg_type)):
+        if isinstance(msg, Msm):
+            sat_index = np.searchsorted(msg.satellites, msg.satellite)
+            for cell in range(len(msg)):
+                row = {name: getattr(msg, name)
+                       for name in msg.header_layout.names}
+                row.update(
+                    (name, getattr(msg, name)[cell]) for name in (
+                        'satellite', 'signal', 'pseudorange', 'phaserange',
+                        'phaserange_rate', 'cnr', 'lock_time', 'half_cycle'))
+                if hasattr(msg, 'extended_info'):
+                    row['extended_info'] = msg.extended_info[sat_index[cell]]
+                rows.append(row)
+        else:
+            rows.append(
+                {name: getattr(msg, name) for name in msg.layout.names})
+    return rows
+
+
+def assert_same_rows(table, rows):
+    assert len(table) == len(rows)
+    for name in rows[0]:
+        assert_array_equal(table[name], [row[name] for row in rows])
+
+
+def test_extract_bits():
+    rng = np.random.default_rng(0)
+    data = rng.integers(256, size=64, dtype=np.uint8)
+    value = int.from_bytes(data.tobytes(), 'big')
+    for width in (1, 7, 38, 57, 64):
+        pos = np.arange(0, 512 - width, 13)
+        expected = [(value >> (512 - p - width)) & ((1 << width) - 1)
+                    for p in pos.tolist()]
+        assert extract_bits(data, pos, width).tolist() == expected
+
+
+def test_unpack_columns():
+    layout = Layout(
+        Field('unsigned', 'uint:12'),
+        Field(None, 'pad:3'),
+        Field('signed', 'int:5', 0.5),
+        Field('flag', 'bool:1'),
+    )
+    buff = b'\xff\xf0\xff\xff\x00\x00\x10\x00'
+    data = np.frombuffer(buff, dtype=np.uint8)
+    columns = layout.unpack_columns(data, [3, 35])
+    for row, pos in enumerate([3, 35]):
+        values = layout.unpack(buff, pos)
+        assert tuple(columns[name][row] for name in layout.names) == values
+
+    array_layout = ArrayLayout(
+        Field('signed', 'int:5'), Field('flag', 'bool:1'))
+    bits = np.unpackbits(data).astype(np.float64)
+    values, end = array_layout.unpack_columns(data, [3, 35], [2, 1])
+    first, first_end = array_layout.unpack(bits, 3, 2)
+    second, second_end = array_layout.unpack(bits, 35, 1)
+    for value, expected in zip(values, zip(first, second)):
+        assert value.tolist() == np.concatenate(expected).tolist()
+    assert end.tolist() == [first_end, second_end]
+
+
+def test_decode_recording():
+    with open(BINARY_FILE, 'rb') as f:
+        data = f.read()
+    tables = decode_batch(data)
+    assert list(tables) == [Type.EXTENDED_L1_L2_GPS]
+    table = tables[Type.EXTENDED_L1_L2_GPS]
+    assert table.name == 'ExtendedL1L2Gps'
+    assert_same_rows(table, object_columns(data, Type.EXTENDED_L1_L2_GPS))
+    assert table['offset'][0] == 0
+
+    df = table.to_frame()
+    assert len(df) == 7
+    assert 'gps_epoch' in df and 'station_id' in df
+
+
+def test_decode_antenna():
+    height = ANTENNA_PAYLOAD[:1] + b'\xe0' + ANTENNA_PAYLOAD[2:]
+    data = b"garbage" + (frame(ANTENNA_PAYLOAD) + frame(height)) * 3
+    data += frame(ANTENNA_PAYLOAD[:-5])
+    tables = decode_batch(data)
+    for msg_type in (Type.REFERENCE_STATION_ANTENNA,
+                     Type.REFERENCE_STATION_ANTENNA_HEIGHT):
+        assert_same_rows(tables[msg_type], object_columns(data, msg_type))
+    assert len(tables[Type.REFERENCE_STATION_ANTENNA]) == 3
+
+    tables = decode_batch(data, ReferenceStationAntenna)
+    assert list(tables) == [Type.REFERENCE_STATION_ANTENNA]
+
+    index = scan_buffer(data)
+    tables = decode_batch(data, index=index[:2])
+    assert [len(table) for table in tables.values()] == [1, 1]
+
+
+@pytest.mark.parametrize("msg_number", [1074, 1085, 1096, 1127])
+def test_decode_msm(msg_number):
+    rng = np.random.default_rng(msg_number)
+    data = b"".join(
+        frame(random_msm(rng, msg_number, truncate=int(i % 7 == 3)))
+        for i in range(30))
+    table = decode_batch(data)[Type(msg_number)]
+    assert_same_rows(table, object_columns(data, Type(msg_number)))
+    assert len(np.unique(table['offset'])) < 30
+
+
+def test_decode_empty():
+    assert decode_batch(b"") == {}
+    assert decode_batch(frame(b"\x3e\xc0")) == {}
+    assert decode_batch(frame(ANTENNA_PAYLOAD), ExtendedL1L2Gps) == {}
+
+
+@pytest.mark.parametrize("msg_number", [1019, 1020, 1045])
+def test_decode_ephemeris(msg_number):
+    rng = np.random.default_rng(msg_number)
+    layout = RtcmMessage.get_class(Type(msg_number)).layout
+    payloads = []
+    for _ in range(20):
+        payload = bytearray(rng.integers(
+            256, size=layout.bit_length // 8 + 1, dtype=np.uint8).tobytes())
+        payload[0] = msg_number >> 4
+        payload[1] = (msg_number & 0xf) << 4 | payload[1] & 0xf
+        payloads.append(bytes(payload))
+    data = b"".join(frame(payload) for payload in payloads)
+    table = decode_batch(data)[Type(msg_number)]
+    assert_same_rows(table, object_columns(data, Type(msg_number)))
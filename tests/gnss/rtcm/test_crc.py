@@ -0,0 +1,96 @@
+import os
+import random
+
+import numpy as np
+import pytest
+
+from gnss.rtcm.crc import Crc24Q, crc24q, crc24q_batch, make_tables
+
+
+def reference_crc(data: bytes) -> int:
+    crc = 0
+    for byte in data:
+        crc = ((crc << 8) & 0xffffff) ^ Crc24Q.tab[(crc >> 16) ^ byte]
+    return crc
+
+
+def random_bytes(seed: int, length: int) -> bytes:
+    rng = random.Random(seed)
+    return bytes(rng.getrandbits(8) for _ in range(length))
+
+
+@pytest.fixture
+def rtcm_data():
+    binary_file = os.path.join(os.path.dirname(__file__), 'rtcm_data.bin')
+    with open(binary_file, 'rb') as f:
+        return f.read()
+
+
+def test_tables():
+    tables = make_tables(8)
+    assert tables[0] == Crc24Q.tab
+    for k in range(1, 8):
+        for byte in (0x01, 0x80, 0xd3, 0xff):
+            assert tables[k][byte] == reference_crc(bytes([byte] + [0] * k))
+
+
+@pytest.mark.parametrize("length", list(range(0, 20)) + [255, 1024, 1029])
+def test_crc24q(length):
+    data = random_bytes(length, length)
+    assert crc24q(data) == reference_crc(data)
+    assert Crc24Q.hash(data) == reference_crc(data).to_bytes(3, 'big')
+    assert crc24q(memoryview(bytearray(data))) == reference_crc(data)
+
+
+def test_incremental():
+    data = random_bytes(0, 1000)
+    crc = Crc24Q()
+    for start in range(0, len(data), 77):
+        crc.update(data[start:start + 77])
+    assert crc.digest() == Crc24Q.hash(data)
+    assert crc.hexdigest() == Crc24Q.hash(data).hex()
+
+    partial = Crc24Q(data[:500])
+    copy = partial.copy()
+    copy.update(data[500:])
+    assert copy.value == crc24q(data)
+    assert partial.value == crc24q(data[:500])
+
+
+def test_frame_crc_is_zero(rtcm_data):
+    msg_length = ((rtcm_data[1] & 0x03) << 8) | rtcm_data[2]
+    assert crc24q(rtcm_data[:6 + msg_length]) == 0
+
+
+def test_batch():
+    data = random_bytes(1, 20000)
+    rng = np.random.default_rng(1)
+    lengths = rng.integers(0, 1030, size=3000)
+    offsets = rng.integers(0, len(data) - lengths)
+    crcs = crc24q_batch(data, offsets, lengths)
+    expected = [reference_crc(data[o:o + n]) for o, n in zip(offsets, lengths)]
+    assert crcs.tolist() == expected
+
+
+def test_check_batch(rtcm_data):
+    offsets = []
+    lengths = []
+    index = 0
+    while index < len(rtcm_data):
+        msg_length = (((rtcm_data[index + 1] & 0x03) << 8)
+                      | rtcm_data[index + 2])
+        offsets.append(index)
+        lengths.append(6 + msg_length)
+        index += 6 + msg_length
+    valid = Crc24Q.check_batch(rtcm_data, offsets, lengths)
+    assert valid.all()
+
+    corrupted = bytearray(rtcm_data)
+    corrupted[offsets[3] + 10] ^= 0x01
+    valid = Crc24Q.check_batch(corrupted, offsets, lengths)
+    assert valid.tolist() == [i != 3 for i in range(len(offsets))]
+
+
+@pytest.mark.xfail(raises=ValueError)
+def test_batch_out_of_buffer():
+    crc24q_batch(b"\x00" * 10, [5], [10])
@@ -0,0 +1,217 @@
+from io import BytesIO
+
+import numpy as np
+from numpy.testing import assert_allclose
+import pytest
+
+from gnss.rtcm import ephemeris
+from gnss.rtcm.ephemeris import (
+    EARTH_ROTATION, GLONASS_FIELDS, GPS_MU, KEPLER_FIELDS, EphemerisStore,
+    glonass_orbits, kepler_orbits
+)
+from gnss.rtcm.messages import (
+    GalileoEphemeris, GlonassEphemeris, GpsEphemeris, RtcmMessage
+)
+from gnss.rtcm.parser import Parser, encode
+
+
+def ephemeris_msg(cls, **values):
+    msg = RtcmMessage(msg_type=cls.type)
+    vars(msg).update(
+        {name: 0 for name in cls.layout.names if name != 'msg_number'},
+        **values)
+    # Quantized like a received message.
+    return cls(buff=msg.to_buffer())
+
+
+def gps(sat_id=1, iode=1, toe=345600, **values):
+    values = {
+        'eccentricity': 0.01, 'sqrt_a': 5153.6, 'i0': 0.3,
+        'm0': 0.3 * sat_id % 2 - 1, 'omega0': 0.45 * sat_id % 2 - 1,
+        'omega': 0.4, 'omega_dot': -2.6e-9,
+        'delta_n': 1.4e-9, 'crs': 12.5, 'cuc': 1e-6, 'af0': 1e-4,
+        'af1': 1e-12, 'toc': toe, **values}
+    return ephemeris_msg(GpsEphemeris, sat_id=sat_id, iode=iode, toe=toe,
+                         **values)
+
+
+def galileo(sat_id=1, iodnav=1, toe=345600, **values):
+    values = {
+        'eccentricity': 0.0003, 'sqrt_a': 5440.6, 'i0': 0.31, 'm0': 0.2,
+        'omega0': 0.5, 'omega': -0.1, 'af0': -5e-5, 'toc': toe, **values}
+    return ephemeris_msg(GalileoEphemeris, sat_id=sat_id, iodnav=iodnav,
+                         toe=toe, **values)
+
+
+def glonass(sat_id=1, tb=50, **values):
+    values = {
+        'x': -14483.0, 'y': -19553.0, 'z': -7064.0, 'x_velocity': -0.33,
+        'y_velocity': -1.09, 'z_velocity': 3.53, 'tau': 2e-5,
+        'gamma': 1e-12, **values}
+    return ephemeris_msg(GlonassEphemeris, sat_id=sat_id, tb=tb, **values)
+
+
+def test_circular_orbit():
+    sqrt_a, toe = 5153.5, 345600
+    params = {name: 0.0 for name in KEPLER_FIELDS}
+    params.update(sqrt_a=sqrt_a, toe=toe, toc=toe, af0=1e-4, af1=1e-11)
+    t = toe + np.array([-3600, 0, 100, 5000.0])
+    position, clock = kepler_orbits(params, t, GPS_MU)
+
+    a = sqrt_a ** 2
+    angle = (np.sqrt(GPS_MU / a ** 3) * (t - toe) - EARTH_ROTATION * t)
+    assert_allclose(position, np.stack(
+        (a * np.cos(angle), a * np.sin(angle), 0 * t), axis=-1), atol=1e-6)
+    assert_allclose(clock, 1e-4 + 1e-11 * (t - toe))
+
+
+def test_glonass_orbit():
+    msg = glonass()
+    params = {name: np.full(3, getattr(msg, name)) for name in GLONASS_FIELDS}
+    dt = np.array([0, 900, -1800.0])
+    position, clock = glonass_orbits(params, dt)
+
+    assert_allclose(position[0], [-14483e3, -19553e3, -7064e3])
+    radius = np.linalg.norm(position, axis=-1)
+    assert_allclose(radius, radius[0], rtol=1e-2)
+    assert_allclose(clock, -msg.tau + msg.gamma * dt)
+
+
+def test_glonass_step(monkeypatch):
+    msg = glonass()
+    params = {name: np.array([getattr(msg, name)]) for name in GLONASS_FIELDS}
+    position, _ = glonass_orbits(params, np.array([1800.0]))
+    monkeypatch.setattr(ephemeris, 'GLONASS_STEP', 1.0)
+    reference, _ = glonass_orbits(params, np.array([1800.0]))
+    assert_allclose(position, reference, atol=1e-2)
+
+
+def test_add():
+    store = EphemerisStore(max_records=2)
+    assert store.add(gps(iode=1))
+    assert store.add(gps(iode=1))
+    assert store.add(gps(iode=2, toe=352800))
+    assert store.add(gps(iode=3, toe=360000))
+    assert store.add(glonass())
+    assert not store.add(RtcmMessage(msg_type=1005))
+
+    assert store.stats() == {
+        "records": 3, "satellites": 2, "added": 4, "replaced": 1,
+        "evicted": 1}
+    assert sorted(store.records) == [
+        ("GLONASS", 1, 50, 34218.0), ("GPS", 1, 2, 352800),
+        ("GPS", 1, 3, 360000)]
+
+
+def test_select():
+    store = EphemerisStore()
+    for msg in (gps(iode=1, toe=345600), gps(iode=2, toe=352800),
+                gps(iode=3, toe=360000, health=1), galileo(toe=604200)):
+        store.add(msg)
+
+    assert store.select("GPS", 1, 348000).iode == 1
+    assert store.select("GPS", 1, 350000).iode == 2
+    # The nearest record is unhealthy.
+    assert store.select("GPS", 1, 359000).iode == 2
+    assert store.select("GPS", 1, 362000) is None
+    assert store.select("GPS", 2, 348000) is None
+    # Across the week change.
+    assert store.select("GALILEO", 1, 3600).iodnav == 1
+
+
+def test_evict():
+    store = EphemerisStore()
+    for msg in (gps(iode=1, toe=345600), gps(iode=2, toe=352800),
+                galileo(toe=345600), glonass(tb=4)):
+        store.add(msg)
+    # Galileo records are valid for longer.
+    assert store.evict(356400) == 2
+    assert list(store.records) == [
+        ("GPS", 1, 2, 352800), ("GALILEO", 1, 1, 345600)]
+    assert store.stats()["satellites"] == 2
+
+
+def test_evict_outage():
+    store = EphemerisStore()
+    for msg in (gps(toe=50400), glonass(tb=0), galileo(toe=50400)):
+        store.add(msg)
+    # More than half a period later, the records would be ahead of time.
+    assert store.evict(50400) == 1
+    assert [key[0] for key in store.records] == ["GPS", "GALILEO"]
+    assert store.evict(50400 + 4 * 86400) == 2
+    assert len(store) == 0
+
+
+def test_positions():
+    store = EphemerisStore()
+    msgs = [gps(sat_id, iode, toe) for sat_id in (3, 7, 12)
+            for iode, toe in ((1, 345600), (2, 352800))]
+    msgs += [galileo(sat_id) for sat_id in (5, 11)]
+    msgs += [glonass(sat_id, tb) for sat_id in (2, 9) for tb in (50, 51)]
+    msgs.append(gps(20, health=1))
+    for msg in msgs:
+        store.add(msg)
+
+    toe = store.key(msgs[-2])[3]
+    times = np.concatenate((np.arange(340000, 360000, 1000.0),
+                            345600 + toe + np.array([-500, 0, 500.0])))
+    orbits = store.positions(times)
+
+    assert orbits.constellation.tolist() == [
+        "GPS", "GPS", "GPS", "GPS", "GLONASS", "GLONASS", "GALILEO",
+        "GALILEO"]
+    assert orbits.satellite.tolist() == [3, 7, 12, 20, 2, 9, 5, 11]
+    assert orbits.position.shape == (len(times), 8, 3)
+    assert orbits.clock.shape == (len(times), 8)
+
+    for row, t in enumerate(times):
+        for column, (constellation, sat_id) in enumerate(
+                zip(orbits.constellation, orbits.satellite)):
+            msg = store.select(constellation, sat_id, t)
+            if msg is None:
+                assert np.isnan(orbits.position[row, column]).all()
+                assert np.isnan(orbits.clock[row, column])
+                continue
+            if constellation == "GLONASS":
+                dt = ephemeris._wrap(
+                    t % 86400 - store.key(msg)[3], 86400)
+                position, clock = glonass_orbits(
+                    {name: np.array(getattr(msg, name))
+                     for name in GLONASS_FIELDS}, dt)
+            else:
+                mu = (ephemeris.GALILEO_MU if constellation == "GALILEO"
+                      else GPS_MU)
+                position, clock = kepler_orbits(
+                    {name: getattr(msg, name) for name in KEPLER_FIELDS},
+                    t, mu)
+            assert_allclose(orbits.position[row, column], position,
+                            atol=1e-6)
+            assert_allclose(orbits.clock[row, column], clock, atol=1e-15)
+
+    radius = np.linalg.norm(orbits.position, axis=-1)
+    assert np.nanmax(np.abs(radius[:, :3] - 5153.6**2)) < 5153.6**2 * 0.02
+    assert np.isnan(radius[:, 3]).all()
+    assert np.isfinite(radius[-3:, 4:6]).all()
+
+
+def test_positions_empty():
+    orbits = EphemerisStore().positions([0.0, 1.0])
+    assert orbits.position.shape == (2, 0, 3)
+
+
+def test_parser():
+    msgs = [gps(sat_id) for sat_id in range(1, 5)] + [glonass(), galileo()]
+    data = b"".join(encode(msg) for msg in msgs)
+    store = EphemerisStore()
+    for msg in Parser(BytesIO(data)).iter_messages(
+            GpsEphemeris, GlonassEphemeris, GalileoEphemeris):
+        store.add(msg)
+    assert len(store) == 6
+
+
+@pytest.mark.parametrize("factory", [gps, galileo, glonass])
+def test_unhealthy(factory):
+    values = {gps: {'health': 1}, galileo: {'e5a_validity': True},
+              glonass: {'bn_msb': True}}[factory]
+    assert EphemerisStore.healthy(factory())
+    assert not EphemerisStore.healthy(factory(**values))
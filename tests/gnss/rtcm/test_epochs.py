@@ -0,0 +1,143 @@
+from io import BytesIO
+import os
+
+import numpy as np
+import pytest
+
+from gnss.rtcm.epochs import CONSTELLATIONS, EpochAssembler
+from gnss.rtcm.generator import Generator
+from gnss.rtcm.messages import Msm
+from gnss.rtcm.parser import Parser
+
+
+BINARY_FILE = os.path.join(os.path.dirname(__file__), 'rtcm_data.bin')
+MSG_NUMBERS = [1005, 1004, 1074, 1085, 1096, 1127]
+
+
+def messages(generator: Generator, nr_epochs: int) -> list:
+    parser = Parser(BytesIO(generator.generate(nr_epochs)))
+    return list(parser.iter_messages())
+
+
+def test_assemble():
+    generator = Generator(MSG_NUMBERS, stations=[1, 2], nr_sat=6, nr_sig=2,
+                          start=86398)
+    msgs = messages(generator, 4)
+    assembler = EpochAssembler()
+    epochs = []
+    for msg in msgs:
+        # Copies, the cells being reused by the next epochs.
+        epochs += [(epoch, epoch.cells.copy()) for epoch in
+                   assembler.feed(msg)]
+
+    assert assembler.stats() == {
+        "complete": 8, "incomplete": 0, "evicted": 0, "late": 0,
+        "dropped_cells": 0, "in_flight": 0}
+    # Across the day change.
+    assert [(epoch.station_id, epoch.time) for epoch, _ in epochs] == [
+        (station_id, time % 86400000)
+        for time in range(86398000, 86402000, 1000) for station_id in (1, 2)]
+    for epoch, cells in epochs:
+        assert epoch.complete
+        assert epoch.msg_numbers == [1004, 1074, 1085, 1096, 1127]
+        assert len(cells) == 1 + 4 * 12
+        assert cells['constellation'][0] == CONSTELLATIONS.index("GPS")
+        assert np.isnan(cells['cnr'][0])
+
+    observations = [msg for msg in msgs if isinstance(msg, Msm)]
+    epoch, cells = epochs[0]
+    msm = observations[0]
+    assert msm.station_id == epoch.station_id
+    assert (cells['satellite'][1:13] == msm.satellite).all()
+    assert (cells['signal'][1:13] == msm.signal).all()
+    assert np.allclose(cells['pseudorange'][1:13], msm.pseudorange)
+    assert np.allclose(cells['phaserange'][1:13], msm.phaserange)
+    assert (cells['constellation'][13:25]
+            == CONSTELLATIONS.index("GLONASS")).all()
+
+
+def test_lost_last_message():
+    generator = Generator([1074, 1084], stations=[1, 2], nr_sat=4)
+    # The last messages of the station epochs, closing them, are lost.
+    msgs = [msg for msg in messages(generator, 3) if msg.type != 1084]
+    assembler = EpochAssembler()
+    epochs = list(assembler.iter_epochs(msgs))
+
+    assert [(epoch.station_id, epoch.time, epoch.complete)
+            for epoch in epochs] == [
+        (1, 0, False), (2, 0, False), (1, 1000, False), (2, 1000, False),
+        (1, 2000, False), (2, 2000, False)]
+    assert assembler.stats()["incomplete"] == 6
+
+
+def test_iter_epochs():
+    generator = Generator([1074], stations=[1, 2], nr_sat=4)
+    msgs = messages(generator, 6)
+    # More epochs than buffer slots.
+    epochs = list(EpochAssembler(max_epochs=1).iter_epochs(msgs))
+
+    assert len(epochs) == len(msgs)
+    for epoch, msm in zip(epochs, msgs):
+        assert (epoch.station_id, epoch.time) == (msm.station_id, msm.epoch)
+        assert (epoch.cells['satellite'] == msm.satellite).all()
+        assert np.allclose(epoch.cells['pseudorange'], msm.pseudorange)
+
+    # Whereas fed epochs are views overwritten by the next messages.
+    assembler = EpochAssembler(max_epochs=1)
+    epochs = [epoch for msg in msgs for epoch in assembler.feed(msg)]
+    assert not np.allclose(epochs[0].cells['pseudorange'],
+                           msgs[0].pseudorange)
+
+
+def test_eviction():
+    generator = Generator([1074, 1084], stations=range(4), nr_sat=4)
+    msgs = [msg for msg in messages(generator, 1) if msg.type != 1084]
+    assembler = EpochAssembler(max_epochs=2)
+    closed = [assembler.feed(msg) for msg in msgs]
+
+    assert [[epoch.station_id for epoch in epochs]
+            for epochs in closed] == [[], [], [0], [1]]
+    assert len(assembler) == 2
+    assert assembler.stats()["evicted"] == 2
+    # Evicted epochs keep their cells until the next feed.
+    assert len(closed[3][0]) == 8
+    assert (closed[3][0].cells['satellite']
+            == msgs[1].satellite).all()
+    assert [epoch.station_id for epoch in assembler.flush()] == [2, 3]
+    assert len(assembler) == 0
+
+
+def test_late_message():
+    generator = Generator([1074, 1084], nr_sat=4)
+    msgs = messages(generator, 2)
+    assembler = EpochAssembler()
+    assert [len(assembler.feed(msg)) for msg in msgs[:3]] == [0, 1, 0]
+    assert assembler.feed(msgs[3])[0].complete
+    # An epoch already closed.
+    assert assembler.feed(msgs[0]) == []
+    assert assembler.stats()["late"] == 1
+
+
+def test_dropped_cells():
+    generator = Generator([1074, 1084], nr_sat=4, nr_sig=3)
+    assembler = EpochAssembler(max_cells=20)
+    epochs = list(assembler.iter_epochs(messages(generator, 2)))
+
+    assert [len(epoch) for epoch in epochs] == [20, 20]
+    assert assembler.stats()["dropped_cells"] == 8
+
+
+def test_recording():
+    with open(BINARY_FILE, 'rb') as f:
+        parser = Parser(f)
+        assembler = EpochAssembler()
+        epochs = list(assembler.iter_epochs(parser.iter_messages()))
+
+    assert len(epochs) == parser.frame_counts[1004]
+    assert all(len(epoch) == 1 for epoch in epochs)
+    assert np.diff([epoch.time for epoch in epochs]).min() > 0
+
+
+def test_invalid_max_epochs():
+    with pytest.raises(ValueError):
+        EpochAssembler(max_epochs=0)
@@ -0,0 +1,193 @@
+from io import BytesIO
+import os
+import threading
+
+import pytest
+
+from gnss.rtcm.executor import CallbackExecutor, CallbackQueue
+from gnss.rtcm.messages import ExtendedL1L2Gps, ReferenceStationAntenna
+from gnss.rtcm.parser import Parser
+
+
+BINARY_FILE = os.path.join(os.path.dirname(__file__), 'rtcm_data.bin')
+REFERENCE_STATION_ANTENNA_FRAME = bytes(
+    [0xd3, 0x00, 0x13, 0x3e, 0xd7, 0xd3, 0x02, 0x02, 0x98, 0x0e, 0xde,
+     0xef, 0x34, 0xb4, 0xbd, 0x62, 0xac, 0x09, 0x41, 0x98, 0x6f, 0x33,
+     0x36, 0x0b, 0x98])
+
+
+@pytest.fixture
+def data():
+    # 7 decoded 1004 messages and a 1005 one.
+    with open(BINARY_FILE, 'rb') as f:
+        return f.read() + REFERENCE_STATION_ANTENNA_FRAME
+
+
+@pytest.mark.parametrize("mode", ["worker", "pool"])
+def test_executor(data, mode):
+    gps, antennas = [], []
+    with CallbackExecutor(mode) as executor:
+        parser = Parser(BytesIO(data * 10), executor=executor)
+
+        @parser.callback
+        def on_gps(msg: ExtendedL1L2Gps):
+            gps.append(msg)
+
+        @parser.callback
+        def on_antenna(msg: ReferenceStationAntenna):
+            antennas.append(msg)
+
+        parser.parse()
+    assert len(gps) == 70 and len(antennas) == 10
+    if mode == "worker":
+        assert [msg.gps_epoch for msg in gps] == [
+            msg.gps_epoch for msg in Parser(BytesIO(data * 10)).iter_messages(
+                ExtendedL1L2Gps)]
+        stats = executor.stats()
+        assert set(stats) == {"test_executor.<locals>.on_gps",
+                              "test_executor.<locals>.on_antenna"}
+    else:
+        stats = executor.stats()
+        assert list(stats) == ["pool"]
+    assert sum(s["executed"] for s in stats.values()) == 80
+    assert all(s["dropped"] == 0 for s in stats.values())
+
+
+def test_block(data):
+    release = threading.Event()
+    executed = []
+
+    def slow(msg):
+        release.wait()
+        executed.append(msg)
+
+    executor = CallbackExecutor(maxsize=2, policy="block")
+    msgs = list(Parser(BytesIO(data)).iter_messages())
+    for msg in msgs[:3]:
+        executor.submit(slow, msg)
+    producer = threading.Thread(target=executor.submit, args=(slow, msgs[3]))
+    producer.start()
+    producer.join(0.1)
+    assert producer.is_alive()
+    release.set()
+    producer.join()
+    executor.close()
+    assert executed == msgs[:4]
+    stats = executor.stats()["test_block.<locals>.slow"]
+    assert stats["blocked_time"] > 0.05
+    assert stats["max_depth"] == 2
+    assert stats["depth"] == 0
+
+
+def test_drop_oldest(data):
+    release = threading.Event()
+    started = threading.Event()
+    executed = []
+
+    def slow(msg: ExtendedL1L2Gps):
+        started.set()
+        release.wait()
+        executed.append(msg)
+
+    executor = CallbackExecutor(maxsize=3, policy="drop-oldest")
+    parser = Parser(BytesIO(data * 10), executor=executor)
+    parser.callback(slow)
+    parser.parse()
+    # The parser went through the whole stream while the callback was
+    # stuck on its first call.
+    assert parser.frame_counts == {1004: 70, 1012: 60, 1005: 10}
+    started.wait()
+    release.set()
+    executor.close()
+
+    # Three queued calls and the one the worker may have started with.
+    stats = executor.stats()["test_drop_oldest.<locals>.slow"]
+    assert stats["submitted"] == 70
+    assert stats["executed"] in (3, 4)
+    assert stats["executed"] + stats["dropped"] == 70
+    assert stats["max_depth"] == 3
+    last = list(Parser(BytesIO(data)).iter_messages(ExtendedL1L2Gps))[-3:]
+    assert [msg.gps_epoch for msg in executed[-3:]] == [
+        msg.gps_epoch for msg in last]
+
+
+def test_coalesce_latest(data):
+    release = threading.Event()
+    started = threading.Event()
+    executed = []
+
+    def slow(msg):
+        started.set()
+        release.wait()
+        executed.append(msg)
+
+    msgs = list(Parser(BytesIO(data)).iter_messages())
+    gps = [msg for msg in msgs if isinstance(msg, ExtendedL1L2Gps)]
+    antennas = [
+        msg for msg in msgs if isinstance(msg, ReferenceStationAntenna)]
+
+    executor = CallbackExecutor(policy="coalesce-latest")
+    executor.submit(slow, gps[0])
+    started.wait()
+    for msg in msgs:
+        executor.submit(slow, msg)
+    stats = executor.stats()["test_coalesce_latest.<locals>.slow"]
+    assert stats["depth"] == 2
+    release.set()
+    executor.close()
+
+    # One call per message type after the one in flight, with the latest
+    # message, in the order the types were first queued.
+    assert executed == [gps[0], gps[-1], antennas[-1]]
+    stats = executor.stats()["test_coalesce_latest.<locals>.slow"]
+    assert stats["coalesced"] == len(msgs) - 2
+
+
+def test_callback_errors(data):
+    def failing(msg: ReferenceStationAntenna):
+        raise KeyError("failed")
+
+    def ok(msg):
+        pass
+
+    with CallbackExecutor() as executor:
+        msgs = list(Parser(BytesIO(data)).iter_messages())
+        for msg in msgs:
+            executor.submit(failing, msg)
+            executor.submit(ok, msg)
+    stats = executor.stats()
+    assert stats["test_callback_errors.<locals>.failing"]["errors"] == 8
+    assert stats["test_callback_errors.<locals>.ok"]["errors"] == 0
+    assert stats["test_callback_errors.<locals>.ok"]["executed"] == 8
+    with pytest.raises(RuntimeError):
+        executor.submit(ok, msgs[0])
+
+
+def test_same_name(data):
+    class Sink:
+        def __init__(self):
+            self.msgs = []
+
+        def store(self, msg):
+            self.msgs.append(msg)
+
+    first, second = Sink(), Sink()
+    msgs = list(Parser(BytesIO(data)).iter_messages())
+    with CallbackExecutor() as executor:
+        for msg in msgs[:3]:
+            executor.submit(first.store, msg)
+        executor.submit(second.store, msgs[3])
+    assert len(first.msgs) == 3 and len(second.msgs) == 1
+    stats = executor.stats()
+    name = "test_same_name.<locals>.Sink.store"
+    assert stats[name]["submitted"] == 3
+    assert stats[name + "-2"]["submitted"] == 1
+
+
+def test_invalid_policy():
+    with pytest.raises(ValueError):
+        CallbackExecutor(policy="drop-newest")
+    with pytest.raises(ValueError):
+        CallbackExecutor(mode="process")
+    with pytest.raises(ValueError):
+        CallbackQueue(maxsize=0)
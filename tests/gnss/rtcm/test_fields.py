@@ -0,0 +1,108 @@
+import numpy as np
+import pytest
+
+from gnss.rtcm.fields import ArrayLayout, Field, Layout, int_to_bits
+
+
+def test_layout():
+    layout = Layout(
+        Field('unsigned', 'uint:12'),
+        Field(None, 'pad:3'),
+        Field('signed', 'int:5', 0.5),
+        Field('flag', 'bool:1'),
+    )
+    assert layout.names == ('unsigned', 'signed', 'flag')
+    assert layout.bit_length == 21
+    assert layout.unpack(b'\xff\xf0\xff\xff', 3) == (4088, -0.5, True)
+
+
+@pytest.mark.parametrize("pos", range(0, 16))
+def test_decode_into(pos):
+    layout = Layout(Field('value', 'int:38'), Field('flag', 'bool:1'))
+    value = -123456789
+    bits = ((value & ((1 << 38) - 1)) << 1 | 1) << (64 - pos - 39)
+    buff = bits.to_bytes(8, 'big')
+
+    class Obj:
+        pass
+
+    obj = Obj()
+    assert layout.decode_into(obj, buff, pos) == pos + 39
+    assert obj.value == value
+    assert obj.flag is True
+
+
+def test_extend():
+    layout = Layout(Field('a', 'uint:4')).extend(Field('b', 'uint:4'))
+    assert layout.unpack(b'\x12') == (1, 2)
+    layout = Layout(Field('a', 'uint:4')) + Layout(Field('b', 'uint:4'))
+    assert layout.unpack(b'\x12') == (1, 2)
+
+
+@pytest.mark.xfail(raises=ValueError)
+def test_buffer_too_short():
+    Layout(Field('a', 'uint:12')).unpack(b'\xff', 0)
+
+
+@pytest.mark.parametrize("fmt", ["uint", "float:32", "uint:0", "uint:x"])
+def test_invalid_format(fmt):
+    with pytest.raises(ValueError):
+        Layout(Field('a', fmt))
+
+
+def test_pack():
+    layout = Layout(
+        Field('unsigned', 'uint:12'),
+        Field(None, 'pad:3'),
+        Field('signed', 'int:5', 0.5),
+        Field('flag', 'bool:1'),
+    )
+    value = layout.pack({'unsigned': 4088, 'signed': -0.5, 'flag': True})
+    assert value == 0b111111111000_000_11111_1
+    assert layout.unpack((value << 3).to_bytes(3, 'big')) == (
+        4088, -0.5, True)
+    with pytest.raises(ValueError):
+        layout.pack({'unsigned': 4096, 'signed': 0, 'flag': False})
+    with pytest.raises(ValueError):
+        layout.pack({'unsigned': 0, 'signed': 8, 'flag': False})
+
+
+def test_array_pack():
+    layout = ArrayLayout(
+        Field('a', 'uint:4'), Field(None, 'pad:2'), Field('b', 'int:6', 0.5))
+    bits = layout.pack({'a': [1, 15], 'b': [-16, 2.5]}, 2)
+    assert len(bits) == 2 * layout.bit_length
+    values, pos = layout.unpack(bits.astype(float), 0, 2)
+    assert pos == len(bits)
+    assert [array.tolist() for array in values] == [[1, 15], [-16, 2.5]]
+    with pytest.raises(ValueError):
+        layout.pack({'a': [16, 0], 'b': [0, 0]}, 2)
+    with pytest.raises(ValueError):
+        layout.pack({'a': [0, 0], 'b': [0, np.nan]}, 2)
+
+
+def test_int_to_bits():
+    assert int_to_bits(5, 4).tolist() == [0, 1, 0, 1]
+    assert int_to_bits(1 << 69, 70).tolist() == [1] + [0] * 69
+
+
+def test_sign_magnitude():
+    layout = Layout(Field('a', 'sint:5'), Field('b', 'sint:5', 0.5))
+    value = layout.pack({'a': -3, 'b': 7.5})
+    assert value == 0b10011_01111
+    buff = (value << 6).to_bytes(2, 'big')
+    assert layout.unpack(buff) == (-3, 7.5)
+    # Negative zero.
+    assert layout.unpack(b'\x84\x00') == (0, 0)
+    with pytest.raises(ValueError):
+        layout.pack({'a': -16, 'b': 0})
+
+    columns = layout.unpack_columns(
+        np.frombuffer(buff * 2, dtype=np.uint8), [0, 16])
+    assert columns['a'].tolist() == [-3, -3]
+    assert columns['b'].tolist() == [7.5, 7.5]
+
+    array_layout = ArrayLayout(Field('a', 'sint:5'))
+    bits = array_layout.pack({'a': [-15, 0, 15]}, 3)
+    values, _ = array_layout.unpack(bits.astype(float), 0, 3)
+    assert values[0].tolist() == [-15, 0, 15]
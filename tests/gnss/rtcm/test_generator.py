@@ -0,0 +1,62 @@
+from io import BytesIO
+
+import numpy as np
+import pytest
+
+from gnss.rtcm.generator import Generator
+from gnss.rtcm.messages import ExtendedL1L2Gps, Msm, epoch_time
+from gnss.rtcm.parser import Parser
+
+
+MSG_NUMBERS = [1005, 1006, 1004, 1074, 1085, 1096, 1117, 1127]
+
+
+def test_generate():
+    generator = Generator(
+        MSG_NUMBERS, stations=[1, 2], nr_sat=8, nr_sig=3,
+        station_interval=5, start=600000)
+    data = generator.generate(10)
+    parser = Parser(BytesIO(data))
+    msgs = list(parser.iter_messages())
+
+    assert parser.error_count == 0
+    assert parser.frame_counts == {
+        1005: 4, 1006: 4, 1004: 20, 1074: 20, 1085: 20, 1096: 20, 1117: 20,
+        1127: 20}
+    assert generator.nr_frames == len(msgs) == 128
+    assert generator.nr_bytes == len(data)
+
+    observations = [msg for msg in msgs if msg.type not in (1005, 1006)]
+    for msg in observations:
+        if isinstance(msg, Msm):
+            assert len(msg.satellites) == 8
+            assert msg.signals.tolist() == [2, 15, 22]
+            assert len(msg) == 24
+            assert not np.isnan(msg.pseudorange).any()
+            epoch = msg.epoch
+        else:
+            assert isinstance(msg, ExtendedL1L2Gps)
+            assert msg.nr_gps_sat == 8
+            epoch = msg.gps_epoch
+        assert epoch_time(msg.type, epoch) == (
+            600000000 + 1000 * (observations.index(msg) // 12)) % 86400000
+    # The multiple message flag is cleared on the last message of a
+    # station epoch.
+    assert [msg.synchronous_gnss for msg in observations[:6]] == (
+        [True] * 5 + [False])
+    assert {msg.station_id for msg in msgs} == {1, 2}
+
+
+def test_reproducible():
+    assert Generator(seed=3).generate(3) == Generator(seed=3).generate(3)
+    assert Generator(seed=3).generate(3) != Generator(seed=4).generate(3)
+
+
+def test_invalid_msg_number():
+    with pytest.raises(ValueError):
+        Generator([1012])
+    with pytest.raises(ValueError):
+        Generator([1071])
+    with pytest.raises(ValueError):
+        Generator([1117], nr_sat=11)
+    assert Generator([1077], nr_sat=20).nr_sat == 20
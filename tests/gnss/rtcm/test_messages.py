@@ -1,16 +1,28 @@
 from io import BytesIO
+import os
+
+import numpy as np
 from numpy.testing import assert_almost_equal
 import pytest
 
-from gnss.rtcm.messages import RtcmMessage
+from gnss.rtcm.messages import RtcmMessage, Type, RANGE_MS
 from gnss.rtcm.messages import (
-    ReferenceStationAntenna, ReferenceStationAntennaHeight,
-    ReceiverAntennaDescriptor
+    ExtendedL1L2Gps, ReferenceStationAntenna, ReferenceStationAntennaHeight,
+    ReceiverAntennaDescriptor, Msm, Msm4, Msm7, GpsMsm7, GpsEphemeris,
+    GlonassEphemeris, GalileoEphemeris
 )
+from gnss.rtcm.messages import epoch_field, epoch_time
+
+
+BINARY_FILE = os.path.join(os.path.dirname(__file__), 'rtcm_data.bin')
+REFERENCE_STATION_ANTENNA = bytes(
+    b'>\xd0\x00\x026\xab\x10_\xca\x085\r\xd0\xca7\xe5G\xf8\x88\x00\x00')
+REFERENCE_STATION_ANTENNA_HEIGHT = bytes(
+    b'>\xe0\x00\x026\xab\x10_\xca\x085\r\xd0\xca7\xe5G\xf8\x88\x00\x00')
 
 
 def test_ref_antenna():
-    buff = bytes(b'>\xd0\x00\x026\xab\x10_\xca\x085\r\xd0\xca7\xe5G\xf8\x88\x00\x00')
+    buff = REFERENCE_STATION_ANTENNA
     msg = ReferenceStationAntenna(buff=buff)
 
     assert msg.station_id == 0
@@ -25,6 +37,24 @@ def test_ref_antenna():
     assert_almost_equal(msg.ecef_z, -3480800.6520, decimal=4)
 
 
+def test_ref_antenna_to_buffer():
+    # The 1005 payload is followed by two bytes it does not use.
+    msg = ReferenceStationAntenna(buff=REFERENCE_STATION_ANTENNA)
+    assert msg.to_buffer() == REFERENCE_STATION_ANTENNA[:19]
+    msg = ReferenceStationAntennaHeight(buff=REFERENCE_STATION_ANTENNA_HEIGHT)
+    assert msg.to_buffer() == REFERENCE_STATION_ANTENNA_HEIGHT
+
+
+def test_extended_l1_l2_gps_to_buffer():
+    with open(BINARY_FILE, 'rb') as f:
+        data = f.read()
+    buff = data[3:3 + (((data[1] & 0x03) << 8) | data[2])]
+    msg = ExtendedL1L2Gps(buff=buff)
+    encoded = msg.to_buffer()
+    assert len(encoded) == len(buff)
+    assert vars(ExtendedL1L2Gps(buff=encoded)) == vars(msg)
+
+
 def test_ref_antenna_height():
     buff = bytes(b'>\xe0\x00\x026\xab\x10_\xca\x085\r\xd0\xca7\xe5G\xf8\x88\x00\x00')
     msg = ReferenceStationAntennaHeight(buff=buff)
@@ -46,3 +76,203 @@ def test_ref_antenna_height():
 def test_receiver_antenna_descriptor():
     buff = bytes(b'@\x90\x00\x00\x00\x00\x08TPS OEM1\x124.7 Nov,23,2017 p6\x00')
     msg = ReceiverAntennaDescriptor(buff=buff)
+
+
+def pack_bits(fields):
+    value = 0
+    nr_bits = 0
+    for field_value, width in fields:
+        value = (value << width) | (field_value & ((1 << width) - 1))
+        nr_bits += width
+    padding = -nr_bits % 8
+    return (value << padding).to_bytes((nr_bits + padding) // 8, 'big')
+
+
+def msm_buffer(msg_number, satellites, signals, cells, satellite_data,
+               cell_data):
+    satellite_mask = sum(1 << (64 - sat) for sat in satellites)
+    signal_mask = sum(1 << (32 - sig) for sig in signals)
+    fields = [(msg_number, 12), (2003, 12), (345600000, 30), (1, 1), (0, 3),
+              (0, 7), (0, 2), (0, 2), (0, 1), (0, 3),
+              (satellite_mask, 64), (signal_mask, 32)]
+    fields += [(cell, 1) for cell in cells]
+    for values, width in satellite_data + cell_data:
+        fields += [(value, width) for value in values]
+    return pack_bits(fields)
+
+
+@pytest.mark.parametrize("msg_number", [1074, 1084, 1094, 1114, 1124])
+def test_msm4(msg_number):
+    buff = msm_buffer(
+        msg_number, [3, 17], [2, 16], [1, 1, 0, 1],
+        [([70, 0xff], 8), ([512, 0], 10)],
+        [([1024, -16384, 1024], 15), ([-2048, 2048, -0x200000], 22),
+         ([0, 1, 15], 4), ([0, 1, 0], 1), ([45, 30, 0], 6)])
+    msg = RtcmMessage(msg_type=Type(msg_number))
+    msg.from_buffer(buff)
+    assert isinstance(msg, Msm4)
+
+    assert msg.station_id == 2003
+    assert msg.epoch == 345600000
+    assert msg.synchronous_gnss
+    assert msg.satellites.tolist() == [3, 17]
+    assert msg.signals.tolist() == [2, 16]
+    assert len(msg) == 3
+    assert msg.satellite.tolist() == [3, 3, 17]
+    assert msg.signal.tolist() == [2, 16, 16]
+
+    rough_range = 70 + 512 * 2**-10
+    assert_almost_equal(
+        msg.pseudorange[0], (rough_range + 1024 * 2**-24) * RANGE_MS)
+    assert np.isnan(msg.pseudorange[1])
+    assert np.isnan(msg.pseudorange[2])
+    assert_almost_equal(
+        msg.phaserange[0], (rough_range - 2048 * 2**-29) * RANGE_MS)
+    assert_almost_equal(
+        msg.phaserange[1], (rough_range + 2048 * 2**-29) * RANGE_MS)
+    assert np.isnan(msg.phaserange_rate).all()
+    assert msg.lock_time.tolist() == [0, 32, 524288]
+    assert msg.half_cycle.tolist() == [False, True, False]
+    assert msg.cnr.tolist() == [45, 30, 0]
+
+
+@pytest.mark.parametrize("msg_number", [1077, 1087, 1097, 1117, 1127])
+def test_msm7(msg_number):
+    buff = msm_buffer(
+        msg_number, [1, 64], [1, 32], [0, 1, 1, 1],
+        [([80, 81], 8), ([7, 13], 4), ([0, 1023], 10), ([-500, -0x2000], 14)],
+        [([-1000, 1000, -0x80000], 20), ([300000, -300000, 0], 24),
+         ([63, 100, 704], 10), ([1, 1, 0], 1), ([800, 16, 0], 10),
+         ([-2500, 2500, -0x4000], 15)])
+    msg = RtcmMessage(msg_type=Type(msg_number))
+    msg.from_buffer(buff)
+    assert isinstance(msg, Msm7)
+
+    assert msg.satellite.tolist() == [1, 64, 64]
+    assert msg.signal.tolist() == [32, 1, 32]
+    assert msg.extended_info.tolist() == [7, 13]
+    rough_ranges = [80, 81 + 1023 * 2**-10, 81 + 1023 * 2**-10]
+    assert_almost_equal(
+        msg.pseudorange[:2],
+        [(rough_ranges[0] - 1000 * 2**-29) * RANGE_MS,
+         (rough_ranges[1] + 1000 * 2**-29) * RANGE_MS])
+    assert np.isnan(msg.pseudorange[2])
+    assert_almost_equal(
+        msg.phaserange,
+        [(rough + fine * 2**-31) * RANGE_MS for rough, fine in zip(
+            rough_ranges, [300000, -300000, 0])])
+    assert_almost_equal(msg.phaserange_rate[0], -500 - 0.25)
+    assert np.isnan(msg.phaserange_rate[1:]).all()
+    assert msg.lock_time.tolist() == [63, 144, 67108864]
+    assert msg.cnr.tolist() == [50, 1, 0]
+
+
+def assert_same_cells(msg, decoded):
+    for name in ['satellite', 'signal', 'lock_time', 'half_cycle', 'cnr']:
+        assert getattr(decoded, name).tolist() == getattr(msg, name).tolist()
+    # Up to the resolution of the fine ranges.
+    for name, scale in [('pseudorange', msg.fine_pseudorange_scale),
+                        ('phaserange', msg.fine_phaserange_scale),
+                        ('phaserange_rate', 1e-4 / RANGE_MS)]:
+        np.testing.assert_allclose(
+            getattr(decoded, name), getattr(msg, name), rtol=0,
+            atol=scale * RANGE_MS)
+
+
+@pytest.mark.parametrize("msg_number", [1074, 1075, 1076, 1077, 1127])
+def test_msm_to_buffer(msg_number):
+    buff = msm_buffer(
+        1077, [1, 64], [1, 32], [0, 1, 1, 1],
+        [([80, 81], 8), ([7, 13], 4), ([0, 1023], 10), ([-500, -0x2000], 14)],
+        [([-1000, 1000, -0x80000], 20), ([300000, -300000, 0], 24),
+         ([63, 100, 704], 10), ([1, 1, 0], 1), ([800, 16, 0], 10),
+         ([-2500, 2500, -0x4000], 15)])
+    msm7 = GpsMsm7(buff=buff)
+    msg = RtcmMessage(msg_type=Type(msg_number))
+    vars(msg).update(vars(msm7))
+    # Values each message type can represent.
+    msg.lock_time = msg._lock_time(msg._lock_time_indicator(msg.lock_time))
+    msg.cnr = np.round(msg.cnr / msg.cnr_scale) * msg.cnr_scale
+    if 'fine_phaserange_rate' not in msg.cell_layout.names:
+        msg.phaserange_rate = np.full(len(msg), np.nan)
+
+    decoded = RtcmMessage(msg_type=Type(msg_number))
+    decoded.from_buffer(msg.to_buffer())
+    assert decoded.station_id == 2003
+    assert decoded.epoch == 345600000
+    assert decoded.synchronous_gnss
+    assert_same_cells(msg, decoded)
+    if msg_number % 10 in (5, 7):
+        assert decoded.extended_info.tolist() == [7, 13]
+
+    # Cells are reordered by satellite then signal.
+    order = [2, 0, 1]
+    for name in ['satellite', 'signal', 'pseudorange', 'phaserange',
+                 'phaserange_rate', 'cnr', 'lock_time', 'half_cycle']:
+        setattr(msg, name, getattr(msg, name)[order])
+    assert msg.to_buffer() == decoded.to_buffer()
+
+
+def test_msm_to_buffer_out_of_range():
+    msg = GpsMsm7(buff=msm_buffer(
+        1077, [1], [1, 2], [1, 1], [([80], 8), ([0], 4), ([0], 10),
+                                    ([0], 14)],
+        [([0, 0], 20), ([0, 0], 24), ([0, 0], 10), ([0, 0], 1),
+         ([0, 0], 10), ([0, 0], 15)]))
+    msg.pseudorange[1] += 1000
+    with pytest.raises(ValueError):
+        msg.to_buffer()
+    msg.satellite[1], msg.signal[1] = 1, 1
+    with pytest.raises(ValueError):
+        msg.to_buffer()
+
+
+@pytest.mark.parametrize("msg_number", [1004, 1012, 1077, 1087, 1127])
+def test_epoch_time(msg_number):
+    time_of_week = 6 * 86400000 + 86400000 - 1000
+    epoch = epoch_field(msg_number, time_of_week)
+    assert epoch_time(msg_number, epoch) == 86400000 - 1000
+
+
+def test_msm_registry():
+    for constellation in ['GPS', 'GLONASS', 'GALILEO', 'QZSS', 'BEIDOU']:
+        for kind in range(4, 8):
+            msg_type = Type[f"{constellation}_MSM{kind}"]
+            cls = RtcmMessage.get_class(msg_type)
+            assert cls.constellation == constellation
+            assert issubclass(cls, Msm)
+
+
+@pytest.mark.xfail(raises=ValueError)
+def test_msm_truncated():
+    buff = msm_buffer(
+        1077, [1, 2], [1], [1, 1], [([80, 81], 8)], [])
+    GpsMsm7(buff=buff)
+
+
+@pytest.mark.parametrize("cls, values, length", [
+    (GpsEphemeris, {
+        'sat_id': 12, 'week': 252, 'iode': 77, 'toc': 345600, 'af0': -2**-20,
+        'eccentricity': 0.01, 'sqrt_a': 5153.5, 'toe': 345600,
+        'm0': -0.25, 'omega_dot': -2**-38, 'health': 0}, 61),
+    (GlonassEphemeris, {
+        'sat_id': 7, 'frequency_channel': -7, 'tb': 50, 'x': -14483.0,
+        'y_velocity': -1.09375, 'z_acceleration': -2**-30,
+        'tau': -2**-15, 'gamma': 2**-38}, 45),
+    (GalileoEphemeris, {
+        'sat_id': 30, 'week': 1300, 'iodnav': 1000, 'toc': 345600,
+        'af0': 2**-20, 'eccentricity': 0.0002, 'sqrt_a': 5440.5,
+        'toe': 345600, 'bgd': -2**-30, 'e5a_validity': True}, 62),
+])
+def test_ephemeris(cls, values, length):
+    msg = RtcmMessage(msg_type=cls.type)
+    vars(msg).update(
+        {name: 0 for name in cls.layout.names if name != 'msg_number'},
+        **values)
+    buff = msg.to_buffer()
+    assert len(buff) == length
+
+    decoded = cls(buff=buff)
+    for name, value in values.items():
+        assert_almost_equal(getattr(decoded, name), value, decimal=9)
+    assert decoded.to_buffer() == buff
@@ -0,0 +1,106 @@
+from io import BytesIO
+import os
+
+import numpy as np
+import pytest
+
+from gnss.rtcm.archive import find_frame, scan_buffer, scan_range
+from gnss.rtcm.batch import decode_batch
+from gnss.rtcm.messages import ExtendedL1L2Gps
+from gnss.rtcm.parallel import ParallelDecoder
+from gnss.rtcm.parser import Parser, frame
+
+
+BINARY_FILE = os.path.join(os.path.dirname(__file__), 'rtcm_data.bin')
+
+
+@pytest.fixture
+def recording(tmp_path):
+    with open(BINARY_FILE, 'rb') as f:
+        data = f.read()
+    corrupted = bytearray(data)
+    corrupted[155 + 20] ^= 0x01
+    # A valid frame hidden in the payload of another one, a chunk
+    # boundary falling before it resyncs on it.
+    nested = frame(b"\x00\x00" + data[:155] + b"\x00")
+    data = (b"garbage" + data + bytes(corrupted) + nested + data) * 4
+    path = tmp_path / "recording.bin"
+    path.write_bytes(data)
+    return str(path), data, data.find(nested)
+
+
+def parse(data):
+    parser = Parser(BytesIO(data))
+    msgs = list(parser.iter_messages())
+    return parser, msgs
+
+
+def test_scan_range(recording):
+    _, data, nested = recording
+    index = scan_buffer(data)
+    part, end = scan_range(data, 0, nested + 2)
+    assert (part == index[index['offset'] <= nested]).all()
+    assert end == nested + part[-1]['length']
+
+    part, end = scan_range(data, nested + 5, nested + 6)
+    assert len(part) == 1 and part['crc_valid'][0]
+    assert end == nested + 5 + 155
+
+    assert find_frame(data, 8) == index['offset'][index['crc_valid']][1]
+    assert find_frame(data, len(data) - 2) == len(data)
+
+
+@pytest.mark.parametrize("processes", [1, 2])
+@pytest.mark.parametrize("chunk_size", [None, 997, 1 << 20])
+def test_messages(recording, processes, chunk_size):
+    path, data, nested = recording
+    parser, expected = parse(data)
+
+    # Without chunk size, the first boundary falls in the nested frame.
+    decoder = ParallelDecoder(path, processes, chunk_size or nested + 2)
+    msgs = list(decoder.messages())
+    assert [vars(msg) for msg in msgs] == [vars(msg) for msg in expected]
+    assert decoder.frame_counts == parser.frame_counts
+    assert decoder.error_count == parser.error_count > 0
+    assert not decoder.incomplete
+    if chunk_size is None:
+        assert decoder.resync_count > 0
+
+
+def test_tables(recording):
+    path, data, nested = recording
+    decoder = ParallelDecoder(path, processes=2, chunk_size=nested + 2)
+    tables = decoder.tables(ExtendedL1L2Gps)
+    expected = decode_batch(data, ExtendedL1L2Gps)
+    assert list(tables) == list(expected)
+    for msg_type, table in expected.items():
+        for name in table.columns:
+            assert np.array_equal(tables[msg_type][name], table[name])
+
+
+def test_incomplete(tmp_path):
+    with open(BINARY_FILE, 'rb') as f:
+        data = f.read()
+    data = data + data[:100]
+    path = tmp_path / "truncated.bin"
+    path.write_bytes(data)
+
+    parser = Parser(BytesIO(data))
+    nr_msgs = 0
+    with pytest.raises(RuntimeError):
+        for _ in parser.iter_messages():
+            nr_msgs += 1
+
+    decoder = ParallelDecoder(str(path), processes=2, chunk_size=300)
+    assert len(list(decoder.messages())) == nr_msgs
+    assert decoder.incomplete
+    assert decoder.frame_counts == parser.frame_counts
+    assert decoder.error_count == parser.error_count
+
+
+def test_empty(tmp_path):
+    path = tmp_path / "empty.bin"
+    path.write_bytes(b"")
+    decoder = ParallelDecoder(str(path))
+    assert list(decoder.messages()) == []
+    assert decoder.tables() == {}
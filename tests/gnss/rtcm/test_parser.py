@@ -1,11 +1,15 @@
 from io import BytesIO
 from numpy.testing import assert_almost_equal
 import os
+import threading
+import time
 
 import pytest
 
-from gnss.rtcm.parser import Parser, PREAMBLE
-from gnss.rtcm.messages import ReferenceStationAntenna, ExtendedL1L2Gps
+from gnss.rtcm.parser import Parser, Framer, LazyMessage, PREAMBLE
+from gnss.rtcm.parser import decode, encode, frame
+from gnss.rtcm.parser import BUFFER_SIZE, MAX_FRAME_LENGTH
+from gnss.rtcm.messages import ReferenceStationAntenna, ExtendedL1L2Gps, Type
 
 
 def test_parse_garbage():
@@ -57,6 +61,15 @@ def test_parse_msg_reference_station_antenna():
     assert_almost_equal(parser.msg.ecef_z, 3975521.4643, decimal=4)
 
 
+def test_encode():
+    frame_ = REFERENCE_STATION_ANTENNA_FRAME
+    msg = decode(frame_[3:-3])
+    assert encode(msg) == frame_
+    assert frame(frame_[3:-3]) == frame_
+    with pytest.raises(ValueError):
+        frame(bytes(1024))
+
+
 def test_parser_callback():
     stream = BytesIO(bytes(
         [0xd3, 0x00, 0x13, 0x3e, 0xd7, 0xd3, 0x02, 0x02, 0x98, 0x0e, 0xde,
@@ -105,5 +118,217 @@ def test_iter_messages():
         for i, msg in enumerate(parser.iter_messages(ExtendedL1L2Gps)):
             assert isinstance(msg, ExtendedL1L2Gps)
     assert i == 6
-    assert parser.counts[ExtendedL1L2Gps.get_name()] == i
+    assert parser.counts[ExtendedL1L2Gps.get_name()] == i + 1
     assert parser.error_count == 0
+
+
+REFERENCE_STATION_ANTENNA_FRAME = bytes(
+    [0xd3, 0x00, 0x13, 0x3e, 0xd7, 0xd3, 0x02, 0x02, 0x98, 0x0e, 0xde,
+     0xef, 0x34, 0xb4, 0xbd, 0x62, 0xac, 0x09, 0x41, 0x98, 0x6f, 0x33,
+     0x36, 0x0b, 0x98])
+
+
+def test_framer_capacity():
+    with pytest.raises(ValueError):
+        Framer(capacity=MAX_FRAME_LENGTH)
+
+
+def test_framer_split_frame():
+    framer = Framer()
+    framer.feed(b"garbage" + REFERENCE_STATION_ANTENNA_FRAME[:10])
+    assert framer.next_frame() is None
+    assert framer.synced
+    framer.feed(REFERENCE_STATION_ANTENNA_FRAME[10:])
+    frame = framer.next_frame()
+    assert isinstance(frame, memoryview)
+    assert frame == REFERENCE_STATION_ANTENNA_FRAME
+    assert framer.next_frame() is None
+    assert len(framer) == 0
+
+
+def test_framer_crc_error():
+    corrupted = bytearray(REFERENCE_STATION_ANTENNA_FRAME)
+    corrupted[10] ^= 0xff
+    framer = Framer()
+    framer.feed(corrupted + REFERENCE_STATION_ANTENNA_FRAME * 30)
+    assert framer.next_frame() == REFERENCE_STATION_ANTENNA_FRAME
+    assert framer.error_count >= 1
+
+
+def test_framer_bounded_memory():
+    binary_file = os.path.join(os.path.dirname(__file__), 'rtcm_data.bin')
+    with open(binary_file, 'rb') as f:
+        data = f.read()
+    stream = BytesIO(data * 50)
+    framer = Framer(capacity=MAX_FRAME_LENGTH + BUFFER_SIZE)
+    nr_frames = 0
+    while True:
+        if framer.next_frame() is not None:
+            nr_frames += 1
+        elif not framer.fill(stream):
+            break
+        assert len(framer) <= framer.capacity
+    assert len(framer._buffer) == framer.capacity
+    assert framer.error_count == 0
+    assert nr_frames % 50 == 0 and nr_frames > 0
+
+
+def test_parser_read_only_stream():
+    class ReadOnlyStream:
+        def __init__(self, data):
+            self._stream = BytesIO(data)
+
+        def read(self, nrbytes):
+            return self._stream.read(nrbytes)
+
+    parser = Parser(ReadOnlyStream(REFERENCE_STATION_ANTENNA_FRAME * 3))
+    msgs = list(parser.iter_messages(ReferenceStationAntenna))
+    assert len(msgs) == 3
+    assert all(msg.station_id == 2003 for msg in msgs)
+
+
+def test_lazy_messages():
+    binary_file = os.path.join(os.path.dirname(__file__), 'rtcm_data.bin')
+    with open(binary_file, 'rb') as stream:
+        expected = list(Parser(stream).iter_messages(ExtendedL1L2Gps))
+
+    with open(binary_file, 'rb') as stream:
+        parser = Parser(stream, lazy=True)
+        msgs = list(parser.iter_messages(ExtendedL1L2Gps))
+
+    assert len(msgs) == len(expected)
+    for msg, expected_msg in zip(msgs, expected):
+        assert isinstance(msg, LazyMessage)
+        assert msg.type == Type.EXTENDED_L1_L2_GPS
+        assert msg.name == ExtendedL1L2Gps.get_name()
+        assert msg.station_id == expected_msg.station_id
+        assert not msg.decoded
+        assert msg.gps_epoch == expected_msg.gps_epoch
+        assert msg.decoded
+        assert isinstance(msg.message, ExtendedL1L2Gps)
+        assert vars(msg.message) == vars(expected_msg)
+
+
+def test_lazy_callback():
+    parser = Parser(BytesIO(REFERENCE_STATION_ANTENNA_FRAME), lazy=True)
+
+    parsed_msgs = []
+
+    @parser.callback
+    def add_msg(msg: ReferenceStationAntenna):
+        parsed_msgs.append(msg)
+
+    parser.parse()
+    msg = parsed_msgs.pop()
+    assert msg.station_id == 2003
+    assert not msg.decoded
+    assert_almost_equal(msg.ecef_x, 1114104.5999, decimal=4)
+
+
+@pytest.mark.xfail(raises=NotImplementedError)
+def test_lazy_not_implemented():
+    LazyMessage(bytes([0x42, 0xf0, 0x00]))
+
+
+def test_skip_unsubscribed(monkeypatch):
+    binary_file = os.path.join(os.path.dirname(__file__), 'rtcm_data.bin')
+    with open(binary_file, 'rb') as f:
+        data = f.read()
+    stream = BytesIO(data + REFERENCE_STATION_ANTENNA_FRAME + data)
+    parser = Parser(stream)
+
+    decoded = []
+
+    def parse_message(buff):
+        decoded.append(bytes(buff[:2]))
+        Parser.parse_message(parser, buff)
+
+    monkeypatch.setattr(parser, 'parse_message', parse_message)
+
+    @parser.callback
+    def on_antenna(msg: ReferenceStationAntenna):
+        pass
+
+    parser.parse()
+    assert len(decoded) == 1
+    assert parser.frame_counts == {1004: 14, 1012: 12, 1005: 1}
+    assert parser.counts == {ReferenceStationAntenna.get_name(): 1}
+    assert isinstance(parser.msg, ReferenceStationAntenna)
+
+
+def test_break_types_update():
+    stream = BytesIO(REFERENCE_STATION_ANTENNA_FRAME * 2)
+    parser = Parser(stream)
+    assert list(parser.iter_messages(ExtendedL1L2Gps)) == []
+    assert parser.frame_counts == {1005: 2}
+
+    stream = BytesIO(REFERENCE_STATION_ANTENNA_FRAME * 2)
+    parser.load_stream(stream)
+    assert len(list(parser.iter_messages(ReferenceStationAntenna))) == 2
+
+
+def test_wait_for_selectable_stream():
+    read_fd, write_fd = os.pipe()
+    os.set_blocking(read_fd, False)
+    stream = open(read_fd, 'rb', buffering=0)
+
+    def write():
+        time.sleep(0.3)
+        os.write(write_fd, REFERENCE_STATION_ANTENNA_FRAME)
+
+    writer = threading.Thread(target=write)
+    writer.start()
+    parser = Parser(stream, wait_for_stream=True)
+    parser.subscribe(ReferenceStationAntenna)
+    cpu_time = time.process_time()
+    msg = parser.parse()
+    cpu_time = time.process_time() - cpu_time
+    writer.join()
+    stream.close()
+    os.close(write_fd)
+
+    assert isinstance(msg, ReferenceStationAntenna)
+    assert parser.idle_time > 0.2
+    assert cpu_time < 0.1
+
+
+def test_wait_for_stream_backoff():
+    class Stream:
+        reads = 0
+
+        def read(self, size):
+            self.reads += 1
+            if self.reads < 8:
+                return b""
+            return REFERENCE_STATION_ANTENNA_FRAME
+
+    stream = Stream()
+    parser = Parser(stream, wait_for_stream=True,
+                    backoff_min=0.001, backoff_max=0.01)
+    parser.subscribe(ReferenceStationAntenna)
+    msg = parser.parse()
+
+    assert isinstance(msg, ReferenceStationAntenna)
+    assert stream.reads == 8
+    assert parser.idle_time >= 0.001 + 0.002 + 0.004 + 0.008 + 3 * 0.01
+    assert parser.busy_time > 0
+
+
+def test_feed():
+    parser = Parser()
+    msgs = []
+
+    @parser.callback
+    def on_antenna(msg: ReferenceStationAntenna):
+        msgs.append(msg)
+
+    # Parsed without iterating the result.
+    parser.feed(REFERENCE_STATION_ANTENNA_FRAME[:10])
+    parser.feed(REFERENCE_STATION_ANTENNA_FRAME[10:]
+                + REFERENCE_STATION_ANTENNA_FRAME * 2)
+    assert len(msgs) == 3
+    assert parser.frame_counts == {1005: 3}
+
+    parser.subscribe(ReferenceStationAntenna)
+    assert len(parser.feed(REFERENCE_STATION_ANTENNA_FRAME * 2)) == 2
+    assert len(msgs) == 5
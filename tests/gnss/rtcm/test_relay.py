@@ -0,0 +1,77 @@
+from io import BytesIO
+import os
+
+import pytest
+
+from gnss.rtcm.messages import ReferenceStationAntenna
+from gnss.rtcm.parser import Parser, frame
+from gnss.rtcm.relay import Relay
+
+
+BINARY_FILE = os.path.join(os.path.dirname(__file__), 'rtcm_data.bin')
+ANTENNA_PAYLOAD = (
+    b'>\xd0\x00\x026\xab\x10_\xca\x085\r\xd0\xca7\xe5G\xf8\x88\x00\x00')
+
+
+@pytest.fixture
+def antenna_frames():
+    return [frame(ANTENNA_PAYLOAD[:2] + bytes([station_id])
+                  + ANTENNA_PAYLOAD[3:]) for station_id in (0, 5)]
+
+
+@pytest.fixture
+def stream_data(antenna_frames):
+    with open(BINARY_FILE, 'rb') as f:
+        data = f.read()
+    corrupted = bytearray(antenna_frames[0])
+    corrupted[10] ^= 0x01
+    return (data + b"\xd3\x00\x01garbage" + antenna_frames[0]
+            + bytes(corrupted) + antenna_frames[1]) * 3
+
+
+@pytest.mark.parametrize("chunk_size", [1, 100, 1 << 20])
+def test_relay(stream_data, antenna_frames, chunk_size):
+    out = BytesIO()
+    relay = Relay(BytesIO(stream_data), out, msg_numbers=[1005],
+                  station_ids=[5], chunk_size=chunk_size)
+    stats = relay.run()
+
+    assert out.getvalue() == antenna_frames[1] * 3
+    assert relay.forward_counts == {1005: 3}
+    parser = Parser(BytesIO(stream_data))
+    list(parser.iter_messages())
+    assert relay.frame_counts == parser.frame_counts
+    assert stats["errors"] == parser.error_count == 6
+    assert stats["bytes_in"] == len(stream_data)
+    assert stats["bytes_saved"] == len(stream_data) - len(out.getvalue())
+
+
+def test_relay_all(stream_data):
+    with open(BINARY_FILE, 'rb') as f:
+        data = f.read()
+    out = BytesIO()
+    relay = Relay(BytesIO(data * 5), out)
+    relay.run()
+    assert out.getvalue() == data * 5
+    assert relay.stats()["bytes_saved"] == 0
+
+
+def test_relay_messages(stream_data, antenna_frames):
+    out = BytesIO()
+    relay = Relay(BytesIO(stream_data), out, msg_numbers=[1005, 1012],
+                  chunk_size=500)
+    msgs = list(relay.iter_messages())
+    assert len(msgs) == 6
+    assert all(isinstance(msg, ReferenceStationAntenna) for msg in msgs)
+    assert [msg.station_id for msg in msgs] == [0, 5] * 3
+    assert relay.forward_counts == {1005: 6, 1012: 18}
+
+
+def test_relay_feed(antenna_frames):
+    out = BytesIO()
+    relay = Relay(None, out)
+    data = b"".join(antenna_frames)
+    relay.feed(data[:10])
+    assert out.getvalue() == b""
+    relay.feed(data[10:])
+    assert out.getvalue() == data
@@ -0,0 +1,148 @@
+import asyncio
+import os
+import socket
+import threading
+import time
+
+import pytest
+
+from gnss.ntrip.caster import Caster
+from gnss.ntrip.client import AsyncClient
+from gnss.rtcm.archive import scan_buffer
+from gnss.rtcm.generator import Generator
+from gnss.rtcm.parser import Parser, PREAMBLE
+from gnss.rtcm.replay import Replayer, frame_times
+
+
+BINARY_FILE = os.path.join(os.path.dirname(__file__), 'rtcm_data.bin')
+
+
+@pytest.fixture
+def data():
+    # Two stations, 5 epochs a second apart: 20 observation frames and
+    # 2 1005 frames.
+    return Generator([1005, 1074, 1084], stations=[1, 2]).generate(5)
+
+
+def test_frame_times():
+    with open(BINARY_FILE, 'rb') as f:
+        data = f.read()
+    index = scan_buffer(data)
+    # 1004 and 1012 messages of the same epochs.
+    assert frame_times(data, index).tolist() == [
+        0, 0, 1, 1, 2, 2, 3, 3, 4, 4, 5, 5, 6]
+
+    # Across a day change, and in GLONASS and BeiDou time.
+    data = Generator([1077, 1087, 1127], start=86398).generate(4)
+    index = scan_buffer(data)
+    assert frame_times(data, index).tolist() == [
+        0, 0, 0, 1, 1, 1, 2, 2, 2, 3, 3, 3]
+
+
+def test_max_rate(data):
+    stream = b"garbage" + data + b"trailing"
+    replayer = Replayer(stream, speed=None, chunk_size=500)
+    chunks = list(iter(replayer.read, b""))
+    assert b"".join(chunks) == stream
+    # Chunks hold whole frames.
+    assert all(chunk[0] == PREAMBLE for chunk in chunks[1:])
+    assert all(len(chunk) <= 500 for chunk in chunks)
+    assert replayer.stats()["frames_out"] == 22
+    assert replayer.stats()["passes"] == 1
+    assert replayer.read() == b""
+
+
+def test_scaled_rate(data):
+    replayer = Replayer(data, speed=20)
+    start = time.perf_counter()
+    chunks = []
+    times = []
+    for chunk in iter(replayer.read, b""):
+        chunks.append(chunk)
+        times.append(time.perf_counter() - start)
+    # One read per epoch, the last one 4 s / 20 after the first.
+    assert len(chunks) == 5
+    assert b"".join(chunks) == data
+    assert 0.19 < times[-1] < 0.4
+    assert replayer.stats()["max_lag"] < 0.1
+
+
+def test_repeat(data):
+    replayer = Replayer(data, speed=None, repeat=3)
+    assert replayer.play(lambda chunk: None) == 3 * len(data)
+    assert replayer.stats()["passes"] == 3
+    assert replayer.duration == 5
+
+    replayer = Replayer(data, speed=50, repeat=2)
+    start = time.perf_counter()
+    replayer.play(lambda chunk: None)
+    # The second pass starts one epoch after the last of the first one.
+    assert 0.18 < time.perf_counter() - start < 0.4
+
+
+def test_file(tmp_path, data):
+    path = str(tmp_path / "recording.bin")
+    with open(path, 'wb') as f:
+        f.write(data)
+    with Replayer(path, speed=None) as replayer:
+        parser = Parser(replayer)
+        assert len(list(parser.iter_messages())) == 22
+        assert parser.error_count == 0
+
+
+def test_socket(data):
+    receiver, sender = socket.socketpair()
+    replayer = Replayer(data, speed=100)
+
+    def play():
+        replayer.play(sender.sendall)
+        sender.close()
+
+    thread = threading.Thread(target=play)
+    thread.start()
+    received = bytearray()
+    for chunk in iter(lambda: receiver.recv(65536), b""):
+        received += chunk
+    thread.join()
+    receiver.close()
+    assert received == data
+
+
+class GatedReplayer(Replayer):
+    """
+    Replayer whose first read waits for an event.
+    """
+    def __init__(self, *args, event, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.event = event
+
+    def read(self, size=-1):
+        self.event.wait()
+        return super().read(size)
+
+
+def test_caster(data):
+    event = threading.Event()
+    caster = Caster(port=0)
+    mountpoint = caster.add_mountpoint(
+        "REPLAY", GatedReplayer(data, speed=50, repeat=2, event=event))
+
+    async def run():
+        async with caster:
+            client = AsyncClient(
+                "127.0.0.1", mountpoint="REPLAY", port=caster.port)
+            await client.connect()
+            while not mountpoint.subscribers:
+                await asyncio.sleep(0.01)
+            event.set()
+            received = bytearray()
+            while True:
+                chunk = await client.read(65536)
+                if not chunk:
+                    return bytes(received)
+                received += chunk
+
+    start = time.perf_counter()
+    received = asyncio.run(run())
+    assert received == data * 2
+    assert time.perf_counter() - start > 0.18
@@ -0,0 +1,97 @@
+from io import BytesIO
+import math
+import os
+from urllib.request import urlopen
+
+import pytest
+
+from gnss.metrics import Histogram, Metrics
+from gnss.rtcm.messages import ExtendedL1L2Gps
+from gnss.rtcm.parser import Parser
+
+
+BINARY_FILE = os.path.join(
+    os.path.dirname(__file__), 'rtcm', 'rtcm_data.bin')
+
+
+@pytest.fixture
+def data():
+    with open(BINARY_FILE, 'rb') as f:
+        return f.read()
+
+
+def test_histogram():
+    histogram = Histogram(buckets=(1, 10))
+    for value in (0.5, 1, 5, 20):
+        histogram.observe(value)
+    assert histogram.to_dict() == {
+        "buckets": {1: 2, 10: 3, math.inf: 4}, "sum": 26.5, "count": 4}
+
+
+def test_parser_stats(data):
+    corrupted = bytearray(data[:155])
+    corrupted[20] ^= 0x01
+    stream = b"garbage" + bytes(corrupted) + data
+    parser = Parser(BytesIO(stream), decode_timing=True)
+    msgs = list(parser.iter_messages(ExtendedL1L2Gps))
+
+    stats = parser.stats()
+    assert stats["bytes_in"] == len(stream)
+    assert stats["frames"] == {1004: 7, 1012: 6}
+    assert stats["crc_errors"] == parser.error_count > 0
+    assert stats["skipped_bytes"] == len(b"garbage") + len(corrupted)
+    assert len(msgs) == 7
+    assert stats["messages"] == {ExtendedL1L2Gps.get_name(): 7}
+    assert stats["decode_time"][1004]["count"] == 7
+    assert stats["decode_time"][1004]["sum"] > 0
+    assert "decode_time" not in Parser().stats()
+
+
+def test_resync_skipped_bytes(data):
+    parser = Parser()
+    list(parser.feed(data[:100]))
+    parser.resync()
+    assert parser.stats()["skipped_bytes"] == 100
+
+
+def test_prometheus(data):
+    parser = Parser(BytesIO(data), decode_timing=True)
+    list(parser.iter_messages(ExtendedL1L2Gps))
+    metrics = Metrics()
+    metrics.add("base", parser, country="FRA")
+
+    text = metrics.to_prometheus()
+    labels = 'source="base",component="parser",country="FRA"'
+    assert "# TYPE gnss_frames_total counter\n" in text
+    assert f'gnss_frames_total{{{labels},msg_number="1004"}} 7\n' in text
+    assert f"gnss_bytes_in_total{{{labels}}} {len(data)}\n" in text
+    assert f"gnss_crc_errors_total{{{labels}}} 0\n" in text
+    assert "# TYPE gnss_decode_seconds histogram\n" in text
+    assert (f'gnss_decode_seconds_bucket{{{labels},msg_number="1004",'
+            f'le="+Inf"}} 7\n') in text
+    assert f'gnss_decode_seconds_count{{{labels},msg_number="1004"}} 7\n' \
+        in text
+    assert f"gnss_busy_seconds_total{{{labels}}} " in text
+    # One HELP and TYPE per family.
+    assert text.count("# TYPE gnss_frames_total") == 1
+
+    assert metrics.snapshot() == {"base": parser.stats()}
+
+
+def test_serve(data):
+    parser = Parser(BytesIO(data))
+    list(parser.iter_messages())
+    metrics = Metrics()
+    metrics.add("base", parser)
+    metrics.serve(port=0)
+    try:
+        with urlopen(f"http://127.0.0.1:{metrics.port}/metrics") as resp:
+            assert resp.headers["Content-Type"].startswith("text/plain")
+            assert resp.read().decode() == metrics.to_prometheus()
+    finally:
+        metrics.close()
+
+
+def test_missing_stats():
+    with pytest.raises(AttributeError):
+        Metrics().add("base", object())